@@ -1 +1,8 @@
 # This file makes 'core' a Python package.
+from pathlib import Path as _Path
+
+# Shared AutoMagic libraries (core.graphics, ...) live in the parent project's
+# core/ directory; extend the package path so they resolve when OTTO runs standalone.
+_shared_core = _Path(__file__).resolve().parents[2] / "core"
+if _shared_core.is_dir():
+    __path__.append(str(_shared_core))
@@ -1,11 +1,12 @@
 # core/generation/audio_generator.py - Generates voiceovers and selects music
 import os
-import random
 import time
 from pathlib import Path
 from elevenlabs.client import ElevenLabs
 from dotenv import load_dotenv
 
+from ..media import get_music_catalog
+
 load_dotenv()
 
 client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
@@ -34,45 +35,26 @@ def generate_voiceover(brief: dict) -> Path | None:
         return None
 
 def select_music(brief: dict) -> Path | None:
-    """Selects a music track from the library based on the brief's mood."""
-    print("🎵 Selecting music track...")
-    music_library_path = Path(os.getenv("MUSIC_LIBRARY_PATH", "music_library"))
-    mood = brief.get("mood", "").lower()
-
-    if not music_library_path.exists():
-        print(f"⚠️ Music library not found at '{music_library_path}'. Skipping music.")
-        return None
-
-    possible_tracks = [p for p in music_library_path.glob("*.mp3") if p.name.lower().startswith(mood)]
-    
-    if not possible_tracks:
-        print(f"⚠️ No music found for mood '{mood}'. Selecting a random track.")
-        all_tracks = list(music_library_path.glob("*.mp3"))
-        if not all_tracks:
-            print("⚠️ No music found in the library at all.")
-            return None
-        return random.choice(all_tracks)
-    
-    return random.choice(possible_tracks)
-
-def select_music(brief: dict) -> Path | None:
-    """Selects appropriate background music based on the brief."""
+    """Selects appropriate background music from the indexed library based on the brief."""
     print("🎵 Selecting background music...")
     
-    music_library_path = Path(os.getenv("MUSIC_LIBRARY_PATH", "generated_assets/audio"))
+    # Kept apart from AUDIO_OUTPUT_DIR; voiceovers are ignored too in case the two are pointed at one folder
+    music_library_path = Path(os.getenv("MUSIC_LIBRARY_PATH", "music_library"))
     music_library_path.mkdir(exist_ok=True, parents=True)
     
+    # Rescanned only when the library changed; new or modified files are analyzed, the rest comes from the catalog
+    catalog = get_music_catalog(music_library_path, ignore=("voiceover_*",))
+    catalog.refresh()
+    
     # Extract mood from brief or use default
     mood = brief.get("mood", "calm").lower()
+    min_duration = float(brief.get("duration", 0) or 0)
     
-    # Try to find music that matches the mood
-    possible_tracks = [p for p in music_library_path.glob("*.mp3") if p.name.lower().startswith(mood)]
-    
-    if not possible_tracks:
+    track = catalog.select(mood, min_duration) or catalog.select(mood)
+    if not track:
         print(f"⚠️ No music found for mood '{mood}'. Using default music.")
         # Create a simple silence track as fallback
         return None
     
-    selected = random.choice(possible_tracks)
-    print(f"✅ Selected music: {selected.name}")
-    return selected
+    print(f"✅ Selected music: {Path(track.path).name} ({track.duration:.0f}s, {track.bpm:.0f} BPM, {track.loudness} LUFS)")
+    return Path(track.path)
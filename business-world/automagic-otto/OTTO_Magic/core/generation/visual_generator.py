@@ -38,10 +38,11 @@ def _generate_dalle_image(prompt: str) -> Path | None:
 def _create_placeholder_image(text: str, output_dir: Path) -> Path | None:
     """Creates a simple placeholder image for testing."""
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        from PIL import ImageDraw, ImageFont
+        from ..graphics import placeholder_background
         
-        # Create a simple colored image with text
-        img = Image.new('RGB', (1792, 1024), color=(70, 130, 180))  # Steel blue
+        # Create a steel blue gradient image with text
+        img = placeholder_background(1792, 1024, [(70, 130, 180), (25, 55, 95)])
         draw = ImageDraw.Draw(img)
         
         # Try to use a font, fall back to default if not available
@@ -4,6 +4,9 @@ import subprocess
 from pathlib import Path
 import time
 
+from ..media import FFmpegError, run_ffmpeg_sync, music_bed_filter, music_input_args
+from ..media import MediaInspectionError, probe_duration, DuckingSettings, lookup_track
+
 VIDEO_OUTPUT_DIR = Path("final_videos")
 VIDEO_OUTPUT_DIR.mkdir(exist_ok=True)
 
@@ -25,6 +28,18 @@ def assemble_video(visual_path, voiceover_path, music_path, brief: dict):
         timestamp = int(time.time())
         output_path = VIDEO_OUTPUT_DIR / f"otto_video_{timestamp}.mp4"
         
+        has_voiceover = bool(voiceover_path and voiceover_path.exists())
+        has_music = bool(music_path and music_path.exists())
+        if music_path and not has_music:
+            print(f"⚠️ Music file not found, continuing without it: {music_path}")
+        
+        voiceover_duration = None
+        if has_voiceover:
+            try:
+                voiceover_duration = probe_duration(voiceover_path)
+            except MediaInspectionError as e:
+                print(f"⚠️ Could not read voiceover duration: {e}")
+        
         # Build FFmpeg command
         cmd = [
             "ffmpeg", "-y",  # Overwrite output files without asking
@@ -33,10 +48,32 @@ def assemble_video(visual_path, voiceover_path, music_path, brief: dict):
         ]
         
         # Add audio if available
-        if voiceover_path and voiceover_path.exists():
+        if has_voiceover:
             cmd.extend(["-i", str(voiceover_path)])
+        if has_music:
+            cmd.extend(music_input_args(music_path))  # Looped by the demuxer, trimmed by the mix
+        
+        if has_music:
+            # Bed is ducked under the voice and mixed in this same render
+            # Cataloged tracks are leveled from their stored loudness instead of a fixed gain
+            track = lookup_track(music_path)
+            ducking = DuckingSettings(bed_gain=track.bed_gain()) if track else DuckingSettings()
+            audio_graph, audio_label = music_bed_filter(
+                music_input=2 if has_voiceover else 1,
+                voice_input=1 if has_voiceover else None,
+                settings=ducking
+            )
+            cmd.extend(["-filter_complex", audio_graph, "-map", "0:v", "-map", audio_label])
+        elif has_voiceover:
+            cmd.extend(["-map", "0:v", "-map", "1:a"])
+        
+        if has_voiceover or has_music:
             cmd.extend(["-c:a", "aac"])  # Audio codec
+        if has_voiceover:
             cmd.extend(["-shortest"])    # Duration matches shortest input
+            if voiceover_duration:
+                # Filtergraph audio buffers ahead, so -shortest alone lets the looped image overrun
+                cmd.extend(["-t", f"{voiceover_duration:.3f}"])
         else:
             cmd.extend(["-t", "10"])     # Default 10 second duration
             
@@ -49,7 +86,13 @@ def assemble_video(visual_path, voiceover_path, music_path, brief: dict):
         ])
         
         print(f"Running FFmpeg command: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = run_ffmpeg_sync(
+            cmd,
+            job_id=output_path.stem,
+            expected_duration=voiceover_duration if has_voiceover else 10,
+            on_progress=lambda p: print(f"   ⏳ {p.out_time:.1f}s rendered ({p.speed:.1f}x)") if p.state == "end" else None,
+            check=False
+        )
         
         if result.returncode == 0:
             print(f"✅ Video assembled successfully: {output_path}")
@@ -58,45 +101,9 @@ def assemble_video(visual_path, voiceover_path, music_path, brief: dict):
             print(f"❌ FFmpeg failed: {result.stderr}")
             return None
             
-    except Exception as e:
-        print(f"❌ Video assembly failed: {e}")
+    except FFmpegError as e:
+        print(f"❌ FFmpeg aborted: {e}")
         return None
-
-        # Prepare audio
-        voiceover_clip = mpy.AudioFileClip(str(voiceover_path))
-        final_duration = voiceover_clip.duration + 1.5 # Add padding
-        
-        final_visual_clip = final_visual_clip.set_duration(final_duration)
-
-        # Add text overlay
-        txt_clip = mpy.TextClip(brief["affirmation_text"], fontsize=70, color='white', font='Impact',
-                                stroke_color='black', stroke_width=2,
-                                size=(final_visual_clip.w * 0.9, None), method='caption')
-        txt_clip = txt_clip.set_position(('center', 'center')).set_duration(final_duration).fadein(0.5).fadeout(0.5)
-
-        # Combine audio tracks
-        audio_clips = [voiceover_clip]
-        if music_path:
-            music_clip = mpy.AudioFileClip(str(music_path)).fx(mpy.afx.volumex, 0.1)
-            # Loop music if shorter than video
-            if music_clip.duration < final_duration:
-                music_clip = music_clip.fx(mpy.afx.audio_loop, duration=final_duration)
-            else:
-                music_clip = music_clip.subclip(0, final_duration)
-            audio_clips.append(music_clip)
-
-        final_audio = mpy.CompositeAudioClip(audio_clips)
-
-        # Compose final video
-        video = mpy.CompositeVideoClip([final_visual_clip, txt_clip])
-        video.audio = final_audio
-        
-        video_filename = f"OTTO_Magic_{brief['theme'].replace(' ', '_')}_{int(time.time())}.mp4"
-        output_path = VIDEO_OUTPUT_DIR / video_filename
-        
-        video.write_videofile(str(output_path), codec="libx264", audio_codec="aac")
-        
-        return output_path
     except Exception as e:
         print(f"❌ Video assembly failed: {e}")
         return None
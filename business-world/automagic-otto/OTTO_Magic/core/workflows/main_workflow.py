@@ -4,63 +4,37 @@ from ..strategy import get_trending_topics, synthesize_brief_from_trends
 from ..generation import generate_visuals, generate_voiceover, select_music
 from ..validation import validate_asset_pack
 from ..pipelines import assemble_video, upload_to_youtube
+from ..utils.dag import Stage, StageGraph
 
 logger = logging.getLogger(__name__)
 
 def get_trends_task(pillars: list[str]):
-    """Get trending topics with retry logic."""
-    for attempt in range(3):
-        try:
-            trends = get_trending_topics(pillars)
-            if trends:
-                return trends
-            logger.warning(f"Failed to fetch trends, attempt {attempt + 1}/3")
-        except Exception as e:
-            logger.error(f"Error fetching trends: {e}")
-            if attempt == 2:
-                raise Exception("Failed to fetch trends after 3 attempts.")
-    return None
+    """Get trending topics (the stage graph retries)."""
+    trends = get_trending_topics(pillars)
+    if not trends:
+        raise Exception("No trends returned.")
+    return trends
 
 def synthesize_brief_task(trends: dict):
-    """Synthesize brief from trends with retry logic."""
-    for attempt in range(3):
-        try:
-            brief = synthesize_brief_from_trends(trends)
-            if brief:
-                return brief
-            logger.warning(f"Failed to synthesize brief, attempt {attempt + 1}/3")
-        except Exception as e:
-            logger.error(f"Error synthesizing brief: {e}")
-            if attempt == 2:
-                raise Exception("Failed to synthesize brief after 3 attempts.")
-    return None
+    """Synthesize brief from trends (the stage graph retries)."""
+    brief = synthesize_brief_from_trends(trends)
+    if not brief:
+        raise Exception("No brief synthesized.")
+    return brief
 
 def generate_and_validate_visuals_task(brief: dict):
-    """Generate and validate visuals with retry logic."""
-    for attempt in range(3):
-        try:
-            print(f"Visual generation attempt {attempt + 1}/3...")
-            visual_path = generate_visuals(brief)
-            if visual_path and validate_asset_pack(visual_path, brief):
-                return visual_path
-            print("Visual generation or validation failed. Retrying...")
-        except Exception as e:
-            logger.error(f"Error generating visuals: {e}")
-    raise Exception("Failed to generate a valid visual asset after 3 attempts.")
+    """Generate and validate visuals (the stage graph retries)."""
+    visual_path = generate_visuals(brief)
+    if not visual_path or not validate_asset_pack(visual_path, brief):
+        raise Exception("Visual generation or validation failed.")
+    return visual_path
     
 def generate_audio_task(brief: dict):
-    """Generate audio with retry logic."""
-    for attempt in range(3):
-        try:
-            voiceover_path = generate_voiceover(brief)
-            if voiceover_path:
-                return voiceover_path
-            logger.warning(f"Failed to generate voiceover, attempt {attempt + 1}/3")
-        except Exception as e:
-            logger.error(f"Error generating voiceover: {e}")
-            if attempt == 2:
-                raise Exception("Failed to generate voiceover after 3 attempts.")
-    return None
+    """Generate audio (the stage graph retries)."""
+    voiceover_path = generate_voiceover(brief)
+    if not voiceover_path:
+        raise Exception("No voiceover generated.")
+    return voiceover_path
     
 def select_music_task(brief: dict):
     """Select music for the video."""
@@ -89,19 +63,27 @@ def upload_youtube_task(video_path, brief):
         print(f"⚠️ YouTube upload error (video still created): {e}")
         # Don't raise exception - video creation was successful
 
+def _production_stages(brief_stages: list) -> StageGraph:
+    """Brief stages followed by concurrent asset generation, assembly and upload."""
+    return StageGraph(brief_stages + [
+        # Visuals, voiceover and music only depend on the brief
+        Stage("visuals", generate_and_validate_visuals_task, ["brief"], timeout=900, retries=2),
+        Stage("voiceover", generate_audio_task, ["brief"], timeout=300, retries=2),
+        Stage("music", select_music_task, ["brief"], timeout=120, required=False),
+        Stage("video", lambda visuals, voiceover, music, brief: assemble_video_task(visuals, voiceover, music, brief),
+              ["visuals", "voiceover", "music", "brief"], timeout=900),
+        Stage("upload", lambda video, brief: upload_youtube_task(video, brief), ["video", "brief"],
+              timeout=1800, required=False)
+    ], name="otto")
+
 def trend_to_video_flow(pillars: list[str]):
     """The main workflow orchestrating the entire daily production."""
-    trends = get_trends_task(pillars)
-    brief = synthesize_brief_task(trends)
-    
-    # Generate assets
-    visual_path = generate_and_validate_visuals_task(brief)
-    voiceover_path = generate_audio_task(brief)
-    music_path = select_music_task(brief)
-    
-    # Final production and upload
-    final_video_path = assemble_video_task(visual_path, voiceover_path, music_path, brief)
-    upload_youtube_task(final_video_path, brief)
+    run = _production_stages([
+        Stage("trends", lambda: get_trends_task(pillars), timeout=120, retries=2),
+        Stage("brief", lambda trends: synthesize_brief_task(trends), ["trends"], timeout=120, retries=2)
+    ]).run()
+    logger.info(f"Stage timings: {run.timings()}")
+    return run["video"]
 
 def video_creation_workflow(topic: str = None, custom_brief: str = None):
     """Entry point for video creation workflow."""
@@ -118,14 +100,9 @@ def video_creation_workflow(topic: str = None, custom_brief: str = None):
         }
         logger.info("Using custom brief")
         
-        # Generate assets for custom brief
-        visual_path = generate_and_validate_visuals_task(brief)
-        voiceover_path = generate_audio_task(brief)
-        music_path = select_music_task(brief)
-        
-        # Final production and upload
-        final_video_path = assemble_video_task(visual_path, voiceover_path, music_path, brief)
-        upload_youtube_task(final_video_path, brief)
+        # Generate assets for custom brief, then assemble and upload
+        run = _production_stages([Stage("brief", lambda: brief)]).run()
+        logger.info(f"Stage timings: {run.timings()}")
     else:
         # Default pillars for trend analysis
         pillars = ["technology", "AI", "creativity", "innovation"]
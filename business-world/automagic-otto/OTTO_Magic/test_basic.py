@@ -58,8 +58,9 @@ def test_basic_functionality():
     # Test 4: Check FFmpeg availability
     print("\n4. Testing FFmpeg availability...")
     try:
-        import subprocess
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        from core.media import PRIORITY_INTERACTIVE, run_ffmpeg_sync
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         if result.returncode == 0:
             print("✅ FFmpeg is available")
         else:
@@ -5,7 +5,6 @@ import sys
 import random
 import logging
 import requests
-import subprocess
 import traceback
 import json # Added: Missing import
 import time # Added: Missing import
@@ -27,6 +26,8 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 import pickle
 
+from core.media import FFmpegError, PRIORITY_INTERACTIVE, run_ffmpeg_sync
+
 # Load environment variables
 load_dotenv()
 
@@ -132,12 +133,8 @@ class VideoProduction:
         """Verify that FFMPEG is available and working"""
         self.logger.debug("Checking FFMPEG availability...")
         try:
-            result = subprocess.run(
-                ['ffmpeg', '-version'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            result = run_ffmpeg_sync(['ffmpeg', '-version'], job_id="version_check",
+                                     timeout=30, check=False, priority=PRIORITY_INTERACTIVE)
             if result.returncode == 0:
                 version = result.stdout.split('\n')[0]
                 self.logger.info(f"FFMPEG is available: {version}")
@@ -332,13 +329,8 @@ class VideoProduction:
             
             # Try alternative validation with subprocess if ffmpeg.probe fails
             try:
-                import subprocess
-                result = subprocess.run(
-                    ['ffmpeg', '-v', 'error', '-i', audio_path, '-f', 'null', '-'],
-                    stderr=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    text=True
-                )
+                result = run_ffmpeg_sync(['ffmpeg', '-v', 'error', '-i', audio_path, '-f', 'null', '-'],
+                                         check=False)
                 
                 # If there's no error output, the file is likely valid
                 if result.returncode == 0 and not result.stderr.strip():
@@ -364,15 +356,15 @@ class VideoProduction:
                 'ffmpeg', '-f', 'lavfi', '-i', f'anullsrc=r=44100:cl=mono',
                 '-t', str(duration), '-q:a', '9', '-acodec', 'libmp3lame', output_path
             ]
-            subprocess.run(silent_audio_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+            run_ffmpeg_sync(silent_audio_cmd, job_id="silent_audio")
             
             if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
                 self.logger.debug(f"Created silent audio: {output_path}")
                 return True
             self.logger.error(f"Silent audio created but is empty or invalid: {output_path}")
             return False
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"FFmpeg command failed for silent audio '{output_path}': {e.stderr.decode() if e.stderr else e}")
+        except FFmpegError as e:
+            self.logger.error(f"FFmpeg command failed for silent audio '{output_path}': {e}")
             return False
         except Exception as e:
             self.logger.error(f"Failed to create silent audio {output_path}: {e}")
@@ -514,12 +506,12 @@ class VideoProduction:
             
             # Stage 1: Create silent video from images
             try:
-                (
+                run_ffmpeg_sync(
                     ffmpeg
                     .input(temp_concat_file_path, format='concat', safe=0)
                     .output(silent_video_path, vcodec='libx264', pix_fmt='yuv420p', r=str(output_framerate), loglevel="error")
                     .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
+                    .compile()
                 )
                 self.logger.info(f"Silent video created: {silent_video_path}")
                 
@@ -537,7 +529,7 @@ class VideoProduction:
                 
                 # First attempt with standard approach
                 try:
-                    (
+                    run_ffmpeg_sync(
                         ffmpeg
                         .output(video_stream, audio_stream, final_video_path, 
                                 vcodec='copy', 
@@ -546,16 +538,16 @@ class VideoProduction:
                                 loglevel="error" 
                                )
                         .overwrite_output()
-                        .run(capture_stdout=True, capture_stderr=True)
+                        .compile()
                     )
                 except Exception as e:
                     self.logger.warning(f"First attempt at adding audio failed: {str(e)}. Trying alternative FFmpeg approach.")
                     # Fallback to alternative approach if first one fails
-                    (
+                    run_ffmpeg_sync(
                         ffmpeg.concat(video_stream, audio_stream, v=1, a=1)
                         .output(final_video_path, vcodec='copy', acodec='aac', loglevel="error")
                         .overwrite_output()
-                        .run(capture_stdout=True, capture_stderr=True)
+                        .compile()
                     )
                 
                 self.logger.info(f"Final video with audio created: {final_video_path}")
@@ -981,13 +973,11 @@ def main():
             test_video_path = os.path.join(os.getenv("FINAL_VIDEO_SAVE_PATH", "final_videos/"), "test_upload.mp4")
             try:
                 # Try to create a 5-second test video
-                subprocess.run(
+                run_ffmpeg_sync(
                     ['ffmpeg', '-f', 'lavfi', '-i', 'color=c=blue:s=1280x720:d=5', 
                      '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo:d=5',
                      '-shortest', '-c:v', 'libx264', '-c:a', 'aac', test_video_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    check=True
+                    job_id="test_upload", priority=PRIORITY_INTERACTIVE
                 )
                 logger.info(f"Created test video: {test_video_path}")
                 
@@ -12,6 +12,9 @@ from typing import Optional, List, Dict, Any
 import requests
 from dotenv import load_dotenv
 
+from core.config.settings import provider_url
+from core.utils.metrics import track_provider_call
+
 load_dotenv()
 logger = logging.getLogger("AutoMagic.Providers")
 
@@ -76,7 +79,7 @@ class GroqScriptProvider(ScriptProvider):
     def __init__(self):
         super().__init__("Groq", priority=1)
         self.api_key = os.getenv("GROQ_API_KEY")
-        self.base_url = "https://api.groq.com/openai/v1"
+        self.base_url = provider_url("groq", "https://api.groq.com/openai/v1", "GROQ_BASE_URL")
         self.model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 
     def is_available(self) -> bool:
@@ -158,7 +161,7 @@ class GeminiScriptProvider(ScriptProvider):
         super().__init__("Gemini", priority=2)
         self.api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
         self.model = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        self.base_url = provider_url("gemini", "https://generativelanguage.googleapis.com/v1beta", "GEMINI_BASE_URL")
 
     def is_available(self) -> bool:
         return bool(self.api_key and not self.api_key.startswith("YOUR_"))
@@ -219,6 +222,7 @@ class OpenAIScriptProvider(ScriptProvider):
     def __init__(self):
         super().__init__("OpenAI", priority=3)
         self.api_key = os.getenv("OPENAI_API_KEY")
+        self.base_url = provider_url("openai", "https://api.openai.com/v1", "OPENAI_BASE_URL")
 
     def is_available(self) -> bool:
         return bool(self.api_key and not self.api_key.startswith("YOUR_"))
@@ -228,7 +232,7 @@ class OpenAIScriptProvider(ScriptProvider):
             return False
         try:
             import openai
-            client = openai.OpenAI(api_key=self.api_key)
+            client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url)
             # Simple test call
             return True
         except Exception as e:
@@ -241,7 +245,7 @@ class OpenAIScriptProvider(ScriptProvider):
 
         try:
             import openai
-            client = openai.OpenAI(api_key=self.api_key)
+            client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url)
 
             prompt = kwargs.get("prompt") or (
                 f"Write a concise, engaging video script for YouTube on the topic '{topic}'. "
@@ -275,6 +279,7 @@ class ReplicateImageProvider(ImageProvider):
         super().__init__("Replicate", priority=3)
         self.api_key = os.getenv("REPLICATE_API_KEY")
         self.model = os.getenv("REPLICATE_MODEL", "black-forest-labs/flux-schnell")
+        self.base_url = provider_url("replicate", "https://api.replicate.com", "REPLICATE_BASE_URL")
 
     def is_available(self) -> bool:
         return bool(self.api_key and not self.api_key.startswith("YOUR_"))
@@ -285,7 +290,7 @@ class ReplicateImageProvider(ImageProvider):
         try:
             headers = {"Authorization": f"Token {self.api_key}"}
             response = requests.get(
-                "https://api.replicate.com/v1/models",
+                f"{self.base_url}/v1/models",
                 headers=headers,
                 timeout=10
             )
@@ -302,10 +307,10 @@ class ReplicateImageProvider(ImageProvider):
             import replicate
 
             # Initialize client
-            os.environ["REPLICATE_API_TOKEN"] = self.api_key
+            client = replicate.Client(api_token=self.api_key, base_url=self.base_url)
 
             # Run the model
-            output = replicate.run(
+            output = client.run(
                 self.model,
                 input={
                     "prompt": prompt,
@@ -339,7 +344,9 @@ class HuggingFaceImageProvider(ImageProvider):
         self.api_key = os.getenv("HUGGINGFACE_API_KEY")
         # Use a more reliable model for free tier (SD-XL is faster and more stable)
         self.model = os.getenv("HUGGINGFACE_MODEL", "stabilityai/stable-diffusion-xl-base-1.0")
-        self.base_url = "https://api-inference.huggingface.co/models"
+        self.base_url = provider_url("huggingface", "https://api-inference.huggingface.co/models",
+                                     "HUGGINGFACE_BASE_URL")
+        self.account_url = provider_url("huggingface", "https://huggingface.co/api/whoami-v2")
 
     def is_available(self) -> bool:
         return bool(self.api_key and not self.api_key.startswith("YOUR_"))
@@ -350,7 +357,7 @@ class HuggingFaceImageProvider(ImageProvider):
         try:
             headers = {"Authorization": f"Bearer {self.api_key}"}
             response = requests.get(
-                "https://huggingface.co/api/whoami-v2",
+                self.account_url,
                 headers=headers,
                 timeout=10
             )
@@ -390,7 +397,9 @@ class StabilityImageProvider(ImageProvider):
     def __init__(self):
         super().__init__("Stability", priority=4)
         self.api_key = os.getenv("STABILITY_API_KEY")
-        self.base_url = "https://api.stability.ai/v2beta/stable-image/generate"
+        self.base_url = provider_url("stability", "https://api.stability.ai/v2beta/stable-image/generate",
+                                     "STABILITY_BASE_URL")
+        self.account_url = provider_url("stability", "https://api.stability.ai/v1/user/account")
 
     def is_available(self) -> bool:
         return bool(self.api_key and not self.api_key.startswith("YOUR_"))
@@ -401,7 +410,7 @@ class StabilityImageProvider(ImageProvider):
         try:
             headers = {"Authorization": f"Bearer {self.api_key}"}
             response = requests.get(
-                "https://api.stability.ai/v1/user/account",
+                self.account_url,
                 headers=headers,
                 timeout=10
             )
@@ -451,7 +460,9 @@ class TogetherAIImageProvider(ImageProvider):
         super().__init__("TogetherAI", priority=1)  # Highest priority for images
         self.api_key = os.getenv("TOGETHER_API_KEY")
         self.model = "black-forest-labs/FLUX.1-schnell"
-        self.base_url = "https://api.together.xyz/v1/images/generations"
+        self.base_url = provider_url("together", "https://api.together.xyz/v1/images/generations",
+                                     "TOGETHER_BASE_URL")
+        self.models_url = provider_url("together", "https://api.together.xyz/v1/models")
 
     def is_available(self) -> bool:
         return bool(self.api_key and not self.api_key.startswith("YOUR_"))
@@ -462,7 +473,7 @@ class TogetherAIImageProvider(ImageProvider):
         try:
             headers = {"Authorization": f"Bearer {self.api_key}"}
             response = requests.get(
-                "https://api.together.xyz/v1/models",
+                self.models_url,
                 headers=headers,
                 timeout=10
             )
@@ -538,6 +549,7 @@ class ElevenLabsVoiceProvider(VoiceProvider):
         self.api_key = os.getenv("ELEVENLABS_API_KEY")
         # Default to Jessica (warm, conversational female) if no voice set
         self.voice_id = os.getenv("ELEVENLABS_VOICE_ID") or self.RECOMMENDED_VOICES["jessica"]
+        self.base_url = provider_url("elevenlabs", "https://api.elevenlabs.io", "ELEVENLABS_BASE_URL")
 
     def is_available(self) -> bool:
         return bool(self.api_key and not self.api_key.startswith("YOUR_"))
@@ -547,7 +559,7 @@ class ElevenLabsVoiceProvider(VoiceProvider):
             return False
         try:
             from elevenlabs.client import ElevenLabs
-            client = ElevenLabs(api_key=self.api_key)
+            client = ElevenLabs(api_key=self.api_key, base_url=self.base_url)
             voices = client.voices.get_all()
             return bool(voices.voices)
         except Exception as e:
@@ -562,7 +574,7 @@ class ElevenLabsVoiceProvider(VoiceProvider):
             from elevenlabs.client import ElevenLabs
             from elevenlabs import VoiceSettings
 
-            client = ElevenLabs(api_key=self.api_key)
+            client = ElevenLabs(api_key=self.api_key, base_url=self.base_url)
             voice_id = kwargs.get("voice_id", self.voice_id)
             use_v3 = kwargs.get("use_v3", True)
 
@@ -621,6 +633,7 @@ class GoogleTTSVoiceProvider(VoiceProvider):
     def __init__(self):
         super().__init__("GoogleTTS", priority=2)
         self.api_key = os.getenv("GOOGLE_TTS_API_KEY") or os.getenv("GOOGLE_API_KEY")
+        self.base_url = provider_url("googletts", "https://texttospeech.googleapis.com/v1", "GOOGLE_TTS_BASE_URL")
 
     def is_available(self) -> bool:
         return bool(self.api_key and not self.api_key.startswith("YOUR_"))
@@ -630,7 +643,7 @@ class GoogleTTSVoiceProvider(VoiceProvider):
             return False
         try:
             response = requests.get(
-                f"https://texttospeech.googleapis.com/v1/voices?key={self.api_key}",
+                f"{self.base_url}/voices?key={self.api_key}",
                 timeout=10
             )
             return response.status_code == 200
@@ -643,7 +656,7 @@ class GoogleTTSVoiceProvider(VoiceProvider):
         self.logger.info("Generating voice with Google TTS...")
 
         try:
-            url = f"https://texttospeech.googleapis.com/v1/text:synthesize?key={self.api_key}"
+            url = f"{self.base_url}/text:synthesize?key={self.api_key}"
 
             payload = {
                 "input": {"text": text},
@@ -725,7 +738,8 @@ class ProviderManager:
         for provider in providers:
             try:
                 self.logger.info(f"Attempting script generation with {provider.name}...")
-                return provider.generate_script(topic, **kwargs)
+                with track_provider_call("script", provider.name):
+                    return provider.generate_script(topic, **kwargs)
             except Exception as e:
                 self.logger.warning(f"{provider.name} failed: {str(e)[:100]}")
                 if provider == providers[-1]:  # Last provider
@@ -744,7 +758,8 @@ class ProviderManager:
         for provider in providers:
             try:
                 self.logger.info(f"Attempting image generation with {provider.name}...")
-                return provider.generate_image(prompt, **kwargs)
+                with track_provider_call("image", provider.name):
+                    return provider.generate_image(prompt, **kwargs)
             except Exception as e:
                 self.logger.warning(f"{provider.name} failed: {str(e)[:100]}")
                 if provider == providers[-1]:  # Last provider
@@ -763,7 +778,8 @@ class ProviderManager:
         for provider in providers:
             try:
                 self.logger.info(f"Attempting voice generation with {provider.name}...")
-                return provider.generate_voice(text, **kwargs)
+                with track_provider_call("voice", provider.name):
+                    return provider.generate_voice(text, **kwargs)
             except Exception as e:
                 self.logger.warning(f"{provider.name} failed: {str(e)[:100]}")
                 if provider == providers[-1]:  # Last provider
@@ -5,7 +5,6 @@ import sys
 import random
 import logging
 import requests
-import subprocess
 import traceback
 import json # Added: Missing import
 import time # Added: Missing import
@@ -14,7 +13,6 @@ from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 import ffmpeg  # Added for ffmpeg-python
-import tempfile  # Added for temporary files
 import openai # Added: Missing import
 import elevenlabs  # Using the newer elevenlabs library instead of elevenlabslib
 
@@ -26,6 +24,12 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 import pickle
 
+from core.media import (inspect_media, MediaInspectionError, verify_image, ImagePrepError,
+                        run_ffmpeg_sync, PRIORITY_INTERACTIVE, validate_mp4)
+from core.utils.dag import Stage, StageGraph, mark_degraded
+from core.utils.checkpoint import RunManifest
+from core.utils.scratch import get_scratch_manager
+
 # Load environment variables
 load_dotenv()
 
@@ -87,12 +91,8 @@ class VideoProduction:
         """Verify that FFMPEG is available and working"""
         self.logger.debug("Checking FFMPEG availability...")
         try:
-            result = subprocess.run(
-                ['ffmpeg', '-version'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            result = run_ffmpeg_sync(['ffmpeg', '-version'], job_id="version_check",
+                                     timeout=30, check=False, priority=PRIORITY_INTERACTIVE)
             if result.returncode == 0:
                 version = result.stdout.split('\n')[0]
                 self.logger.info(f"FFMPEG is available: {version}")
@@ -143,6 +143,7 @@ class VideoProduction:
         self.logger.info(f"Generating script for topic: {topic}")
         if not self.openai_client:
             self.logger.error("OpenAI client is not initialized. Cannot generate script.")
+            mark_degraded("no OpenAI client")
             return "Error: Script generation failed due to missing OpenAI client."
 
         prompt = (
@@ -163,6 +164,7 @@ class VideoProduction:
             self.logger.error(f"OpenAI script generation failed: {e}")
             if self.debug_mode:
                 self.logger.error(traceback.format_exc())
+            mark_degraded(f"script generation failed: {e}")
             return f"Error: Script generation failed. Topic: {topic}"
 
     def generate_images(self, script):
@@ -176,6 +178,7 @@ class VideoProduction:
         # For debugging, use mock images if in debug mode and no OPENAI key
         if self.debug_mode and (not os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY").startswith("YOUR_")):
             self.logger.debug("DEBUG MODE: Using placeholder images")
+            mark_degraded("debug placeholder images")
             image_files = []
             # Create a simple test image using PIL
             from PIL import Image, ImageDraw, ImageFont
@@ -243,6 +246,7 @@ class VideoProduction:
                     self.logger.error(traceback.format_exc())
                 
                 # In case of failure, create a blank image with error message
+                mark_degraded(f"image {idx} replaced by an error placeholder")
                 try:
                     from PIL import Image, ImageDraw, ImageFont
                     # Use a different variable name for the error image path
@@ -279,12 +283,11 @@ class VideoProduction:
         return image_files
 
     def _is_valid_image(self, image_path):
-        """Check if the file is a valid image by attempting to open it with PIL"""
+        """Check the image structure and that its pixel data decodes completely"""
         try:
-            from PIL import Image
-            Image.open(image_path)
+            verify_image(image_path)
             return True
-        except Exception as e:
+        except ImagePrepError as e:
             self.logger.error(f"Image validation error for {image_path}: {str(e)}")
             return False
             
@@ -305,43 +308,22 @@ class VideoProduction:
             self.logger.error(f"Audio file has invalid extension: {audio_path}")
             return False
         
-        # Try to probe the file with ffmpeg to verify it's a valid audio file
+        # Inspect the container/frame headers in-process (memoized; ffprobe only for unknown formats)
         try:
-            import ffmpeg
-            probe = ffmpeg.probe(audio_path, v='error')
-            # Check if there's at least one audio stream
-            audio_streams = [stream for stream in probe['streams'] if stream['codec_type'] == 'audio']
-            if not audio_streams:
+            info = inspect_media(audio_path)
+            if not info.has_audio:
                 self.logger.error(f"No audio streams found in file: {audio_path}")
                 return False
+            if info.duration <= 0:
+                self.logger.error(f"Audio file has zero duration: {audio_path}")
+                return False
                 
-            self.logger.info(f"Validated audio file: {audio_path} - duration: {probe['format'].get('duration', 'unknown')}s")
+            self.logger.info(f"Validated audio file: {audio_path} - duration: {info.duration:.2f}s")
             return True
             
-        except Exception as e:
+        except MediaInspectionError as e:
             self.logger.error(f"Failed to validate audio file {audio_path}: {str(e)}")
-            
-            # Try alternative validation with subprocess if ffmpeg.probe fails
-            try:
-                import subprocess
-                result = subprocess.run(
-                    ['ffmpeg', '-v', 'error', '-i', audio_path, '-f', 'null', '-'],
-                    stderr=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    text=True
-                )
-                
-                # If there's no error output, the file is likely valid
-                if result.returncode == 0 and not result.stderr.strip():
-                    self.logger.info(f"Audio file validated via subprocess: {audio_path}")
-                    return True
-                else:
-                    self.logger.error(f"Audio validation failed (subprocess): {result.stderr}")
-                    return False
-                    
-            except Exception as e2:
-                self.logger.error(f"Failed to validate audio with subprocess: {str(e2)}")
-                return False
+            return False
                 
     def generate_voice(self, script):
         """Generate voice narration based on the script"""
@@ -350,6 +332,7 @@ class VideoProduction:
         # Debug mode with mock audio
         if self.debug_mode and (not os.getenv("ELEVENLABS_API_KEY") or os.getenv("ELEVENLABS_API_KEY").startswith("YOUR_")):
             self.logger.debug("DEBUG MODE: Using placeholder audio")
+            mark_degraded("debug silent narration")
             audio_path = os.path.join(os.getenv("AUDIO_SAVE_PATH", "generated_audio/"), "debug_narration.mp3")
             
             # Create a silent audio file for testing
@@ -360,12 +343,7 @@ class VideoProduction:
                     '-t', '10', '-q:a', '9', '-acodec', 'libmp3lame', audio_path
                 ]
                 
-                subprocess.run(
-                    silent_audio_cmd,
-                    stdout=subprocess.PIPE, 
-                    stderr=subprocess.PIPE,
-                    check=True
-                )
+                run_ffmpeg_sync(silent_audio_cmd, job_id="debug_narration")
                 self.logger.debug(f"Created silent debug audio: {audio_path}")
                 return audio_path
             except Exception as e:
@@ -416,6 +394,7 @@ class VideoProduction:
                 self.logger.error(traceback.format_exc())
                 
             # Create a fallback silent audio
+            mark_degraded(f"voice generation failed: {e}")
             try:
                 self.logger.info("Attempting to create fallback silent audio")
                 silent_audio_cmd = [
@@ -423,12 +402,7 @@ class VideoProduction:
                     '-t', '20', '-q:a', '9', '-acodec', 'libmp3lame', audio_path
                 ]
                 
-                subprocess.run(
-                    silent_audio_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    check=True
-                )
+                run_ffmpeg_sync(silent_audio_cmd, job_id="fallback_narration")
                 self.logger.warning(f"Created fallback silent audio: {audio_path}")
             except Exception as e2:
                 self.logger.error(f"Failed to create fallback audio: {e2}")
@@ -452,6 +426,7 @@ class VideoProduction:
 
         if not image_files:
             self.logger.error("No images provided to create video.")
+            mark_degraded("no images")
             # Create a dummy file with error to allow script to proceed for testing other parts if needed
             try:
                 with open(final_video_path, 'w') as f: f.write("Error: No images provided for video creation.")
@@ -474,6 +449,7 @@ class VideoProduction:
             
         if not valid_image_files:
             self.logger.error("No valid image files found.")
+            mark_degraded("no valid images")
             try:
                 with open(final_video_path, 'w') as f: f.write("Error: No valid image files found.")
             except Exception as e:
@@ -485,6 +461,7 @@ class VideoProduction:
             
         if not os.path.exists(audio_file):
             self.logger.error(f"Audio file not found: {audio_file}")
+            mark_degraded("narration missing")
             try:
                 with open(final_video_path, 'w') as f: f.write(f"Error: Audio file {audio_file} not found.")
             except Exception as e:
@@ -494,6 +471,7 @@ class VideoProduction:
         # Verify that audio file is valid
         if not self._is_valid_audio(audio_file):
             self.logger.error(f"Invalid audio file: {audio_file}")
+            mark_degraded("narration invalid")
             try:
                 with open(final_video_path, 'w') as f: f.write(f"Error: Invalid audio file: {audio_file}")
             except Exception as e:
@@ -503,123 +481,115 @@ class VideoProduction:
         image_duration_per_image = 5  # seconds per image
         output_framerate = 25  # fps
 
-        temp_concat_file_path = None
-        silent_video_path = None
+        video_seconds = len(image_files) * image_duration_per_image
 
-        try:
-            # Create a temporary file list for ffmpeg's concat demuxer
-            with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as tmpf:
-                for img_path in image_files:
-                    abs_img_path = os.path.abspath(img_path)
-                    # FFmpeg on Windows prefers forward slashes or escaped backslashes.
-                    # ffmpeg-python might handle this, but being explicit can help.
-                    # For concat file, simple forward slashes are usually safer.
-                    # However, direct path from abspath should work if ffmpeg-python handles it.
-                    # Let's ensure paths are clean for the concat file.
-                    # Replacing backslashes with forward slashes for ffmpeg file list.
-                    clean_img_path = abs_img_path.replace('\\\\', '/').replace('\\', '/')
-                    tmpf.write(f"file '{clean_img_path}'\n")
-                    tmpf.write(f"duration {image_duration_per_image}\n")
-                temp_concat_file_path = tmpf.name
+        # Concat list and silent video live in per-job scratch (tmpfs when it fits), removed on exit
+        with get_scratch_manager().job(Path(final_video_path).stem) as scratch:
+            try:
+                # Create the file list for ffmpeg's concat demuxer
+                temp_concat_file_path = str(scratch.path('concat.txt'))
+                with open(temp_concat_file_path, 'w', encoding='utf-8') as tmpf:
+                    for img_path in image_files:
+                        abs_img_path = os.path.abspath(img_path)
+                        # FFmpeg on Windows prefers forward slashes or escaped backslashes.
+                        # ffmpeg-python might handle this, but being explicit can help.
+                        # For concat file, simple forward slashes are usually safer.
+                        # However, direct path from abspath should work if ffmpeg-python handles it.
+                        # Let's ensure paths are clean for the concat file.
+                        # Replacing backslashes with forward slashes for ffmpeg file list.
+                        clean_img_path = abs_img_path.replace('\\\\', '/').replace('\\', '/')
+                        tmpf.write(f"file '{clean_img_path}'\n")
+                        tmpf.write(f"duration {image_duration_per_image}\n")
             
-            self.logger.debug(f"Using concat file: {temp_concat_file_path}")
+                self.logger.debug(f"Using concat file: {temp_concat_file_path}")
 
-            # Stage 1: Create silent video from images
-            # Need a temporary path for the silent video
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_silent_video:
-                silent_video_path = tmp_silent_video.name
+                # Stage 1: Create silent video from images
+                silent_video_path = str(scratch.path('silent.mp4', int(video_seconds * 2_000_000 / 8)))
                 self.logger.info(f"Creating silent video at: {silent_video_path}")
             
-            # Stage 1: Create silent video from images
-            try:
-                (
-                    ffmpeg
-                    .input(temp_concat_file_path, format='concat', safe=0)
-                    .output(silent_video_path, vcodec='libx264', pix_fmt='yuv420p', r=str(output_framerate), loglevel="error")
-                    .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-                self.logger.info(f"Silent video created: {silent_video_path}")
-                
-                # Verify that silent video was created
-                if not os.path.exists(silent_video_path) or os.path.getsize(silent_video_path) < 1000:
-                    self.logger.error(f"Silent video was not created properly: {silent_video_path}")
-                    raise Exception("Failed to create valid silent video")
-                
-                # Stage 2: Combine silent video with audio
-                self.logger.info(f"Adding audio {audio_file} to {silent_video_path}")
-                
-                # Create input streams
-                video_stream = ffmpeg.input(silent_video_path)
-                audio_stream = ffmpeg.input(audio_file)
-                
-                # First attempt with standard approach
+                # Stage 1: Create silent video from images
                 try:
-                    (
+                    run_ffmpeg_sync(
                         ffmpeg
-                        .output(video_stream, audio_stream, final_video_path, 
-                                vcodec='copy', 
-                                acodec='aac', 
-                                shortest=None, # Ensures audio is not cut short if video is shorter
-                                loglevel="error" 
-                               )
-                        .overwrite_output()
-                        .run(capture_stdout=True, capture_stderr=True)
-                    )
-                except Exception as e:
-                    self.logger.warning(f"First attempt at adding audio failed: {str(e)}. Trying alternative FFmpeg approach.")
-                    # Fallback to alternative approach if first one fails
-                    (
-                        ffmpeg.concat(video_stream, audio_stream, v=1, a=1)
-                        .output(final_video_path, vcodec='copy', acodec='aac', loglevel="error")
+                        .input(temp_concat_file_path, format='concat', safe=0)
+                        .output(silent_video_path, vcodec='libx264', pix_fmt='yuv420p', r=str(output_framerate), loglevel="error")
                         .overwrite_output()
-                        .run(capture_stdout=True, capture_stderr=True)
+                        .compile(),
+                        job_id=f"{Path(final_video_path).stem}_silent"
                     )
+                    self.logger.info(f"Silent video created: {silent_video_path}")
                 
-                self.logger.info(f"Final video with audio created: {final_video_path}")
-                return final_video_path
+                    # Verify that silent video was created (structure only; frames are sampled on the final mux)
+                    silent_check = validate_mp4(silent_video_path, require_audio=False, sample_frames=0)
+                    if not silent_check.passed:
+                        self.logger.error(f"Silent video was not created properly: {silent_check.summary()}")
+                        raise Exception("Failed to create valid silent video")
                 
-            except Exception as e_inner:
-                self.logger.error(f"Error in video processing: {str(e_inner)}")
-                raise  # Re-raise for outer exception handler
+                    # Stage 2: Combine silent video with audio
+                    self.logger.info(f"Adding audio {audio_file} to {silent_video_path}")
                 
-        except ffmpeg.Error as e:
-            self.logger.error("ffmpeg error during video creation:")
-            # Decode stdout/stderr if they are bytes, handling potential decoding errors
-            stdout_msg = e.stdout.decode('utf-8', errors='replace') if e.stdout else "N/A"
-            stderr_msg = e.stderr.decode('utf-8', errors='replace') if e.stderr else "N/A"
-            self.logger.error(f"FFmpeg command: {' '.join(e.cmd) if hasattr(e, 'cmd') and e.cmd else 'N/A'}")
-            self.logger.error(f"FFmpeg stdout: {stdout_msg}")
-            self.logger.error(f"FFmpeg stderr: {stderr_msg}")
-            if not os.path.exists(final_video_path) or os.path.getsize(final_video_path) == 0:
-                try:
-                    with open(final_video_path, 'w', encoding='utf-8') as f:
-                        f.write(f"Error: ffmpeg failed. Stderr: {stderr_msg[:500]}")
-                except Exception as ex_write:
-                     self.logger.error(f"Failed to write dummy error file after ffmpeg error: {ex_write}")
-            return final_video_path 
-        except Exception as e_gen:
-            self.logger.error(f"General error in create_video_from_images_and_audio: {str(e_gen)}", exc_info=True)
-            if not os.path.exists(final_video_path) or os.path.getsize(final_video_path) == 0:
-                try:
-                    with open(final_video_path, 'w', encoding='utf-8') as f:
-                        f.write(f"Error: General error during video creation. Error: {str(e_gen)[:500]}")
-                except Exception as ex_write:
-                    self.logger.error(f"Failed to write dummy error file after general error: {ex_write}")
-            return final_video_path
-        finally:
-            if temp_concat_file_path and os.path.exists(temp_concat_file_path):
-                try:
-                    os.remove(temp_concat_file_path)
-                    self.logger.debug(f"Removed temporary concat file: {temp_concat_file_path}")
-                except Exception as e_remove:
-                    self.logger.warning(f"Could not remove temp concat file {temp_concat_file_path}: {e_remove}")
-            if silent_video_path and os.path.exists(silent_video_path):
-                try:
-                    os.remove(silent_video_path)
-                    self.logger.debug(f"Removed temporary silent video: {silent_video_path}")
-                except Exception as e_remove:
-                    self.logger.warning(f"Could not remove temp silent video {silent_video_path}: {e_remove}")
+                    # Create input streams
+                    video_stream = ffmpeg.input(silent_video_path)
+                    audio_stream = ffmpeg.input(audio_file)
+                
+                    # First attempt with standard approach
+                    try:
+                        run_ffmpeg_sync(
+                            ffmpeg
+                            .output(video_stream, audio_stream, final_video_path, 
+                                    vcodec='copy', 
+                                    acodec='aac', 
+                                    shortest=None, # Ensures audio is not cut short if video is shorter
+                                    loglevel="error" 
+                                   )
+                            .overwrite_output()
+                            .compile(),
+                            job_id=f"{Path(final_video_path).stem}_mux"
+                        )
+                    except Exception as e:
+                        self.logger.warning(f"First attempt at adding audio failed: {str(e)}. Trying alternative FFmpeg approach.")
+                        # Fallback to alternative approach if first one fails
+                        run_ffmpeg_sync(
+                            ffmpeg.concat(video_stream, audio_stream, v=1, a=1)
+                            .output(final_video_path, vcodec='copy', acodec='aac', loglevel="error")
+                            .overwrite_output()
+                            .compile(),
+                            job_id=f"{Path(final_video_path).stem}_mux_concat"
+                        )
+                
+                    self.logger.info(f"Final video with audio created: {final_video_path}")
+                    return final_video_path
+                
+                except Exception as e_inner:
+                    self.logger.error(f"Error in video processing: {str(e_inner)}")
+                    raise  # Re-raise for outer exception handler
+                
+            except ffmpeg.Error as e:
+                self.logger.error("ffmpeg error during video creation:")
+                # Decode stdout/stderr if they are bytes, handling potential decoding errors
+                stdout_msg = e.stdout.decode('utf-8', errors='replace') if e.stdout else "N/A"
+                stderr_msg = e.stderr.decode('utf-8', errors='replace') if e.stderr else "N/A"
+                self.logger.error(f"FFmpeg command: {' '.join(e.cmd) if hasattr(e, 'cmd') and e.cmd else 'N/A'}")
+                self.logger.error(f"FFmpeg stdout: {stdout_msg}")
+                self.logger.error(f"FFmpeg stderr: {stderr_msg}")
+                mark_degraded("ffmpeg failed")
+                if not os.path.exists(final_video_path) or os.path.getsize(final_video_path) == 0:
+                    try:
+                        with open(final_video_path, 'w', encoding='utf-8') as f:
+                            f.write(f"Error: ffmpeg failed. Stderr: {stderr_msg[:500]}")
+                    except Exception as ex_write:
+                         self.logger.error(f"Failed to write dummy error file after ffmpeg error: {ex_write}")
+                return final_video_path 
+            except Exception as e_gen:
+                self.logger.error(f"General error in create_video_from_images_and_audio: {str(e_gen)}", exc_info=True)
+                mark_degraded(f"video creation failed: {e_gen}")
+                if not os.path.exists(final_video_path) or os.path.getsize(final_video_path) == 0:
+                    try:
+                        with open(final_video_path, 'w', encoding='utf-8') as f:
+                            f.write(f"Error: General error during video creation. Error: {str(e_gen)[:500]}")
+                    except Exception as ex_write:
+                        self.logger.error(f"Failed to write dummy error file after general error: {ex_write}")
+                return final_video_path
 
     def upload_to_youtube(self, video_path, title, description):
         """Upload the video to YouTube"""
@@ -804,32 +774,44 @@ class VideoProduction:
         
         return False # Default to false if something unexpected happens
 
-    def run_daily_production(self):
-        """Run the full daily production pipeline"""
+    def _production_manifest(self):
+        """Checkpoint manifest for the current season/day; a retry of the same day resumes from it"""
+        checkpoint_dir = os.getenv("CHECKPOINT_DIR", ".cache/runs")
+        path = os.path.join(checkpoint_dir, f"daily_s{self.season:02d}_d{self.day_number:02d}.json")
+        return RunManifest(path, context={"pipeline": "daily_production", "season": self.season,
+                                          "day": self.day_number})
+
+    def run_daily_production(self, rerun=()):
+        """Run the full daily production pipeline, skipping stages already checkpointed for this day"""
         self.logger.info(f"Starting daily production for Season {self.season}, Day {self.day_number}")
         
         final_video_path_for_check = None  # Initialize to ensure it's always defined for logging
         try:
-            # Step 1: Generate content idea
-            topic = self.generate_content_idea()
+            manifest = self._production_manifest()
+            # Steps 1-5 as a stage graph: images and voice both only need the script
+            graph = StageGraph([
+                Stage("topic", self.generate_content_idea, timeout=120, retries=1),
+                Stage("script", lambda topic: self.generate_script(topic), ["topic"], timeout=180, retries=1),
+                Stage("images", lambda script: self.generate_images(script), ["script"], timeout=600),
+                Stage("voice", lambda script: self.generate_voice(script), ["script"], timeout=300),
+                Stage("video", lambda images, voice: self.create_video_from_images_and_audio(images, voice),
+                      ["images", "voice"], timeout=900)
+            ], name="daily_production", manifest=manifest)
+            graph.invalidate(*rerun)
+            if manifest.completed_stages:
+                self.logger.info(f"Resuming from checkpoint {manifest.path}: "
+                                 f"{', '.join(manifest.completed_stages)} already done")
+            production = graph.run()
+            topic, script = production["topic"], production["script"]
             self.logger.info(f"Content idea: {topic}")
             
-            # Step 2: Generate script
-            script = self.generate_script(topic)
-            
-            # Step 3: Generate images
-            image_files = self.generate_images(script)
-            
-            # Step 4: Generate voice
-            audio_file = self.generate_voice(script)
-            
-            # Step 5: Create final video from images and audio
-            final_video = self.create_video_from_images_and_audio(image_files, audio_file)
+            final_video = production["video"]
             final_video_path_for_check = final_video  # Store for logging outside exception block if needed
 
             # Check if video creation actually succeeded and produced a valid file
             if not final_video or not os.path.exists(final_video) or os.path.getsize(final_video) == 0:
                 self.logger.error("Video creation failed or produced an empty/invalid file. Aborting this production cycle.")
+                graph.invalidate("video")
                 # Check if it's a dummy error file and log its content
                 if final_video and os.path.exists(final_video):
                     try:
@@ -887,6 +869,7 @@ class VideoProduction:
                 if success:
                     self.logger.info(f"YouTube upload successful for: {title}")
                     metrics['successes'] += 1
+                    manifest.set_status("completed", title=title)
                     
                     # Increment day number for next run
                     self.day_number += 1
@@ -913,6 +896,9 @@ class VideoProduction:
                     else:
                         self.logger.error("All upload attempts failed")
                         metrics['failures'] += 1
+                        manifest.set_status("upload_failed")
+                        self.logger.info(f"Generated assets are checkpointed in {manifest.path}; "
+                                         f"the next run for this day only retries the upload")
                         self.logger.warning(f"Daily production completed but YouTube upload failed after {max_upload_attempts} attempts")
             
             # Save updated metrics
@@ -955,6 +941,9 @@ def main():
     parser.add_argument('--test', choices=['image', 'voice', 'video', 'upload'], 
                       help='Test a specific component without running the full pipeline')
     parser.add_argument('--list-voices', action='store_true', help='List available ElevenLabs voices')
+    parser.add_argument('--rerun', action='append', default=[],
+                      choices=['topic', 'script', 'images', 'voice', 'video'],
+                      help='Discard the checkpoint of a stage (and what depends on it) for this day; repeatable')
     args = parser.parse_args()
     
     # Set debug mode
@@ -1005,13 +994,11 @@ def main():
             test_video_path = os.path.join(os.getenv("FINAL_VIDEO_SAVE_PATH", "final_videos/"), "test_upload.mp4")
             try:
                 # Try to create a 5-second test video
-                subprocess.run(
+                run_ffmpeg_sync(
                     ['ffmpeg', '-f', 'lavfi', '-i', 'color=c=blue:s=1280x720:d=5', 
                      '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo:d=5',
                      '-shortest', '-c:v', 'libx264', '-c:a', 'aac', test_video_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    check=True
+                    job_id="test_upload", priority=PRIORITY_INTERACTIVE
                 )
                 logger.info(f"Created test video: {test_video_path}")
                 
@@ -1059,7 +1046,7 @@ def main():
     # Also provide a way to run it immediately for testing
     if args.now:
         logger.info("Running production now as requested")
-        production.run_daily_production()
+        production.run_daily_production(rerun=args.rerun)
     else:
         logger.info(f"Waiting for scheduled time ({run_time})...")
         logger.info("(Run with --now flag to execute immediately)")
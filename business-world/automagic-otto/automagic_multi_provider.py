@@ -7,14 +7,15 @@ Enhanced version with automatic fallbacks for all API services
 import os
 import sys
 import logging
-import tempfile
-import subprocess
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Import the new provider system
 from api_providers import ProviderManager
+from core.media import probe_duration, inspect_media, MediaInspectionError, run_ffmpeg_sync, validate_mp4
+from core.utils.dag import Stage, StageGraph, StageFailedError
+from core.utils.scratch import get_scratch_manager
 
 load_dotenv()
 
@@ -205,13 +206,10 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
                 self.logger.error(f"Failed to generate image {idx}: {e}")
                 # Create better placeholder image with gradient
                 try:
-                    from PIL import Image, ImageDraw, ImageFont
+                    from PIL import ImageDraw, ImageFont
+                    from core.graphics import ProceduralCanvas
                     import random
 
-                    # Create gradient background
-                    img = Image.new('RGB', (1280, 720))
-                    draw = ImageDraw.Draw(img)
-
                     # Nice color schemes
                     colors = [
                         [(25, 42, 86), (220, 107, 107)],  # Navy to coral
@@ -221,14 +219,12 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
                         [(26, 28, 67), (247, 37, 133)]    # Deep purple to pink
                     ]
 
-                    start_color, end_color = random.choice(colors)
-
-                    # Draw gradient
-                    for y in range(720):
-                        r = int(start_color[0] + (end_color[0] - start_color[0]) * y / 720)
-                        g = int(start_color[1] + (end_color[1] - start_color[1]) * y / 720)
-                        b = int(start_color[2] + (end_color[2] - start_color[2]) * y / 720)
-                        draw.line([(0, y), (1280, y)], fill=(r, g, b))
+                    # Gradient background with a semi-transparent band for text readability
+                    img = (
+                        ProceduralCanvas.from_gradient(1280, 720, random.choice(colors))
+                        .rectangle(100, 300, 1180, 420, (0, 0, 0), opacity=120 / 255)
+                        .render()
+                    )
 
                     # Add text with better styling
                     text = prompt[:50] if len(prompt) > 50 else prompt
@@ -243,15 +239,8 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
                         except:
                             font = ImageFont.load_default()
 
-                    # Add semi-transparent overlay for text readability
-                    overlay = Image.new('RGBA', (1280, 720), (0, 0, 0, 0))
-                    overlay_draw = ImageDraw.Draw(overlay)
-                    overlay_draw.rectangle([(100, 300), (1180, 420)], fill=(0, 0, 0, 120))
-                    img.paste(Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB'))
-
                     # Draw text
                     draw = ImageDraw.Draw(img)
-                    bbox = draw.textbbox((640, 360), text, font=font, anchor="mm")
                     draw.text((640, 360), text, fill=(255, 255, 255), font=font, anchor="mm")
 
                     placeholder_path = os.path.join(
@@ -328,12 +317,10 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
             )
 
             try:
-                subprocess.run(
+                run_ffmpeg_sync(
                     ['ffmpeg', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=mono',
                      '-t', '20', '-q:a', '9', '-acodec', 'libmp3lame', audio_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    check=True
+                    job_id=f"silent_{Path(audio_path).stem}"
                 )
                 self.logger.info(f"Created silent fallback audio: {audio_path}")
             except Exception as e2:
@@ -344,10 +331,7 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
     def _get_audio_duration(self, audio_file: str) -> float:
         """Get duration of audio file in seconds"""
         try:
-            import ffmpeg
-            probe = ffmpeg.probe(audio_file)
-            duration = float(probe['streams'][0]['duration'])
-            return duration
+            return probe_duration(audio_file)
         except Exception as e:
             self.logger.warning(f"Could not get audio duration: {e}, defaulting to 30s")
             return 30.0
@@ -381,7 +365,10 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
                 '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
                 output_path
             ]
-            result = subprocess.run(cmd, capture_output=True, timeout=120)
+            result = run_ffmpeg_sync(cmd, job_id=f"ken_burns_{Path(output_path).stem}",
+                                     expected_duration=duration, timeout=120, check=False)
+            if result.returncode != 0:
+                self.logger.warning(f"Ken Burns ffmpeg exited {result.returncode}: {result.stderr_tail[-1:]}")
             return result.returncode == 0
         except Exception as e:
             self.logger.error(f"Ken Burns effect failed: {e}")
@@ -402,73 +389,71 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
             f"automagic_video_{timestamp}.mp4"
         )
 
-        try:
-            import ffmpeg
-
-            # Get audio duration to properly time images
-            audio_duration = self._get_audio_duration(audio_file)
-            num_images = len(image_files)
-
-            # Calculate duration per image (distribute evenly across audio)
-            duration_per_image = audio_duration / num_images
-            self.logger.info(f"Audio: {audio_duration:.1f}s, Images: {num_images}, Duration per image: {duration_per_image:.1f}s")
-
-            # Apply Ken Burns effect to each image
-            clip_files = []
-            for i, img in enumerate(image_files):
-                clip_path = tempfile.mktemp(suffix=f'_clip{i}.mp4')
-                self.logger.info(f"Applying Ken Burns effect to image {i+1}/{num_images}...")
-
-                if self._apply_ken_burns(img, clip_path, duration_per_image, i):
-                    clip_files.append(clip_path)
-                else:
-                    self.logger.warning(f"Ken Burns failed for image {i+1}, using static fallback")
-                    # Fallback to static image
-                    cmd = [
-                        'ffmpeg', '-y', '-loop', '1', '-i', img,
-                        '-vf', 'scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2',
-                        '-t', str(duration_per_image),
-                        '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
-                        clip_path
-                    ]
-                    subprocess.run(cmd, capture_output=True, timeout=60)
-                    clip_files.append(clip_path)
-
-            # Create concat file for the clips
-            concat_file = tempfile.mktemp(suffix='.txt')
-            with open(concat_file, 'w') as f:
-                for clip in clip_files:
-                    f.write(f"file '{clip.replace(chr(92), '/')}'\n")
-
-            # Concatenate all clips
-            silent_video = tempfile.mktemp(suffix='.mp4')
-            concat_cmd = [
-                'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file,
-                '-c', 'copy', silent_video
-            ]
-            subprocess.run(concat_cmd, capture_output=True, timeout=120)
-
-            # Add audio
-            final_cmd = [
-                'ffmpeg', '-y', '-i', silent_video, '-i', audio_file,
-                '-c:v', 'copy', '-c:a', 'aac', '-t', str(audio_duration),
-                video_path
-            ]
-            subprocess.run(final_cmd, capture_output=True, timeout=120)
-
-            # Cleanup
-            os.remove(concat_file)
-            os.remove(silent_video)
-            for clip in clip_files:
-                if os.path.exists(clip):
-                    os.remove(clip)
-
-            self.logger.info(f"Video created: {video_path}")
-            return video_path
+        # Clips, concat list and silent video live in per-job scratch (tmpfs when it fits)
+        with get_scratch_manager().job(f"multi_{timestamp}") as scratch:
+            try:
+                import ffmpeg
+
+                # Get audio duration to properly time images
+                audio_duration = self._get_audio_duration(audio_file)
+                num_images = len(image_files)
+
+                # Calculate duration per image (distribute evenly across audio)
+                duration_per_image = audio_duration / num_images
+                self.logger.info(f"Audio: {audio_duration:.1f}s, Images: {num_images}, Duration per image: {duration_per_image:.1f}s")
+
+                # Apply Ken Burns effect to each image
+                clip_files = []
+                for i, img in enumerate(image_files):
+                    clip_path = str(scratch.path(f'clip{i}.mp4', int(duration_per_image * 2_000_000 / 8)))
+                    self.logger.info(f"Applying Ken Burns effect to image {i+1}/{num_images}...")
+
+                    if self._apply_ken_burns(img, clip_path, duration_per_image, i):
+                        clip_files.append(clip_path)
+                    else:
+                        self.logger.warning(f"Ken Burns failed for image {i+1}, using static fallback")
+                        # Fallback to static image
+                        cmd = [
+                            'ffmpeg', '-y', '-loop', '1', '-i', img,
+                            '-vf', 'scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2',
+                            '-t', str(duration_per_image),
+                            '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+                            clip_path
+                        ]
+                        run_ffmpeg_sync(cmd, job_id=f"static_{Path(clip_path).stem}",
+                                        expected_duration=duration_per_image, timeout=60, check=False)
+                        clip_files.append(clip_path)
+
+                # Create concat file for the clips
+                concat_file = str(scratch.path('clips.txt'))
+                with open(concat_file, 'w') as f:
+                    for clip in clip_files:
+                        f.write(f"file '{clip.replace(chr(92), '/')}'\n")
+
+                # Concatenate all clips
+                silent_video = str(scratch.path('silent.mp4', int(audio_duration * 2_000_000 / 8)))
+                concat_cmd = [
+                    'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file,
+                    '-c', 'copy', silent_video
+                ]
+                run_ffmpeg_sync(concat_cmd, job_id=f"concat_{timestamp}",
+                                expected_duration=audio_duration, timeout=120, check=False)
+
+                # Add audio
+                final_cmd = [
+                    'ffmpeg', '-y', '-i', silent_video, '-i', audio_file,
+                    '-c:v', 'copy', '-c:a', 'aac', '-t', str(audio_duration),
+                    video_path
+                ]
+                run_ffmpeg_sync(final_cmd, job_id=f"mux_{timestamp}",
+                                expected_duration=audio_duration, timeout=120, check=False)
+
+                self.logger.info(f"Video created: {video_path}")
+                return video_path
 
-        except Exception as e:
-            self.logger.error(f"Video creation failed: {e}")
-            return None
+            except Exception as e:
+                self.logger.error(f"Video creation failed: {e}")
+                return None
 
     def verify_production(self, images: list, audio: str, video: str) -> dict:
         """
@@ -525,16 +510,19 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
             results["errors"].append("Audio file not generated")
             results["passed"] = False
         else:
-            audio_size = os.path.getsize(audio)
-            if audio_size < 10000:  # Less than 10KB is suspicious
+            # Frame/atom headers, not file size: a truncated or headerless file fails here
+            try:
+                audio_info = inspect_media(audio)
+                if not audio_info.has_audio:
+                    raise MediaInspectionError("no audio stream")
                 results["checks"][check_name] = {
-                    "passed": False,
-                    "detail": f"Audio too small ({audio_size} bytes)"
+                    "passed": True,
+                    "detail": f"Audio: {audio_info.audio.codec_name}, {audio_info.size/1000:.1f}KB"
                 }
-                results["errors"].append("Audio file too small - may be silent/corrupted")
+            except MediaInspectionError as e:
+                results["checks"][check_name] = {"passed": False, "detail": f"Unreadable audio ({e})"}
+                results["errors"].append("Audio file is corrupted or not audio")
                 results["passed"] = False
-            else:
-                results["checks"][check_name] = {"passed": True, "detail": f"Audio: {audio_size/1000:.1f}KB"}
 
         # Check 4: Audio duration is reasonable (10-120 seconds for short-form)
         check_name = "audio_duration"
@@ -567,23 +555,22 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
             results["errors"].append("Video file not created")
             results["passed"] = False
         else:
-            video_size = os.path.getsize(video)
-            if video_size < 100000:  # Less than 100KB is suspicious
-                results["checks"][check_name] = {
-                    "passed": False,
-                    "detail": f"Video too small ({video_size/1000:.1f}KB)"
-                }
-                results["errors"].append("Video file too small - may be corrupted")
+            # Box tree, sample tables and a few sampled frames instead of a size threshold
+            validation = validate_mp4(video, allow_static=len(set(images or [])) < 2)
+            if not validation.passed:
+                results["checks"][check_name] = {"passed": False, "detail": validation.summary()}
+                results["errors"].extend(f"Video invalid: {error}" for error in validation.errors)
                 results["passed"] = False
             else:
-                results["checks"][check_name] = {"passed": True, "detail": f"Video: {video_size/1000000:.2f}MB"}
+                results["checks"][check_name] = {
+                    "passed": True,
+                    "detail": f"Video: {validation.size/1000000:.2f}MB, {validation.summary()}"
+                }
 
         # Check 6: Video duration matches audio
         check_name = "video_audio_sync"
         try:
-            import ffmpeg
-            video_probe = ffmpeg.probe(video)
-            video_duration = float(video_probe['streams'][0]['duration'])
+            video_duration = inspect_media(video).duration
             audio_duration = self._get_audio_duration(audio)
 
             diff = abs(video_duration - audio_duration)
@@ -632,30 +619,25 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
         self.logger.info("STARTING AUTOMAGIC PRODUCTION (MULTI-PROVIDER)")
         self.logger.info("="*60)
 
-        images = []
-        audio = None
-        video = None
+        # Images and voice only need the script, so they run side by side
+        graph = StageGraph([
+            Stage("topic", self.generate_content_idea, timeout=120, retries=1),
+            Stage("script", lambda topic: self.generate_script(topic), ["topic"], timeout=180, retries=1),
+            Stage("images", lambda script: self.generate_images(script), ["script"], timeout=600),
+            Stage("voice", lambda script: self.generate_voice(script), ["script"], timeout=300),
+            Stage("video", lambda images, voice: self.create_video(images, voice),
+                  ["images", "voice"], timeout=900),
+            Stage("verify", lambda images, voice, video: self.verify_production(images, voice, video),
+                  ["images", "voice", "video"], timeout=120)
+        ], name="multi_provider")
 
         try:
-            # Step 1: Generate content idea
-            topic = self.generate_content_idea()
-            self.logger.info(f"Topic: {topic}")
-
-            # Step 2: Generate script
-            script = self.generate_script(topic)
-
-            # Step 3: Generate images
-            images = self.generate_images(script)
+            run = graph.run()
+            self.logger.info(f"Topic: {run['topic']}")
+            video = run["video"]
 
-            # Step 4: Generate voice
-            audio = self.generate_voice(script)
-
-            # Step 5: Create video
-            video = self.create_video(images, audio)
-
-            # Step 6: VERIFY all outputs
-            self.logger.info("Running verification checks...")
-            verification = self.verify_production(images, audio, video)
+            # Verification ran as the last stage
+            verification = run["verify"]
             self.print_verification_report(verification)
 
             if verification["passed"]:
@@ -663,15 +645,20 @@ Format: Just list the prompts, one per line, no numbering or extra text."""
                 self.logger.info("PRODUCTION COMPLETE - ALL CHECKS PASSED!")
                 self.logger.info(f"Video: {video}")
                 self.logger.info("="*60)
-                return {"success": True, "video": video, "verification": verification}
+                return {"success": True, "video": video, "verification": verification,
+                        "stages": run.summary()}
             else:
                 self.logger.error("="*60)
                 self.logger.error("PRODUCTION FAILED VERIFICATION")
                 for error in verification["errors"]:
                     self.logger.error(f"  - {error}")
                 self.logger.error("="*60)
-                return {"success": False, "video": video, "verification": verification}
+                return {"success": False, "video": video, "verification": verification,
+                        "stages": run.summary()}
 
+        except StageFailedError as e:
+            self.logger.error(f"Production error: {e}", exc_info=True)
+            return {"success": False, "video": None, "error": str(e), "stages": e.run.summary()}
         except Exception as e:
             self.logger.error(f"Production error: {e}", exc_info=True)
             return {"success": False, "video": None, "error": str(e)}
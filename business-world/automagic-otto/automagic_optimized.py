@@ -14,17 +14,23 @@ import signal
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 from datetime import datetime, timedelta
-import schedule
 
 # Import optimized components
 from core.config import get_config, validate_config
 from core.api import get_api_client
 from core.video import create_video_from_assets, VideoSettings
+from core.media import ffmpeg_priority, PRIORITY_INTERACTIVE
 from core.utils.resource_manager import get_resource_manager, managed_operation
+from core.utils.cron import AsyncCronScheduler, OVERLAP_SKIP
+from core.utils.metrics import REGISTRY, MetricsExporter, track_stage
 
 # Setup logging
 logger = logging.getLogger("AutoMagic.Main")
 
+PRODUCTIONS = REGISTRY.counter("automagic_productions_total", "Daily content runs by outcome", ["outcome"])
+PRODUCTION_SECONDS = REGISTRY.histogram("automagic_production_seconds", "Daily content run time", ["outcome"])
+UPLOADS = REGISTRY.counter("automagic_uploads_total", "Upload attempts by outcome", ["outcome"])
+
 class OptimizedVideoProduction:
     """Next-generation video production system with async processing"""
     
@@ -33,6 +39,8 @@ class OptimizedVideoProduction:
         self.resource_manager = None
         self.running = False
         self._shutdown_event = asyncio.Event()
+        self.scheduler: Optional[AsyncCronScheduler] = None
+        self.metrics_exporter: Optional[MetricsExporter] = None
         
         # Performance metrics
         self.metrics = {
@@ -60,6 +68,15 @@ class OptimizedVideoProduction:
             # Schedule cleanup
             asyncio.create_task(self._schedule_maintenance())
             
+            # Prometheus /metrics endpoint and/or textfile, when configured
+            metrics_config = self.config.metrics
+            if metrics_config.port or metrics_config.textfile_path:
+                self.metrics_exporter = MetricsExporter(
+                    REGISTRY, port=metrics_config.port, host=metrics_config.host,
+                    textfile=metrics_config.textfile_path or None,
+                    textfile_interval=metrics_config.textfile_interval
+                ).start()
+            
             logger.info("AutoMagic Optimized initialized successfully")
             
         except Exception as e:
@@ -75,6 +92,10 @@ class OptimizedVideoProduction:
         if self.resource_manager:
             await self.resource_manager.shutdown()
         
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        
         logger.info("Shutdown completed")
     
     async def _schedule_maintenance(self):
@@ -110,11 +131,13 @@ class OptimizedVideoProduction:
                         topic = custom_topic
                         logger.info(f"Using custom topic: {topic}")
                     else:
-                        topic = await api_client.generate_content_idea()
+                        with track_stage("daily_content", "topic"):
+                            topic = await api_client.generate_content_idea()
                         logger.info(f"Generated topic: {topic}")
                     
                     # Step 2: Script Generation
-                    script = await api_client.generate_script(topic)
+                    with track_stage("daily_content", "script"):
+                        script = await api_client.generate_script(topic)
                     logger.info("Script generated successfully")
                     
                     # Step 3: Asset Generation (Parallel)
@@ -127,25 +150,28 @@ class OptimizedVideoProduction:
                     
                     # Wait for assets with timeout
                     try:
-                        images, audio_path = await asyncio.wait_for(
-                            asyncio.gather(image_task, audio_task),
-                            timeout=300  # 5 minutes timeout
-                        )
+                        with track_stage("daily_content", "assets"):
+                            images, audio_path = await asyncio.wait_for(
+                                asyncio.gather(image_task, audio_task),
+                                timeout=300  # 5 minutes timeout
+                            )
                     except asyncio.TimeoutError:
                         logger.error("Asset generation timed out")
                         raise
                 
                 # Step 4: Video Creation
                 video_settings = VideoSettings.from_config()
-                video_path = await create_video_from_assets(
-                    images, audio_path, settings=video_settings
-                )
+                with track_stage("daily_content", "video"):
+                    video_path = await create_video_from_assets(
+                        images, audio_path, settings=video_settings
+                    )
                 
                 # Step 5: Platform Optimization (if needed)
                 # Could add platform-specific versions here
                 
                 # Step 6: Upload (if configured)
-                upload_success = await self._upload_if_configured(video_path, topic, script)
+                with track_stage("daily_content", "upload"):
+                    upload_success = await self._upload_if_configured(video_path, topic, script)
                 
                 # Update metrics
                 processing_time = time.time() - start_time
@@ -169,6 +195,8 @@ class OptimizedVideoProduction:
                 
         except Exception as e:
             self.metrics["errors_encountered"] += 1
+            PRODUCTIONS.inc(outcome="failed")
+            PRODUCTION_SECONDS.observe(time.time() - start_time, outcome="failed")
             logger.error(f"Daily content creation failed: {e}")
             
             return {
@@ -242,6 +270,9 @@ Season {self.config.production.season}, Day {self.config.production.day_number}
         self.metrics["average_processing_time"] = (
             self.metrics["total_processing_time"] / self.metrics["videos_created"]
         )
+        PRODUCTIONS.inc(outcome="succeeded")
+        PRODUCTION_SECONDS.observe(processing_time, outcome="succeeded")
+        UPLOADS.inc(outcome="uploaded" if upload_success else "skipped_or_failed")
         
         if upload_success:
             self.metrics["api_calls_made"] += 1
@@ -251,36 +282,39 @@ Season {self.config.production.season}, Day {self.config.production.day_number}
         self.running = True
         
         # Get schedule time
-        run_time = self.config.production.daily_run_time
-        logger.info(f"Scheduled for daily run at {run_time}")
+        production = self.config.production
+        run_time = production.daily_run_time
         
-        # Schedule the job
-        schedule.every().day.at(run_time).do(
-            lambda: asyncio.create_task(self.create_daily_content())
-        )
+        # One production at a time; a run still going when the next is due skips that one
+        self.scheduler = AsyncCronScheduler(state_path=self.config.paths.cache_path / "scheduler_state.json")
+        self.scheduler.add("daily_production", self.create_daily_content, run_time,
+                           jitter=production.schedule_jitter_seconds,
+                           catch_up=production.schedule_catch_up,
+                           max_concurrent=1, overlap=OVERLAP_SKIP)
+        await self.scheduler.start()
+        logger.info(f"Scheduled daily production at {run_time}; next run "
+                    f"{self.scheduler.get_status()['daily_production']['next_fire']}")
         
         logger.info("Entering scheduled mode. Press Ctrl+C to stop.")
         
         try:
-            while self.running and not self._shutdown_event.is_set():
-                # Check for scheduled jobs
-                schedule.run_pending()
-                
-                # Sleep with cancellation support
-                try:
-                    await asyncio.wait_for(asyncio.sleep(60), timeout=60)
-                except asyncio.TimeoutError:
-                    pass  # Normal timeout, continue loop
-                    
+            await self._shutdown_event.wait()
         except asyncio.CancelledError:
             logger.info("Scheduled production cancelled")
         except KeyboardInterrupt:
             logger.info("Received interrupt signal")
         finally:
+            # Cancel an in-flight production and give it time to unwind
+            await self.scheduler.stop(cancel_running=True, timeout=30)
             await self.shutdown()
     
     async def test_component(self, component: str) -> Dict[str, Any]:
         """Test individual components"""
+        # Someone is waiting on the result, so its ffmpeg work jumps ahead of queued renders
+        with ffmpeg_priority(PRIORITY_INTERACTIVE):
+            return await self._run_component_test(component)
+
+    async def _run_component_test(self, component: str) -> Dict[str, Any]:
         logger.info(f"Testing component: {component}")
         
         try:
@@ -344,6 +378,7 @@ Season {self.config.production.season}, Day {self.config.production.day_number}
                 "day_number": self.config.production.day_number,
                 "scheduled_time": self.config.production.daily_run_time
             },
+            "schedule": self.scheduler.get_status() if self.scheduler else {},
             "system_status": self.resource_manager.get_status() if self.resource_manager else {}
         }
 
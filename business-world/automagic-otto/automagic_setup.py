@@ -28,7 +28,9 @@ def parse_arguments():
 def check_ffmpeg():
     """Check if FFmpeg is installed."""
     try:
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        from core.media import PRIORITY_INTERACTIVE, run_ffmpeg_sync
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         if result.returncode == 0:
             return True, result.stdout.split('\n')[0]
         return False, "FFmpeg command returned non-zero exit code"
@@ -7,7 +7,6 @@ import schedule
 import time
 import json
 import random
-import subprocess
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
@@ -23,6 +22,7 @@ from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 import shutil
 import elevenlabs
+from core.media import run_ffmpeg_sync
 # from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 # Add trend integration
@@ -469,13 +469,8 @@ Thanks for watching! If you enjoyed this video and want to see more content like
             
             # Try alternative validation with subprocess if ffmpeg.probe fails
             try:
-                import subprocess
-                result = subprocess.run(
-                    ['ffmpeg', '-v', 'error', '-i', audio_path, '-f', 'null', '-'],
-                    stderr=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    text=True
-                )
+                result = run_ffmpeg_sync(['ffmpeg', '-v', 'error', '-i', audio_path, '-f', 'null', '-'],
+                                         check=False)
                 
                 # If there's no error output, the file is likely valid
                 if result.returncode == 0 and not result.stderr.strip():
@@ -567,9 +562,9 @@ Thanks for watching! If you enjoyed this video and want to see more content like
         try:
             duration = 10  # seconds
             self.logger.info(f"Generating silent audio using ffmpeg-python (fallback)...")
-            (ffmpeg.input('anullsrc', format='lavfi', t=str(duration))
-             .output(audio_path, acodec='libmp3lame', ar='44100')
-             .overwrite_output().run(capture_stdout=True, capture_stderr=True, quiet=True))
+            run_ffmpeg_sync(ffmpeg.input('anullsrc', format='lavfi', t=str(duration))
+                            .output(audio_path, acodec='libmp3lame', ar='44100')
+                            .overwrite_output().compile())
             if os.path.exists(audio_path) and os.path.getsize(audio_path) > 1000 and self._is_valid_audio(audio_path):
                 self.logger.info(f"Successfully generated silent audio file (fallback): {audio_path}")
                 success = True
@@ -589,19 +584,11 @@ Thanks for watching! If you enjoyed this video and want to see more content like
                 
                 duration = 10  # seconds
                 
-                if os.name == 'nt':  # Windows
-                    result = subprocess.run(
-                        f'ffmpeg -f lavfi -i anullsrc=r=44100:cl=mono -t {duration} -q:a 2 -acodec libmp3lame "{audio_path}"',
-                        shell=True, 
-                        capture_output=True,
-                        text=True
-                    )
-                else:  # Linux, macOS
-                    result = subprocess.run([
-                        'ffmpeg', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=mono', 
-                        '-t', str(duration), '-q:a', '2', '-acodec', 'libmp3lame', 
-                        audio_path
-                    ], capture_output=True, text=True)
+                result = run_ffmpeg_sync([
+                    'ffmpeg', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=mono',
+                    '-t', str(duration), '-q:a', '2', '-acodec', 'libmp3lame',
+                    audio_path
+                ], check=False)
                 
                 if result.returncode == 0 and os.path.exists(audio_path) and os.path.getsize(audio_path) > 1000:
                     if self._is_valid_audio(audio_path):
@@ -740,12 +727,12 @@ Thanks for watching! If you enjoyed this video and want to see more content like
             
             # Stage 1: Create silent video from images
             try:
-                (
+                run_ffmpeg_sync(
                     ffmpeg
                     .input(temp_concat_file_path, format='concat', safe=0)
                     .output(silent_video_path, vcodec='libx264', pix_fmt='yuv420p', r=str(output_framerate), loglevel="error")
                     .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
+                    .compile()
                 )
                 self.logger.info(f"Silent video created: {silent_video_path}")
                 
@@ -763,7 +750,7 @@ Thanks for watching! If you enjoyed this video and want to see more content like
                 
                 # First attempt with standard approach
                 try:
-                    (
+                    run_ffmpeg_sync(
                         ffmpeg
                         .output(video_stream, audio_stream, final_video_path, 
                                 vcodec='copy', 
@@ -772,17 +759,17 @@ Thanks for watching! If you enjoyed this video and want to see more content like
                                 loglevel="error" 
                                )
                         .overwrite_output()
-                        .run(capture_stdout=True, capture_stderr=True)
+                        .compile()
                     )
                 except Exception as e:
                     self.logger.warning(f"First attempt at adding audio failed: {str(e)}")
                     # Fallback to alternative approach if first one fails
                     self.logger.info("Trying alternative FFmpeg approach")
-                    (
+                    run_ffmpeg_sync(
                         ffmpeg.concat(video_stream, audio_stream, v=1, a=1)
                         .output(final_video_path, vcodec='copy', acodec='aac')
                         .overwrite_output()
-                        .run(capture_stdout=True, capture_stderr=True)
+                        .compile()
                     )
                 
                 self.logger.info(f"Final video with audio created: {final_video_path}")
@@ -7,13 +7,14 @@ import schedule
 import time
 import json
 import random
-import subprocess
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 import ffmpeg  # Added for ffmpeg-python
 import tempfile  # Added for temporary files
 
+from core.media import run_ffmpeg_sync
+
 # Load environment variables
 load_dotenv()
 
@@ -265,13 +266,8 @@ Thanks for watching! If you enjoyed this video, don't forget to like and subscri
             
             # Try alternative validation with subprocess if ffmpeg.probe fails
             try:
-                import subprocess
-                result = subprocess.run(
-                    ['ffmpeg', '-v', 'error', '-i', audio_path, '-f', 'null', '-'],
-                    stderr=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    text=True
-                )
+                result = run_ffmpeg_sync(['ffmpeg', '-v', 'error', '-i', audio_path, '-f', 'null', '-'],
+                                         check=False)
                 
                 # If there's no error output, the file is likely valid
                 if result.returncode == 0 and not result.stderr.strip():
@@ -314,12 +310,12 @@ Thanks for watching! If you enjoyed this video, don't forget to like and subscri
             duration = 10  # seconds
             
             self.logger.info(f"Generating silent audio using ffmpeg-python...")
-            (
+            run_ffmpeg_sync(
                 ffmpeg
                 .input('anullsrc', format='lavfi', t=str(duration))
                 .output(audio_path, acodec='libmp3lame', ar='44100')
                 .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True, quiet=True)
+                .compile()
             )
             
             # Verify the file was created successfully
@@ -339,7 +335,6 @@ Thanks for watching! If you enjoyed this video, don't forget to like and subscri
         # Method 2: If Method 1 failed, try using subprocess with ffmpeg directly
         if not success:
             try:
-                import subprocess
                 self.logger.warning("Trying direct ffmpeg command as fallback...")
                 
                 # Ensure audio directory exists
@@ -353,21 +348,11 @@ Thanks for watching! If you enjoyed this video, don't forget to like and subscri
                 # Run ffmpeg command directly - more explicit for better reliability
                 duration = 10  # seconds
                 
-                if os.name == 'nt':  # Windows
-                    # On Windows, use subprocess with shell=True to avoid path issues
-                    result = subprocess.run(
-                        f'ffmpeg -f lavfi -i anullsrc=r=44100:cl=mono -t {duration} -q:a 2 -acodec libmp3lame "{audio_path}"',
-                        shell=True, 
-                        capture_output=True,
-                        text=True
-                    )
-                else:  # Linux, macOS
-                    # On Unix systems, use array form
-                    result = subprocess.run([
-                        'ffmpeg', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=mono', 
-                        '-t', str(duration), '-q:a', '2', '-acodec', 'libmp3lame', 
-                        audio_path
-                    ], capture_output=True, text=True)
+                result = run_ffmpeg_sync([
+                    'ffmpeg', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=mono',
+                    '-t', str(duration), '-q:a', '2', '-acodec', 'libmp3lame',
+                    audio_path
+                ], check=False)
                 
                 if result.returncode == 0 and os.path.exists(audio_path) and os.path.getsize(audio_path) > 1000:
                     if self._is_valid_audio(audio_path):
@@ -507,12 +492,12 @@ Thanks for watching! If you enjoyed this video, don't forget to like and subscri
             
             # Stage 1: Create silent video from images
             try:
-                (
+                run_ffmpeg_sync(
                     ffmpeg
                     .input(temp_concat_file_path, format='concat', safe=0)
                     .output(silent_video_path, vcodec='libx264', pix_fmt='yuv420p', r=str(output_framerate), loglevel="error")
                     .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
+                    .compile()
                 )
                 self.logger.info(f"Silent video created: {silent_video_path}")
                 
@@ -530,7 +515,7 @@ Thanks for watching! If you enjoyed this video, don't forget to like and subscri
                 
                 # First attempt with standard approach
                 try:
-                    (
+                    run_ffmpeg_sync(
                         ffmpeg
                         .output(video_stream, audio_stream, final_video_path, 
                                 vcodec='copy', 
@@ -539,17 +524,17 @@ Thanks for watching! If you enjoyed this video, don't forget to like and subscri
                                 loglevel="error" 
                                )
                         .overwrite_output()
-                        .run(capture_stdout=True, capture_stderr=True)
+                        .compile()
                     )
                 except Exception as e:
                     self.logger.warning(f"First attempt at adding audio failed: {str(e)}")
                     # Fallback to alternative approach if first one fails
                     self.logger.info("Trying alternative FFmpeg approach")
-                    (
+                    run_ffmpeg_sync(
                         ffmpeg.concat(video_stream, audio_stream, v=1, a=1)
                         .output(final_video_path, vcodec='copy', acodec='aac')
                         .overwrite_output()
-                        .run(capture_stdout=True, capture_stderr=True)
+                        .compile()
                     )
                 
                 self.logger.info(f"Final video with audio created: {final_video_path}")
@@ -7,7 +7,6 @@ import schedule
 import time
 import json
 import random
-import subprocess
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
@@ -24,6 +23,8 @@ import shutil
 import elevenlabs
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from PIL import Image, ImageDraw, ImageFont
+from core.graphics import placeholder_background
+from core.media import run_ffmpeg_sync
 
 # Add trend integration
 try:
@@ -300,7 +301,7 @@ Focus on practical value and engagement."""
                 output_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = run_ffmpeg_sync(cmd, check=False)
             
             # Cleanup temp file
             os.unlink(input_file)
@@ -396,7 +397,7 @@ Focus on practical value and engagement."""
         """Create a fallback image when AI generation fails"""
         try:
             # Create a simple gradient image
-            img = Image.new('RGB', (1024, 1024), color='#4A90E2')
+            img = placeholder_background(1024, 1024, [(74, 144, 226), (30, 70, 140)])
             draw = ImageDraw.Draw(img)
             
             # Add text
@@ -495,7 +496,7 @@ Focus on practical value and engagement."""
                 output_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = run_ffmpeg_sync(cmd, check=False)
             
             if result.returncode == 0 and os.path.exists(output_path):
                 self.logger.info(f"Silent audio fallback created: {output_path}")
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Video Backend Benchmark Suite
+Renders synthetic production-sized assets through every video assembly backend and records wall time,
+realtime factor, peak process-tree RSS and output size as JSON that can be compared across commits
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import psutil
+from PIL import Image
+
+logger = logging.getLogger("AutoMagic.Benchmark")
+
+ROOT_DIR = Path(__file__).resolve().parent
+OTTO_DIR = ROOT_DIR / "OTTO_Magic"
+RESULTS_DIR = ROOT_DIR / "benchmark_results"
+SCHEMA_VERSION = 1
+
+# Production runs render three DALL-E sized images over a one-minute voiceover
+PROFILES = {
+    "production": {"images": 3, "image_size": (1024, 1024), "audio_seconds": 60.0},
+    "quick": {"images": 3, "image_size": (1024, 1024), "audio_seconds": 10.0},
+}
+
+# Figures compared across result files; for all of them lower is better except realtime_factor
+COMPARED_FIELDS = ("wall_seconds", "realtime_factor", "peak_rss_mb", "output_mb")
+
+class BackendUnavailable(Exception):
+    """The backend cannot run on this host (missing library or encoder)"""
+
+# ---------------------------------------------------------------------------
+# Synthetic assets
+# ---------------------------------------------------------------------------
+
+def _make_image(path: Path, size, seed: int):
+    """Smooth gradients, a few shapes and mild grain, so encoders see something like a generated image"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = rng.uniform(40, 215, 3)
+    slope = rng.uniform(-0.12, 0.12, (3, 2))
+    pixels = np.stack([base[c] + slope[c, 0] * x + slope[c, 1] * y for c in range(3)], axis=-1)
+    for _ in range(6):
+        cx, cy, radius = rng.uniform(0, width), rng.uniform(0, height), rng.uniform(60, 260)
+        mask = (x - cx) ** 2 + (y - cy) ** 2 < radius ** 2
+        pixels[mask] = rng.uniform(0, 255, 3)
+    pixels += rng.normal(0, 6, pixels.shape)
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB").save(path)
+
+def make_assets(asset_dir: Path, profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Write the images and a voice-like mp3 once; every backend renders the same files"""
+    asset_dir.mkdir(parents=True, exist_ok=True)
+    images = []
+    for index in range(profile["images"]):
+        path = asset_dir / f"image_{index}.png"
+        _make_image(path, profile["image_size"], seed=index)
+        images.append(str(path))
+
+    # Speech-band tones with noise at ElevenLabs' output format (44.1 kHz mono 128k mp3)
+    audio = asset_dir / "voice.mp3"
+    seconds = profile["audio_seconds"]
+    subprocess.run([
+        'ffmpeg', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', f'sine=frequency=180:duration={seconds}',
+        '-f', 'lavfi', '-i', f'sine=frequency=420:duration={seconds}',
+        '-f', 'lavfi', '-i', f'anoisesrc=color=pink:amplitude=0.05:duration={seconds}',
+        '-filter_complex', 'amix=inputs=3:normalize=0,volume=0.5',
+        '-ar', '44100', '-ac', '1', '-b:a', '128k', str(audio)
+    ], check=True)
+
+    assets = {"images": images, "audio": str(audio), "audio_seconds": seconds}
+    (asset_dir / "assets.json").write_text(json.dumps(assets, indent=2), encoding="utf-8")
+    return assets
+
+# ---------------------------------------------------------------------------
+# Backends (run inside a worker process)
+# ---------------------------------------------------------------------------
+
+def _run_optimized_processor(assets: Dict[str, Any], output: Path) -> str:
+    from core.video import OptimizedVideoProcessor, VideoSettings
+
+    async def render():
+        async with OptimizedVideoProcessor(VideoSettings.from_config()) as processor:
+            return await processor.create_video_from_assets(assets["images"], assets["audio"], str(output))
+
+    return asyncio.run(render())
+
+def _enhanced_runner(method: str) -> Callable[[Dict[str, Any], Path], str]:
+    def run(assets: Dict[str, Any], output: Path) -> str:
+        import enhanced_video_pipeline as pipeline
+
+        probes = {'moviepy_enhanced': pipeline._probe_moviepy,
+                  'ffmpeg_python': pipeline._probe_ffmpeg_python,
+                  'ffmpeg_direct': pipeline._probe_ffmpeg_cli,
+                  'basic_fallback': pipeline._probe_ffmpeg_cli}
+        usable, reason = probes[method]()
+        if not usable:
+            raise BackendUnavailable(reason)
+
+        assembler = pipeline.EnhancedVideoAssembler()
+        # Same split of the voiceover across images that assemble_video_enhanced callers use
+        per_image = assets["audio_seconds"] / len(assets["images"])
+        return assembler.methods[method](
+            assets["images"], assets["audio"], str(output),
+            fps=assembler.default_fps, resolution=assembler.default_resolution,
+            duration_per_image=per_image, add_transitions=True, add_effects=True
+        )
+    return run
+
+def _run_ken_burns(assets: Dict[str, Any], output: Path) -> str:
+    os.environ["FINAL_VIDEO_SAVE_PATH"] = str(output.parent)
+    from automagic_multi_provider import MultiProviderVideoProduction
+
+    # Only the rendering half is measured; the constructor insists on configured API providers
+    production = MultiProviderVideoProduction.__new__(MultiProviderVideoProduction)
+    production.logger = logging.getLogger("AutoMagic.MultiProvider")
+    result = production.create_video(assets["images"], assets["audio"])
+    if result:
+        os.replace(result, output)
+        return str(output)
+    return result
+
+def _run_otto_assemble(assets: Dict[str, Any], output: Path) -> str:
+    # OTTO's own core package must win over the shared one for this import
+    sys.path.insert(0, str(OTTO_DIR))
+    from core.pipelines import video_assembler
+
+    video_assembler.VIDEO_OUTPUT_DIR = output.parent
+    result = video_assembler.assemble_video(assets["images"][0], assets["audio"], None, {})
+    if result:
+        os.replace(result, output)
+        return str(output)
+    return result
+
+BACKENDS: Dict[str, Callable[[Dict[str, Any], Path], str]] = {
+    "optimized_processor": _run_optimized_processor,
+    "enhanced.moviepy_enhanced": _enhanced_runner('moviepy_enhanced'),
+    "enhanced.ffmpeg_python": _enhanced_runner('ffmpeg_python'),
+    "enhanced.ffmpeg_direct": _enhanced_runner('ffmpeg_direct'),
+    "enhanced.basic_fallback": _enhanced_runner('basic_fallback'),
+    "ken_burns": _run_ken_burns,
+    "otto_assemble": _run_otto_assemble,
+}
+
+class _TreeSampler:
+    """Samples the RSS of this process and its children (ffmpeg) in a background thread"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="rss-sampler", daemon=True)
+
+    def _tree_rss(self) -> int:
+        total = 0
+        for process in [self.process] + self.process.children(recursive=True):
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _loop(self):
+        while True:
+            self.peak = max(self.peak, self._tree_rss())
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._tree_rss())
+
+def _cpu_seconds() -> float:
+    times = psutil.Process().cpu_times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def run_worker(backend: str, assets_file: Path, output: Path, result_file: Path):
+    """Render once with one backend in this (fresh) process and write the measurements"""
+    assets = json.loads(assets_file.read_text(encoding="utf-8"))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    result: Dict[str, Any] = {"backend": backend}
+    cpu_start = _cpu_seconds()
+    started = time.perf_counter()
+    try:
+        with _TreeSampler() as sampler:
+            produced = BACKENDS[backend](assets, output)
+        result["wall_seconds"] = time.perf_counter() - started
+        result["cpu_seconds"] = _cpu_seconds() - cpu_start
+        result["peak_rss_mb"] = sampler.peak / 1024**2
+        if not produced or not Path(produced).exists():
+            raise RuntimeError("backend returned no output")
+        from core.media import probe_duration
+        result["output_seconds"] = probe_duration(produced)
+        result["output_mb"] = Path(produced).stat().st_size / 1024**2
+        result["realtime_factor"] = result["output_seconds"] / result["wall_seconds"]
+        result["status"] = "ok"
+    except BackendUnavailable as e:
+        result.update(status="skipped", error=str(e))
+    except ImportError as e:
+        result.update(status="skipped", error=f"missing dependency: {e}")
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {e}",
+                      wall_seconds=time.perf_counter() - started)
+    result_file.write_text(json.dumps(result), encoding="utf-8")
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def _git_info() -> Dict[str, Any]:
+    def git(*args) -> str:
+        result = subprocess.run(['git', *args], cwd=ROOT_DIR, capture_output=True, text=True, timeout=60)
+        return result.stdout.strip() if result.returncode == 0 else ""
+    return {"commit": git('rev-parse', '--short', 'HEAD'),
+            "dirty": bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+def _host_info() -> Dict[str, Any]:
+    ffmpeg = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "cpu_count": os.cpu_count(), "memory_gb": round(psutil.virtual_memory().total / 1024**3, 1),
+            "ffmpeg": ffmpeg.stdout.splitlines()[0] if ffmpeg.returncode == 0 else "unavailable"}
+
+def _summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median of the successful repeats; a backend that failed any repeat reports the failure"""
+    ok = [run for run in runs if run["status"] == "ok"]
+    if len(ok) < len(runs):
+        bad = next(run for run in runs if run["status"] != "ok")
+        return {"status": bad["status"], "error": bad.get("error"), "runs": runs}
+    summary: Dict[str, Any] = {"status": "ok", "runs": runs}
+    for key in ("wall_seconds", "cpu_seconds", "realtime_factor", "peak_rss_mb", "output_mb", "output_seconds"):
+        summary[key] = round(statistics.median(run[key] for run in ok), 4)
+    return summary
+
+def run_suite(profile_name: str, backends: List[str], repeat: int, timeout: float,
+              keep: bool = False) -> Dict[str, Any]:
+    profile = PROFILES[profile_name]
+    work_dir = Path(tempfile.mkdtemp(prefix="automagic_bench_"))
+    try:
+        logger.info(f"Generating {profile['images']} images at {profile['image_size'][0]}x{profile['image_size'][1]} "
+                    f"and {profile['audio_seconds']:g}s of audio in {work_dir}")
+        make_assets(work_dir / "assets", profile)
+
+        results: Dict[str, Any] = {}
+        for backend in backends:
+            runs = []
+            for attempt in range(repeat):
+                # A fresh process per render: no warm caches, imports or RSS carried between backends
+                run_dir = work_dir / "runs" / f"{backend}_{attempt}"
+                run_dir.mkdir(parents=True)
+                result_file = run_dir / "result.json"
+                cmd = [sys.executable, str(Path(__file__).resolve()), "--worker", backend,
+                       "--assets", str(work_dir / "assets" / "assets.json"),
+                       "--output", str(run_dir / "out" / "video.mp4"), "--result", str(result_file)]
+                try:
+                    completed = subprocess.run(cmd, cwd=run_dir, capture_output=True, text=True, timeout=timeout)
+                    run = (json.loads(result_file.read_text(encoding="utf-8")) if result_file.exists()
+                           else {"status": "failed", "error": completed.stderr.strip()[-500:]})
+                except subprocess.TimeoutExpired:
+                    run = {"status": "failed", "error": f"timed out after {timeout:g}s"}
+                run.pop("backend", None)
+                runs.append(run)
+                if run["status"] == "ok":
+                    logger.info(f"{backend} #{attempt + 1}: {run['wall_seconds']:.2f}s, "
+                                f"{run['realtime_factor']:.2f}x realtime, {run['peak_rss_mb']:.0f}MB peak, "
+                                f"{run['output_mb']:.2f}MB")
+                else:
+                    logger.warning(f"{backend} #{attempt + 1} {run['status']}: {run.get('error')}")
+                    break  # Repeating a skipped or broken backend only costs time
+            results[backend] = _summarize(runs)
+
+        return {"schema": SCHEMA_VERSION, "created_at": datetime.now().isoformat(timespec="seconds"),
+                "git": _git_info(), "host": _host_info(),
+                "profile": {"name": profile_name, **profile, "repeat": repeat},
+                "results": results}
+    finally:
+        if keep:
+            logger.info(f"Kept benchmark files in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+def print_report(report: Dict[str, Any]):
+    profile = report["profile"]
+    print(f"\nBenchmark {report['git'].get('commit') or 'unknown'}{' (dirty)' if report['git'].get('dirty') else ''} "
+          f"- profile {profile['name']}: {profile['images']} images, {profile['audio_seconds']:g}s audio, "
+          f"median of {profile['repeat']}")
+    print(f"{'backend':28} {'wall s':>8} {'rt x':>7} {'cpu s':>8} {'peak MB':>8} {'out MB':>7} {'out s':>6}")
+    for backend, result in report["results"].items():
+        if result["status"] != "ok":
+            print(f"{backend:28} {result['status']}: {result.get('error')}")
+            continue
+        print(f"{backend:28} {result['wall_seconds']:8.2f} {result['realtime_factor']:7.2f} "
+              f"{result['cpu_seconds']:8.2f} {result['peak_rss_mb']:8.0f} {result['output_mb']:7.2f} "
+              f"{result['output_seconds']:6.1f}")
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print per-backend changes; returns the regressions larger than threshold (a fraction)"""
+    print(f"\nComparing {baseline['git'].get('commit') or 'baseline'} -> {current['git'].get('commit') or 'current'}")
+    if baseline["profile"]["name"] != current["profile"]["name"]:
+        print(f"Warning: profiles differ ({baseline['profile']['name']} vs {current['profile']['name']})")
+    regressions = []
+    for backend in sorted(set(baseline["results"]) | set(current["results"])):
+        old, new = baseline["results"].get(backend), current["results"].get(backend)
+        if not old or not new or old["status"] != "ok" or new["status"] != "ok":
+            print(f"{backend:28} {old['status'] if old else 'absent'} -> {new['status'] if new else 'absent'}")
+            continue
+        changes = []
+        for key in COMPARED_FIELDS:
+            before, after = old[key], new[key]
+            if not before:
+                continue
+            change = (after - before) / before
+            worse = -change if key == "realtime_factor" else change
+            changes.append(f"{key} {before:.2f}->{after:.2f} ({change:+.1%})")
+            if worse > threshold:
+                regressions.append(f"{backend} {key} {change:+.1%}")
+        print(f"{backend:28} " + ", ".join(changes))
+    if regressions:
+        print(f"\nRegressions beyond {threshold:.0%}: " + "; ".join(regressions))
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the video assembly backends on synthetic assets")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="production")
+    parser.add_argument("--backend", action="append", choices=sorted(BACKENDS),
+                        help="Backend to run (repeatable; default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="Renders per backend; the median is reported")
+    parser.add_argument("--timeout", type=float, default=900, help="Seconds allowed per render")
+    parser.add_argument("--output", help="Result JSON path (default: benchmark_results/<time>_<commit>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="Compare BASELINE against CURRENT (or against this run when only one is given)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold as a fraction")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 when a regression is found")
+    parser.add_argument("--keep", action="store_true", help="Keep generated assets and outputs")
+    # Internal: one render inside a fresh process
+    parser.add_argument("--worker", choices=sorted(BACKENDS), help=argparse.SUPPRESS)
+    parser.add_argument("--assets", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        logging.basicConfig(level=logging.WARNING)
+        run_worker(args.worker, Path(args.assets), Path(args.output), Path(args.result))
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.compare and len(args.compare) == 2:
+        baseline, current = (json.loads(Path(path).read_text(encoding="utf-8")) for path in args.compare)
+        regressions = compare_reports(baseline, current, args.threshold)
+        return 1 if regressions and args.fail_on_regression else 0
+
+    if not shutil.which('ffmpeg'):
+        logger.error("ffmpeg not found on PATH")
+        return 1
+
+    report = run_suite(args.profile, args.backend or list(BACKENDS), max(1, args.repeat), args.timeout, args.keep)
+    print_report(report)
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}_{report['git'].get('commit') or 'nogit'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    logger.info(f"Results saved to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare[0]).read_text(encoding="utf-8"))
+        regressions = compare_reports(baseline, report, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
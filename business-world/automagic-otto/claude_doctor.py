@@ -9,7 +9,8 @@ import json
 import pickle
 from pathlib import Path
 from datetime import datetime
-import subprocess
+
+from core.media import inspect_media, PRIORITY_INTERACTIVE, run_ffmpeg_sync
 
 def diagnostic_header():
     print("=" * 60)
@@ -127,17 +128,10 @@ def check_recent_videos():
             print(f"     Created: {mod_time.strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"     Size: {size_mb:.1f} MB")
             
-            # Try to get video info with ffprobe
+            # Read video info from the container
             try:
-                result = subprocess.run([
-                    'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                    '-show_format', str(video)
-                ], capture_output=True, text=True)
-                
-                if result.returncode == 0:
-                    info = json.loads(result.stdout)
-                    duration = float(info['format']['duration'])
-                    print(f"     Duration: {duration:.1f} seconds")
+                duration = inspect_media(video).duration
+                print(f"     Duration: {duration:.1f} seconds")
                     
             except Exception as e:
                 print(f"     Duration: Unable to check")
@@ -190,7 +184,8 @@ def check_dependencies():
     
     # Check FFmpeg
     try:
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         if result.returncode == 0:
             version_line = result.stdout.split('\\n')[0]
             print(f"✅ FFmpeg: {version_line}")
@@ -4,10 +4,11 @@ Complete OTTO Epic - Finish the epic video with existing segments
 """
 
 import os
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from core.media import run_ffmpeg_sync
+
 def complete_otto_epic():
     """Complete OTTO's epic video with existing segments"""
     
@@ -52,7 +53,7 @@ def complete_otto_epic():
             str(segment_path)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = run_ffmpeg_sync(cmd, check=False)
         
         if result.returncode == 0:
             segments.append(str(segment_path))
@@ -81,7 +82,7 @@ def complete_otto_epic():
         str(concat_video)
     ]
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = run_ffmpeg_sync(cmd, check=False)
     
     if result.returncode != 0:
         print(f"Concatenation failed: {result.stderr}")
@@ -117,7 +118,7 @@ def complete_otto_epic():
             str(final_output)
         ]
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = run_ffmpeg_sync(cmd, check=False)
     
     if result.returncode == 0:
         file_size = os.path.getsize(final_output) / (1024 * 1024)
@@ -3,6 +3,11 @@ Async API module for AutoMagic
 High-performance API clients with connection pooling and caching
 """
 
-from .async_client import AsyncAPIClient, get_api_client
+__all__ = ["AsyncAPIClient", "get_api_client"]
 
-__all__ = ["AsyncAPIClient", "get_api_client"]
\ No newline at end of file
+def __getattr__(name):
+    # Loaded on first use so the stdlib-only emulator (python -m core.api.emulator) runs without the SDKs
+    if name in __all__:
+        from . import async_client
+        return getattr(async_client, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
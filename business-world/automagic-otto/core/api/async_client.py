@@ -23,6 +23,7 @@ from tenacity import (
     retry_if_exception_type
 )
 from ..config import get_config
+from ..utils.metrics import record_cache, track_provider_call
 
 logger = logging.getLogger("AutoMagic.API")
 
@@ -84,14 +85,17 @@ class APICache:
         key = self._generate_key(method, params)
         
         if key not in self._cache:
+            record_cache("api", False)
             return None
         
         entry = self._cache[key]
         if time.time() - entry["timestamp"] > self.ttl:
             self._evict(key)
+            record_cache("api", False)
             return None
         
         self._access_times[key] = time.time()
+        record_cache("api", True)
         return entry["data"]
     
     def set(self, method: str, params: Dict[str, Any], data: Any):
@@ -168,13 +172,15 @@ class AsyncAPIClient:
         if self.config.api.openai_api_key:
             self.openai_client = openai.AsyncOpenAI(
                 api_key=self.config.api.openai_api_key,
+                base_url=self.config.api.openai_base_url,
                 max_retries=0  # We handle retries ourselves
             )
         
         # ElevenLabs client
         if self.config.api.elevenlabs_api_key:
             self.elevenlabs_client = AsyncElevenLabs(
-                api_key=self.config.api.elevenlabs_api_key
+                api_key=self.config.api.elevenlabs_api_key,
+                base_url=self.config.api.elevenlabs_base_url
             )
         
         logger.info("AsyncAPIClient initialized with connection pooling")
@@ -257,15 +263,16 @@ class AsyncAPIClient:
             
             Return only the topic title, nothing else."""
             
-            response = await self.openai_client.chat.completions.create(
-                model=self.config.api.openai_model,
-                messages=[
-                    {"role": "system", "content": "You are a creative YouTube content strategist."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=50,
-                temperature=0.8
-            )
+            with track_provider_call("topic", "openai"):
+                response = await self.openai_client.chat.completions.create(
+                    model=self.config.api.openai_model,
+                    messages=[
+                        {"role": "system", "content": "You are a creative YouTube content strategist."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=50,
+                    temperature=0.8
+                )
             
             topic = response.choices[0].message.content.strip().strip('"')
             
@@ -318,15 +325,16 @@ Requirements:
 
 Format as plain text with clear sections."""
             
-            response = await self.openai_client.chat.completions.create(
-                model=self.config.api.openai_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert YouTube script writer."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=400,
-                temperature=0.7
-            )
+            with track_provider_call("script", "openai"):
+                response = await self.openai_client.chat.completions.create(
+                    model=self.config.api.openai_model,
+                    messages=[
+                        {"role": "system", "content": "You are an expert YouTube script writer."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=400,
+                    temperature=0.7
+                )
             
             script = response.choices[0].message.content.strip()
             
@@ -396,13 +404,14 @@ Format as plain text with clear sections."""
             # Enhance prompt for better results
             enhanced_prompt = f"{prompt}, high quality, professional, clean background, 16:9 aspect ratio"
             
-            response = await self.openai_client.images.generate(
-                model=self.config.api.dalle_model,
-                prompt=enhanced_prompt,
-                n=1,
-                size=self.config.api.dalle_image_size,
-                response_format="url"
-            )
+            with track_provider_call("image", "openai"):
+                response = await self.openai_client.images.generate(
+                    model=self.config.api.dalle_model,
+                    prompt=enhanced_prompt,
+                    n=1,
+                    size=self.config.api.dalle_image_size,
+                    response_format="url"
+                )
             
             image_url = response.data[0].url
             
@@ -499,11 +508,12 @@ Format as plain text with clear sections."""
             clean_text = self._clean_text_for_speech(text)
             
             # Generate audio
-            audio_generator = await self.elevenlabs_client.generate(
-                text=clean_text,
-                voice=self.config.api.elevenlabs_voice_id or "Rachel",
-                model=self.config.api.elevenlabs_model_id
-            )
+            with track_provider_call("voice", "elevenlabs"):
+                audio_generator = await self.elevenlabs_client.generate(
+                    text=clean_text,
+                    voice=self.config.api.elevenlabs_voice_id or "Rachel",
+                    model=self.config.api.elevenlabs_model_id
+                )
             
             # Save audio
             audio_path = self.config.paths.audio_save_path / f"voiceover_{int(time.time())}.mp3"
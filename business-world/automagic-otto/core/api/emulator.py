@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+Provider Emulator
+Local stand-in for the script, image and voice APIs with configurable latency, errors and rate limits
+"""
+
+import argparse
+import base64
+import io
+import json
+import logging
+import math
+import random
+import re
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+import wave
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger("AutoMagic.Emulator")
+
+PROVIDERS = ("openai", "groq", "gemini", "together", "huggingface", "stability", "replicate",
+             "elevenlabs", "googletts")
+
+# p95 as a multiple of the median when only the median is given (the defaults' 400/1200ms shape)
+LATENCY_TAIL_RATIO = 3.0
+
+@dataclass
+class ProviderProfile:
+    """How one emulated provider behaves"""
+    latency_ms: float = 400.0  # Median response time
+    latency_p95_ms: float = 1200.0  # Log-normal tail; equal to latency_ms for a fixed delay, 3x when omitted
+    error_rate: float = 0.0  # Share of requests answered 500
+    throttle_rate: float = 0.0  # Share of requests answered 429 regardless of the limits below
+    requests_per_minute: int = 0  # Token-bucket limit; 0 means unlimited
+    max_concurrency: int = 0  # Requests in flight beyond this get 429; 0 means unlimited
+    retry_after_seconds: float = 1.0  # Advertised on random 429s
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Seconds to wait before answering"""
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_p95_ms <= self.latency_ms:
+            return self.latency_ms / 1000
+        sigma = math.log(self.latency_p95_ms / self.latency_ms) / 1.645
+        return rng.lognormvariate(math.log(self.latency_ms), sigma) / 1000
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any], base: Optional["ProviderProfile"] = None) -> "ProviderProfile":
+        known = {f.name for f in fields(cls)}
+        unknown = set(values) - known
+        if unknown:
+            raise ValueError(f"Unknown provider profile settings: {sorted(unknown)}")
+        merged = asdict(base) if base else {}
+        merged.update(values)
+        # A new median without a p95 keeps the tail's shape instead of the old absolute p95
+        if "latency_ms" in values and "latency_p95_ms" not in values:
+            merged["latency_p95_ms"] = merged["latency_ms"] * LATENCY_TAIL_RATIO
+        return cls(**merged)
+
+class _ProviderState:
+    """Rate-limit bucket, in-flight count and statistics of one provider"""
+
+    def __init__(self, profile: ProviderProfile):
+        self.profile = profile
+        self.lock = threading.Lock()
+        self.tokens = float(profile.requests_per_minute)
+        self.refilled = time.monotonic()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.statuses: Dict[int, int] = {}
+        self.latencies: List[float] = []
+
+    def _refill(self):
+        limit = self.profile.requests_per_minute
+        now = time.monotonic()
+        self.tokens = min(float(limit), self.tokens + (now - self.refilled) * limit / 60)
+        self.refilled = now
+
+    def admit(self) -> Tuple[Optional[str], Dict[str, str]]:
+        """(rejection reason or None, rate-limit headers); an admitted request counts as in flight"""
+        with self.lock:
+            headers: Dict[str, str] = {}
+            limit = self.profile.requests_per_minute
+            if limit:
+                self._refill()
+                reset = (1 - self.tokens) * 60 / limit if self.tokens < 1 else 0.0
+                headers = {"x-ratelimit-limit-requests": str(limit),
+                           "x-ratelimit-remaining-requests": str(max(0, int(self.tokens) - 1)),
+                           "x-ratelimit-reset-requests": f"{reset:.3f}s"}
+                if self.tokens < 1:
+                    headers["retry-after"] = str(max(1, math.ceil(reset)))
+                    return "rate limit exceeded", headers
+            if self.profile.max_concurrency and self.in_flight >= self.profile.max_concurrency:
+                headers["retry-after"] = "1"
+                return "too many concurrent requests", headers
+            if limit:
+                self.tokens -= 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return None, headers
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def record(self, status: int, seconds: float):
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.latencies.append(seconds)
+            if len(self.latencies) > 10000:
+                del self.latencies[:5000]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            ordered = sorted(self.latencies)
+            def percentile(q: float) -> Optional[float]:
+                return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4) if ordered else None
+            return {"requests": sum(self.statuses.values()),
+                    "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+                    "in_flight": self.in_flight, "peak_in_flight": self.peak_in_flight,
+                    "latency_p50": percentile(0.5), "latency_p95": percentile(0.95),
+                    "profile": asdict(self.profile)}
+
+class _MediaFactory:
+    """Synthetic JPEG images and MP3 speech, cached by size and duration"""
+
+    def __init__(self, cache_size: int = 32):
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self.cache_size = cache_size
+        self.files: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()  # Served under /files/
+
+    def _cached(self, key: Tuple, build: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        data = build()
+        with self._lock:
+            self._cache[key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    def image(self, prompt: str, width: int = 1024, height: int = 1024) -> bytes:
+        width, height = max(16, min(width, 2048)), max(16, min(height, 2048))
+        shade = sum(prompt.encode("utf-8")) % 8
+
+        def build() -> bytes:
+            from PIL import Image
+            gradient = Image.linear_gradient("L")
+            hue = gradient.resize((width, height))
+            other = gradient.transpose(Image.Transpose.ROTATE_90).resize((width, height))
+            tint = Image.new("L", (width, height), 40 + shade * 25)
+            buffer = io.BytesIO()
+            Image.merge("RGB", (hue, other, tint)).save(buffer, format="JPEG", quality=85)
+            return buffer.getvalue()
+
+        return self._cached(("image", width, height, shade), build)
+
+    def speech(self, text: str) -> Tuple[bytes, str]:
+        """Audio lasting roughly as long as the text takes to read, as MP3 (or WAV without ffmpeg)"""
+        seconds = max(1, min(600, round(len(text.split()) * 0.4)))
+        use_mp3 = shutil.which("ffmpeg") is not None
+
+        def build() -> bytes:
+            if use_mp3:
+                return subprocess.run([
+                    "ffmpeg", "-loglevel", "error", "-f", "lavfi",
+                    "-i", f"sine=frequency=220:duration={seconds}",
+                    "-ar", "44100", "-ac", "1", "-b:a", "128k", "-f", "mp3", "-"
+                ], capture_output=True, check=True).stdout
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as out:
+                out.setnchannels(1)
+                out.setsampwidth(2)
+                out.setframerate(16000)
+                out.writeframes(b"\x00\x00" * 16000 * seconds)
+            return buffer.getvalue()
+
+        return self._cached(("speech", seconds, use_mp3), build), "audio/mpeg" if use_mp3 else "audio/wav"
+
+    def publish(self, data: bytes, content_type: str, suffix: str) -> str:
+        """Keep a generated file for download and return its name"""
+        name = f"{uuid.uuid4().hex}.{suffix}"
+        with self._lock:
+            self.files[name] = (data, content_type)
+            while len(self.files) > 256:
+                self.files.popitem(last=False)
+        return name
+
+class EmulatorError(Exception):
+    """An emulated failure answered with the given status"""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+def _error_body(provider: str, status: int, message: str) -> Dict[str, Any]:
+    """Error payloads shaped like each provider's own"""
+    if provider in ("gemini", "googletts"):
+        google_status = {429: "RESOURCE_EXHAUSTED", 404: "NOT_FOUND"}.get(status, "INTERNAL")
+        return {"error": {"code": status, "message": message, "status": google_status}}
+    if provider == "elevenlabs":
+        return {"detail": {"status": "too_many_concurrent_requests" if status == 429 else "error",
+                           "message": message}}
+    if provider in ("huggingface", "replicate"):
+        return {"error": message, "detail": message}
+    error_type = "rate_limit_exceeded" if status == 429 else "server_error"
+    return {"error": {"message": message, "type": error_type, "code": error_type}}
+
+class ProviderEmulator:
+    """Threaded HTTP server answering each provider's API under /<provider>/<real path>"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765,
+                 default: Optional[ProviderProfile] = None,
+                 profiles: Optional[Dict[str, ProviderProfile]] = None, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.default = default or ProviderProfile()
+        self._states = {name: _ProviderState((profiles or {}).get(name, self.default)) for name in PROVIDERS}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.media = _MediaFactory()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._routes: List[Tuple[str, str, "re.Pattern", Callable]] = [
+            ("GET", "openai", re.compile(r"/v1/models"), self._list_models),
+            ("POST", "openai", re.compile(r"/v1/chat/completions"), self._chat_completion),
+            ("POST", "openai", re.compile(r"/v1/images/generations"), self._openai_image),
+            ("GET", "groq", re.compile(r"/openai/v1/models"), self._list_models),
+            ("POST", "groq", re.compile(r"/openai/v1/chat/completions"), self._chat_completion),
+            ("GET", "gemini", re.compile(r"/v1beta/models"), self._gemini_models),
+            ("POST", "gemini", re.compile(r"/v1beta/models/(?P<model>[^/:]+):generateContent"),
+             self._gemini_generate),
+            ("GET", "together", re.compile(r"/v1/models"), self._list_models),
+            ("POST", "together", re.compile(r"/v1/images/generations"), self._together_image),
+            ("GET", "huggingface", re.compile(r"/api/whoami-v2"), self._whoami),
+            ("POST", "huggingface", re.compile(r"/models/(?P<model>.+)"), self._raw_image),
+            ("GET", "stability", re.compile(r"/v1/user/account"), self._whoami),
+            ("POST", "stability", re.compile(r"/v2beta/stable-image/generate/(?P<model>[^/]+)"), self._raw_image),
+            ("GET", "replicate", re.compile(r"/v1/models"), self._list_models),
+            ("POST", "replicate", re.compile(r"/v1/models/(?P<model>[^/]+/[^/]+)/predictions"),
+             self._replicate_predict),
+            ("POST", "replicate", re.compile(r"/v1/predictions"), self._replicate_predict),
+            ("GET", "replicate", re.compile(r"/v1/predictions/(?P<id>[^/]+)"), self._replicate_get),
+            ("GET", "elevenlabs", re.compile(r"/v1/voices"), self._elevenlabs_voices),
+            ("POST", "elevenlabs", re.compile(r"/v1/text-to-speech/(?P<voice>[^/]+)(/stream)?"),
+             self._elevenlabs_speech),
+            ("GET", "googletts", re.compile(r"/v1/voices"), self._google_voices),
+            ("POST", "googletts", re.compile(r"/v1/text:synthesize"), self._google_speech),
+        ]
+        self._predictions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # -- lifecycle -------------------------------------------------------
+
+    def start(self) -> "ProviderEmulator":
+        handler = type("EmulatorHandler", (_Handler,), {"emulator": self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="provider-emulator", daemon=True)
+        self._thread.start()
+        logger.info(f"Provider emulator listening on {self.url}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "ProviderEmulator":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # -- control ---------------------------------------------------------
+
+    def configure(self, provider: str, **settings: Any):
+        """Change a provider's profile while running; counters are kept"""
+        state = self._states[provider]
+        with state.lock:
+            state.profile = ProviderProfile.from_dict(settings, state.profile)
+            state.tokens = min(state.tokens, float(state.profile.requests_per_minute))
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: state.snapshot() for name, state in self._states.items()}
+
+    def reset_stats(self):
+        for state in self._states.values():
+            with state.lock:
+                state.statuses.clear()
+                state.latencies.clear()
+                state.peak_in_flight = state.in_flight
+
+    # -- request handling ------------------------------------------------
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], headers: Dict[str, str],
+               body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Route one request; returns (status, headers, body)"""
+        if path.startswith("/files/"):
+            entry = self.media.files.get(path[len("/files/"):])
+            if entry is None:
+                return self._json(404, {"error": "not found"})
+            return 200, {"Content-Type": entry[1]}, entry[0]
+        if path == "/_emulator/stats":
+            return self._json(200, self.stats())
+        if path == "/_emulator/reset" and method == "POST":
+            self.reset_stats()
+            return self._json(200, {"reset": True})
+        if path.startswith("/_emulator/config/") and method == "POST":
+            provider = path.rsplit("/", 1)[-1]
+            if provider not in self._states:
+                return self._json(404, {"error": f"unknown provider {provider}"})
+            try:
+                self.configure(provider, **json.loads(body or b"{}"))
+            except (TypeError, ValueError) as e:
+                return self._json(400, {"error": str(e)})
+            return self._json(200, self._states[provider].snapshot()["profile"])
+
+        provider, _, rest = path.lstrip("/").partition("/")
+        rest = "/" + rest
+        state = self._states.get(provider)
+        if state is None:
+            return self._json(404, {"error": f"unknown provider '{provider}'"})
+        for route_method, route_provider, pattern, handler in self._routes:
+            if route_provider != provider or route_method != method:
+                continue
+            match = pattern.fullmatch(rest)
+            if match:
+                return self._serve(provider, state, handler, match.groupdict(), query, headers, body)
+        return self._json(404, _error_body(provider, 404, f"{method} {rest} is not emulated"))
+
+    def _serve(self, provider: str, state: _ProviderState, handler: Callable, params: Dict[str, str],
+               query: Dict[str, List[str]], headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        started = time.monotonic()
+        rejection, limit_headers = state.admit()
+        if rejection:
+            state.record(429, time.monotonic() - started)
+            status, response_headers, payload = self._json(429, _error_body(provider, 429, rejection))
+            response_headers.update(limit_headers)
+            return status, response_headers, payload
+
+        profile = state.profile
+        with self._rng_lock:
+            delay = profile.sample_latency(self._rng)
+            roll = self._rng.random()
+        try:
+            time.sleep(delay)
+            if roll < profile.throttle_rate:
+                raise EmulatorError(429, "rate limit exceeded (emulated)",
+                                    {"retry-after": f"{profile.retry_after_seconds:g}"})
+            if roll < profile.throttle_rate + profile.error_rate:
+                raise EmulatorError(500, "internal server error (emulated)")
+            request = self._parse_body(headers, body)
+            status, response_headers, payload = handler(provider, params, query, request)
+        except EmulatorError as e:
+            status, response_headers, payload = self._json(e.status, _error_body(provider, e.status, str(e)))
+            response_headers.update(e.headers)
+        finally:
+            state.release()
+        response_headers.update(limit_headers)
+        state.record(status, time.monotonic() - started)
+        return status, response_headers, payload
+
+    @staticmethod
+    def _parse_body(headers: Dict[str, str], body: bytes) -> Dict[str, Any]:
+        content_type = headers.get("content-type", "")
+        if not body:
+            return {}
+        if "application/json" in content_type or body[:1] in (b"{", b"["):
+            try:
+                return json.loads(body)
+            except ValueError:
+                raise EmulatorError(400, "malformed JSON body")
+        if "multipart/form-data" in content_type:
+            # Only the simple text fields matter here (prompt, output_format)
+            fields = re.findall(rb'name="([^"]+)"\r\n\r\n(.*?)\r\n--', body, re.S)
+            return {name.decode(): value.decode(errors="replace") for name, value in fields}
+        if "application/x-www-form-urlencoded" in content_type:
+            return {key: values[-1] for key, values in parse_qs(body.decode()).items()}
+        return {}
+
+    @staticmethod
+    def _json(status: int, payload: Any) -> Tuple[int, Dict[str, str], bytes]:
+        return status, {"Content-Type": "application/json"}, json.dumps(payload).encode("utf-8")
+
+    def _file_url(self, data: bytes, content_type: str, suffix: str) -> str:
+        return f"{self.url}/files/{self.media.publish(data, content_type, suffix)}"
+
+    # -- provider endpoints ----------------------------------------------
+
+    def _list_models(self, provider, params, query, request):
+        return self._json(200, {"object": "list", "data": [{"id": f"{provider}-emulated", "object": "model"}]})
+
+    def _whoami(self, provider, params, query, request):
+        return self._json(200, {"name": "emulator", "id": "emulated-account", "credits": 1000})
+
+    @staticmethod
+    def _script(prompt: str) -> str:
+        topic = re.search(r"'([^']{3,80})'", prompt or "")
+        subject = topic.group(1) if topic else "this topic"
+        return (f"[excited] Have you ever wondered about {subject}? [pauses] Here are three things most people "
+                f"never notice. First, it is older than you think. Second, it shows up in everyday life. "
+                f"[curious] And third, scientists are still learning about it. [warm] If you enjoyed this, "
+                f"like and subscribe for more.")
+
+    def _chat_completion(self, provider, params, query, request):
+        messages = request.get("messages") or [{"content": ""}]
+        content = self._script(str(messages[-1].get("content", "")))
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        completion_tokens = len(content.split())
+        return self._json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get("model", f"{provider}-emulated"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}})
+
+    def _gemini_models(self, provider, params, query, request):
+        return self._json(200, {"models": [{"name": "models/gemini-emulated",
+                                            "supportedGenerationMethods": ["generateContent"]}]})
+
+    def _gemini_generate(self, provider, params, query, request):
+        parts = (request.get("contents") or [{}])[-1].get("parts") or [{}]
+        text = self._script(str(parts[-1].get("text", "")))
+        return self._json(200, {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                                "finishReason": "STOP"}],
+                                "modelVersion": params["model"]})
+
+    @staticmethod
+    def _size(request: Dict[str, Any], default: Tuple[int, int] = (1024, 1024)) -> Tuple[int, int]:
+        if isinstance(request.get("size"), str) and "x" in request["size"]:
+            width, height = request["size"].split("x", 1)
+            return int(width), int(height)
+        return int(request.get("width", default[0])), int(request.get("height", default[1]))
+
+    def _openai_image(self, provider, params, query, request):
+        image = self.media.image(str(request.get("prompt", "")), *self._size(request))
+        count = max(1, int(request.get("n", 1)))
+        if request.get("response_format") == "b64_json":
+            data = [{"b64_json": base64.b64encode(image).decode("ascii")} for _ in range(count)]
+        else:
+            data = [{"url": self._file_url(image, "image/jpeg", "jpg")} for _ in range(count)]
+        return self._json(200, {"created": int(time.time()), "data": data})
+
+    def _together_image(self, provider, params, query, request):
+        image = self.media.image(str(request.get("prompt", "")), *self._size(request, (1024, 576)))
+        return self._json(200, {"id": uuid.uuid4().hex, "model": request.get("model"), "object": "list",
+                                "data": [{"index": 0, "url": self._file_url(image, "image/jpeg", "jpg")}]})
+
+    def _raw_image(self, provider, params, query, request):
+        prompt = str(request.get("inputs") or request.get("prompt") or "")
+        return 200, {"Content-Type": "image/jpeg"}, self.media.image(prompt, 1024, 576)
+
+    def _replicate_predict(self, provider, params, query, request):
+        inputs = request.get("input") or {}
+        image = self.media.image(str(inputs.get("prompt", "")), 1024, 576)
+        prediction_id = uuid.uuid4().hex[:20]
+        prediction = {"id": prediction_id, "model": params.get("model", request.get("version", "")),
+                      "status": "succeeded", "input": inputs,
+                      "output": [self._file_url(image, "image/jpeg", "jpg")],
+                      "urls": {"get": f"{self.url}/replicate/v1/predictions/{prediction_id}"},
+                      "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "error": None,
+                      "logs": "", "metrics": {"predict_time": 0.0}}
+        self._predictions[prediction_id] = prediction
+        while len(self._predictions) > 256:
+            self._predictions.popitem(last=False)
+        return self._json(201, prediction)
+
+    def _replicate_get(self, provider, params, query, request):
+        prediction = self._predictions.get(params["id"])
+        if prediction is None:
+            raise EmulatorError(404, "prediction not found")
+        return self._json(200, prediction)
+
+    def _elevenlabs_voices(self, provider, params, query, request):
+        voices = [{"voice_id": voice_id, "name": name, "category": "premade"}
+                  for name, voice_id in (("Rachel", "21m00Tcm4TlvDq8ikWAM"), ("Jessica", "cgSgspJ2msm6clMCkdW9"),
+                                         ("George", "JBFqnCBsd6RMkjVDRZzb"))]
+        return self._json(200, {"voices": voices})
+
+    def _elevenlabs_speech(self, provider, params, query, request):
+        audio, content_type = self.media.speech(str(request.get("text", "")))
+        return 200, {"Content-Type": content_type}, audio
+
+    def _google_voices(self, provider, params, query, request):
+        return self._json(200, {"voices": [{"languageCodes": ["en-US"], "name": "en-US-Neural2-J",
+                                            "ssmlGender": "MALE", "naturalSampleRateHertz": 24000}]})
+
+    def _google_speech(self, provider, params, query, request):
+        text = str((request.get("input") or {}).get("text", ""))
+        audio, _ = self.media.speech(text)
+        return self._json(200, {"audioContent": base64.b64encode(audio).decode("ascii")})
+
+class _Handler(BaseHTTPRequestHandler):
+    emulator: ProviderEmulator
+    protocol_version = "HTTP/1.1"
+
+    def _dispatch(self, method: str):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        headers = {key.lower(): value for key, value in self.headers.items()}
+        try:
+            status, response_headers, payload = self.emulator.handle(method, parts.path, parse_qs(parts.query),
+                                                                     headers, body)
+        except Exception as e:
+            logger.exception(f"Emulator failed on {method} {self.path}")
+            status, response_headers, payload = ProviderEmulator._json(500, {"error": str(e)})
+        self.send_response(status)
+        for key, value in response_headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def load_profiles(path: str) -> Tuple[ProviderProfile, Dict[str, ProviderProfile]]:
+    """A JSON file of {"default": {...}, "providers": {"together": {...}, ...}}"""
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    default = ProviderProfile.from_dict(data.get("default", {}))
+    providers = data.get("providers", {})
+    unknown = set(providers) - set(PROVIDERS)
+    if unknown:
+        raise ValueError(f"Unknown providers in {path}: {sorted(unknown)}")
+    return default, {name: ProviderProfile.from_dict(values, default) for name, values in providers.items()}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve emulated provider APIs for offline load and latency testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--config", help="JSON file with default and per-provider profiles")
+    parser.add_argument("--latency-ms", type=float,
+                        help=f"Median latency for every provider; p95 defaults to {LATENCY_TAIL_RATIO:g}x this")
+    parser.add_argument("--latency-p95-ms", type=float,
+                        help="p95 latency for every provider; equal to --latency-ms for a fixed delay")
+    parser.add_argument("--error-rate", type=float, help="Share of requests answered 500")
+    parser.add_argument("--throttle-rate", type=float, help="Share of requests answered 429")
+    parser.add_argument("--rpm", type=int, help="Requests per minute per provider before 429")
+    parser.add_argument("--max-concurrency", type=int, help="In-flight requests per provider before 429")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible latency and error draws")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    default, profiles = load_profiles(args.config) if args.config else (ProviderProfile(), {})
+    overrides = {key: value for key, value in {
+        "latency_ms": args.latency_ms, "latency_p95_ms": args.latency_p95_ms, "error_rate": args.error_rate,
+        "throttle_rate": args.throttle_rate, "requests_per_minute": args.rpm,
+        "max_concurrency": args.max_concurrency}.items() if value is not None}
+    if overrides:
+        default = ProviderProfile.from_dict(overrides, default)
+        profiles = {name: ProviderProfile.from_dict(overrides, profile) for name, profile in profiles.items()}
+
+    emulator = ProviderEmulator(args.host, args.port, default, profiles, args.seed).start()
+    print(f"export PROVIDER_EMULATOR_URL={emulator.url}")
+    print("Set each provider's API key to any value; stats at /_emulator/stats")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,11 +7,13 @@ from .settings import (
     config,
     get_config,
     validate_config,
+    provider_url,
     APIConfig,
     PathConfig,
     VideoConfig,
     ResourceConfig,
     ProductionConfig,
+    MetricsConfig,
     ConfigManager
 )
 
@@ -19,10 +21,12 @@ __all__ = [
     "config",
     "get_config", 
     "validate_config",
+    "provider_url",
     "APIConfig",
     "PathConfig", 
     "VideoConfig",
     "ResourceConfig",
     "ProductionConfig",
+    "MetricsConfig",
     "ConfigManager"
 ]
\ No newline at end of file
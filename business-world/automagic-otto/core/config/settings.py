@@ -10,6 +10,7 @@ import json
 import logging
 from pathlib import Path
 from typing import Dict, Any, Optional, List
+from urllib.parse import urlsplit
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
 import psutil
@@ -17,6 +18,16 @@ import psutil
 # Load environment variables
 load_dotenv()
 
+def provider_url(provider: str, default: str, override_var: Optional[str] = None) -> str:
+    """Endpoint for a provider: an explicit override, else the local provider emulator when set, else default"""
+    if override_var and os.getenv(override_var):
+        return os.getenv(override_var).rstrip("/")
+    emulator = os.getenv("PROVIDER_EMULATOR_URL", "").rstrip("/")
+    if emulator:
+        # The emulator serves each provider's real paths under /<provider>
+        return f"{emulator}/{provider}{urlsplit(default).path}".rstrip("/")
+    return default
+
 @dataclass
 class APIConfig:
     """API configuration with validation"""
@@ -29,6 +40,10 @@ class APIConfig:
     elevenlabs_voice_id: str = ""
     elevenlabs_model_id: str = "eleven_multilingual_v2"
     
+    # Endpoints; PROVIDER_EMULATOR_URL points every provider at a local emulator
+    openai_base_url: str = "https://api.openai.com/v1"
+    elevenlabs_base_url: str = "https://api.elevenlabs.io"
+    
     google_api_key: str = ""
     youtube_client_id: str = ""
     youtube_client_secret: str = ""
@@ -52,6 +67,9 @@ class APIConfig:
         self.elevenlabs_voice_id = os.getenv("ELEVENLABS_VOICE_ID", self.elevenlabs_voice_id)
         self.elevenlabs_model_id = os.getenv("ELEVENLABS_MODEL_ID", self.elevenlabs_model_id)
         
+        self.openai_base_url = provider_url("openai", self.openai_base_url, "OPENAI_BASE_URL")
+        self.elevenlabs_base_url = provider_url("elevenlabs", self.elevenlabs_base_url, "ELEVENLABS_BASE_URL")
+        
         self.google_api_key = os.getenv("GOOGLE_API_KEY", self.google_api_key)
         self.youtube_client_id = os.getenv("YOUTUBE_CLIENT_ID", self.youtube_client_id)
         self.youtube_client_secret = os.getenv("YOUTUBE_CLIENT_SECRET", self.youtube_client_secret)
@@ -125,11 +143,21 @@ class VideoConfig:
     crf: int = 23  # Lower = better quality, higher file size
     pixel_format: str = "yuv420p"
     
+    # Deadline-aware encoder tuning (overrides preset when enabled)
+    auto_tune_encoder: bool = False
+    encode_budget_ratio: float = 1.0  # Wall-clock encode seconds allowed per second of output
+    
+    # Loudness normalization applied in the final mux
+    loudnorm_two_pass: bool = False
+    
     def __post_init__(self):
         """Load from environment variables"""
         self.resolution = os.getenv("VIDEO_RESOLUTION", self.resolution)
         self.fps = int(os.getenv("VIDEO_FPS", self.fps))
         self.duration = int(os.getenv("MAX_VIDEO_DURATION", self.duration))
+        self.auto_tune_encoder = os.getenv("VIDEO_AUTO_TUNE", str(self.auto_tune_encoder)).lower() == "true"
+        self.encode_budget_ratio = float(os.getenv("VIDEO_ENCODE_BUDGET_RATIO", self.encode_budget_ratio))
+        self.loudnorm_two_pass = os.getenv("VIDEO_LOUDNORM_TWO_PASS", str(self.loudnorm_two_pass)).lower() == "true"
 
 @dataclass
 class ResourceConfig:
@@ -139,12 +167,19 @@ class ResourceConfig:
     cleanup_after_days: int = 7
     max_concurrent_operations: int = 3
     
+    # RAM-backed scratch for render intermediates (tmpfs); empty disables it
+    scratch_dir: str = "/dev/shm"
+    scratch_memory_gb: float = 0.0  # 0 = a quarter of max_memory_gb
+    
     def __post_init__(self):
         """Auto-detect system resources"""
         # Set memory limit to 50% of available RAM
         available_memory = psutil.virtual_memory().total / (1024**3)  # GB
         self.max_memory_gb = min(self.max_memory_gb, available_memory * 0.5)
         
+        self.scratch_dir = os.getenv("SCRATCH_DIR", self.scratch_dir)
+        self.scratch_memory_gb = float(os.getenv("SCRATCH_MEMORY_GB", self.scratch_memory_gb))
+        
         # Set CPU limit based on available cores
         cpu_count = psutil.cpu_count()
         self.max_concurrent_operations = min(self.max_concurrent_operations, cpu_count)
@@ -154,7 +189,9 @@ class ProductionConfig:
     """Production workflow configuration"""
     season: int = 1
     day_number: int = 1
-    daily_run_time: str = "09:00"
+    daily_run_time: str = "09:00"  # "HH:MM" or a five-field cron expression
+    schedule_jitter_seconds: float = 0.0
+    schedule_catch_up: str = "latest"  # none, latest or all missed runs after downtime
     
     # Content generation
     content_themes: List[str] = field(default_factory=lambda: [
@@ -166,6 +203,23 @@ class ProductionConfig:
         self.season = int(os.getenv("SEASON", self.season))
         self.day_number = int(os.getenv("DAY_NUMBER", self.day_number))
         self.daily_run_time = os.getenv("DAILY_RUN_TIME", self.daily_run_time)
+        self.schedule_jitter_seconds = float(os.getenv("SCHEDULE_JITTER_SECONDS", self.schedule_jitter_seconds))
+        self.schedule_catch_up = os.getenv("SCHEDULE_CATCH_UP", self.schedule_catch_up)
+
+@dataclass
+class MetricsConfig:
+    """Metrics export configuration"""
+    port: int = 0  # Local /metrics endpoint; 0 disables it
+    host: str = "127.0.0.1"
+    textfile_path: str = ""  # node_exporter textfile collector file; empty disables it
+    textfile_interval: float = 15.0
+    
+    def __post_init__(self):
+        """Load from environment variables"""
+        self.port = int(os.getenv("METRICS_PORT", self.port))
+        self.host = os.getenv("METRICS_HOST", self.host)
+        self.textfile_path = os.getenv("METRICS_TEXTFILE", self.textfile_path)
+        self.textfile_interval = float(os.getenv("METRICS_TEXTFILE_INTERVAL", self.textfile_interval))
 
 class ConfigManager:
     """Centralized configuration manager"""
@@ -176,6 +230,7 @@ class ConfigManager:
         self.video = VideoConfig()
         self.resources = ResourceConfig()
         self.production = ProductionConfig()
+        self.metrics = MetricsConfig()
         
         # Setup logging
         self.setup_logging()
@@ -208,7 +263,9 @@ class ConfigManager:
         root_logger = logging.getLogger("AutoMagic")
         root_logger.setLevel(log_level)
         root_logger.addHandler(file_handler)
-        root_logger.addHandler(console_handler)
+        # A script that already set up console logging (basicConfig) would otherwise print every line twice
+        if not logging.getLogger().handlers:
+            root_logger.addHandler(console_handler)
     
     def validate_all(self) -> Dict[str, List[str]]:
         """Validate all configuration sections"""
@@ -250,16 +307,12 @@ class ConfigManager:
         issues = []
         
         try:
-            import subprocess
-            result = subprocess.run(
-                ['ffmpeg', '-version'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=10
-            )
+            from ..media import FFmpegError, PRIORITY_INTERACTIVE, run_ffmpeg_sync
+            result = run_ffmpeg_sync(['ffmpeg', '-version'], job_id="version_check",
+                                     timeout=10, check=False, priority=PRIORITY_INTERACTIVE)
             if result.returncode != 0:
                 issues.append("FFmpeg not properly installed")
-        except (subprocess.TimeoutExpired, FileNotFoundError):
+        except (FFmpegError, FileNotFoundError):
             issues.append("FFmpeg not found in PATH")
         except Exception as e:
             issues.append(f"FFmpeg validation error: {str(e)}")
@@ -0,0 +1,34 @@
+"""
+Graphics module for AutoMagic
+Vectorized procedural backgrounds and cached text sprites for visuals and placeholder images
+"""
+
+from .procedural import (
+    ProceduralCanvas,
+    vertical_gradient,
+    add_noise,
+    placeholder_background
+)
+from .text import (
+    TextStyle,
+    TextSprite,
+    TextReveal,
+    load_font,
+    wrap_text,
+    render_text_sprite,
+    render_text_reveal
+)
+
+__all__ = [
+    "ProceduralCanvas",
+    "vertical_gradient",
+    "add_noise",
+    "placeholder_background",
+    "TextStyle",
+    "TextSprite",
+    "TextReveal",
+    "load_font",
+    "wrap_text",
+    "render_text_sprite",
+    "render_text_reveal"
+]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Procedural Background Library
+Vectorized gradients, particles, shapes and vignettes for segment visuals and fallback images
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+Color = Tuple[int, int, int]
+
+def vertical_gradient(width: int,
+                      height: int,
+                      colors: Sequence[Color],
+                      stops: Optional[Sequence[float]] = None,
+                      offset: Sequence[float] = (0.0, 0.0, 0.0)) -> np.ndarray:
+    """Build an (H, W, 3) float32 top-to-bottom gradient through the given colour stops"""
+    if not colors:
+        raise ValueError("At least one gradient color is required")
+
+    if stops is None:
+        stops = np.linspace(0.0, 1.0, len(colors)) if len(colors) > 1 else [0.0]
+    if len(stops) != len(colors):
+        raise ValueError("Gradient stops and colors must have the same length")
+
+    # Interpolate one column, then broadcast it across the width
+    rows = np.arange(height, dtype=np.float32) / max(height, 1)
+    palette = np.asarray(colors, dtype=np.float32)
+    column = np.stack([
+        np.interp(rows, stops, palette[:, channel]) for channel in range(3)
+    ], axis=-1) + np.asarray(offset, dtype=np.float32)
+
+    return np.ascontiguousarray(
+        np.broadcast_to(column[:, None, :], (height, width, 3)), dtype=np.float32
+    )
+
+def add_noise(pixels: np.ndarray, amount: float, seed: Optional[int] = None) -> np.ndarray:
+    """Add uniform per-pixel colour variation of +/- amount in place"""
+    if amount > 0:
+        rng = np.random.default_rng(seed)
+        variation = rng.random(pixels.shape, dtype=np.float32)
+        variation *= 2 * amount
+        variation -= amount
+        pixels += variation
+    return pixels
+
+class ProceduralCanvas:
+    """Float32 canvas that collects shape layers into one overlay and composites it once"""
+
+    def __init__(self, background: np.ndarray):
+        self.height, self.width = background.shape[:2]
+        self._base = background.astype(np.float32, copy=False)
+
+        # Premultiplied overlay accumulated from every shape layer
+        self._overlay_rgb = np.zeros((self.height, self.width, 3), dtype=np.float32)
+        self._overlay_alpha = np.zeros((self.height, self.width), dtype=np.float32)
+        self._vignette_strength = 0.0
+
+    @classmethod
+    def from_gradient(cls,
+                      width: int,
+                      height: int,
+                      colors: Sequence[Color],
+                      stops: Optional[Sequence[float]] = None,
+                      offset: Sequence[float] = (0.0, 0.0, 0.0),
+                      noise: float = 0.0,
+                      seed: Optional[int] = None) -> "ProceduralCanvas":
+        """Create a canvas on a vertical gradient background"""
+        background = vertical_gradient(width, height, colors, stops, offset)
+        return cls(add_noise(background, noise, seed))
+
+    @classmethod
+    def solid(cls, width: int, height: int, color: Color) -> "ProceduralCanvas":
+        """Create a canvas on a flat colour background"""
+        background = np.empty((height, width, 3), dtype=np.float32)
+        background[...] = color
+        return cls(background)
+
+    def _clip_box(self, x0: float, y0: float, x1: float, y1: float) -> Optional[Tuple[int, int, int, int]]:
+        """Clip a bounding box to the canvas, returning None if nothing is visible"""
+        left = max(0, int(np.floor(x0)))
+        top = max(0, int(np.floor(y0)))
+        right = min(self.width, int(np.ceil(x1)))
+        bottom = min(self.height, int(np.ceil(y1)))
+
+        if left >= right or top >= bottom:
+            return None
+        return left, top, right, bottom
+
+    def _paint(self, box: Tuple[int, int, int, int], mask: np.ndarray, color: Color, opacity: float):
+        """Merge a coverage mask into the overlay using the 'over' operator"""
+        left, top, right, bottom = box
+        alpha = mask * np.float32(opacity)
+
+        region_rgb = self._overlay_rgb[top:bottom, left:right]
+        region_alpha = self._overlay_alpha[top:bottom, left:right]
+
+        inverse = 1.0 - alpha
+        region_rgb *= inverse[..., None]
+        region_rgb += alpha[..., None] * np.asarray(color[:3], dtype=np.float32)
+        region_alpha *= inverse
+        region_alpha += alpha
+
+    def _normalized_coords(self, box: Tuple[int, int, int, int],
+                           cx: float, cy: float, rx: float, ry: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Pixel-centre coordinates inside a box, normalized to a shape's radii"""
+        left, top, right, bottom = box
+        ys, xs = np.ogrid[top:bottom, left:right]
+        nx = (xs.astype(np.float32) + 0.5 - cx) / rx
+        ny = (ys.astype(np.float32) + 0.5 - cy) / ry
+        return nx, ny
+
+    def ellipse(self, x0: float, y0: float, x1: float, y1: float,
+                color: Color, opacity: float = 1.0) -> "ProceduralCanvas":
+        """Add an anti-aliased ellipse inscribed in the given box"""
+        box = self._clip_box(x0, y0, x1, y1)
+        if box is None:
+            return self
+
+        rx, ry = max((x1 - x0) / 2, 0.5), max((y1 - y0) / 2, 0.5)
+        nx, ny = self._normalized_coords(box, (x0 + x1) / 2, (y0 + y1) / 2, rx, ry)
+        distance = np.sqrt(nx * nx + ny * ny)
+        mask = np.clip((1.0 - distance) * min(rx, ry) + 0.5, 0.0, 1.0)
+
+        self._paint(box, mask, color, opacity)
+        return self
+
+    def circle(self, cx: float, cy: float, radius: float,
+               color: Color, opacity: float = 1.0) -> "ProceduralCanvas":
+        """Add an anti-aliased circle"""
+        return self.ellipse(cx - radius, cy - radius, cx + radius, cy + radius, color, opacity)
+
+    def diamond(self, cx: float, cy: float, size: float,
+                color: Color, opacity: float = 1.0) -> "ProceduralCanvas":
+        """Add an anti-aliased diamond with the given half-diagonal"""
+        size = max(size, 0.5)
+        box = self._clip_box(cx - size, cy - size, cx + size, cy + size)
+        if box is None:
+            return self
+
+        nx, ny = self._normalized_coords(box, cx, cy, size, size)
+        mask = np.clip((1.0 - (np.abs(nx) + np.abs(ny))) * size + 0.5, 0.0, 1.0)
+
+        self._paint(box, mask, color, opacity)
+        return self
+
+    def rectangle(self, x0: float, y0: float, x1: float, y1: float,
+                  color: Color, opacity: float = 1.0) -> "ProceduralCanvas":
+        """Add a filled rectangle"""
+        box = self._clip_box(x0, y0, x1, y1)
+        if box is None:
+            return self
+
+        left, top, right, bottom = box
+        mask = np.ones((bottom - top, right - left), dtype=np.float32)
+
+        self._paint(box, mask, color, opacity)
+        return self
+
+    def particles(self, centers: Sequence[Tuple[float, float]], radii: Sequence[float],
+                  color: Color = (255, 255, 255), opacity: float = 1.0) -> "ProceduralCanvas":
+        """Add a field of small circles sharing one colour"""
+        for (cx, cy), radius in zip(centers, radii):
+            self.circle(cx, cy, radius, color, opacity)
+        return self
+
+    def vignette(self, strength: float = 0.35) -> "ProceduralCanvas":
+        """Darken the corners when the canvas is rendered"""
+        self._vignette_strength = float(np.clip(strength, 0.0, 1.0))
+        return self
+
+    def render(self) -> Image.Image:
+        """Composite the overlay onto the background once and return an RGB image"""
+        pixels = self._base * (1.0 - self._overlay_alpha)[..., None]
+        pixels += self._overlay_rgb
+
+        if self._vignette_strength > 0:
+            ys, xs = np.ogrid[0:self.height, 0:self.width]
+            dx = (xs.astype(np.float32) + 0.5) / self.width - 0.5
+            dy = (ys.astype(np.float32) + 0.5) / self.height - 0.5
+            falloff = 1.0 - self._vignette_strength * np.clip((dx * dx + dy * dy) * 2.0, 0.0, 1.0)
+            pixels *= falloff[..., None]
+
+        np.clip(pixels, 0, 255, out=pixels)
+        return Image.fromarray(pixels.astype(np.uint8), "RGB")
+
+def placeholder_background(width: int,
+                           height: int,
+                           colors: Sequence[Color],
+                           vignette: float = 0.3,
+                           seed: Optional[int] = None) -> Image.Image:
+    """Render a gradient-and-vignette background for fallback images"""
+    canvas = ProceduralCanvas.from_gradient(width, height, colors, noise=4.0, seed=seed)
+    return canvas.vignette(vignette).render()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Text Rendering Cache
+Fonts loaded once, wrapped layouts memoized and styled text sprites cached as RGBA arrays, revealed by cropping
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+RGBA = Tuple[int, int, int, int]
+
+# Tried in order when the requested font is not installed
+FALLBACK_FONTS = ("C:\\Windows\\Fonts\\arial.ttf", "DejaVuSans.ttf")
+
+@dataclass(frozen=True)
+class TextStyle:
+    """Visual style of a text sprite (hashable, so it can key the sprite cache)"""
+    font: str = "arial.ttf"
+    size: int = 80
+    fill: RGBA = (255, 255, 255, 255)
+    stroke_width: int = 0
+    stroke_fill: RGBA = (0, 0, 0, 255)
+    shadow_offset: Tuple[int, int] = (0, 0)
+    shadow_blur: int = 0
+    shadow_fill: RGBA = (0, 0, 0, 180)
+    glow_radius: int = 0
+    glow_fill: RGBA = (255, 255, 255, 160)
+    line_height: Optional[int] = None
+
+    @property
+    def line_spacing(self) -> int:
+        """Vertical distance between consecutive baselines"""
+        return self.line_height or int(self.size * 1.25)
+
+@dataclass(frozen=True)
+class TextSprite:
+    """Pre-rendered text block ready to composite onto frames"""
+    pixels: np.ndarray
+    image: Image.Image
+    padding: int
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.image.size
+
+    def paste_centered(self, frame: Image.Image,
+                       center: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """Alpha-composite the sprite onto a frame, centred on a point (default: frame centre)"""
+        cx, cy = center or (frame.width // 2, frame.height // 2)
+        x = int(cx - self.image.width / 2)
+        y = int(cy - self.image.height / 2)
+        frame.paste(self.image, (x, y), self.image)
+        return frame
+
+@dataclass(frozen=True)
+class TextReveal:
+    """A full-text sprite plus where each character ends, for typewriter reveals without re-rendering"""
+    sprite: TextSprite
+    stops: Tuple[Tuple[int, int], ...]  # Per character of the text: (line, x past its glyph), spaces repeat
+    bands: Tuple[int, ...]  # Top of each line's horizontal band in the sprite, then the sprite height
+
+    def paste_centered(self, frame: Image.Image, count: int,
+                       center: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """Composite the first count characters, positioned as the full text would be"""
+        if count >= len(self.stops):
+            return self.sprite.paste_centered(frame, center)
+        if count <= 0:
+            return frame
+
+        image = self.sprite.image
+        cx, cy = center or (frame.width // 2, frame.height // 2)
+        x = int(cx - image.width / 2)
+        y = int(cy - image.height / 2)
+        line, cut = self.stops[count - 1]
+        top, bottom = self.bands[line], self.bands[line + 1]
+        # Earlier lines whole, then the current line up to the last revealed glyph
+        for box in ((0, 0, image.width, top), (0, top, cut, bottom)):
+            if box[2] > box[0] and box[3] > box[1]:
+                region = image.crop(box)
+                frame.paste(region, (x + box[0], y + box[1]), region)
+        return frame
+
+@lru_cache(maxsize=32)
+def load_font(name: str = "arial.ttf", size: int = 48) -> ImageFont.ImageFont:
+    """Load a TrueType font once per (name, size), falling back to common system fonts"""
+    for candidate in (name, *FALLBACK_FONTS):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1 only ships a fixed-size bitmap font
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=1024)
+def wrap_text(text: str, font_name: str, size: int, max_width: int) -> Tuple[str, ...]:
+    """Greedy word wrap measured once per word, memoized by (text, font, width)"""
+    font = load_font(font_name, size)
+    space_width = font.getlength(" ")
+
+    lines = []
+    current_words = []
+    current_width = 0.0
+
+    for word in text.split():
+        word_width = font.getlength(word)
+        candidate_width = word_width if not current_words else current_width + space_width + word_width
+
+        if current_words and candidate_width > max_width:
+            lines.append(" ".join(current_words))
+            current_words = [word]
+            current_width = word_width
+        else:
+            current_words.append(word)
+            current_width = candidate_width
+
+    if current_words:
+        lines.append(" ".join(current_words))
+
+    return tuple(lines)
+
+def _line_extent(font: ImageFont.ImageFont) -> int:
+    """Height of one rendered line from ascender to descender"""
+    try:
+        ascent, descent = font.getmetrics()
+        return ascent + descent
+    except AttributeError:
+        return font.getbbox("Ag")[3]
+
+def _blurred_layer(mask: Image.Image, fill: RGBA, radius: int) -> Image.Image:
+    """Colour a coverage mask and soften it with a single Gaussian blur"""
+    if radius > 0:
+        mask = mask.filter(ImageFilter.GaussianBlur(radius))
+
+    alpha = np.asarray(mask, dtype=np.float32) * (fill[3] / 255.0)
+    layer = np.empty(alpha.shape + (4,), dtype=np.uint8)
+    layer[..., :3] = fill[:3]
+    layer[..., 3] = alpha.astype(np.uint8)
+    return Image.fromarray(layer, "RGBA")
+
+def _layout(text: str, style: TextStyle, max_width: int):
+    """Font, wrapped lines, their widths, block width, padding and sprite size for a text"""
+    font = load_font(style.font, style.size)
+    lines = wrap_text(text, style.font, style.size, max_width) or ("",)
+
+    line_widths = [int(np.ceil(font.getlength(line))) for line in lines]
+    block_width = max(line_widths) + 2 * style.stroke_width
+    block_height = style.line_spacing * (len(lines) - 1) + _line_extent(font) + 2 * style.stroke_width
+
+    shadow_x, shadow_y = style.shadow_offset
+    padding = (max(style.glow_radius, style.shadow_blur) * 2
+               + max(abs(shadow_x), abs(shadow_y)) + style.stroke_width)
+    return font, lines, line_widths, block_width, padding, (block_width + 2 * padding, block_height + 2 * padding)
+
+@lru_cache(maxsize=256)
+def render_text_sprite(text: str, style: TextStyle = TextStyle(), max_width: int = 1720) -> TextSprite:
+    """Render wrapped, centre-aligned text with stroke, shadow and glow into a cached sprite"""
+    font, lines, line_widths, block_width, padding, (width, height) = _layout(text, style, max_width)
+    shadow_x, shadow_y = style.shadow_offset
+
+    # Coverage mask shared by the shadow and glow passes
+    mask = Image.new("L", (width, height), 0)
+    mask_draw = ImageDraw.Draw(mask)
+    text_layer = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    text_draw = ImageDraw.Draw(text_layer)
+
+    for index, (line, line_width) in enumerate(zip(lines, line_widths)):
+        x = padding + (block_width - line_width) // 2
+        y = padding + style.stroke_width + index * style.line_spacing
+        mask_draw.text((x, y), line, font=font, fill=255, stroke_width=style.stroke_width)
+        text_draw.text((x, y), line, font=font, fill=style.fill,
+                       stroke_width=style.stroke_width, stroke_fill=style.stroke_fill)
+
+    sprite = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+
+    if style.shadow_offset != (0, 0) or style.shadow_blur:
+        shadow = _blurred_layer(mask, style.shadow_fill, style.shadow_blur)
+        sprite.alpha_composite(shadow, (max(shadow_x, 0), max(shadow_y, 0)),
+                               (max(-shadow_x, 0), max(-shadow_y, 0)))
+
+    if style.glow_radius:
+        sprite.alpha_composite(_blurred_layer(mask, style.glow_fill, style.glow_radius))
+
+    sprite.alpha_composite(text_layer)
+
+    pixels = np.asarray(sprite)
+    pixels.setflags(write=False)
+    return TextSprite(pixels=pixels, image=sprite, padding=padding)
+
+@lru_cache(maxsize=64)
+def render_text_reveal(text: str, style: TextStyle = TextStyle(), max_width: int = 1720) -> TextReveal:
+    """The full text's cached sprite with per-character stops; the text wraps as it will when complete"""
+    sprite = render_text_sprite(text, style, max_width)
+    font, lines, line_widths, block_width, padding, (_, height) = _layout(text, style, max_width)
+
+    # wrap_text keeps the non-space characters in order, so they map one-to-one onto the lines
+    glyph_stops = []
+    for index, (line, line_width) in enumerate(zip(lines, line_widths)):
+        x = padding + (block_width - line_width) // 2
+        for end, char in enumerate(line, start=1):
+            if not char.isspace():
+                glyph_stops.append((index, x + int(np.ceil(font.getlength(line[:end]))) + 2 * style.stroke_width))
+
+    stops, glyphs, last = [], iter(glyph_stops), (0, 0)
+    for char in text:
+        if not char.isspace():
+            last = next(glyphs, last)
+        stops.append(last)
+
+    # Each band starts halfway into the gap above its line, so glow between lines belongs to the line below
+    gap = max(0, style.line_spacing - _line_extent(font)) // 2
+    tops = [0] + [padding + style.stroke_width + index * style.line_spacing - gap for index in range(1, len(lines))]
+    return TextReveal(sprite=sprite, stops=tuple(stops), bands=tuple(tops) + (height,))
@@ -0,0 +1,124 @@
+"""
+Media module for AutoMagic
+Shared media tooling: encoder tuning, ffmpeg runner and scheduler, media inspector, MP4 validation, image preparation, loudness, music beds, music catalog and backend selection
+"""
+
+from .encoder_tuning import (
+    EncoderTuner,
+    EncoderChoice,
+    X264_PRESETS,
+    get_encoder_tuner
+)
+from .ffmpeg_runner import (
+    FFmpegError,
+    FFmpegStalledError,
+    FFmpegCancelledError,
+    FFmpegProgress,
+    FFmpegResult,
+    ProgressRegistry,
+    progress_registry,
+    run_ffmpeg,
+    run_ffmpeg_sync
+)
+from .ffmpeg_scheduler import (
+    FFmpegScheduler,
+    FFmpegSlot,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NORMAL,
+    PRIORITY_BATCH,
+    ffmpeg_priority,
+    get_ffmpeg_scheduler
+)
+from .inspector import (
+    MediaInfo,
+    StreamInfo,
+    MediaInspectionError,
+    inspect_media,
+    probe_duration,
+    clear_inspection_cache
+)
+from .mp4_validator import (
+    MP4Validation,
+    TrackReport,
+    validate_mp4
+)
+from .image_prep import (
+    ImagePrepEngine,
+    ImagePrepSpec,
+    ImagePrepError,
+    prepare_image,
+    verify_image
+)
+from .loudness import (
+    LoudnessAnalyzer,
+    LoudnessTarget
+)
+from .music_bed import (
+    DuckingSettings,
+    music_bed_filter,
+    music_input_args
+)
+from .music_catalog import (
+    MusicCatalog,
+    MusicTrack,
+    MusicAnalysisError,
+    analyze_track,
+    get_music_catalog,
+    lookup_track
+)
+from .backend_selector import (
+    BackendSelector,
+    BackendStats,
+    BackendCapability
+)
+
+__all__ = [
+    "EncoderTuner",
+    "EncoderChoice",
+    "X264_PRESETS",
+    "get_encoder_tuner",
+    "FFmpegError",
+    "FFmpegStalledError",
+    "FFmpegCancelledError",
+    "FFmpegProgress",
+    "FFmpegResult",
+    "ProgressRegistry",
+    "progress_registry",
+    "run_ffmpeg",
+    "run_ffmpeg_sync",
+    "FFmpegScheduler",
+    "FFmpegSlot",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_NORMAL",
+    "PRIORITY_BATCH",
+    "ffmpeg_priority",
+    "get_ffmpeg_scheduler",
+    "MediaInfo",
+    "StreamInfo",
+    "MediaInspectionError",
+    "inspect_media",
+    "probe_duration",
+    "clear_inspection_cache",
+    "MP4Validation",
+    "TrackReport",
+    "validate_mp4",
+    "ImagePrepEngine",
+    "ImagePrepSpec",
+    "ImagePrepError",
+    "prepare_image",
+    "verify_image",
+    "LoudnessAnalyzer",
+    "LoudnessTarget",
+    "DuckingSettings",
+    "music_bed_filter",
+    "music_input_args",
+    "MusicCatalog",
+    "MusicTrack",
+    "MusicAnalysisError",
+    "analyze_track",
+    "get_music_catalog",
+    "lookup_track",
+    "BackendSelector",
+    "BackendStats",
+    "BackendCapability"
+]
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Adaptive Backend Selection
+Probes which assembly backends work on this host and orders them by expected time to a valid output
+"""
+
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("AutoMagic.BackendSelector")
+
+# Weight of the newest attempt in the moving averages
+EWMA_ALPHA = 0.3
+STATS_MAX_AGE = 30 * 24 * 3600
+
+# A probe returns (available, reason)
+BackendProbe = Callable[[], Tuple[bool, str]]
+
+@dataclass
+class BackendStats:
+    """Attempt history for one backend on this host"""
+    attempts: int = 0
+    successes: int = 0
+    consecutive_failures: int = 0
+    seconds_per_output_second: Optional[float] = None
+    last_success_at: float = 0.0
+    last_failure_at: float = 0.0
+    last_error: str = ""
+
+    @property
+    def success_rate(self) -> float:
+        """Laplace-smoothed so one early failure does not write a backend off"""
+        return (self.successes + 1) / (self.attempts + 2)
+
+    def expected_cost(self) -> Optional[float]:
+        """Expected attempt time per output second until one attempt succeeds"""
+        if self.seconds_per_output_second is None:
+            return None
+        return self.seconds_per_output_second / self.success_rate
+
+@dataclass
+class BackendCapability:
+    """Result of a capability probe"""
+    available: bool
+    reason: str = ""
+    probed_at: float = field(default_factory=time.time)
+
+class BackendSelector:
+    """Orders interchangeable backends by measured success rate and throughput"""
+
+    def __init__(self,
+                 name: str,
+                 probes: Dict[str, BackendProbe],
+                 fallback_only: Sequence[str] = (),
+                 cache_path: Optional[Path] = None,
+                 failure_threshold: int = 3,
+                 reprobe_interval: float = 3600.0):
+        self.name = name
+        self.probes = dict(probes)
+        self.fallback_only = set(fallback_only)
+        self.cache_path = Path(cache_path or Path(".cache") / f"{name}_backends.json")
+        self.failure_threshold = failure_threshold
+        self.reprobe_interval = reprobe_interval
+
+        self._lock = threading.Lock()
+        self._capabilities: Dict[str, BackendCapability] = {}
+        self._stats: Dict[str, BackendStats] = {backend: BackendStats() for backend in self.probes}
+        self._load_cache()
+
+    @staticmethod
+    def _host_key() -> str:
+        """Identify the machine so a copied cache is not trusted elsewhere"""
+        return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}"
+
+    def _load_cache(self):
+        """Restore attempt history recorded on this host"""
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return
+
+        if data.get("host") != self._host_key():
+            return
+        if time.time() - data.get("updated_at", 0) > STATS_MAX_AGE:
+            return
+
+        for backend, values in data.get("backends", {}).items():
+            if backend in self._stats:
+                try:
+                    self._stats[backend] = BackendStats(**values)
+                except TypeError:
+                    continue
+
+    def _save_cache(self):
+        """Persist attempt history; caller holds the lock"""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            partial = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+            partial.write_text(json.dumps({
+                "host": self._host_key(),
+                "updated_at": time.time(),
+                "backends": {backend: asdict(stats) for backend, stats in self._stats.items()}
+            }, indent=2))
+            os.replace(partial, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save {self.name} backend stats: {e}")
+
+    def probe(self, force: bool = False) -> Dict[str, BackendCapability]:
+        """Run capability probes that have never run or have expired"""
+        now = time.time()
+        with self._lock:
+            for backend, probe in self.probes.items():
+                known = self._capabilities.get(backend)
+                if known and not force and now - known.probed_at < self.reprobe_interval:
+                    continue
+                try:
+                    available, reason = probe()
+                except Exception as e:
+                    available, reason = False, str(e)
+                self._capabilities[backend] = BackendCapability(available, reason, now)
+                if not available:
+                    logger.info(f"{self.name} backend {backend} unavailable: {reason}")
+            return dict(self._capabilities)
+
+    def _quarantined(self, stats: BackendStats, now: float) -> bool:
+        """Consistently failing backends sit out until the next re-probe window"""
+        return (stats.consecutive_failures >= self.failure_threshold
+                and now - stats.last_failure_at < self.reprobe_interval)
+
+    def order(self) -> List[str]:
+        """Usable backends, cheapest expected time to a valid output first"""
+        capabilities = self.probe()
+        now = time.time()
+
+        with self._lock:
+            candidates = []
+            for index, backend in enumerate(self.probes):
+                if not capabilities[backend].available:
+                    continue
+                stats = self._stats[backend]
+                if self._quarantined(stats, now):
+                    logger.debug(f"Skipping {backend}: {stats.consecutive_failures} consecutive failures")
+                    continue
+                cost = stats.expected_cost()
+                # Untried backends keep their declared order behind measured ones
+                candidates.append((
+                    backend in self.fallback_only,
+                    cost is None,
+                    cost if cost is not None else 0.0,
+                    index,
+                    backend
+                ))
+
+        return [candidate[-1] for candidate in sorted(candidates)]
+
+    def record(self, backend: str, success: bool, elapsed: float,
+               output_seconds: Optional[float] = None, error: str = ""):
+        """Fold one attempt into the backend's history"""
+        # Normalize by output length so short and long jobs are comparable
+        normalized = elapsed / max(output_seconds or 1.0, 1e-3)
+        now = time.time()
+
+        with self._lock:
+            stats = self._stats.setdefault(backend, BackendStats())
+            stats.attempts += 1
+            if success:
+                stats.successes += 1
+                stats.consecutive_failures = 0
+                stats.last_success_at = now
+            else:
+                stats.consecutive_failures += 1
+                stats.last_failure_at = now
+                stats.last_error = error[-300:]
+                if stats.consecutive_failures == self.failure_threshold:
+                    logger.warning(f"{self.name} backend {backend} failed {self.failure_threshold} times "
+                                   f"in a row; skipping it for {self.reprobe_interval:.0f}s")
+
+            # Failed attempts cost time too, so they count toward the average
+            if stats.seconds_per_output_second is None:
+                stats.seconds_per_output_second = normalized
+            else:
+                stats.seconds_per_output_second += EWMA_ALPHA * (normalized - stats.seconds_per_output_second)
+
+            self._save_cache()
+
+    def describe(self) -> Dict[str, object]:
+        """Backend capabilities, history and current order for status output"""
+        order = self.order()
+        with self._lock:
+            return {
+                "order": order,
+                "cache_path": str(self.cache_path),
+                "backends": {
+                    backend: {
+                        "available": self._capabilities[backend].available,
+                        "reason": self._capabilities[backend].reason,
+                        "success_rate": round(stats.success_rate, 3),
+                        "expected_cost": stats.expected_cost(),
+                        **asdict(stats)
+                    }
+                    for backend, stats in self._stats.items()
+                }
+            }
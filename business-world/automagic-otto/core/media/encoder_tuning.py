@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Deadline-Aware Encoder Tuning
+Calibrates x264 preset throughput on this host and picks preset/CRF/threads to meet a time budget
+"""
+
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from .ffmpeg_scheduler import get_ffmpeg_scheduler
+
+logger = logging.getLogger("AutoMagic.EncoderTuning")
+
+# x264 presets from fastest to slowest
+X264_PRESETS = (
+    "ultrafast", "superfast", "veryfast", "faster", "fast",
+    "medium", "slow", "slower", "veryslow"
+)
+
+# Synthetic clip used for calibration; throughput is scaled to other sizes by pixel count
+CALIBRATION_SIZE = (640, 360)
+CALIBRATION_FRAMES = 90
+CALIBRATION_MAX_AGE = 30 * 24 * 3600
+
+@dataclass
+class EncoderChoice:
+    """Encoder parameters selected for one job"""
+    preset: str
+    crf: int
+    threads: int
+    estimated_seconds: float
+    budget_seconds: float
+
+    @property
+    def fits_budget(self) -> bool:
+        return self.estimated_seconds <= self.budget_seconds
+
+    def ffmpeg_args(self) -> list:
+        """Encoder arguments for an ffmpeg command line"""
+        return ['-preset', self.preset, '-crf', str(self.crf), '-threads', str(self.threads)]
+
+class EncoderTuner:
+    """Measures per-preset encode speed once per host and chooses settings per job"""
+
+    def __init__(self,
+                 cache_path: Optional[Path] = None,
+                 ffmpeg: str = "ffmpeg",
+                 presets: Sequence[str] = X264_PRESETS[:7],
+                 safety_margin: float = 0.8):
+        self.cache_path = Path(cache_path or Path(".cache") / "encoder_calibration.json")
+        self.ffmpeg = ffmpeg
+        self.presets = [preset for preset in X264_PRESETS if preset in presets]
+        self.safety_margin = safety_margin
+        self._fps: Optional[Dict[str, float]] = None
+
+    @staticmethod
+    def _host_key() -> str:
+        """Identify the machine so a copied cache is not trusted elsewhere"""
+        return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}"
+
+    def _load_cache(self) -> Optional[Dict[str, float]]:
+        """Return cached preset throughput if it belongs to this host and is fresh"""
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if data.get("host") != self._host_key():
+            return None
+        if time.time() - data.get("measured_at", 0) > CALIBRATION_MAX_AGE:
+            return None
+
+        fps = data.get("fps", {})
+        if not all(preset in fps for preset in self.presets):
+            return None
+        return {preset: float(value) for preset, value in fps.items()}
+
+    def _save_cache(self, fps: Dict[str, float]):
+        """Persist calibration results"""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_path.write_text(json.dumps({
+                "host": self._host_key(),
+                "measured_at": time.time(),
+                "frame_size": list(CALIBRATION_SIZE),
+                "fps": fps
+            }, indent=2))
+        except OSError as e:
+            logger.warning(f"Could not save encoder calibration: {e}")
+
+    def _measure_preset(self, preset: str) -> float:
+        """Encode a synthetic clip with one preset and return frames per second"""
+        width, height = CALIBRATION_SIZE
+        cmd = [
+            self.ffmpeg, '-hide_banner', '-nostdin',
+            '-f', 'lavfi',
+            '-i', f'testsrc2=size={width}x{height}:rate=30',
+            '-frames:v', str(CALIBRATION_FRAMES),
+            '-c:v', 'libx264',
+            '-preset', preset,
+            '-crf', '23',
+            '-pix_fmt', 'yuv420p',
+            '-f', 'null', '-'
+        ]
+
+        # Takes a scheduler slot but keeps ffmpeg's own threading: estimates assume the whole machine
+        with get_ffmpeg_scheduler().slot(f"calibrate_{preset}"):
+            start = time.perf_counter()
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            elapsed = time.perf_counter() - start
+
+        if result.returncode != 0:
+            raise RuntimeError(f"Calibration encode failed for preset {preset}: {result.stderr[-300:]}")
+        return CALIBRATION_FRAMES / max(elapsed, 1e-3)
+
+    def calibrate(self, force: bool = False) -> Dict[str, float]:
+        """Return frames per second at the calibration size for each preset"""
+        if self._fps is not None and not force:
+            return self._fps
+
+        if not force:
+            cached = self._load_cache()
+            if cached:
+                self._fps = cached
+                return cached
+
+        logger.info(f"Calibrating x264 presets on this host: {', '.join(self.presets)}")
+        fps = {}
+        for preset in self.presets:
+            fps[preset] = round(self._measure_preset(preset), 2)
+            logger.debug(f"Preset {preset}: {fps[preset]} fps at {CALIBRATION_SIZE[0]}x{CALIBRATION_SIZE[1]}")
+
+        self._save_cache(fps)
+        self._fps = fps
+        return fps
+
+    def estimate_seconds(self, preset: str, frames: int, width: int, height: int) -> float:
+        """Estimate wall-clock encode time for a job with one preset"""
+        fps = self.calibrate()[preset]
+        pixel_ratio = (width * height) / (CALIBRATION_SIZE[0] * CALIBRATION_SIZE[1])
+        return frames * pixel_ratio / fps
+
+    def choose(self,
+               frames: int,
+               width: int,
+               height: int,
+               budget_seconds: float,
+               target_crf: int = 23,
+               max_crf: int = 28,
+               queue_depth: int = 0,
+               concurrent_jobs: int = 1) -> EncoderChoice:
+        """Pick the slowest preset that finishes inside the budget at the target quality"""
+        # A deep queue shrinks this job's share of the budget; an idle one spends it on quality
+        effective_budget = budget_seconds * self.safety_margin / (1 + max(queue_depth, 0))
+        threads = max(1, (os.cpu_count() or 1) // max(concurrent_jobs, 1))
+
+        # Calibration runs with all cores; scale estimates when cores are shared
+        share = max(concurrent_jobs, 1)
+        estimates = {
+            preset: self.estimate_seconds(preset, frames, width, height) * share
+            for preset in self.presets
+        }
+
+        for preset in reversed(self.presets):
+            if estimates[preset] <= effective_budget:
+                return EncoderChoice(preset, target_crf, threads, estimates[preset], budget_seconds)
+
+        # Even the fastest preset overruns: give up some quality for bitrate and time
+        fastest = self.presets[0]
+        overrun = estimates[fastest] / max(effective_budget, 1e-3)
+        crf = min(max_crf, target_crf + int(round(2 * overrun)))
+        logger.warning(f"Encode budget {budget_seconds:.1f}s too tight; "
+                       f"using {fastest} at CRF {crf} (est. {estimates[fastest]:.1f}s)")
+        return EncoderChoice(fastest, crf, threads, estimates[fastest], budget_seconds)
+
+    def describe(self) -> Dict[str, object]:
+        """Calibration summary for status output"""
+        return {"host": self._host_key(), "fps": dict(self.calibrate()),
+                "cache_path": str(self.cache_path)}
+
+_tuner: Optional[EncoderTuner] = None
+
+def get_encoder_tuner(cache_path: Optional[Path] = None) -> EncoderTuner:
+    """Get the shared encoder tuner"""
+    global _tuner
+    if _tuner is None:
+        _tuner = EncoderTuner(cache_path)
+    return _tuner
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+FFmpeg Runner
+Runs ffmpeg with -progress streaming into structured events, bounded stderr and stall detection
+"""
+
+import asyncio
+import logging
+import re
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Callable, Deque, Dict, List, Optional
+
+from .ffmpeg_scheduler import get_ffmpeg_scheduler
+from ..utils.admission import attribute_process, record_process_exit
+from ..utils.cancellation import CancelToken, OperationCancelledError, current_cancel_token
+from ..utils.metrics import FFMPEG_REALTIME_FACTOR, FFMPEG_SECONDS
+from ..utils.tracing import set_attributes, span
+
+logger = logging.getLogger("AutoMagic.FFmpeg")
+
+# Stderr lines kept per job for error reports
+STDERR_TAIL_LINES = 200
+
+# Stdout lines other than progress (e.g. -version or -encoders listings) kept per job
+OUTPUT_LINES = 2000
+
+_PROGRESS_KEY = re.compile(r'[a-z0-9_]+')
+# -benchmark summary lines, consumed for admission's per-operation costs rather than kept in the tail
+_BENCH_TIMES = re.compile(r'bench: utime=([0-9.]+)s stime=([0-9.]+)s')
+_BENCH_RSS = re.compile(r'bench: maxrss=([0-9]+)KiB')
+
+class FFmpegError(RuntimeError):
+    """ffmpeg exited with an error"""
+
+    def __init__(self, message: str, returncode: Optional[int] = None, stderr_tail: Optional[List[str]] = None):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr_tail = stderr_tail or []
+
+class FFmpegStalledError(FFmpegError):
+    """ffmpeg stopped making progress and was killed"""
+
+class FFmpegCancelledError(FFmpegError, OperationCancelledError):
+    """The work that started ffmpeg was cancelled, so ffmpeg was killed or never started"""
+
+@dataclass
+class FFmpegProgress:
+    """Latest progress report for one ffmpeg job"""
+    job_id: str
+    expected_duration: Optional[float] = None
+    frame: int = 0
+    fps: float = 0.0
+    speed: float = 0.0  # Realtime factor reported by ffmpeg
+    out_time: float = 0.0  # Seconds of output written
+    total_size: int = 0
+    state: str = "starting"  # starting, continue, end
+    started_at: float = field(default_factory=time.monotonic)
+    updated_at: float = field(default_factory=time.monotonic)
+    advanced_at: float = field(default_factory=time.monotonic)  # Last time output actually grew
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def seconds_since_update(self) -> float:
+        return time.monotonic() - self.updated_at
+
+    @property
+    def seconds_since_advance(self) -> float:
+        return time.monotonic() - self.advanced_at
+
+    @property
+    def realtime_factor(self) -> float:
+        """Output seconds produced per wall-clock second"""
+        return self.out_time / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def percent(self) -> Optional[float]:
+        if not self.expected_duration:
+            return None
+        return min(100.0, 100.0 * self.out_time / self.expected_duration)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        if not self.expected_duration or self.out_time <= 0:
+            return None
+        remaining = max(self.expected_duration - self.out_time, 0.0)
+        return remaining / max(self.realtime_factor, 1e-6)
+
+    def to_dict(self) -> Dict[str, object]:
+        """Snapshot for status output and metrics"""
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "frame": self.frame,
+            "fps": self.fps,
+            "speed": self.speed,
+            "out_time": round(self.out_time, 3),
+            "total_size": self.total_size,
+            "elapsed": round(self.elapsed, 3),
+            "percent": self.percent,
+            "eta_seconds": self.eta_seconds,
+            "realtime_factor": round(self.realtime_factor, 3),
+            "seconds_since_update": round(self.seconds_since_update, 3),
+            "seconds_since_advance": round(self.seconds_since_advance, 3)
+        }
+
+@dataclass
+class FFmpegResult:
+    """Outcome of an ffmpeg run"""
+    returncode: int
+    progress: FFmpegProgress
+    stderr_tail: List[str]
+    elapsed: float
+    output: List[str] = field(default_factory=list)  # Stdout lines that were not progress
+
+    @property
+    def stderr(self) -> str:
+        return "\n".join(self.stderr_tail)
+
+    @property
+    def stdout(self) -> str:
+        return "\n".join(self.output)
+
+class ProgressRegistry:
+    """Thread-safe view of every running ffmpeg job for schedulers and metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, FFmpegProgress] = {}
+        self._listeners: List[Callable[[FFmpegProgress], None]] = []
+
+    def add_listener(self, listener: Callable[[FFmpegProgress], None]):
+        """Receive every progress event (called from the runner's reader)"""
+        self._listeners.append(listener)
+
+    def update(self, progress: FFmpegProgress):
+        with self._lock:
+            self._jobs[progress.job_id] = progress
+        for listener in list(self._listeners):
+            try:
+                listener(progress)
+            except Exception as e:
+                logger.error(f"Progress listener error: {e}")
+
+    def remove(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[FFmpegProgress]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_jobs(self) -> Dict[str, Dict[str, object]]:
+        """Snapshot of all running jobs"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {job.job_id: job.to_dict() for job in jobs}
+
+    def stalled_jobs(self, threshold: float) -> List[str]:
+        """Jobs whose output has not grown for longer than threshold seconds"""
+        with self._lock:
+            return [job_id for job_id, job in self._jobs.items() if job.seconds_since_advance > threshold]
+
+progress_registry = ProgressRegistry()
+
+def with_progress_args(cmd: List[str]) -> List[str]:
+    """Ask ffmpeg for machine-readable progress on stdout instead of the stats line, and its usage at exit"""
+    args = list(cmd)
+    if '-progress' in args:
+        return args
+    return [args[0], '-hide_banner', '-progress', 'pipe:1', '-nostats', '-benchmark', *args[1:]]
+
+def _parse_out_time(value: str) -> Optional[float]:
+    """Parse HH:MM:SS.micro into seconds"""
+    try:
+        hours, minutes, seconds = value.split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except ValueError:
+        return None
+
+class _UsageReport:
+    """CPU time and peak RSS that ffmpeg prints to stderr at exit under -benchmark"""
+
+    def __init__(self):
+        self.cpu_seconds: Optional[float] = None
+        self.peak_rss: Optional[int] = None
+
+    def feed(self, line: str) -> bool:
+        """Consume a bench line; False for any other stderr output"""
+        match = _BENCH_TIMES.match(line)
+        if match:
+            self.cpu_seconds = float(match.group(1)) + float(match.group(2))
+            return True
+        match = _BENCH_RSS.match(line)
+        if match:
+            self.peak_rss = int(match.group(1)) * 1024
+            return True
+        return False
+
+class _ProgressParser:
+    """Accumulates key=value lines into progress blocks"""
+
+    def __init__(self, job_id: str, expected_duration: Optional[float],
+                 on_progress: Optional[Callable[[FFmpegProgress], None]]):
+        self.progress = FFmpegProgress(job_id=job_id, expected_duration=expected_duration)
+        self.output: Deque[str] = deque(maxlen=OUTPUT_LINES)
+        self._fields: Dict[str, str] = {}
+        self._on_progress = on_progress
+        progress_registry.update(self.progress)
+
+    def feed(self, line: str):
+        key, sep, value = line.strip().partition('=')
+        if not sep or not _PROGRESS_KEY.fullmatch(key):
+            self.output.append(line.rstrip('\n'))
+            return
+        self._fields[key] = value.strip()
+        if key == 'progress':
+            self._emit()
+
+    def _emit(self):
+        fields, self._fields = self._fields, {}
+        previous = self.progress
+
+        out_time = previous.out_time
+        if fields.get('out_time_us', 'N/A').lstrip('-').isdigit():
+            out_time = max(int(fields['out_time_us']), 0) / 1_000_000
+        elif 'out_time' in fields:
+            out_time = _parse_out_time(fields['out_time']) or out_time
+
+        def number(key, cast, default):
+            try:
+                return cast(fields.get(key, '').rstrip('x'))
+            except ValueError:
+                return default
+
+        progress = replace(
+            previous,
+            frame=number('frame', int, previous.frame),
+            fps=number('fps', float, previous.fps),
+            speed=number('speed', float, previous.speed),
+            out_time=out_time,
+            total_size=number('total_size', int, previous.total_size),
+            state=fields.get('progress', previous.state),
+            updated_at=time.monotonic()
+        )
+
+        if (progress.out_time > previous.out_time or progress.frame > previous.frame
+                or progress.total_size != previous.total_size or progress.state == 'end'):
+            progress.advanced_at = progress.updated_at
+
+        self.progress = progress
+        progress_registry.update(progress)
+        if self._on_progress:
+            try:
+                self._on_progress(progress)
+            except Exception as e:
+                logger.error(f"Progress callback error for {progress.job_id}: {e}")
+
+def _check_cancelled(token: Optional[CancelToken], job_id: str):
+    """Refuse to start ffmpeg for work that has already been cancelled"""
+    if token is not None and token.cancelled:
+        raise FFmpegCancelledError(f"ffmpeg job {job_id} not started: {token.reason}")
+
+def _finish(parser: _ProgressParser, stderr_tail: Deque[str], returncode: int, started: float,
+            stalled: bool, timed_out: bool, check: bool, cancelled: Optional[str] = None) -> FFmpegResult:
+    """Build the result, raising on failure when check is set"""
+    progress_registry.remove(parser.progress.job_id)
+    result = FFmpegResult(returncode, parser.progress, list(stderr_tail), time.monotonic() - started,
+                          list(parser.output))
+    job_id = parser.progress.job_id
+
+    outcome = ("cancelled" if cancelled else "stalled" if stalled else "timeout" if timed_out
+               else "success" if returncode == 0 else "error")
+    FFMPEG_SECONDS.observe(result.elapsed, outcome=outcome)
+    set_attributes(**{"ffmpeg.outcome": outcome, "ffmpeg.returncode": returncode,
+                      "ffmpeg.out_time": round(parser.progress.out_time, 3),
+                      "ffmpeg.realtime_factor": round(parser.progress.realtime_factor, 3)})
+    if outcome == "success" and parser.progress.out_time > 0:
+        FFMPEG_REALTIME_FACTOR.observe(parser.progress.realtime_factor)
+
+    if cancelled:
+        raise FFmpegCancelledError(f"ffmpeg job {job_id} killed: {cancelled}", returncode, result.stderr_tail)
+    if stalled:
+        raise FFmpegStalledError(f"ffmpeg job {job_id} stalled at {parser.progress.out_time:.1f}s output",
+                                 returncode, result.stderr_tail)
+    if timed_out:
+        raise FFmpegError(f"ffmpeg job {job_id} timed out after {result.elapsed:.0f}s",
+                          returncode, result.stderr_tail)
+    if check and returncode != 0:
+        tail = "\n".join(result.stderr_tail[-10:])
+        raise FFmpegError(f"ffmpeg job {job_id} failed ({returncode}): {tail}", returncode, result.stderr_tail)
+
+    logger.debug(f"ffmpeg job {job_id} finished in {result.elapsed:.1f}s "
+                 f"({parser.progress.realtime_factor:.2f}x realtime)")
+    return result
+
+async def run_ffmpeg(cmd: List[str],
+                     job_id: Optional[str] = None,
+                     expected_duration: Optional[float] = None,
+                     on_progress: Optional[Callable[[FFmpegProgress], None]] = None,
+                     stall_timeout: float = 30.0,
+                     timeout: Optional[float] = None,
+                     check: bool = True,
+                     priority: Optional[int] = None) -> FFmpegResult:
+    """Run ffmpeg asynchronously, streaming progress and killing it if it stalls"""
+    job_id = job_id or uuid.uuid4().hex[:12]
+    scheduler = get_ffmpeg_scheduler()
+    # Queue for a slot first so waiting time never counts as a stall
+    with span("ffmpeg", **{"ffmpeg.job_id": job_id}):
+        async with scheduler.slot_async(job_id, priority) as slot:
+            with span("ffmpeg.encode", **{"ffmpeg.job_id": job_id}):
+                return await _run_ffmpeg_async(slot.apply_threads(cmd), job_id, expected_duration, on_progress,
+                                               stall_timeout, timeout, check,
+                                               lambda pid: slot.apply_to_process(pid, scheduler.niceness_for(slot)))
+
+async def _run_ffmpeg_async(cmd: List[str], job_id: str, expected_duration: Optional[float],
+                            on_progress: Optional[Callable[[FFmpegProgress], None]],
+                            stall_timeout: float, timeout: Optional[float], check: bool,
+                            on_spawn: Callable[[int], None]) -> FFmpegResult:
+    token = current_cancel_token()
+    _check_cancelled(token, job_id)
+    parser = _ProgressParser(job_id, expected_duration, on_progress)
+    stderr_tail: Deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+    usage = _UsageReport()
+    started = time.monotonic()
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *with_progress_args(cmd),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    except Exception:
+        progress_registry.remove(job_id)
+        raise
+    on_spawn(process.pid)
+    attribute_process(process.pid)
+
+    async def read_progress():
+        async for line in process.stdout:
+            parser.feed(line.decode(errors='replace'))
+
+    async def read_stderr():
+        async for line in process.stderr:
+            text = line.decode(errors='replace').rstrip()
+            if not usage.feed(text):
+                stderr_tail.append(text)
+
+    readers = asyncio.gather(read_progress(), read_stderr())
+    stalled = timed_out = False
+    cancelled = None
+
+    try:
+        while process.returncode is None:
+            try:
+                await asyncio.wait_for(process.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                break
+
+            if token is not None and token.cancelled:
+                cancelled = token.reason
+            elif parser.progress.seconds_since_advance > stall_timeout:
+                stalled = True
+            elif timeout and time.monotonic() - started > timeout:
+                timed_out = True
+            if cancelled or stalled or timed_out:
+                logger.error(f"Killing ffmpeg job {job_id}: " + (cancelled or
+                             ('no progress for %.0fs' % stall_timeout if stalled else 'timeout')))
+                process.kill()
+                await process.wait()
+                break
+
+        await readers
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        progress_registry.remove(job_id)
+        raise
+
+    record_process_exit(process.pid, usage.cpu_seconds, usage.peak_rss)
+    return _finish(parser, stderr_tail, process.returncode, started, stalled, timed_out, check, cancelled)
+
+def run_ffmpeg_sync(cmd: List[str],
+                    job_id: Optional[str] = None,
+                    expected_duration: Optional[float] = None,
+                    on_progress: Optional[Callable[[FFmpegProgress], None]] = None,
+                    stall_timeout: float = 30.0,
+                    timeout: Optional[float] = None,
+                    check: bool = True,
+                    priority: Optional[int] = None) -> FFmpegResult:
+    """Blocking variant of run_ffmpeg for synchronous scripts"""
+    job_id = job_id or uuid.uuid4().hex[:12]
+    scheduler = get_ffmpeg_scheduler()
+    with span("ffmpeg", **{"ffmpeg.job_id": job_id}), scheduler.slot(job_id, priority) as slot:
+        with span("ffmpeg.encode", **{"ffmpeg.job_id": job_id}):
+            return _run_ffmpeg_blocking(slot.apply_threads(cmd), job_id, expected_duration, on_progress,
+                                        stall_timeout, timeout, check,
+                                        lambda pid: slot.apply_to_process(pid, scheduler.niceness_for(slot)))
+
+def _run_ffmpeg_blocking(cmd: List[str], job_id: str, expected_duration: Optional[float],
+                         on_progress: Optional[Callable[[FFmpegProgress], None]],
+                         stall_timeout: float, timeout: Optional[float], check: bool,
+                         on_spawn: Callable[[int], None]) -> FFmpegResult:
+    # Read here: the watchdog thread does not inherit the caller's context
+    token = current_cancel_token()
+    _check_cancelled(token, job_id)
+    parser = _ProgressParser(job_id, expected_duration, on_progress)
+    stderr_tail: Deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+    usage = _UsageReport()
+    started = time.monotonic()
+
+    try:
+        process = subprocess.Popen(
+            with_progress_args(cmd),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors='replace'
+        )
+    except Exception:
+        progress_registry.remove(job_id)
+        raise
+    on_spawn(process.pid)
+    attribute_process(process.pid)
+
+    def read_stderr():
+        for line in process.stderr:
+            if not usage.feed(line.rstrip()):
+                stderr_tail.append(line.rstrip())
+
+    outcome = {"stalled": False, "timed_out": False, "cancelled": None}
+    finished = threading.Event()
+
+    def watchdog():
+        while not finished.wait(1.0):
+            if token is not None and token.cancelled:
+                outcome["cancelled"] = token.reason
+            elif parser.progress.seconds_since_advance > stall_timeout:
+                outcome["stalled"] = True
+            elif timeout and time.monotonic() - started > timeout:
+                outcome["timed_out"] = True
+            if outcome["cancelled"] or outcome["stalled"] or outcome["timed_out"]:
+                logger.error(f"Killing ffmpeg job {job_id}: " + (outcome["cancelled"] or
+                             ('no progress for %.0fs' % stall_timeout if outcome['stalled'] else 'timeout')))
+                process.kill()
+                return
+
+    stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+    watchdog_thread = threading.Thread(target=watchdog, daemon=True)
+    stderr_thread.start()
+    watchdog_thread.start()
+
+    try:
+        for line in process.stdout:
+            parser.feed(line)
+        process.wait()
+    finally:
+        finished.set()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        stderr_thread.join(timeout=5)
+        watchdog_thread.join(timeout=5)
+
+    record_process_exit(process.pid, usage.cpu_seconds, usage.peak_rss)
+    return _finish(parser, stderr_tail, process.returncode, started,
+                   outcome["stalled"], outcome["timed_out"], check, outcome["cancelled"])
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+FFmpeg Process Scheduler
+Caps concurrent ffmpeg processes, splits CPU threads between them and orders waiting jobs by priority
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set
+
+from ..utils.metrics import QUEUE_DEPTH, QUEUE_RUNNING, REGISTRY
+
+logger = logging.getLogger("AutoMagic.FFmpegScheduler")
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BATCH = 10
+
+# Priority for ffmpeg calls that do not pass one; set around interactive work with ffmpeg_priority()
+_current_priority: contextvars.ContextVar[int] = contextvars.ContextVar("ffmpeg_priority", default=PRIORITY_NORMAL)
+
+# ffmpeg options that take no value; every other option consumes the next argument
+_FLAG_OPTIONS = frozenset({
+    '-y', '-n', '-hide_banner', '-nostdin', '-stdin', '-stats', '-nostats', '-report', '-shortest',
+    '-an', '-vn', '-sn', '-dn', '-re', '-copyts', '-start_at_zero', '-accurate_seek', '-noaccurate_seek',
+    '-autorotate', '-noautorotate', '-ignore_unknown', '-copy_unknown', '-benchmark', '-benchmark_all',
+    '-debug_ts', '-xerror', '-fix_sub_duration', '-version', '-buildconf', '-formats', '-muxers',
+    '-demuxers', '-devices', '-codecs', '-decoders', '-encoders', '-bsfs', '-protocols', '-filters',
+    '-pix_fmts', '-layouts', '-sample_fmts', '-colors', '-hwaccels', '-L',
+})
+
+def output_positions(cmd: List[str]) -> List[int]:
+    """Indexes of the output files in an ffmpeg command line"""
+    positions = []
+    i = 1
+    while i < len(cmd):
+        arg = cmd[i]
+        if arg.startswith('-') and len(arg) > 1:
+            i += 1 if arg in _FLAG_OPTIONS else 2
+            continue
+        positions.append(i)  # A bare argument (or '-' for stdout) is an output
+        i += 1
+    return positions
+
+@contextmanager
+def ffmpeg_priority(priority: int):
+    """Run every ffmpeg call in this context (and tasks it spawns) at the given priority"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+@dataclass
+class FFmpegSlot:
+    """Permission to run one ffmpeg process with a share of the CPU"""
+    job_id: str
+    priority: int
+    threads: int
+    cpus: List[int] = field(default_factory=list)
+    waited: float = 0.0
+    ticket: int = 0
+
+    def apply_threads(self, cmd: List[str]) -> List[str]:
+        """Set -threads for every output: replace values already given, add it where an output has none"""
+        cmd = list(cmd)
+        for i, arg in enumerate(cmd[:-1]):
+            if arg == '-threads':
+                cmd[i + 1] = str(self.threads)
+        # Output options sit between the previous output (or the last input) and the output file;
+        # walk from the end so insertions keep earlier indexes valid
+        outputs = output_positions(cmd)
+        inputs_end = max((i + 2 for i, arg in enumerate(cmd) if arg == '-i'), default=1)
+        for number in reversed(range(len(outputs))):
+            start = outputs[number - 1] + 1 if number else min(inputs_end, outputs[0])
+            if '-threads' not in cmd[start:outputs[number]]:
+                cmd[outputs[number]:outputs[number]] = ['-threads', str(self.threads)]
+        return cmd
+
+    def apply_to_process(self, pid: int, niceness: int = 0):
+        """Optional CPU affinity and niceness for the spawned process (Linux)"""
+        if self.cpus and hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(pid, self.cpus)
+            except OSError as e:
+                logger.debug(f"Could not pin ffmpeg {pid} to CPUs {self.cpus}: {e}")
+        if niceness and hasattr(os, "setpriority"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, pid, niceness)
+            except OSError as e:
+                logger.debug(f"Could not renice ffmpeg {pid}: {e}")
+
+class _Waiter:
+    """A queued request, woken from whichever thread releases a slot"""
+
+    def __init__(self, job_id: str, priority: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.job_id = job_id
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.slot: Optional[FFmpegSlot] = None
+        self.event = threading.Event()
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+
+    def grant(self, slot: FFmpegSlot):
+        self.slot = slot
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(slot))
+        else:
+            self.event.set()
+
+class FFmpegScheduler:
+    """Process-wide admission control for ffmpeg"""
+
+    def __init__(self,
+                 max_concurrent: Optional[int] = None,
+                 total_threads: Optional[int] = None,
+                 pin_cpus: bool = False,
+                 batch_niceness: int = 0):
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+        self.cpus = cpus
+        self.total_threads = total_threads or len(cpus)
+        # x264 scales well to about four threads per process; past that, parallel processes win
+        self.max_concurrent = max_concurrent or max(1, self.total_threads // 4)
+        self.pin_cpus = pin_cpus
+        self.batch_niceness = batch_niceness
+
+        self._lock = threading.Lock()
+        self._queue: List = []
+        self._sequence = itertools.count()
+        self._running: Dict[int, FFmpegSlot] = {}
+        self._free_cpus: Set[int] = set(cpus)
+        self._granted = 0
+        self._total_wait = 0.0
+
+    def _threads_for_next(self) -> int:
+        """Even share of the idle threads across the open slots, so the total never exceeds the cores"""
+        in_use = sum(slot.threads for slot in self._running.values())
+        free = max(0, self.total_threads - in_use)
+        open_slots = max(1, self.max_concurrent - len(self._running))
+        return max(1, -(-free // open_slots))
+
+    def _dispatch(self):
+        """Grant slots to queued waiters in priority order; caller holds the lock"""
+        while self._queue and len(self._running) < self.max_concurrent:
+            _, ticket, waiter = heapq.heappop(self._queue)
+            if waiter.future is not None and waiter.future.cancelled():
+                continue
+            threads = self._threads_for_next()
+            cpus = []
+            if self.pin_cpus:
+                cpus = sorted(self._free_cpus)[:threads]
+                self._free_cpus.difference_update(cpus)
+            slot = FFmpegSlot(waiter.job_id, waiter.priority, threads, cpus,
+                              time.monotonic() - waiter.enqueued, ticket)
+            self._running[ticket] = slot
+            self._granted += 1
+            self._total_wait += slot.waited
+            waiter.grant(slot)
+
+    def _enqueue(self, waiter: _Waiter):
+        with self._lock:
+            heapq.heappush(self._queue, (waiter.priority, next(self._sequence), waiter))
+            self._dispatch()
+
+    def release(self, slot: FFmpegSlot):
+        with self._lock:
+            if self._running.pop(slot.ticket, None) is not None:
+                self._free_cpus.update(slot.cpus)
+            self._dispatch()
+
+    def export_metrics(self):
+        """Collector for the metrics registry"""
+        with self._lock:
+            QUEUE_DEPTH.set(len(self._queue), queue="ffmpeg")
+            QUEUE_RUNNING.set(len(self._running), queue="ffmpeg")
+
+    def niceness_for(self, slot: FFmpegSlot) -> int:
+        return self.batch_niceness if slot.priority >= PRIORITY_BATCH else 0
+
+    @contextmanager
+    def slot(self, job_id: str, priority: Optional[int] = None) -> Iterator[FFmpegSlot]:
+        """Block until this job may run"""
+        waiter = _Waiter(job_id, current_priority() if priority is None else priority)
+        self._enqueue(waiter)
+        waiter.event.wait()
+        try:
+            yield waiter.slot
+        finally:
+            self.release(waiter.slot)
+
+    @asynccontextmanager
+    async def slot_async(self, job_id: str, priority: Optional[int] = None):
+        """Wait without blocking the event loop until this job may run"""
+        waiter = _Waiter(job_id, current_priority() if priority is None else priority,
+                         asyncio.get_running_loop())
+        self._enqueue(waiter)
+        try:
+            slot = await waiter.future
+        except asyncio.CancelledError:
+            # Granted between cancellation and wakeup: hand the slot back
+            with self._lock:
+                granted = waiter.slot
+            if granted is not None:
+                self.release(granted)
+            raise
+        try:
+            yield slot
+        finally:
+            self.release(slot)
+
+    def get_status(self) -> Dict[str, object]:
+        """Running and queued jobs for status output"""
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "total_threads": self.total_threads,
+                "running": [{"job_id": slot.job_id, "threads": slot.threads,
+                             "priority": slot.priority, "cpus": slot.cpus}
+                            for slot in self._running.values()],
+                "queued": [waiter.job_id for _, _, waiter in sorted(self._queue)],
+                "granted": self._granted,
+                "avg_wait_seconds": round(self._total_wait / self._granted, 3) if self._granted else 0.0
+            }
+
+_scheduler: Optional[FFmpegScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_ffmpeg_scheduler() -> FFmpegScheduler:
+    """Get the process-wide scheduler, configured from FFMPEG_* environment variables"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FFmpegScheduler(
+                max_concurrent=int(os.getenv("FFMPEG_MAX_CONCURRENT", "0")) or None,
+                total_threads=int(os.getenv("FFMPEG_TOTAL_THREADS", "0")) or None,
+                pin_cpus=os.getenv("FFMPEG_PIN_CPUS", "false").lower() == "true",
+                batch_niceness=int(os.getenv("FFMPEG_BATCH_NICE", "0"))
+            )
+            REGISTRY.add_collector("ffmpeg_scheduler", _scheduler.export_metrics)
+        return _scheduler
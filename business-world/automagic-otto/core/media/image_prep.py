@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Image Preparation Engine
+Verifies, draft-decodes, crops and resizes source images to the encoder frame size in a process pool
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+import math
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+logger = logging.getLogger("AutoMagic.ImagePrep")
+
+# Bump when the preparation pipeline changes so stale cache entries are ignored
+PREP_VERSION = 1
+
+class ImagePrepError(ValueError):
+    """Source image is missing, corrupt or cannot be prepared"""
+
+@dataclass(frozen=True)
+class ImagePrepSpec:
+    """Target frame for prepared images"""
+    width: int
+    height: int
+    quality: int = 90
+    pixel_format: str = "yuv420p"
+
+    @property
+    def frame_size(self) -> Tuple[int, int]:
+        """Encoder frame size; 4:2:0 chroma needs even dimensions"""
+        if self.pixel_format in ("yuv420p", "nv12"):
+            return self.width - self.width % 2, self.height - self.height % 2
+        return self.width, self.height
+
+    @property
+    def subsampling(self) -> int:
+        """JPEG chroma subsampling matching the encoder pixel format (2 = 4:2:0, 0 = 4:4:4)"""
+        return 2 if self.pixel_format in ("yuv420p", "nv12") else 0
+
+    @property
+    def cache_suffix(self) -> str:
+        width, height = self.frame_size
+        return f"v{PREP_VERSION}_{width}x{height}_q{self.quality}_{self.pixel_format}.jpg"
+
+def content_hash(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """BLAKE2b digest of a file's bytes"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def verify_image(path: Union[str, Path]) -> Tuple[int, int]:
+    """Check an image's structure and that its pixel data decodes completely; returns its size"""
+    try:
+        with Image.open(path) as img:
+            img.verify()  # Structure and checksums (PNG CRCs), no pixel decode
+
+        with Image.open(path) as img:
+            size = img.size
+            # JPEG can decode at 1/8 scale, still walking every entropy-coded block
+            img.draft('RGB', (max(1, size[0] // 8), max(1, size[1] // 8)))
+            img.load()  # Raises on truncated or corrupt pixel data
+        return size
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise ImagePrepError(f"Invalid image {path}: {e}")
+
+def _cover_box(source_size: Tuple[int, int], target_size: Tuple[int, int]) -> Tuple[float, float, float, float]:
+    """Centered crop of the source with the target aspect ratio"""
+    src_w, src_h = source_size
+    dst_w, dst_h = target_size
+    if src_w * dst_h > src_h * dst_w:
+        crop_w = src_h * dst_w / dst_h
+        left = (src_w - crop_w) / 2
+        return left, 0.0, left + crop_w, float(src_h)
+    crop_h = src_w * dst_h / dst_w
+    top = (src_h - crop_h) / 2
+    return 0.0, top, float(src_w), top + crop_h
+
+def prepare_image(source: str, spec: ImagePrepSpec, cache_dir: str) -> str:
+    """Produce an encoder-ready JPEG for one source image, reusing the content-addressed cache"""
+    output = Path(cache_dir) / f"{content_hash(source)}_{spec.cache_suffix}"
+    if output.exists():
+        return str(output)
+
+    target = spec.frame_size
+    try:
+        with Image.open(source) as img:
+            # Let the JPEG decoder downscale by 1/2..1/8 while still covering the target
+            scale = max(target[0] / img.width, target[1] / img.height)
+            img.draft('RGB', (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+
+            if img.size != target:
+                img = img.resize(target, Image.Resampling.LANCZOS,
+                                 box=_cover_box(img.size, target), reducing_gap=3.0)
+
+            output.parent.mkdir(parents=True, exist_ok=True)
+            partial = output.with_suffix(f".{os.getpid()}_{threading.get_ident()}.tmp")
+            img.save(partial, "JPEG", quality=spec.quality, subsampling=spec.subsampling, optimize=True)
+            os.replace(partial, output)  # Atomic so concurrent workers never see half a file
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise ImagePrepError(f"Failed to prepare {source}: {e}")
+
+    return str(output)
+
+def _prepare_worker(source: str, spec: ImagePrepSpec, cache_dir: str) -> Tuple[Optional[str], Optional[str]]:
+    """Process pool entry point returning (output, error) instead of raising across processes"""
+    try:
+        return prepare_image(source, spec, cache_dir), None
+    except Exception as e:
+        return None, str(e)
+
+class ImagePrepEngine:
+    """Prepares batches of images in parallel worker processes"""
+
+    def __init__(self, cache_dir: Union[str, Path], max_workers: Optional[int] = None):
+        # Absolute so prepared paths stay valid in ffmpeg concat lists written elsewhere
+        self.cache_dir = Path(cache_dir).resolve()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 1)))
+        self._executor: Optional[concurrent.futures.Executor] = None
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            try:
+                self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+            except (OSError, NotImplementedError) as e:
+                # Sandboxes without process support still get thread-level overlap on I/O
+                logger.warning(f"Process pool unavailable ({e}), preparing images in threads")
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _collect(self, sources: Sequence[str], results) -> List[Optional[str]]:
+        prepared = []
+        for source, (output, error) in zip(sources, results):
+            if error:
+                logger.error(f"Image preparation failed for {source}: {error}")
+            prepared.append(output)
+        return prepared
+
+    def prepare_many(self, sources: Sequence[str], spec: ImagePrepSpec) -> List[Optional[str]]:
+        """Prepare images in order; failed images come back as None"""
+        executor = self._get_executor()
+        futures = [executor.submit(_prepare_worker, str(source), spec, str(self.cache_dir)) for source in sources]
+        return self._collect(sources, [future.result() for future in futures])
+
+    async def prepare_many_async(self, sources: Sequence[str], spec: ImagePrepSpec) -> List[Optional[str]]:
+        """Async variant of prepare_many"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(executor, _prepare_worker, str(source), spec, str(self.cache_dir))
+            for source in sources
+        ])
+        return self._collect(sources, results)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Media Inspector
+Reads duration, streams and codecs from MP4/MOV atoms, MP3 frame headers and WAV chunks without spawning ffprobe
+"""
+
+import json
+import logging
+import os
+import struct
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger("AutoMagic.MediaInspector")
+
+# Memoized results keyed by (path, size, mtime_ns)
+CACHE_SIZE = 1024
+
+# Largest moov atom read into memory
+MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+class MediaInspectionError(ValueError):
+    """File is missing, truncated or not a recognised media file"""
+
+@dataclass
+class StreamInfo:
+    """One audio or video stream"""
+    codec_type: str  # video, audio
+    codec_name: str
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    bit_rate: Optional[int] = None
+
+@dataclass
+class MediaInfo:
+    """Container-level summary of a media file"""
+    path: str
+    format_name: str  # mp4, mp3, wav or the ffprobe format name
+    duration: float
+    size: int
+    streams: List[StreamInfo] = field(default_factory=list)
+    bit_rate: Optional[int] = None
+    source: str = "parser"  # parser or ffprobe
+
+    @property
+    def has_video(self) -> bool:
+        return any(stream.codec_type == 'video' for stream in self.streams)
+
+    @property
+    def has_audio(self) -> bool:
+        return any(stream.codec_type == 'audio' for stream in self.streams)
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        return next((stream for stream in self.streams if stream.codec_type == 'video'), None)
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        return next((stream for stream in self.streams if stream.codec_type == 'audio'), None)
+
+    def to_probe_dict(self) -> Dict[str, Any]:
+        """ffprobe -show_format -show_streams compatible dictionary"""
+        streams = []
+        for index, stream in enumerate(self.streams):
+            entry: Dict[str, Any] = {"index": index, "codec_type": stream.codec_type,
+                                     "codec_name": stream.codec_name}
+            if stream.duration is not None:
+                entry["duration"] = f"{stream.duration:.6f}"
+            if stream.width:
+                entry["width"], entry["height"] = stream.width, stream.height
+            if stream.fps:
+                entry["r_frame_rate"] = f"{round(stream.fps * 1000)}/1000"
+            if stream.sample_rate:
+                entry["sample_rate"] = str(stream.sample_rate)
+            if stream.channels:
+                entry["channels"] = stream.channels
+            if stream.bit_rate:
+                entry["bit_rate"] = str(stream.bit_rate)
+            streams.append(entry)
+
+        format_info = {"filename": self.path, "format_name": self.format_name,
+                       "duration": f"{self.duration:.6f}", "size": str(self.size)}
+        if self.bit_rate:
+            format_info["bit_rate"] = str(self.bit_rate)
+        return {"streams": streams, "format": format_info}
+
+# ---------------------------------------------------------------- MP4 / MOV
+
+MP4_TOP_LEVEL = {b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip', b'pnot', b'uuid', b'moof', b'styp'}
+
+MP4_CODECS = {
+    'avc1': 'h264', 'avc3': 'h264', 'hvc1': 'hevc', 'hev1': 'hevc', 'av01': 'av1',
+    'vp09': 'vp9', 'mp4v': 'mpeg4', 'mp4a': 'aac', '.mp3': 'mp3', 'ac-3': 'ac3',
+    'ec-3': 'eac3', 'Opus': 'opus', 'alac': 'alac', 'jpeg': 'mjpeg'
+}
+
+def _iter_boxes(data: bytes, start: int, end: int) -> Iterator[Tuple[str, int, int]]:
+    """Yield (type, payload_start, box_end) for boxes in a byte range"""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise MediaInspectionError(f"Corrupt '{box_type.decode('latin-1')}' atom")
+        yield box_type.decode('latin-1'), pos + header, pos + size
+        pos += size
+
+def _find_box(data: bytes, start: int, end: int, *path: str) -> Optional[Tuple[int, int]]:
+    """Locate a nested box by type path, returning its payload range"""
+    for box_type, payload, box_end in _iter_boxes(data, start, end):
+        if box_type == path[0]:
+            return (payload, box_end) if len(path) == 1 else _find_box(data, payload, box_end, *path[1:])
+    return None
+
+def _iter_file_boxes(f, size: int) -> Iterator[Tuple[str, int, int, int]]:
+    """Yield (type, offset, header_size, box_size) for the top-level atoms of an open file"""
+    pos = 0
+    while pos + 8 <= size:
+        f.seek(pos)
+        header = f.read(16)
+        box_size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if box_size == 1:
+            box_size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = size - pos
+
+        if box_size < header_size:
+            raise MediaInspectionError(f"Corrupt top-level atom at offset {pos}")
+        if pos + box_size > size:
+            raise MediaInspectionError(f"Truncated '{box_type.decode('latin-1')}' atom "
+                                       f"({pos + box_size - size} bytes missing)")
+        yield box_type.decode('latin-1'), pos, header_size, box_size
+        pos += box_size
+
+def _read_moov(path: str, size: int) -> bytes:
+    """Walk top-level atoms on disk and return the moov payload"""
+    moov = None
+    has_media_data = False
+
+    with open(path, 'rb') as f:
+        for box_type, pos, header_size, box_size in _iter_file_boxes(f, size):
+            if box_type == 'moov':
+                if box_size > MAX_MOOV_BYTES:
+                    raise MediaInspectionError("moov atom too large to inspect")
+                f.seek(pos + header_size)
+                moov = f.read(box_size - header_size)
+            elif box_type in ('mdat', 'moof'):
+                has_media_data = True
+
+    if moov is None:
+        raise MediaInspectionError("No moov atom (incomplete or not an MP4)")
+    if not has_media_data:
+        raise MediaInspectionError("No mdat atom (file has no media data)")
+    return moov
+
+def _parse_track(moov: bytes, start: int, end: int) -> Optional[StreamInfo]:
+    """Build stream info from one trak atom"""
+    mdia = _find_box(moov, start, end, 'mdia')
+    if not mdia:
+        return None
+
+    hdlr = _find_box(moov, *mdia, 'hdlr')
+    handler = moov[hdlr[0] + 8:hdlr[0] + 12].decode('latin-1') if hdlr else ''
+    codec_type = {'vide': 'video', 'soun': 'audio'}.get(handler)
+    if not codec_type:
+        return None
+
+    duration = None
+    mdhd = _find_box(moov, *mdia, 'mdhd')
+    if mdhd:
+        version = moov[mdhd[0]]
+        if version == 1:
+            timescale, track_duration = struct.unpack_from('>IQ', moov, mdhd[0] + 20)
+        else:
+            timescale, track_duration = struct.unpack_from('>II', moov, mdhd[0] + 12)
+        duration = track_duration / timescale if timescale else None
+
+    stream = StreamInfo(codec_type=codec_type, codec_name='unknown', duration=duration)
+
+    stbl = _find_box(moov, *mdia, 'minf', 'stbl')
+    if stbl:
+        stsd = _find_box(moov, *stbl, 'stsd')
+        if stsd and stsd[1] - stsd[0] >= 16:
+            entry = stsd[0] + 8
+            fourcc = moov[entry + 4:entry + 8].decode('latin-1')
+            stream.codec_name = MP4_CODECS.get(fourcc, fourcc.strip())
+            if codec_type == 'video' and entry + 36 <= stsd[1]:
+                stream.width, stream.height = struct.unpack_from('>HH', moov, entry + 32)
+            elif codec_type == 'audio' and entry + 36 <= stsd[1]:
+                stream.channels = struct.unpack_from('>H', moov, entry + 24)[0]
+                stream.sample_rate = struct.unpack_from('>I', moov, entry + 32)[0] >> 16
+
+        stts = _find_box(moov, *stbl, 'stts')
+        if stts and codec_type == 'video' and duration:
+            count = struct.unpack_from('>I', moov, stts[0] + 4)[0]
+            samples = sum(struct.unpack_from('>I', moov, stts[0] + 8 + 8 * i)[0] for i in range(count))
+            stream.fps = round(samples / duration, 3) if samples else None
+
+    if codec_type == 'video' and not stream.width:
+        tkhd = _find_box(moov, start, end, 'tkhd')
+        if tkhd:
+            offset = 88 if moov[tkhd[0]] == 1 else 76
+            width, height = struct.unpack_from('>II', moov, tkhd[0] + offset)
+            stream.width, stream.height = width >> 16, height >> 16
+
+    return stream
+
+def _inspect_mp4(path: str, size: int) -> MediaInfo:
+    moov = _read_moov(path, size)
+
+    duration = 0.0
+    mvhd = _find_box(moov, 0, len(moov), 'mvhd')
+    if mvhd:
+        if moov[mvhd[0]] == 1:
+            timescale, movie_duration = struct.unpack_from('>IQ', moov, mvhd[0] + 20)
+        else:
+            timescale, movie_duration = struct.unpack_from('>II', moov, mvhd[0] + 12)
+        duration = movie_duration / timescale if timescale else 0.0
+
+    streams = []
+    for box_type, payload, box_end in _iter_boxes(moov, 0, len(moov)):
+        if box_type == 'trak':
+            stream = _parse_track(moov, payload, box_end)
+            if stream:
+                streams.append(stream)
+
+    if not duration:
+        duration = max((stream.duration or 0.0 for stream in streams), default=0.0)
+
+    bit_rate = int(size * 8 / duration) if duration else None
+    return MediaInfo(path, 'mp4', duration, size, streams, bit_rate)
+
+# ---------------------------------------------------------------- MP3
+
+MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 25: (11025, 12000, 8000)}
+
+def _mp3_frame_header(data: bytes, pos: int) -> Optional[Dict[str, int]]:
+    """Decode an MPEG audio frame header, or None if the bytes are not one"""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = {0: 25, 2: 2, 3: 1}.get((b1 >> 3) & 3)
+    layer = {1: 3, 2: 2, 3: 1}.get((b1 >> 1) & 3)
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+
+    if layer == 1:
+        samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        samples, length = 576, 72 * bitrate // sample_rate + padding
+    else:
+        samples, length = 1152, 144 * bitrate // sample_rate + padding
+
+    return {"version": version, "layer": layer, "bitrate": bitrate, "sample_rate": sample_rate,
+            "channels": 1 if b3 >> 6 == 3 else 2, "samples": samples, "length": length}
+
+def _inspect_mp3(path: str, size: int) -> MediaInfo:
+    with open(path, 'rb') as f:
+        head = f.read(10)
+        audio_start = 0
+        if head[:3] == b'ID3' and len(head) == 10:
+            # Syncsafe tag size, plus footer when flagged
+            tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+            audio_start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+
+        f.seek(audio_start)
+        data = f.read(128 * 1024)
+        f.seek(max(size - 128, 0))
+        has_id3v1 = f.read(3) == b'TAG'
+
+    # First frame whose successor is also a valid frame header
+    frame = offset = None
+    for pos in range(len(data) - 4):
+        header = _mp3_frame_header(data, pos)
+        if header and (pos + header["length"] + 4 > len(data)
+                       or _mp3_frame_header(data, pos + header["length"])):
+            frame, offset = header, pos
+            break
+    if frame is None:
+        raise MediaInspectionError("No MPEG audio frames found")
+
+    # Xing/Info (VBR or LAME CBR) or VBRI headers carry the exact frame count
+    frames = None
+    side_info = (36 if frame["channels"] == 2 else 21) if frame["version"] == 1 else \
+                (21 if frame["channels"] == 2 else 13)
+    xing = data[offset + side_info:offset + side_info + 12]
+    if xing[:4] in (b'Xing', b'Info') and len(xing) == 12 and struct.unpack('>I', xing[4:8])[0] & 1:
+        frames = struct.unpack('>I', xing[8:12])[0]
+    elif data[offset + 36:offset + 40] == b'VBRI':
+        frames = struct.unpack_from('>I', data, offset + 50)[0]
+
+    audio_bytes = size - audio_start - offset - (128 if has_id3v1 else 0)
+    if frames:
+        duration = frames * frame["samples"] / frame["sample_rate"]
+        bit_rate = int(audio_bytes * 8 / duration) if duration else frame["bitrate"]
+    else:
+        duration = audio_bytes * 8 / frame["bitrate"]
+        bit_rate = frame["bitrate"]
+
+    stream = StreamInfo('audio', 'mp3', duration, sample_rate=frame["sample_rate"],
+                        channels=frame["channels"], bit_rate=bit_rate)
+    return MediaInfo(path, 'mp3', duration, size, [stream], bit_rate)
+
+# ---------------------------------------------------------------- WAV
+
+WAV_CODECS = {1: 'pcm_s{bits}le', 3: 'pcm_f{bits}le', 6: 'pcm_alaw', 7: 'pcm_mulaw', 0xFFFE: 'pcm_s{bits}le'}
+
+def _inspect_wav(path: str, size: int) -> MediaInfo:
+    fmt = None
+    data_size = None
+
+    with open(path, 'rb') as f:
+        f.seek(12)
+        pos = 12
+        while pos + 8 <= size:
+            chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack('<HHIIHH', f.read(16))
+            elif chunk_id == b'data':
+                # Streaming writers leave 0 or 0xFFFFFFFF; fall back to the rest of the file
+                available = size - pos - 8
+                data_size = available if chunk_size in (0, 0xFFFFFFFF) or chunk_size > available else chunk_size
+                break
+            pos += 8 + chunk_size + (chunk_size & 1)
+            f.seek(pos)
+
+    if fmt is None or data_size is None:
+        raise MediaInspectionError("WAV file is missing fmt or data chunk")
+
+    audio_format, channels, sample_rate, byte_rate, _, bits = fmt
+    if not byte_rate:
+        raise MediaInspectionError("WAV file has zero byte rate")
+
+    duration = data_size / byte_rate
+    codec = WAV_CODECS.get(audio_format, f'wav_{audio_format:#x}').format(bits=bits)
+    stream = StreamInfo('audio', codec, duration, sample_rate=sample_rate,
+                        channels=channels, bit_rate=byte_rate * 8)
+    return MediaInfo(path, 'wav', duration, size, [stream], byte_rate * 8)
+
+# ---------------------------------------------------------------- ffprobe fallback
+
+def _inspect_ffprobe(path: str, size: int) -> MediaInfo:
+    cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise MediaInspectionError(f"Unrecognised format and ffprobe unavailable: {e}")
+    if result.returncode != 0:
+        raise MediaInspectionError("Unrecognised media format")
+
+    probe = json.loads(result.stdout or '{}')
+    format_info = probe.get('format', {})
+
+    def number(value, cast=float):
+        try:
+            return cast(value) if value not in (None, 'N/A') else None
+        except (TypeError, ValueError):
+            return None
+
+    streams = []
+    for entry in probe.get('streams', []):
+        if entry.get('codec_type') not in ('video', 'audio'):
+            continue
+        fps = None
+        if entry.get('r_frame_rate', '0/0') != '0/0':
+            num, _, den = entry['r_frame_rate'].partition('/')
+            fps = float(num) / float(den or 1) if float(den or 1) else None
+        streams.append(StreamInfo(
+            codec_type=entry['codec_type'], codec_name=entry.get('codec_name', 'unknown'),
+            duration=number(entry.get('duration')), width=entry.get('width'), height=entry.get('height'),
+            fps=fps if entry['codec_type'] == 'video' else None,
+            sample_rate=number(entry.get('sample_rate'), int), channels=entry.get('channels'),
+            bit_rate=number(entry.get('bit_rate'), int)
+        ))
+
+    duration = number(format_info.get('duration')) or max((s.duration or 0.0 for s in streams), default=0.0)
+    return MediaInfo(path, format_info.get('format_name', 'unknown'), duration, size, streams,
+                     number(format_info.get('bit_rate'), int), source='ffprobe')
+
+# ---------------------------------------------------------------- public API
+
+def _detect_format(path: str) -> Optional[str]:
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if len(head) >= 8 and head[4:8] in MP4_TOP_LEVEL:
+        return 'mp4'
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'wav'
+    if head[:3] == b'ID3' or _mp3_frame_header(head, 0):
+        return 'mp3'
+    return None
+
+PARSERS = {'mp4': _inspect_mp4, 'mp3': _inspect_mp3, 'wav': _inspect_wav}
+
+_cache: "OrderedDict[Tuple[str, int, int], Union[MediaInfo, MediaInspectionError]]" = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+def inspect_media(path: Union[str, Path]) -> MediaInfo:
+    """Inspect a media file, memoized by (path, size, mtime); raises MediaInspectionError"""
+    path = os.path.abspath(str(path))
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise MediaInspectionError(f"Cannot access {path}: {e}")
+
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+    if cached is not None:
+        if isinstance(cached, MediaInspectionError):
+            raise cached
+        return cached
+
+    try:
+        if stat.st_size == 0:
+            raise MediaInspectionError("File is empty")
+        parser = PARSERS.get(_detect_format(path), _inspect_ffprobe)
+        result: Union[MediaInfo, MediaInspectionError] = parser(path, stat.st_size)
+    except MediaInspectionError as e:
+        result = e
+    except (OSError, struct.error, IndexError) as e:
+        result = MediaInspectionError(f"Malformed media file: {e}")
+
+    with _cache_lock:
+        _cache_stats["misses"] += 1
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    if isinstance(result, MediaInspectionError):
+        logger.debug(f"Inspection failed for {path}: {result}")
+        raise result
+    return result
+
+def probe_duration(path: Union[str, Path]) -> float:
+    """Duration in seconds of a media file"""
+    return inspect_media(path).duration
+
+def clear_inspection_cache():
+    """Drop all memoized inspection results"""
+    with _cache_lock:
+        _cache.clear()
+
+def inspection_cache_stats() -> Dict[str, int]:
+    """Cache hit/miss counters"""
+    with _cache_lock:
+        return dict(_cache_stats, entries=len(_cache))
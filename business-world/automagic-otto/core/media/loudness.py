@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Loudness Normalization
+Builds loudnorm filter chains for the final mux, with two-pass measurements cached per source audio hash
+"""
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from .ffmpeg_runner import FFmpegError, run_ffmpeg
+from .image_prep import content_hash
+
+logger = logging.getLogger("AutoMagic.Loudness")
+
+# Keys loudnorm prints in its JSON summary that the second pass consumes
+MEASURED_KEYS = ("input_i", "input_tp", "input_lra", "input_thresh", "target_offset")
+
+@dataclass(frozen=True)
+class LoudnessTarget:
+    """EBU R128 targets for loudnorm"""
+    integrated: float = -16.0
+    true_peak: float = -1.5
+    lra: float = 11.0
+    sample_rate: int = 44100
+
+    @property
+    def base_filter(self) -> str:
+        return f"loudnorm=I={self.integrated}:TP={self.true_peak}:LRA={self.lra}"
+
+    @property
+    def cache_suffix(self) -> str:
+        return f"I{self.integrated}_TP{self.true_peak}_LRA{self.lra}"
+
+class LoudnessAnalyzer:
+    """Produces loudnorm filter chains, measuring each source once for two-pass normalization"""
+
+    def __init__(self, cache_dir: Union[str, Path], target: Optional[LoudnessTarget] = None):
+        self.cache_dir = Path(cache_dir)
+        self.target = target or LoudnessTarget()
+
+    def _cache_path(self, audio_path: str) -> Path:
+        return self.cache_dir / f"{content_hash(audio_path)}_{self.target.cache_suffix}.json"
+
+    async def measure(self, audio_path: str) -> Optional[Dict[str, str]]:
+        """First loudnorm pass: analyze only, reusing earlier measurements of the same bytes"""
+        cache_path = self._cache_path(audio_path)
+        try:
+            return json.loads(cache_path.read_text())
+        except (OSError, ValueError):
+            pass
+
+        cmd = [
+            'ffmpeg', '-nostdin', '-i', audio_path,
+            '-vn', '-af', f"{self.target.base_filter}:print_format=json",
+            '-f', 'null', '-'
+        ]
+        try:
+            result = await run_ffmpeg(cmd, job_id=f"loudness_{cache_path.stem[:12]}")
+        except FFmpegError as e:
+            logger.warning(f"Loudness measurement failed for {audio_path}: {e}")
+            return None
+
+        match = re.search(r"\{[^{}]*\"input_i\"[^{}]*\}", result.stderr)
+        if not match:
+            logger.warning(f"No loudnorm summary in ffmpeg output for {audio_path}")
+            return None
+
+        summary = json.loads(match.group(0))
+        measured = {key: summary[key] for key in MEASURED_KEYS}
+        # Silence measures as -inf, which the second pass cannot use
+        if any(not re.fullmatch(r"-?\d+(\.\d+)?", value) for value in measured.values()):
+            logger.debug(f"Unusable loudness measurement for {audio_path}: {measured}")
+            return None
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            partial = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            partial.write_text(json.dumps(measured))
+            os.replace(partial, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache loudness measurement: {e}")
+        return measured
+
+    async def filter_chain(self, audio_path: str, two_pass: bool = False) -> str:
+        """Audio filter chain for the mux; falls back to single-pass loudnorm when unmeasured"""
+        target = self.target
+        loudnorm = target.base_filter
+
+        measured = await self.measure(audio_path) if two_pass else None
+        if measured:
+            loudnorm += (f":measured_I={measured['input_i']}"
+                         f":measured_TP={measured['input_tp']}"
+                         f":measured_LRA={measured['input_lra']}"
+                         f":measured_thresh={measured['input_thresh']}"
+                         f":offset={measured['target_offset']}"
+                         ":linear=true")
+
+        # loudnorm works at 192 kHz internally; resample back once before the encoder
+        return f"{loudnorm},aresample={target.sample_rate}"
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+MP4 Validation
+Checks rendered MP4s from the box tree and a few sampled frames instead of file sizes or a full decode
+"""
+
+import logging
+import os
+import struct
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+from .ffmpeg_scheduler import get_ffmpeg_scheduler
+from .inspector import (MAX_MOOV_BYTES, MP4_CODECS, MediaInspectionError,
+                        _find_box, _iter_boxes, _iter_file_boxes)
+
+logger = logging.getLogger("AutoMagic.MP4Validator")
+
+# Frames decoded per file, at evenly spaced timestamps
+SAMPLE_FRAMES = 5
+
+# Sampled frames are compared as small grayscale thumbnails
+THUMB_SIZE = (64, 36)
+
+# Mean luma (0-255) below which a frame counts as black; limited-range black is 16
+BLACK_LUMA = 24.0
+
+# Mean absolute thumbnail difference below which two sampled frames show the same picture
+FROZEN_DIFF = 1.0
+
+# Atoms an MP4 writer may put first
+LEADING_ATOMS = (b'ftyp', b'styp', b'moov', b'mdat', b'free', b'skip', b'wide')
+
+# Keyframes further apart than this make seeking slow for players and for the sampler
+MAX_KEYFRAME_GAP = 10.0
+
+@dataclass
+class TrackReport:
+    """Sample table summary for one track"""
+    codec_type: str  # video, audio
+    codec_name: str
+    duration: float
+    sample_count: int
+    keyframe_times: List[float] = field(default_factory=list)  # Video only, seconds
+    data_end: int = 0  # File offset where the last sample ends
+
+    @property
+    def max_keyframe_gap(self) -> float:
+        times = self.keyframe_times + [self.duration]
+        return max((b - a for a, b in zip(times, times[1:])), default=self.duration)
+
+@dataclass
+class MP4Validation:
+    """Outcome of validating one MP4"""
+    path: str
+    size: int = 0
+    faststart: bool = False
+    duration: float = 0.0
+    tracks: List[TrackReport] = field(default_factory=list)
+    frame_luma: List[float] = field(default_factory=list)  # Mean luma of each sampled frame
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+    @property
+    def passed(self) -> bool:
+        return not self.errors
+
+    @property
+    def video(self) -> Optional[TrackReport]:
+        return next((track for track in self.tracks if track.codec_type == 'video'), None)
+
+    @property
+    def audio(self) -> Optional[TrackReport]:
+        return next((track for track in self.tracks if track.codec_type == 'audio'), None)
+
+    def summary(self) -> str:
+        """One-line description for logs and reports"""
+        if self.errors:
+            return "; ".join(self.errors)
+        video = self.video
+        return (f"{self.duration:.1f}s, {video.sample_count} frames, {len(video.keyframe_times)} keyframes, "
+                f"{'faststart' if self.faststart else 'moov at end'}, {len(self.frame_luma)} frames sampled")
+
+def _uint_array(data: bytes, offset: int, count: int, wide: bool = False) -> List[int]:
+    """Big-endian table of 32- or 64-bit integers"""
+    return list(struct.unpack_from(f">{count}{'Q' if wide else 'I'}", data, offset))
+
+def _parse_track_tables(moov: bytes, start: int, end: int, errors: List[str]) -> Optional[TrackReport]:
+    """Read one trak's sample tables, recording structural problems in errors"""
+    mdia = _find_box(moov, start, end, 'mdia')
+    if not mdia:
+        return None
+    hdlr = _find_box(moov, *mdia, 'hdlr')
+    handler = moov[hdlr[0] + 8:hdlr[0] + 12].decode('latin-1') if hdlr else ''
+    codec_type = {'vide': 'video', 'soun': 'audio'}.get(handler)
+    if not codec_type:
+        return None
+
+    timescale, track_duration = 0, 0
+    mdhd = _find_box(moov, *mdia, 'mdhd')
+    if mdhd:
+        if moov[mdhd[0]] == 1:
+            timescale, track_duration = struct.unpack_from('>IQ', moov, mdhd[0] + 20)
+        else:
+            timescale, track_duration = struct.unpack_from('>II', moov, mdhd[0] + 12)
+    if not timescale:
+        errors.append(f"{codec_type} track has no timescale")
+        return None
+    track = TrackReport(codec_type, 'unknown', track_duration / timescale, 0)
+
+    stbl = _find_box(moov, *mdia, 'minf', 'stbl')
+    if not stbl:
+        errors.append(f"{codec_type} track has no sample table")
+        return track
+
+    stsd = _find_box(moov, *stbl, 'stsd')
+    if stsd and stsd[1] - stsd[0] >= 16:
+        fourcc = moov[stsd[0] + 12:stsd[0] + 16].decode('latin-1')
+        track.codec_name = MP4_CODECS.get(fourcc, fourcc.strip())
+
+    # Sample sizes
+    sizes: List[int] = []
+    uniform_size = 0
+    stsz = _find_box(moov, *stbl, 'stsz')
+    if stsz:
+        uniform_size, track.sample_count = struct.unpack_from('>II', moov, stsz[0] + 4)
+        if not uniform_size:
+            sizes = _uint_array(moov, stsz[0] + 12, track.sample_count)
+    if not track.sample_count:
+        errors.append(f"{codec_type} track has no samples")
+        return track
+
+    # Decode timestamps of every sample, needed for keyframe times
+    stts = _find_box(moov, *stbl, 'stts')
+    timed_samples = 0
+    decode_times: List[int] = []
+    if stts:
+        entry_count = struct.unpack_from('>I', moov, stts[0] + 4)[0]
+        entries = _uint_array(moov, stts[0] + 8, entry_count * 2)
+        clock = 0
+        for count, delta in zip(entries[::2], entries[1::2]):
+            if codec_type == 'video':
+                decode_times.extend(range(clock, clock + count * delta, delta) if delta else [clock] * count)
+            clock += count * delta
+            timed_samples += count
+    if timed_samples != track.sample_count:
+        errors.append(f"{codec_type} track times {timed_samples} samples but stores {track.sample_count}")
+
+    if codec_type == 'video':
+        stss = _find_box(moov, *stbl, 'stss')
+        if stss:
+            entry_count = struct.unpack_from('>I', moov, stss[0] + 4)[0]
+            keyframes = _uint_array(moov, stss[0] + 8, entry_count)
+        else:
+            keyframes = list(range(1, track.sample_count + 1))  # No table: every sample is a sync sample
+        if not keyframes:
+            errors.append("video track has no keyframes")
+        elif keyframes[0] != 1:
+            errors.append("video track does not start with a keyframe")
+        track.keyframe_times = [decode_times[number - 1] / timescale
+                                for number in keyframes if 0 < number <= len(decode_times)]
+
+    # Where the last sample ends, to catch files cut short after the moov was written
+    stco = _find_box(moov, *stbl, 'stco')
+    co64 = None if stco else _find_box(moov, *stbl, 'co64')
+    chunk_box = stco or co64
+    stsc = _find_box(moov, *stbl, 'stsc')
+    if chunk_box and stsc:
+        wide = co64 is not None
+        chunk_count = struct.unpack_from('>I', moov, chunk_box[0] + 4)[0]
+        stsc_count = struct.unpack_from('>I', moov, stsc[0] + 4)[0]
+        if chunk_count and stsc_count:
+            last_offset = _uint_array(moov, chunk_box[0] + 8, chunk_count, wide)[-1]
+            samples_in_last = struct.unpack_from('>I', moov, stsc[0] + 8 + 12 * (stsc_count - 1) + 4)[0]
+            last_sizes = sizes[-samples_in_last:] if sizes else [uniform_size] * samples_in_last
+            track.data_end = last_offset + sum(last_sizes)
+    else:
+        errors.append(f"{codec_type} track has no chunk offsets")
+
+    return track
+
+def _read_structure(path: str, result: MP4Validation) -> Optional[bytes]:
+    """Walk the top-level atoms, recording layout, and return the moov payload"""
+    moov = None
+    moov_pos = mdat_pos = None
+    fragmented = False
+
+    with open(path, 'rb') as f:
+        if f.read(8)[4:] not in LEADING_ATOMS:
+            raise MediaInspectionError("Not an MP4 file")
+        for box_type, pos, header_size, box_size in _iter_file_boxes(f, result.size):
+            if box_type == 'moov' and moov is None:
+                if box_size > MAX_MOOV_BYTES:
+                    raise MediaInspectionError("moov atom too large to inspect")
+                f.seek(pos + header_size)
+                moov = f.read(box_size - header_size)
+                moov_pos = pos
+            elif box_type == 'mdat' and mdat_pos is None:
+                mdat_pos = pos
+            elif box_type == 'moof':
+                fragmented = True
+
+    if moov is None:
+        raise MediaInspectionError("No moov atom: the render stopped before the index was written")
+    if mdat_pos is None and not fragmented:
+        raise MediaInspectionError("No mdat atom: the file has no media data")
+    if fragmented:
+        result.warnings.append("Fragmented MP4: per-sample tables were not checked")
+        return None
+
+    result.faststart = moov_pos < mdat_pos
+    return moov
+
+def _sample_times(video: TrackReport, count: int) -> List[float]:
+    """Timestamps spread evenly across the timeline, one in the middle of each of count slices"""
+    if video.duration <= 0 or count <= 0:
+        return []
+    return [video.duration * (n + 0.5) / count for n in range(count)]
+
+def _decode_thumbnails(path: str, seek_times: List[float]) -> np.ndarray:
+    """Decode the frame at each seek time in a single ffmpeg run, as grayscale thumbnails"""
+    width, height = THUMB_SIZE
+    cmd = ['ffmpeg', '-hide_banner', '-nostdin', '-v', 'error']
+    for seconds in seek_times:
+        # Accurate seek decodes from the keyframe before the target, so samples do not collapse
+        # onto the few keyframes of a short render
+        cmd += ['-threads', '1', '-ss', f"{seconds:.3f}", '-i', path]
+    labels = "".join(f"[v{i}]" for i in range(len(seek_times)))
+    graph = ";".join(
+        f"[{i}:v]setpts=PTS-STARTPTS,trim=end_frame=1,scale={width}:{height},setsar=1,format=gray[v{i}]"
+        for i in range(len(seek_times))
+    ) + f";{labels}concat=n={len(seek_times)}:v=1:a=0[out]"
+    cmd += ['-filter_complex', graph, '-map', '[out]', '-fps_mode', 'passthrough', '-f', 'rawvideo', '-']
+
+    with get_ffmpeg_scheduler().slot(f"validate_{Path(path).stem}"):
+        result = subprocess.run(cmd, capture_output=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors='replace').strip()[-300:] or "ffmpeg failed")
+    frames = np.frombuffer(result.stdout, dtype=np.uint8)
+    frame_count = frames.size // (width * height)
+    if not frame_count:
+        raise RuntimeError("no frames decoded")
+    return frames[:frame_count * width * height].reshape(frame_count, height, width).astype(np.float32)
+
+def _check_frames(path: str, result: MP4Validation, sample_frames: int, allow_static: bool):
+    """Decode a handful of frames across the timeline to catch black or frozen renders"""
+    seek_times = _sample_times(result.video, sample_frames)
+    if not seek_times:
+        return
+    try:
+        frames = _decode_thumbnails(path, seek_times)
+    except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+        result.warnings.append(f"Frame sampling skipped: {e}")
+        return
+
+    result.frame_luma = [round(float(frame.mean()), 1) for frame in frames]
+    black = sum(luma < BLACK_LUMA for luma in result.frame_luma)
+    if black == len(frames):
+        result.errors.append(f"Video is black at all {black} sampled frames")
+    elif black:
+        result.warnings.append(f"Video is black at {black} of {len(frames)} sampled frames")
+
+    if len(frames) >= 3 and black < len(frames):
+        changes = [float(np.abs(a - b).mean()) for a, b in zip(frames, frames[1:])]
+        if max(changes) < FROZEN_DIFF:
+            message = f"Video shows the same picture at all {len(frames)} sampled frames"
+            if allow_static:
+                result.warnings.append(message)
+            else:
+                result.errors.append(f"{message} (frozen)")
+
+def validate_mp4(path: Union[str, Path],
+                 expected_duration: Optional[float] = None,
+                 duration_tolerance: float = 1.0,
+                 require_audio: bool = True,
+                 require_faststart: bool = False,
+                 sync_tolerance: float = 2.0,
+                 sample_frames: int = SAMPLE_FRAMES,
+                 allow_static: bool = False) -> MP4Validation:
+    """Validate an MP4's structure and sampled content; never raises for a bad file"""
+    started = time.perf_counter()
+    path = os.path.abspath(str(path))
+    result = MP4Validation(path)
+
+    try:
+        result.size = os.path.getsize(path)
+        if not result.size:
+            raise MediaInspectionError("File is empty")
+        moov = _read_structure(path, result)
+        if moov is not None:
+            for box_type, payload, box_end in _iter_boxes(moov, 0, len(moov)):
+                if box_type == 'trak':
+                    track = _parse_track_tables(moov, payload, box_end, result.errors)
+                    if track:
+                        result.tracks.append(track)
+    except (MediaInspectionError, OSError, struct.error, IndexError) as e:
+        result.errors.append(str(e) or e.__class__.__name__)
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result
+    if moov is None:
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result
+
+    if not result.faststart:
+        message = "moov atom follows the media data (no faststart)"
+        (result.errors if require_faststart else result.warnings).append(message)
+
+    video, audio = result.video, result.audio
+    if not video:
+        result.errors.append("No video track")
+    if not audio and require_audio:
+        result.errors.append("No audio track")
+
+    for track in result.tracks:
+        if track.duration <= 0:
+            result.errors.append(f"{track.codec_type} track has zero duration")
+        if track.data_end > result.size:
+            result.errors.append(f"Truncated: {track.codec_type} samples end "
+                                 f"{track.data_end - result.size} bytes past the end of the file")
+    result.duration = max((track.duration for track in result.tracks), default=0.0)
+
+    if video and video.keyframe_times and video.max_keyframe_gap > MAX_KEYFRAME_GAP:
+        result.warnings.append(f"Keyframes up to {video.max_keyframe_gap:.1f}s apart")
+    if video and audio and abs(video.duration - audio.duration) > sync_tolerance:
+        result.errors.append(f"Video ({video.duration:.1f}s) and audio ({audio.duration:.1f}s) lengths differ")
+    if expected_duration is not None and abs(result.duration - expected_duration) > duration_tolerance:
+        result.errors.append(f"Duration {result.duration:.1f}s, expected {expected_duration:.1f}s")
+
+    if video and not result.errors and sample_frames:
+        _check_frames(path, result, sample_frames, allow_static)
+
+    result.elapsed_ms = (time.perf_counter() - started) * 1000
+    if result.errors:
+        logger.debug(f"MP4 validation failed for {path}: {result.summary()}")
+    return result
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Music Bed Mixing
+Builds ffmpeg filtergraphs that loop a music bed, duck it under narration and mix both in the render
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+# Common format for the mix inputs; amix and sidechaincompress need matching layouts
+MIX_FORMAT = "aformat=sample_fmts=fltp:sample_rates=44100:channel_layouts=stereo"
+
+@dataclass(frozen=True)
+class DuckingSettings:
+    """Bed level and sidechain compressor parameters"""
+    bed_gain: float = 0.3  # Linear gain on the bed before ducking
+    threshold: float = 0.02  # Voice level that starts ducking
+    ratio: float = 8.0
+    attack_ms: float = 20.0
+    release_ms: float = 400.0
+    makeup: float = 1.0
+
+    @property
+    def compressor(self) -> str:
+        return (f"sidechaincompress=threshold={self.threshold}:ratio={self.ratio}"
+                f":attack={self.attack_ms}:release={self.release_ms}:makeup={self.makeup}")
+
+def music_input_args(music_path: Union[str, Path]) -> List[str]:
+    """Input arguments that loop the bed inside the demuxer instead of decoding it into memory"""
+    return ['-stream_loop', '-1', '-i', str(music_path)]
+
+def music_bed_filter(music_input: int,
+                     voice_input: Optional[int] = None,
+                     settings: Optional[DuckingSettings] = None,
+                     output_label: str = "aout") -> Tuple[str, str]:
+    """Return (filter_complex, output label) mixing a looped bed under optional narration
+
+    With narration the mix ends when the voice ends, so the endlessly looped bed is trimmed
+    to narration length; without it the caller bounds the output with -t.
+    """
+    settings = settings or DuckingSettings()
+    bed = f"[{music_input}:a]{MIX_FORMAT},volume={settings.bed_gain}"
+
+    if voice_input is None:
+        return f"{bed}[{output_label}]", f"[{output_label}]"
+
+    graph = ";".join([
+        f"[{voice_input}:a]{MIX_FORMAT},asplit=2[voice][sidechain]",
+        f"{bed}[bed]",
+        f"[bed][sidechain]{settings.compressor}[ducked]",
+        f"[voice][ducked]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[{output_label}]"
+    ])
+    return graph, f"[{output_label}]"
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Music Library Catalog
+Persistent, mtime-incremental index of music tracks with loudness, tempo, energy and mood tags
+"""
+
+import bisect
+import concurrent.futures
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .ffmpeg_scheduler import PRIORITY_BATCH, get_ffmpeg_scheduler
+
+logger = logging.getLogger("AutoMagic.MusicCatalog")
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac')
+
+# Bump when feature extraction changes so stale entries are re-analyzed
+CATALOG_VERSION = 2
+
+# Features are computed on a low-rate mono decode; tempo and energy need nothing finer
+ANALYSIS_RATE = 11025
+FRAME_SIZE = 1024
+HOP_SIZE = 256
+TEMPO_RANGE = (60.0, 180.0)
+TEMPO_PRIOR_BPM = 120.0  # Breaks half/double tempo ties toward typical music tempi
+
+# Where a music bed should sit under narration normalized to about -16 LUFS
+BED_TARGET_LUFS = -28.0
+
+# Random probes select() makes for a loudness match before scanning the candidates
+LOUDNESS_PROBES = 32
+
+class MusicAnalysisError(RuntimeError):
+    """Track could not be decoded or measured"""
+
+@dataclass
+class MusicTrack:
+    """Catalog entry for one track"""
+    path: str
+    size: int
+    mtime_ns: int
+    duration: float
+    loudness: float  # Integrated loudness, LUFS
+    true_peak: float  # dBFS
+    bpm: float
+    energy: float  # 0 (ambient) .. 1 (driving)
+    moods: List[str] = field(default_factory=list)
+
+    def bed_gain(self, target_lufs: float = BED_TARGET_LUFS) -> float:
+        """Linear gain that brings this track to the bed level, from the stored measurement"""
+        return float(np.clip(10 ** ((target_lufs - self.loudness) / 20), 0.02, 1.0))
+
+def _decode_and_measure(path: Path) -> Tuple[np.ndarray, float, float]:
+    """One ffmpeg pass: EBU R128 loudness from the full-rate audio plus a mono PCM copy for NumPy"""
+    cmd = [
+        'ffmpeg', '-hide_banner', '-nostdin', '-i', str(path), '-vn',
+        '-filter_complex',
+        f"[0:a]asplit=2[meter][pcm];[meter]ebur128=peak=true:framelog=quiet,anullsink;"
+        f"[pcm]aresample={ANALYSIS_RATE},aformat=sample_fmts=flt:channel_layouts=mono[out]",
+        '-map', '[out]', '-f', 'f32le', '-'
+    ]
+    with get_ffmpeg_scheduler().slot(f"music_{path.stem}", PRIORITY_BATCH) as slot:
+        result = subprocess.run(slot.apply_threads(cmd), capture_output=True, timeout=600)
+    stderr = result.stderr.decode(errors='replace')
+    if result.returncode != 0:
+        raise MusicAnalysisError(f"Decoding {path} failed: {stderr[-300:]}")
+
+    loudness = re.search(r"I:\s+(-?[\d.]+|-inf) LUFS", stderr)
+    peak = re.search(r"True peak:\s+Peak:\s+(-?[\d.]+|-inf) dBFS", stderr)
+    samples = np.frombuffer(result.stdout, dtype=np.float32)
+    if not loudness or samples.size < FRAME_SIZE:
+        raise MusicAnalysisError(f"No measurable audio in {path}")
+
+    to_float = lambda match: float(match.group(1)) if match and match.group(1) != '-inf' else -70.0
+    return samples, to_float(loudness), to_float(peak)
+
+def _onset_envelope(samples: np.ndarray) -> np.ndarray:
+    """Half-wave rectified spectral flux of the log-magnitude spectrogram"""
+    frame_count = 1 + (samples.size - FRAME_SIZE) // HOP_SIZE
+    frames = np.lib.stride_tricks.as_strided(
+        samples,
+        shape=(frame_count, FRAME_SIZE),
+        strides=(samples.strides[0] * HOP_SIZE, samples.strides[0])
+    )
+    spectrum = np.log1p(100 * np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE), axis=1)))
+    flux = np.maximum(np.diff(spectrum, axis=0), 0).sum(axis=1)
+    return flux - flux.mean() if flux.size else flux
+
+def estimate_tempo(samples: np.ndarray) -> float:
+    """BPM from the autocorrelation peak of the onset envelope"""
+    envelope = _onset_envelope(samples)
+    frame_rate = ANALYSIS_RATE / HOP_SIZE
+    min_lag = int(frame_rate * 60 / TEMPO_RANGE[1])
+    max_lag = int(frame_rate * 60 / TEMPO_RANGE[0])
+    if envelope.size <= max_lag + 1 or not envelope.any():
+        return 0.0
+
+    # FFT autocorrelation is O(n log n) even for long tracks
+    size = 1 << int(np.ceil(np.log2(2 * envelope.size)))
+    spectrum = np.fft.rfft(envelope, size)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum))[:max_lag + 1]
+
+    lags = np.arange(min_lag, max_lag + 1)
+    prior = np.exp(-0.5 * np.log2(60 * frame_rate / lags / TEMPO_PRIOR_BPM) ** 2)
+    lag = lags[int(np.argmax(autocorr[min_lag:max_lag + 1] * prior))]
+    return round(60 * frame_rate / lag, 1)
+
+def estimate_energy(samples: np.ndarray, bpm: float) -> float:
+    """Blend of RMS level and tempo scaled to 0..1"""
+    rms_db = 20 * np.log10(max(float(np.sqrt(np.mean(samples ** 2))), 1e-6))
+    level = np.clip((rms_db + 40) / 30, 0, 1)
+    pace = np.clip((bpm - TEMPO_RANGE[0]) / (TEMPO_RANGE[1] - TEMPO_RANGE[0]), 0, 1) if bpm else 0.0
+    return round(float(0.6 * level + 0.4 * pace), 3)
+
+def mood_tags(path: Path, library: Path, energy: float) -> List[str]:
+    """Filename prefix and folder names (the library's naming convention) plus an energy:* tag"""
+    tags = []
+    prefix = re.split(r"[_\-\s.]+", path.stem.lower(), maxsplit=1)[0]
+    if prefix:
+        tags.append(prefix)
+    tags.extend(part.lower() for part in path.relative_to(library).parts[:-1])
+    # Namespaced so a measured level never satisfies a brief's mood by accident
+    tags.append("energy:" + ("calm" if energy < 0.35 else "energetic" if energy > 0.65 else "moderate"))
+    return sorted(set(tags))
+
+def analyze_track(path: Union[str, Path], library: Union[str, Path]) -> MusicTrack:
+    """Decode a track once and compute every catalog feature"""
+    path, library = Path(path), Path(library)
+    stat = path.stat()
+    samples, loudness, true_peak = _decode_and_measure(path)
+    bpm = estimate_tempo(samples)
+    energy = estimate_energy(samples, bpm)
+    return MusicTrack(
+        path=str(path.resolve()),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        duration=round(samples.size / ANALYSIS_RATE, 3),
+        loudness=round(loudness, 1),
+        true_peak=round(true_peak, 1),
+        bpm=bpm,
+        energy=energy,
+        moods=mood_tags(path, library, energy)
+    )
+
+class MusicCatalog:
+    """Persistent track index with lookups by mood, duration and loudness"""
+
+    def __init__(self, library_path: Union[str, Path], cache_path: Optional[Path] = None,
+                 max_workers: Optional[int] = None, ignore: Sequence[str] = ()):
+        self.library_path = Path(library_path).resolve()
+        self.ignore = tuple(pattern.lower() for pattern in ignore)  # Filename globs that are not music
+        library_key = hashlib.blake2b(str(self.library_path).encode(), digest_size=8).hexdigest()
+        self.cache_path = Path(cache_path or Path(".cache") / f"music_catalog_{library_key}.json")
+        self.max_workers = max_workers or max(1, min(4, os.cpu_count() or 1))
+
+        self._lock = threading.Lock()
+        self._tracks: Dict[str, MusicTrack] = {}
+        self._by_mood: Dict[str, List[MusicTrack]] = {}
+        self._durations: Dict[str, List[float]] = {}
+        self._dir_mtimes: Dict[str, int] = {}  # Library directories as of the last scan
+        self._load()
+
+    def _load(self):
+        """Restore the persisted catalog"""
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CATALOG_VERSION or data.get("library") != str(self.library_path):
+            return
+
+        for entry in data.get("tracks", []):
+            try:
+                track = MusicTrack(**entry)
+            except TypeError:
+                continue
+            self._tracks[track.path] = track
+        self._rebuild_index()
+
+    def _save(self):
+        """Persist the catalog atomically; caller holds the lock"""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            partial = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+            partial.write_text(json.dumps({
+                "version": CATALOG_VERSION,
+                "library": str(self.library_path),
+                "scanned_at": time.time(),
+                "tracks": [asdict(track) for track in self._tracks.values()]
+            }))
+            os.replace(partial, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save music catalog: {e}")
+
+    def _rebuild_index(self):
+        """Bucket tracks by mood, each bucket sorted by duration for bisect lookups"""
+        by_mood: Dict[str, List[MusicTrack]] = {"*": []}
+        for track in self._tracks.values():
+            by_mood["*"].append(track)
+            for mood in track.moods:
+                by_mood.setdefault(mood, []).append(track)
+        for tracks in by_mood.values():
+            tracks.sort(key=lambda track: track.duration)
+        self._by_mood = by_mood
+        self._durations = {mood: [track.duration for track in tracks] for mood, tracks in by_mood.items()}
+
+    def scan(self) -> Dict[str, int]:
+        """Analyze new or modified files and drop deleted ones; unchanged files are not opened"""
+        if not self.library_path.is_dir():
+            logger.warning(f"Music library not found at {self.library_path}")
+            return {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0}
+
+        # Directory mtimes are read before listing, so files added during the scan trigger the next refresh
+        found, dir_mtimes = {}, {}
+        for root, _, files in os.walk(self.library_path):
+            try:
+                dir_mtimes[root] = os.stat(root).st_mtime_ns
+            except OSError:
+                continue
+            for name in files:
+                lowered = name.lower()
+                if lowered.endswith(AUDIO_EXTENSIONS) and not any(fnmatch.fnmatch(lowered, p) for p in self.ignore):
+                    path = Path(root) / name
+                    found[str(path.resolve())] = path
+
+        with self._lock:
+            known = dict(self._tracks)
+
+        stale = []
+        for key, path in list(found.items()):
+            try:
+                stat = path.stat()
+            except OSError:
+                del found[key]
+                continue
+            track = known.get(key)
+            if not track or track.size != stat.st_size or track.mtime_ns != stat.st_mtime_ns:
+                stale.append(path)
+        removed = [key for key in known if key not in found]
+
+        analyzed, failed = [], 0
+        if stale:
+            logger.info(f"Analyzing {len(stale)} music track(s) in {self.library_path}")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(analyze_track, path, self.library_path): path for path in stale}
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        analyzed.append(future.result())
+                    except (MusicAnalysisError, OSError, subprocess.TimeoutExpired) as e:
+                        failed += 1
+                        logger.warning(f"Skipping {futures[future]}: {e}")
+
+        added = sum(1 for track in analyzed if track.path not in known)
+        with self._lock:
+            for key in removed:
+                self._tracks.pop(key, None)
+            for track in analyzed:
+                self._tracks[track.path] = track
+            if analyzed or removed:
+                self._rebuild_index()
+                self._save()
+            self._dir_mtimes = dir_mtimes
+
+        return {"added": added, "updated": len(analyzed) - added, "removed": len(removed),
+                "unchanged": len(found) - len(stale), "failed": failed}
+
+    def refresh(self) -> Optional[Dict[str, int]]:
+        """Scan only when a library directory changed since the last scan; None when nothing did"""
+        with self._lock:
+            dir_mtimes = dict(self._dir_mtimes)
+        if dir_mtimes:
+            try:
+                if all(os.stat(root).st_mtime_ns == mtime for root, mtime in dir_mtimes.items()):
+                    return None
+            except OSError:
+                pass
+        return self.scan()
+
+    def find(self, mood: Optional[str] = None, min_duration: float = 0.0,
+             loudness_range: Optional[Tuple[float, float]] = None) -> List[MusicTrack]:
+        """Tracks tagged with a mood (any mood if None) at least min_duration long"""
+        key = mood.lower() if mood else "*"
+        with self._lock:
+            tracks = self._by_mood.get(key, [])
+            start = bisect.bisect_left(self._durations.get(key, []), min_duration)
+            candidates = tracks[start:]
+
+        if loudness_range:
+            low, high = loudness_range
+            candidates = [track for track in candidates if low <= track.loudness <= high]
+        return candidates
+
+    def select(self, mood: Optional[str] = None, min_duration: float = 0.0,
+               loudness_range: Optional[Tuple[float, float]] = None) -> Optional[MusicTrack]:
+        """Random matching track, for variety between videos"""
+        key = mood.lower() if mood else "*"
+        with self._lock:
+            tracks = self._by_mood.get(key, [])
+            start = bisect.bisect_left(self._durations.get(key, []), min_duration)
+        if start >= len(tracks):
+            return None
+        if not loudness_range:
+            return tracks[random.randrange(start, len(tracks))]
+
+        # Random probes find a match at once unless few candidates fit; then one pass over them decides
+        low, high = loudness_range
+        for _ in range(LOUDNESS_PROBES):
+            track = tracks[random.randrange(start, len(tracks))]
+            if low <= track.loudness <= high:
+                return track
+        matches = [index for index in range(start, len(tracks)) if low <= tracks[index].loudness <= high]
+        return tracks[random.choice(matches)] if matches else None
+
+    def get(self, path: Union[str, Path]) -> Optional[MusicTrack]:
+        """Catalog entry for a file, if it is indexed and unchanged"""
+        path = Path(path)
+        with self._lock:
+            track = self._tracks.get(str(path.resolve()))
+        if not track:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return track if track.size == stat.st_size and track.mtime_ns == stat.st_mtime_ns else None
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+_catalogs: Dict[Path, MusicCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def get_music_catalog(library_path: Union[str, Path], ignore: Sequence[str] = ()) -> MusicCatalog:
+    """Get the shared catalog for a library directory; ignore applies when it is first created"""
+    key = Path(library_path).resolve()
+    with _catalogs_lock:
+        if key not in _catalogs:
+            _catalogs[key] = MusicCatalog(key, ignore=ignore)
+        return _catalogs[key]
+
+def lookup_track(path: Union[str, Path]) -> Optional[MusicTrack]:
+    """Find a file in any loaded catalog without analyzing it"""
+    with _catalogs_lock:
+        catalogs = list(_catalogs.values())
+    for catalog in catalogs:
+        track = catalog.get(path)
+        if track:
+            return track
+    return None
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Admission Control
+Reserves memory, CPU slots and disk for each operation in a first-come queue, learning per-type costs from past runs
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple, Union
+
+import psutil
+
+from .tracing import span
+
+logger = logging.getLogger("AutoMagic.Admission")
+
+# Bumped when what a sample measures changes; costs saved under another version are discarded
+COST_MODEL_VERSION = 2
+
+@dataclass
+class OperationCost:
+    """Resources an operation holds while it runs"""
+    memory_gb: float = 0.5
+    cpu_slots: int = 1
+    disk_gb: float = 0.1
+
+    def __str__(self) -> str:
+        return f"{self.memory_gb:.2f}GB RAM, {self.cpu_slots} CPU, {self.disk_gb:.2f}GB disk"
+
+def operation_type(operation_id: str) -> str:
+    """Operation kind used to learn costs: the id without its trailing timestamp or job id"""
+    return re.sub(r"([_:-]([0-9]+|[0-9a-f]{8,}))+$", "", operation_id) or operation_id
+
+class CostModel:
+    """Exponentially weighted per-type costs observed from finished operations, persisted as JSON"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, alpha: float = 0.3, headroom: float = 1.2,
+                 min_samples: int = 5):
+        self.path = Path(path) if path else None
+        self.alpha = alpha
+        self.headroom = headroom
+        self.min_samples = max(1, min_samples)  # Runs before the learned cost fully replaces the declared one
+        self._lock = threading.Lock()
+        self._costs: Dict[str, Dict[str, float]] = {}
+        if self.path and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable cost model {self.path}: {e}")
+            else:
+                if isinstance(data, dict) and data.get("version") == COST_MODEL_VERSION:
+                    self._costs = data.get("costs", {})
+                else:
+                    logger.info(f"Discarding cost model {self.path} measured by an older version")
+
+    def estimate(self, kind: str, declared: Optional[OperationCost] = None,
+                 cores_per_slot: float = 1.0) -> OperationCost:
+        """Declared (or default) cost moved toward the learned one with each run, until min_samples runs exist"""
+        prior = declared or OperationCost()
+        with self._lock:
+            learned = self._costs.get(kind)
+        if not learned:
+            return prior
+        weight = min(1.0, learned.get("runs", 1) / self.min_samples)
+
+        def blend(prior_value: float, learned_value: float) -> float:
+            return prior_value + weight * (learned_value * self.headroom - prior_value)
+
+        cores = blend(prior.cpu_slots * cores_per_slot, learned["cpu_cores"])
+        return OperationCost(memory_gb=max(0.05, blend(prior.memory_gb, learned["memory_gb"])),
+                             cpu_slots=max(1, math.ceil(cores / cores_per_slot - 1e-9)),
+                             disk_gb=max(0.0, blend(prior.disk_gb, learned["disk_gb"])))
+
+    def observe(self, kind: str, memory_gb: float, cpu_cores: float, disk_gb: float, seconds: float):
+        sample = {"memory_gb": max(0.0, memory_gb), "cpu_cores": max(0.0, cpu_cores),
+                  "disk_gb": max(0.0, disk_gb), "seconds": seconds}
+        with self._lock:
+            previous = self._costs.get(kind)
+            if previous:
+                runs = previous.get("runs", 1) + 1
+                sample = {key: previous[key] + self.alpha * (value - previous[key]) for key, value in sample.items()}
+            else:
+                runs = 1
+            sample["runs"] = runs
+            self._costs[kind] = sample
+            self._save()
+
+    def _save(self):
+        """Caller holds the lock"""
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"version": COST_MODEL_VERSION, "costs": self._costs}, indent=2),
+                           encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.debug(f"Could not save cost model: {e}")
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {kind: dict(values) for kind, values in self._costs.items()}
+
+def _bytes_under(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+class _UsageProbe:
+    """Measures what one operation used: the child processes and workspace paths attributed to it, sampled"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._processes: Dict[int, psutil.Process] = {}
+        self._cpu_seconds: Dict[int, float] = {}  # Last reading per child, kept after it exits
+        self._paths: Dict[Path, bool] = {}  # Path -> held in RAM (tmpfs) rather than on disk
+        self.attributed = False
+        self.peak_memory = 0
+        self.peak_disk = 0
+
+    def add_process(self, pid: int):
+        self.attributed = True
+        try:
+            process = psutil.Process(pid)
+        except psutil.Error:
+            return
+        with self._lock:
+            self._processes[pid] = process
+
+    def finish_process(self, pid: int, cpu_seconds: Optional[float], peak_rss: Optional[int]):
+        """Exact totals reported by the child at exit; short runs finish between samples"""
+        with self._lock:
+            self._processes.pop(pid, None)
+            if cpu_seconds is not None:
+                self._cpu_seconds[pid] = max(self._cpu_seconds.get(pid, 0.0), cpu_seconds)
+            if peak_rss is not None:
+                self.peak_memory = max(self.peak_memory, peak_rss)
+
+    def add_path(self, path: Path, in_memory: bool):
+        self.attributed = True
+        with self._lock:
+            self._paths[path] = in_memory
+
+    def _read_processes(self) -> Tuple[int, Dict[int, float]]:
+        with self._lock:
+            processes = list(self._processes.items())
+        rss, cpu, gone = 0, {}, []
+        for pid, process in processes:
+            try:
+                with process.oneshot():
+                    rss += process.memory_info().rss
+                    times = process.cpu_times()
+                cpu[pid] = times.user + times.system
+            except psutil.Error:
+                gone.append(pid)
+        with self._lock:
+            for pid in gone:
+                self._processes.pop(pid, None)
+        return rss, cpu
+
+    def _read_paths(self) -> Tuple[int, int]:
+        with self._lock:
+            paths = list(self._paths.items())
+        in_ram = on_disk = 0
+        for path, in_memory in paths:
+            try:
+                size = _bytes_under(path)
+            except OSError:
+                continue
+            if in_memory:
+                in_ram += size
+            else:
+                on_disk += size
+        return in_ram, on_disk
+
+    def sample(self):
+        rss, cpu = self._read_processes()
+        in_ram, on_disk = self._read_paths()
+        with self._lock:
+            for pid, seconds in cpu.items():
+                self._cpu_seconds[pid] = max(self._cpu_seconds.get(pid, 0.0), seconds)
+            self.peak_memory = max(self.peak_memory, rss + in_ram)
+            self.peak_disk = max(self.peak_disk, on_disk)
+
+    def result(self):
+        """(memory_gb, cpu_cores, disk_gb, seconds)"""
+        self.sample()
+        seconds = max(time.monotonic() - self.started, 1e-3)
+        with self._lock:
+            return (self.peak_memory / 1024**3, sum(self._cpu_seconds.values()) / seconds,
+                    self.peak_disk / 1024**3, seconds)
+
+class _Ticket:
+    """A queued or admitted operation"""
+
+    def __init__(self, operation_id: str, kind: str, cost: OperationCost, loop: asyncio.AbstractEventLoop):
+        self.operation_id = operation_id
+        self.kind = kind
+        self.cost = cost
+        self.enqueued = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.probe: Optional[_UsageProbe] = None
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def admit(self):
+        self.admitted_at = time.monotonic()
+        self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(True))
+
+# The admitted operation this task is running inside; nested operations ride on its reservation
+_current_ticket: contextvars.ContextVar[Optional[_Ticket]] = contextvars.ContextVar("admission_ticket", default=None)
+
+def attribute_process(pid: int):
+    """Count a child process's memory and CPU toward the operation this task is running inside"""
+    ticket = _current_ticket.get()
+    if ticket is not None and ticket.probe is not None:
+        ticket.probe.add_process(pid)
+
+def record_process_exit(pid: int, cpu_seconds: Optional[float] = None, peak_rss: Optional[int] = None):
+    """Final CPU seconds and peak RSS (bytes) of a child passed to attribute_process, when it reports them"""
+    ticket = _current_ticket.get()
+    if ticket is not None and ticket.probe is not None:
+        ticket.probe.finish_process(pid, cpu_seconds, peak_rss)
+
+def attribute_path(path: Union[str, Path], in_memory: bool = False):
+    """Count bytes written under a path (the operation's own workspace) as its disk, or memory when on tmpfs"""
+    ticket = _current_ticket.get()
+    if ticket is not None and ticket.probe is not None:
+        ticket.probe.add_path(Path(path), in_memory)
+
+class AdmissionController:
+    """First-come, first-served admission against memory, CPU slot and disk budgets"""
+
+    def __init__(self, max_memory_gb: float, cpu_slots: int, max_disk_gb: float,
+                 disk_path: Union[str, Path] = ".", cost_model: Optional[CostModel] = None,
+                 recheck_interval: float = 1.0, sample_interval: float = 0.5):
+        self.max_memory_gb = max_memory_gb
+        self.cpu_slots = max(1, cpu_slots)
+        self.max_disk_gb = max_disk_gb
+        self.disk_path = Path(disk_path)
+        self.costs = cost_model or CostModel()
+        self.recheck_interval = recheck_interval
+        self.sample_interval = sample_interval
+        # A CPU slot is this operation's share of the machine's cores
+        self.cores_per_slot = max(1.0, (os.cpu_count() or 1) / self.cpu_slots)
+
+        self._lock = threading.Lock()
+        self._queue: Deque[_Ticket] = deque()
+        self._admitted: Dict[int, _Ticket] = {}
+        self._admitted_count = 0
+        self._total_wait = 0.0
+
+    def _reserved(self) -> OperationCost:
+        tickets = list(self._admitted.values())
+        return OperationCost(memory_gb=sum(t.cost.memory_gb for t in tickets),
+                             cpu_slots=sum(t.cost.cpu_slots for t in tickets),
+                             disk_gb=sum(t.cost.disk_gb for t in tickets))
+
+    def _fits(self, cost: OperationCost) -> bool:
+        """Caller holds the lock; an operation larger than the budget runs alone rather than never"""
+        if not self._admitted:
+            return True
+        reserved = self._reserved()
+        available_memory = psutil.virtual_memory().available / 1024**3
+        try:
+            free_disk = shutil.disk_usage(self.disk_path).free / 1024**3
+        except OSError:
+            free_disk = float("inf")
+        return (reserved.memory_gb + cost.memory_gb <= self.max_memory_gb
+                and cost.memory_gb <= available_memory
+                and reserved.cpu_slots + cost.cpu_slots <= self.cpu_slots
+                and reserved.disk_gb + cost.disk_gb <= self.max_disk_gb
+                and cost.disk_gb <= free_disk)
+
+    def _dispatch(self):
+        """Admit from the head of the queue; later arrivals never overtake a waiting operation"""
+        while self._queue and self._fits(self._queue[0].cost):
+            ticket = self._queue.popleft()
+            if ticket.future.cancelled():
+                continue
+            self._admitted[id(ticket)] = ticket
+            self._admitted_count += 1
+            self._total_wait += time.monotonic() - ticket.enqueued
+            ticket.admit()
+
+    def _release(self, ticket: _Ticket):
+        with self._lock:
+            self._admitted.pop(id(ticket), None)
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+            self._dispatch()
+
+    async def _acquire(self, ticket: _Ticket):
+        with self._lock:
+            self._queue.append(ticket)
+            self._dispatch()
+        logged = False
+        while True:
+            try:
+                # Re-check periodically: memory and disk freed outside our reservations count too
+                await asyncio.wait_for(asyncio.shield(ticket.future), timeout=self.recheck_interval)
+                return
+            except asyncio.TimeoutError:
+                if not logged:
+                    logger.info(f"Operation {ticket.operation_id} waiting for {ticket.cost} "
+                                f"({len(self._queue)} queued)")
+                    logged = True
+                with self._lock:
+                    self._dispatch()
+            except asyncio.CancelledError:
+                self._release(ticket)
+                raise
+
+    async def _sample(self, probe: _UsageProbe):
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            await asyncio.to_thread(probe.sample)
+
+    @asynccontextmanager
+    async def operation(self, operation_id: str, cost: Optional[OperationCost] = None):
+        """Wait for admission, hold the reservation while the body runs, then learn what it used"""
+        parent = _current_ticket.get()
+        if parent is not None:
+            # Nested inside an admitted operation: waiting here could deadlock against the parent
+            yield
+            return
+
+        kind = operation_type(operation_id)
+        ticket = _Ticket(operation_id, kind, self.costs.estimate(kind, cost, self.cores_per_slot), asyncio.get_running_loop())
+        with span("admission.wait", **{"operation.id": operation_id, "operation.cost": str(ticket.cost)}):
+            await self._acquire(ticket)
+        waited = ticket.admitted_at - ticket.enqueued
+        if waited > 0.1:
+            logger.info(f"Admitted {operation_id} after {waited:.1f}s")
+
+        probe = ticket.probe = _UsageProbe()
+        token = _current_ticket.set(ticket)
+        sampler = asyncio.create_task(self._sample(probe))
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            sampler.cancel()
+            _current_ticket.reset(token)
+            self._release(ticket)
+            # Operations that started no processes and wrote to no workspace keep their declared cost
+            if succeeded and probe.attributed:
+                memory_gb, cpu_cores, disk_gb, seconds = await asyncio.to_thread(probe.result)
+                self.costs.observe(kind, memory_gb, cpu_cores, disk_gb, seconds)
+                logger.debug(f"{operation_id} used {memory_gb:.2f}GB, {cpu_cores:.1f} cores, "
+                             f"{disk_gb:.2f}GB disk in {seconds:.1f}s")
+
+    def queued(self, kind: Optional[str] = None) -> int:
+        """Operations waiting for admission, optionally only those of one type"""
+        with self._lock:
+            return sum(1 for ticket in self._queue if kind is None or ticket.kind == kind)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            reserved = self._reserved()
+            return {
+                "budget": {"memory_gb": round(self.max_memory_gb, 2), "cpu_slots": self.cpu_slots,
+                           "disk_gb": round(self.max_disk_gb, 2)},
+                "reserved": asdict(reserved),
+                "admitted": [t.operation_id for t in self._admitted.values()],
+                "queued": [t.operation_id for t in self._queue],
+                "avg_wait_seconds": round(self._total_wait / self._admitted_count, 3) if self._admitted_count else 0.0,
+                "learned_costs": self.costs.snapshot()
+            }
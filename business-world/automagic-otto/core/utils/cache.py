@@ -7,6 +7,8 @@ from typing import Any, Optional, Union
 import threading
 import os
 
+from .metrics import record_cache
+
 class ContentCache:
     def __init__(self, cache_dir: str = "cache", default_max_age_hours: int = 24):
         self.cache_dir = Path(cache_dir)
@@ -44,6 +46,7 @@ class ContentCache:
             cache_file = self._get_cache_file_path(key, cache_type)
             
             if not cache_file.exists():
+                record_cache("content", False)
                 return None
             
             try:
@@ -57,13 +60,16 @@ class ContentCache:
                 created = datetime.fromisoformat(cached['timestamp'])
                 if datetime.now() - created > timedelta(hours=max_age):
                     cache_file.unlink()
+                    record_cache("content", False)
                     return None
                 
+                record_cache("content", True)
                 return cached['data']
             
             except (json.JSONDecodeError, pickle.PickleError, KeyError, ValueError) as e:
                 # Remove corrupted cache file
                 cache_file.unlink()
+                record_cache("content", False)
                 return None
     
     def set(self, key: str, data: Any, cache_type: str = "text") -> bool:
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Cooperative Cancellation
+Cancel tokens with an optional deadline, carried in a context variable so stage work and its ffmpeg children can stop
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+class OperationCancelledError(RuntimeError):
+    """The work's cancel token was set or its deadline passed"""
+
+class CancelToken:
+    """Set once by whoever owns the work; checked by the work itself and by the ffmpeg runner"""
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline  # time.monotonic() value
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline passed")
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None without one"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def sleep(self, seconds: float) -> bool:
+        """Wait up to seconds (e.g. a retry backoff); True when woken by cancellation"""
+        remaining = self.remaining()
+        return self._event.wait(seconds if remaining is None else min(seconds, remaining)) or self.cancelled
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise OperationCancelledError(self.reason)
+
+# The token of the work this task or thread is running on behalf of
+_current_token: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar("cancel_token", default=None)
+
+def current_cancel_token() -> Optional[CancelToken]:
+    return _current_token.get()
+
+def check_cancelled():
+    """Raise OperationCancelledError when the current work has been cancelled"""
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+@contextmanager
+def cancel_scope(token: CancelToken):
+    """Run everything in this context (and tasks it spawns) under the given token"""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Run Checkpoints
+Per-run manifest of completed stages (inputs hash, result and output artifacts) so a rerun can skip finished work
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger("AutoMagic.Checkpoint")
+
+MANIFEST_VERSION = 1
+
+def _file_paths(value: Any) -> List[str]:
+    """Strings inside a stage result that name existing files"""
+    if isinstance(value, str):
+        return [value] if len(value) < 4096 and os.path.isfile(value) else []
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return [path for item in value for path in _file_paths(item)]
+    return []
+
+def fingerprint(path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    """(size, mtime_ns) of a file, or None when it is gone"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def inputs_hash(stage: str, inputs: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> str:
+    """Hash of a stage's name, its dependency results and the run context; files count by path, size and mtime"""
+    files = {path: fingerprint(path) for path in _file_paths(inputs)}
+    blob = json.dumps({"stage": stage, "inputs": inputs, "files": files, "context": context or {}},
+                      sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class RunManifest:
+    """JSON manifest for one logical run, rewritten atomically after every completed stage"""
+
+    def __init__(self, path: Union[str, Path], context: Optional[Dict[str, Any]] = None,
+                 invalidate: Iterable[str] = ()):
+        self.path = Path(path)
+        self.context = context or {}
+        self._lock = threading.Lock()
+        self.data: Dict[str, Any] = {"version": MANIFEST_VERSION, "context": self.context,
+                                     "created_at": time.time(), "status": "running", "stages": {}}
+        self._load()
+        for stage in invalidate:
+            self.invalidate(stage)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+            return
+        if data.get("version") != MANIFEST_VERSION or data.get("context") != self.context:
+            logger.info(f"Manifest {self.path} belongs to a different run; starting fresh")
+            return
+        if data.get("status") == "completed":
+            # A finished run is never replayed, e.g. when the day counter failed to advance
+            logger.info(f"Run in {self.path} already completed; starting fresh")
+            return
+        self.data = data
+        self.data["status"] = "running"
+
+    def _save(self):
+        """Caller holds the lock"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.data, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def lookup(self, stage: str, digest: str) -> Tuple[bool, Any]:
+        """(True, result) when the stage completed with these inputs and its artifacts are unchanged"""
+        with self._lock:
+            entry = self.data["stages"].get(stage)
+        if not entry or entry.get("inputs_hash") != digest:
+            return False, None
+        for path, recorded in entry.get("artifacts", {}).items():
+            current = fingerprint(path)
+            if current is None or list(current) != list(recorded):
+                logger.info(f"Checkpoint for {stage} is stale: {path} is missing or changed")
+                return False, None
+        return True, entry.get("result")
+
+    def record(self, stage: str, digest: str, result: Any, elapsed: float = 0.0):
+        """Store a completed stage together with fingerprints of the files it produced"""
+        try:
+            json.dumps(result)
+        except (TypeError, ValueError):
+            logger.debug(f"Result of {stage} is not JSON-serializable; not checkpointed")
+            return
+        artifacts = {path: fingerprint(path) for path in _file_paths(result)}
+        with self._lock:
+            self.data["stages"][stage] = {"inputs_hash": digest, "result": result,
+                                          "artifacts": artifacts, "elapsed": round(elapsed, 3),
+                                          "completed_at": time.time()}
+            self._save()
+
+    def invalidate(self, stage: str):
+        """Force a stage to rerun; stages that depend on it rerun when its new result differs"""
+        with self._lock:
+            if self.data["stages"].pop(stage, None) is not None:
+                logger.info(f"Invalidated checkpoint for {stage}")
+                self._save()
+
+    def set_status(self, status: str, **details: Any):
+        """Mark the run (e.g. completed or upload_failed) for later inspection"""
+        with self._lock:
+            self.data["status"] = status
+            self.data.update(details)
+            self._save()
+
+    @property
+    def completed_stages(self) -> List[str]:
+        with self._lock:
+            return list(self.data["stages"])
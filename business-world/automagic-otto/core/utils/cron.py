@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Async Cron Scheduler
+Runs coroutines on cron schedules with jitter, catch-up of missed runs, bounded concurrency and overlap policies
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Union
+
+logger = logging.getLogger("AutoMagic.Scheduler")
+
+# What to do when a run is due while max_concurrent runs are still going
+OVERLAP_SKIP = "skip"  # Drop the new run
+OVERLAP_QUEUE = "queue"  # Start it when a run finishes; further due runs coalesce into that one
+OVERLAP_REPLACE = "replace"  # Cancel the oldest running run and start the new one
+
+# Which runs missed while the process was down are made up on start
+CATCH_UP_NONE = "none"
+CATCH_UP_LATEST = "latest"  # One run standing in for all missed ones
+CATCH_UP_ALL = "all"  # Each missed run, up to max_catch_up, still subject to the overlap policy
+
+_ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *",
+            "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *", "@yearly": "0 0 1 1 *", "@annually": "0 0 1 1 *"}
+
+class CronExpression:
+    """Five-field cron expression (minute hour day-of-month month day-of-week) in local time"""
+
+    _RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        text = _ALIASES.get(self.expression, self.expression)
+        if ":" in text and " " not in text:
+            # "HH:MM" daily shorthand, as used by DAILY_RUN_TIME
+            hour, _, minute = text.partition(":")
+            text = f"{int(minute)} {int(hour)} * * *"
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse_field(value, low, high) for value, (low, high) in zip(fields, self._RANGES))
+        self.weekdays = {day % 7 for day in weekdays}  # 7 is Sunday too
+        # Vixie cron: when both day fields are restricted, either may match
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(value: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in value.split(","):
+            spec, _, step_text = part.partition("/")
+            step = int(step_text) if step_text else 1
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(v) for v in spec.split("-", 1))
+            else:
+                start = int(spec)
+                end = high if step_text else start
+            if not (low <= start <= end <= high) or step < 1:
+                raise ValueError(f"Invalid cron field '{value}' (allowed {low}-{high})")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after the given time"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(20000):  # Enough to reach a leap day eight years out
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            else:
+                later = [minute for minute in sorted(self.minutes) if minute >= moment.minute]
+                if later:
+                    return moment.replace(minute=later[0])
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+        raise ValueError(f"Cron expression '{self.expression}' never fires")
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+@dataclass
+class ScheduledJob:
+    """A coroutine function and the rules for when and how it runs"""
+    name: str
+    func: Callable[[], Awaitable[Any]]
+    cron: CronExpression
+    jitter: float = 0.0  # Random delay in seconds added to each fire time
+    max_concurrent: int = 1
+    overlap: str = OVERLAP_SKIP
+    catch_up: str = CATCH_UP_LATEST
+    max_catch_up: int = 3
+    catch_up_window: float = 86400.0  # Missed runs older than this are not made up
+    timeout: Optional[float] = None
+    running: Set["RunHandle"] = field(default_factory=set)
+    pending: Optional["RunHandle"] = None
+    last_fire: Optional[datetime] = None
+    next_fire: Optional[datetime] = None
+    counts: Dict[str, int] = field(default_factory=dict)
+
+class RunHandle:
+    """One run of a scheduled job; await it for the job's result"""
+
+    def __init__(self, job: ScheduledJob, scheduled_for: datetime, reason: str = "scheduled"):
+        self.job = job
+        self.scheduled_for = scheduled_for
+        self.reason = reason  # scheduled, catch_up or manual
+        self.status = "pending"  # pending, running, succeeded, failed, cancelled, skipped
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._done = asyncio.get_running_loop().create_future()
+
+    def __await__(self):
+        return asyncio.shield(self._done).__await__()
+
+    def done(self) -> bool:
+        return self._done.done()
+
+    def cancel(self) -> bool:
+        if self.task is not None:
+            return self.task.cancel()
+        return False
+
+    def _settle(self, status: str, result: Any = None, error: Optional[BaseException] = None):
+        self.status = status
+        self.finished_at = time.time()
+        self.job.counts[status] = self.job.counts.get(status, 0) + 1
+        if self._done.done():
+            return
+        if status == "cancelled":
+            self._done.cancel()
+        elif error is not None:
+            self._done.set_exception(error)
+            self._done.exception()  # Nobody has to await a scheduled run; mark it retrieved
+        else:
+            self._done.set_result(result)
+
+    def __repr__(self) -> str:
+        return f"RunHandle({self.job.name}, {self.scheduled_for:%Y-%m-%d %H:%M}, {self.status})"
+
+class AsyncCronScheduler:
+    """Fires scheduled jobs from one asyncio task per schedule"""
+
+    def __init__(self, state_path: Optional[Union[str, Path]] = None):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.state_path = Path(state_path) if state_path else None
+        self._state = self._load_state()
+        self._loops: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+
+    def add(self, name: str, func: Callable[[], Awaitable[Any]], cron: Union[str, CronExpression],
+            **options: Any) -> ScheduledJob:
+        """Register a job; options are ScheduledJob fields (jitter, max_concurrent, overlap, catch_up, ...)"""
+        if name in self.jobs:
+            raise ValueError(f"Job '{name}' is already scheduled")
+        job = ScheduledJob(name, func, CronExpression(cron) if isinstance(cron, str) else cron, **options)
+        if job.overlap not in (OVERLAP_SKIP, OVERLAP_QUEUE, OVERLAP_REPLACE):
+            raise ValueError(f"Unknown overlap policy '{job.overlap}'")
+        if job.catch_up not in (CATCH_UP_NONE, CATCH_UP_LATEST, CATCH_UP_ALL):
+            raise ValueError(f"Unknown catch-up policy '{job.catch_up}'")
+        last = self._state.get(name)
+        job.last_fire = datetime.fromisoformat(last) if last else None
+        self.jobs[name] = job
+        if self._stopping is not None:
+            job.next_fire = job.cron.next_after(datetime.now())
+            self._loops.append(asyncio.create_task(self._job_loop(job), name=f"cron-{name}"))
+        return job
+
+    def _load_state(self) -> Dict[str, str]:
+        if not self.state_path or not self.state_path.exists():
+            return {}
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable scheduler state {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        self._state.update({name: job.last_fire.isoformat()
+                            for name, job in self.jobs.items() if job.last_fire})
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._state, indent=2), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    async def start(self):
+        """Make up missed runs and start a timer task per job"""
+        if self._stopping is not None:
+            return
+        self._stopping = asyncio.Event()
+        now = datetime.now()
+        for job in self.jobs.values():
+            self._catch_up(job, now)
+            job.next_fire = job.cron.next_after(max(now, job.last_fire) if job.last_fire else now)
+            self._loops.append(asyncio.create_task(self._job_loop(job), name=f"cron-{job.name}"))
+        logger.info(f"Scheduler started with {len(self.jobs)} jobs")
+
+    def _catch_up(self, job: ScheduledJob, now: datetime):
+        if job.last_fire is None or job.catch_up == CATCH_UP_NONE:
+            return
+        # Keep only the most recent max_catch_up fire times inside the window
+        missed: Deque[datetime] = deque(maxlen=max(1, job.max_catch_up))
+        moment = job.cron.next_after(max(job.last_fire, now - timedelta(seconds=job.catch_up_window)))
+        while moment <= now:
+            missed.append(moment)
+            moment = job.cron.next_after(moment)
+        if not missed:
+            return
+        if job.catch_up == CATCH_UP_LATEST:
+            missed = deque([missed[-1]])
+        logger.info(f"Catching up {len(missed)} missed run(s) of {job.name}")
+        for scheduled_for in missed:
+            self._fire(job, scheduled_for, "catch_up")
+
+    async def _job_loop(self, job: ScheduledJob):
+        after = max(datetime.now(), job.last_fire) if job.last_fire else datetime.now()
+        while not self._stopping.is_set():
+            scheduled_for = job.cron.next_after(after)
+            job.next_fire = scheduled_for
+            fire_at = scheduled_for + timedelta(seconds=random.uniform(0, job.jitter)) if job.jitter else scheduled_for
+            # Sleep in bounded chunks against the wall clock, so suspend or clock changes cannot skew the fire time
+            while not self._stopping.is_set():
+                delay = (fire_at - datetime.now()).total_seconds()
+                if delay <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=min(delay, 60.0))
+                except asyncio.TimeoutError:
+                    pass
+            if self._stopping.is_set():
+                return
+            lateness = (datetime.now() - fire_at).total_seconds()
+            if lateness > 60:
+                logger.warning(f"{job.name} fired {lateness:.0f}s late")
+            self._fire(job, scheduled_for, "scheduled")
+            after = scheduled_for
+
+    def _fire(self, job: ScheduledJob, scheduled_for: datetime, reason: str) -> RunHandle:
+        """Apply the overlap policy to a due run"""
+        handle = RunHandle(job, scheduled_for, reason)
+        if reason != "manual":
+            job.last_fire = scheduled_for
+            self._save_state()
+        if len(job.running) < job.max_concurrent:
+            self._start(handle)
+        elif job.overlap == OVERLAP_REPLACE:
+            oldest = min(job.running, key=lambda run: run.started_at or 0.0)
+            logger.warning(f"{job.name}: cancelling run for {oldest.scheduled_for} to start {scheduled_for}")
+            oldest.cancel()
+            self._start(handle)
+        elif job.overlap == OVERLAP_QUEUE and job.pending is None:
+            logger.info(f"{job.name}: {len(job.running)} run(s) still going; queued run for {scheduled_for}")
+            job.pending = handle
+        elif job.overlap == OVERLAP_QUEUE:
+            logger.info(f"{job.name}: run for {scheduled_for} coalesced into the queued run")
+            handle._settle("skipped")
+        else:
+            logger.warning(f"{job.name}: skipping run for {scheduled_for}, previous run still going")
+            handle._settle("skipped")
+        return handle
+
+    def _start(self, handle: RunHandle):
+        job = handle.job
+        job.running.add(handle)
+        handle.status = "running"
+        handle.started_at = time.time()
+        coro = job.func()
+        if job.timeout:
+            coro = asyncio.wait_for(coro, timeout=job.timeout)
+        handle.task = asyncio.create_task(coro, name=f"run-{job.name}")
+        handle.task.add_done_callback(lambda task: self._finished(handle, task))
+        logger.info(f"Started {job.name} ({handle.reason} run for {handle.scheduled_for:%Y-%m-%d %H:%M})")
+
+    def _finished(self, handle: RunHandle, task: asyncio.Task):
+        job = handle.job
+        job.running.discard(handle)
+        if task.cancelled():
+            handle._settle("cancelled")
+        elif task.exception() is not None:
+            logger.error(f"{job.name} run for {handle.scheduled_for} failed: {task.exception()}")
+            handle._settle("failed", error=task.exception())
+        else:
+            handle._settle("succeeded", result=task.result())
+            logger.info(f"{job.name} finished in {time.time() - handle.started_at:.1f}s")
+        if job.pending is not None and len(job.running) < job.max_concurrent:
+            pending, job.pending = job.pending, None
+            self._start(pending)
+
+    def run_now(self, name: str) -> RunHandle:
+        """Trigger a job outside its schedule, subject to its overlap policy"""
+        return self._fire(self.jobs[name], datetime.now(), "manual")
+
+    async def stop(self, cancel_running: bool = False, timeout: Optional[float] = None):
+        """Stop firing; wait for (or cancel) runs in flight"""
+        if self._stopping is None:
+            return
+        self._stopping.set()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops.clear()
+        in_flight = [run for job in self.jobs.values() for run in job.running]
+        for job in self.jobs.values():
+            if job.pending is not None:
+                job.pending._settle("skipped")
+                job.pending = None
+        if cancel_running:
+            for run in in_flight:
+                run.cancel()
+        if in_flight:
+            await asyncio.wait([run.task for run in in_flight], timeout=timeout)
+        self._stopping = None
+        logger.info("Scheduler stopped")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Next fire time, runs in flight and outcome counts per job"""
+        return {name: {"cron": job.cron.expression,
+                       "next_fire": job.next_fire.isoformat() if job.next_fire else None,
+                       "last_fire": job.last_fire.isoformat() if job.last_fire else None,
+                       "running": len(job.running), "queued": job.pending is not None,
+                       "overlap": job.overlap, "counts": dict(job.counts)}
+                for name, job in self.jobs.items()}
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Stage Graph Executor
+Runs pipeline stages as a dependency graph, overlapping independent stages with per-stage timeouts and retries,
+optionally skipping stages already completed in a checkpoint manifest
+"""
+
+import concurrent.futures
+import contextvars
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .cancellation import CancelToken, cancel_scope
+from .checkpoint import RunManifest, inputs_hash
+from .metrics import STAGE_SECONDS
+from .tracing import add_event, span
+
+logger = logging.getLogger("AutoMagic.StageGraph")
+
+# Seconds to let cancelled attempts exit before the executor is abandoned at the end of a run
+CANCEL_GRACE = 5.0
+
+class StageFailedError(RuntimeError):
+    """A required stage failed after its retries; carries the partial run"""
+
+    def __init__(self, stage: str, cause: BaseException, run: "GraphRun"):
+        super().__init__(f"Stage '{stage}' failed: {cause}")
+        self.stage = stage
+        self.cause = cause
+        self.run = run
+
+class StageTimeoutError(TimeoutError):
+    """A stage attempt ran past its timeout"""
+
+@dataclass
+class Stage:
+    """One unit of work; receives the results of its dependencies as keyword arguments"""
+    name: str
+    func: Callable[..., Any]
+    depends_on: Sequence[str] = ()
+    timeout: Optional[float] = None  # Seconds per attempt; a retry waits until the timed-out attempt exits
+    retries: int = 0
+    retry_delay: float = 1.0  # Doubles after each failed attempt
+    required: bool = True  # Optional stages yield None on failure and the run continues
+    checkpoint: bool = True  # Reuse a result from the run manifest when the inputs are unchanged
+
+@dataclass
+class StageRecord:
+    """Timing and outcome of one stage"""
+    name: str
+    status: str = "pending"  # pending, running, succeeded, degraded, cached, failed, skipped
+    attempts: int = 0
+    started: Optional[float] = None  # Seconds after the run started
+    elapsed: float = 0.0  # From first attempt to the final outcome, including retries
+    error: Optional[str] = None  # Failure, or why a degraded result is a fallback
+
+@dataclass
+class GraphRun:
+    """Results and per-stage records of one execution"""
+    name: str
+    results: Dict[str, Any] = field(default_factory=dict)
+    records: Dict[str, StageRecord] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def __getitem__(self, stage: str) -> Any:
+        return self.results[stage]
+
+    def timings(self) -> Dict[str, float]:
+        return {name: round(record.elapsed, 3) for name, record in self.records.items()}
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage status and timing for logs and status output"""
+        stage_time = sum(record.elapsed for record in self.records.values())
+        return {
+            "name": self.name,
+            "elapsed": round(self.elapsed, 3),
+            "stage_time": round(stage_time, 3),  # Exceeds elapsed by the time saved running stages together
+            "stages": {name: {"status": record.status, "attempts": record.attempts,
+                              "started": round(record.started, 3) if record.started is not None else None,
+                              "elapsed": round(record.elapsed, 3), "error": record.error}
+                       for name, record in self.records.items()}
+        }
+
+@dataclass
+class _Attempt:
+    stage: Stage
+    number: int
+    deadline: Optional[float]
+    token: CancelToken
+    digest: Optional[str] = None
+    degraded: Optional[str] = None  # Set through mark_degraded() by the stage function
+
+# The attempt the current stage function is running as
+_current_attempt: contextvars.ContextVar[Optional[_Attempt]] = contextvars.ContextVar("stage_attempt", default=None)
+
+def mark_degraded(reason: str):
+    """Flag the running stage's result as a fallback: later stages still get it, but it is never checkpointed"""
+    attempt = _current_attempt.get()
+    if attempt is not None:
+        attempt.degraded = f"{attempt.degraded}; {reason}" if attempt.degraded else reason
+
+def _is_empty(result: Any) -> bool:
+    return result is None or (isinstance(result, (str, list, tuple, dict, set)) and not result)
+
+# Each attempt runs under a CancelToken carrying its deadline (current_cancel_token()); ffmpeg started through
+# the runner is killed when it fires, and long-running stage code can call check_cancelled() between steps
+def _traced_attempt(pipeline: str, attempt: _Attempt, kwargs: Dict[str, Any]) -> Any:
+    stage = attempt.stage.name
+    reset = _current_attempt.set(attempt)
+    try:
+        with cancel_scope(attempt.token), span(f"stage.{stage}", **{"pipeline.name": pipeline, "stage.name": stage,
+                                                                    "stage.attempt": attempt.number}):
+            return attempt.stage.func(**kwargs)
+    finally:
+        _current_attempt.reset(reset)
+
+class StageGraph:
+    """Dependency graph of stages run on a thread pool"""
+
+    def __init__(self, stages: Sequence[Stage], name: str = "pipeline", max_workers: Optional[int] = None,
+                 manifest: Optional[RunManifest] = None):
+        self.name = name
+        self.manifest = manifest
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage '{stage.name}'")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            unknown = [dep for dep in stage.depends_on if dep not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages {unknown}")
+        self.order = self._topological_order()
+        self.max_workers = max_workers or len(self.stages)
+
+    def _topological_order(self) -> List[str]:
+        """Stage names in dependency order; raises on cycles"""
+        remaining = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        order: List[str] = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle between stages {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def dependents(self, name: str) -> List[str]:
+        """Stages that consume a stage's result, directly or through other stages, in dependency order"""
+        affected = {name}
+        for stage in self.order:
+            if affected.intersection(self.stages[stage].depends_on):
+                affected.add(stage)
+        return [stage for stage in self.order if stage in affected and stage != name]
+
+    def invalidate(self, *names: str):
+        """Drop the checkpoints of these stages and of every stage downstream of them"""
+        if self.manifest is None:
+            return
+        unknown = [name for name in names if name not in self.stages]
+        if unknown:
+            raise ValueError(f"Unknown stages {unknown}")
+        affected = set(names).union(*(self.dependents(name) for name in names))
+        for stage in self.order:
+            if stage in affected:
+                self.manifest.invalidate(stage)
+
+    def run(self) -> GraphRun:
+        """Execute every stage, raising StageFailedError when a required stage fails"""
+        with span(f"pipeline.{self.name}", **{"pipeline.name": self.name, "pipeline.stages": len(self.stages)}):
+            return self._run()
+
+    def _run(self) -> GraphRun:
+        run = GraphRun(self.name, records={name: StageRecord(name) for name in self.order})
+        started = time.monotonic()
+        waiting = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        running: Dict[concurrent.futures.Future, _Attempt] = {}
+        # Timed-out attempts whose threads have not exited yet; their results are ignored
+        abandoned: Dict[concurrent.futures.Future, _Attempt] = {}
+        delayed: List[Tuple[float, Stage, int]] = []  # (ready_at, stage, attempt number)
+        # Degraded, empty or failed results and everything built on them; none of these is checkpointed
+        tainted: Set[str] = set()
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                         thread_name_prefix=f"stage-{self.name}")
+
+        def start(stage: Stage, number: int):
+            record = run.records[stage.name]
+            if record.started is None:
+                record.started = time.monotonic() - started
+            record.status, record.attempts = "running", number
+            kwargs = {dep: run.results[dep] for dep in stage.depends_on}
+            digest = None
+            if self.manifest is not None and stage.checkpoint:
+                digest = inputs_hash(stage.name, kwargs, self.manifest.context)
+                hit, result = self.manifest.lookup(stage.name, digest)
+                if hit:
+                    record.attempts = 0
+                    add_event("stage.cached", **{"stage.name": stage.name})
+                    finish(stage, result, "cached")
+                    logger.info(f"[{self.name}] {stage.name} restored from checkpoint")
+                    return
+            deadline = time.monotonic() + stage.timeout if stage.timeout else None
+            attempt = _Attempt(stage, number, deadline, CancelToken(deadline), digest)
+            # Each attempt runs in a copy of the caller's context (ffmpeg priority and similar)
+            future = executor.submit(contextvars.copy_context().run, _traced_attempt, self.name, attempt, kwargs)
+            running[future] = attempt
+            logger.debug(f"[{self.name}] {stage.name} attempt {number} started")
+
+        def finish(stage: Stage, result: Any, status: str, error: Optional[BaseException] = None):
+            record = run.records[stage.name]
+            record.status = status
+            record.elapsed = time.monotonic() - started - (record.started or 0.0)
+            record.error = str(error) if error else None
+            if status == "failed":
+                tainted.add(stage.name)
+            run.results[stage.name] = result
+            STAGE_SECONDS.observe(record.elapsed, pipeline=self.name, stage=stage.name, status=status)
+            for deps in waiting.values():
+                deps.discard(stage.name)
+            if status == "succeeded":
+                logger.info(f"[{self.name}] {stage.name} done in {record.elapsed:.1f}s")
+
+        def succeeded(attempt: _Attempt, result: Any):
+            stage = attempt.stage
+            reason = attempt.degraded or ("empty result" if _is_empty(result) else None)
+            if reason:
+                finish(stage, result, "degraded")
+                record = run.records[stage.name]
+                record.error = reason
+                tainted.add(stage.name)
+                logger.warning(f"[{self.name}] {stage.name} fell back after {record.elapsed:.1f}s ({reason}); "
+                               f"not checkpointed")
+                return
+            finish(stage, result, "succeeded")
+            upstream = [dep for dep in stage.depends_on if dep in tainted]
+            if upstream:
+                tainted.add(stage.name)
+                logger.info(f"[{self.name}] {stage.name} not checkpointed: built on fallback "
+                            f"results of {', '.join(upstream)}")
+            elif attempt.digest is not None:
+                self.manifest.record(stage.name, attempt.digest, result, run.records[stage.name].elapsed)
+
+        def failed(attempt: _Attempt, error: BaseException):
+            stage = attempt.stage
+            if attempt.number <= stage.retries:
+                delay = stage.retry_delay * 2 ** (attempt.number - 1)
+                logger.warning(f"[{self.name}] {stage.name} attempt {attempt.number} failed ({error}); "
+                               f"retrying in {delay:g}s")
+                delayed.append((time.monotonic() + delay, stage, attempt.number + 1))
+                return
+            if not stage.required:
+                logger.warning(f"[{self.name}] optional stage {stage.name} failed: {error}")
+                finish(stage, None, "failed", error)
+                return
+            finish(stage, None, "failed", error)
+            for name, record in run.records.items():
+                if record.status == "pending":
+                    record.status = "skipped"
+            run.elapsed = time.monotonic() - started
+            raise StageFailedError(stage.name, error, run) from error
+
+        try:
+            while True:
+                # Stages restored from the checkpoint finish at once and may unblock more
+                ready = [name for name, deps in waiting.items() if not deps]
+                while ready:
+                    for name in ready:
+                        del waiting[name]
+                        start(self.stages[name], 1)
+                    ready = [name for name, deps in waiting.items() if not deps]
+                if not running and not delayed:
+                    break
+
+                now = time.monotonic()
+                busy = {attempt.stage.name for attempt in abandoned.values()}
+                wakeups = [attempt.deadline for attempt in running.values() if attempt.deadline]
+                wakeups += [ready_at for ready_at, stage, _ in delayed if stage.name not in busy]
+                timeout = max(0.0, min(wakeups) - now) if wakeups else None
+                # Abandoned attempts wake the loop when they exit, releasing their stage's retry
+                done, _ = concurrent.futures.wait(list(running) + list(abandoned), timeout=timeout,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    if future in abandoned:
+                        attempt = abandoned.pop(future)
+                        logger.info(f"[{self.name}] timed-out {attempt.stage.name} attempt {attempt.number} "
+                                    f"exited {time.monotonic() - attempt.deadline:.1f}s after its deadline")
+                        continue
+                    attempt = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        succeeded(attempt, future.result())
+                    else:
+                        failed(attempt, error)
+
+                now = time.monotonic()
+                for future, attempt in list(running.items()):
+                    if attempt.deadline and now >= attempt.deadline:
+                        # Threads cannot be interrupted: cancel the attempt (killing its ffmpeg) and ignore
+                        # its result; any retry waits until the thread has actually exited
+                        del running[future]
+                        attempt.token.cancel(f"{attempt.stage.name} timed out after {attempt.stage.timeout:g}s")
+                        if not future.done():
+                            abandoned[future] = attempt
+                        failed(attempt, StageTimeoutError(f"timed out after {attempt.stage.timeout:g}s"))
+
+                busy = {attempt.stage.name for attempt in abandoned.values()}
+                for entry in [entry for entry in delayed if entry[0] <= now and entry[1].name not in busy]:
+                    delayed.remove(entry)
+                    start(entry[1], entry[2])
+        finally:
+            self._abandon(list(running.items()) + list(abandoned.items()))
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        run.elapsed = time.monotonic() - started
+        stage_time = sum(record.elapsed for record in run.records.values())
+        cached = sum(1 for record in run.records.values() if record.status == "cached")
+        degraded = sum(1 for record in run.records.values() if record.status == "degraded")
+        logger.info(f"[{self.name}] {len(self.stages)} stages in {run.elapsed:.1f}s "
+                    f"({stage_time:.1f}s of stage time" + (f", {cached} from checkpoint" if cached else "")
+                    + (f", {degraded} degraded)" if degraded else ")"))
+        return run
+
+    def _abandon(self, attempts: List[Tuple[concurrent.futures.Future, _Attempt]]):
+        """Cancel attempts still running when the run ends and give them a moment to exit"""
+        for _, attempt in attempts:
+            attempt.token.cancel(f"pipeline {self.name} ended")
+        pending = [future for future, _ in attempts if not future.done()]
+        if pending:
+            concurrent.futures.wait(pending, timeout=CANCEL_GRACE)
+        stuck = [attempt for future, attempt in attempts if not future.done()]
+        if stuck:
+            logger.warning(f"[{self.name}] {len(stuck)} cancelled attempt(s) still running after "
+                           f"{CANCEL_GRACE:g}s: " + ", ".join(f"{a.stage.name}#{a.number}" for a in stuck))
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Durable Job Queue
+SQLite-backed priority queue with leases and heartbeats, so interrupted jobs are picked up again after a crash
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .metrics import QUEUE_DEPTH, QUEUE_RUNNING, REGISTRY
+
+logger = logging.getLogger("AutoMagic.JobQueue")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (kind, status, priority, created_at);
+"""
+
+# Job states; a processing job whose lease expired is claimable again
+QUEUED, PROCESSING, COMPLETED, FAILED = "queued", "processing", "completed", "failed"
+
+@dataclass
+class Job:
+    """A claimed job and the lease it is held under"""
+    id: str
+    kind: str
+    priority: int
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    owner: str
+
+def _worker_owner() -> str:
+    """Lease owner tag: host and pid identify dead workers, the suffix tells threads apart"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobQueue:
+    """Priority queue (lowest number first) persisted in SQLite and shared between processes"""
+
+    def __init__(self, db_path: Union[str, Path], kind: str = "default", lease_seconds: float = 60.0):
+        self.db_path = Path(db_path)
+        self.kind = kind
+        self.lease_seconds = lease_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self.recover()
+        REGISTRY.add_collector(f"job_queue:{kind}:{self.db_path}", self.export_metrics)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection per operation, so any thread may use the queue"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that takes the database lock up front"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def submit(self, payload: Dict[str, Any], priority: int = 5,
+               job_id: Optional[str] = None, max_attempts: int = 3) -> str:
+        """Persist a new job and return its id"""
+        job_id = job_id or f"job_{uuid.uuid4().hex[:12]}"
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, priority, payload, status, max_attempts, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, self.kind, priority, json.dumps(payload), QUEUED, max_attempts, time.time())
+            )
+        return job_id
+
+    def recover(self) -> int:
+        """Requeue jobs held by workers on this host whose process has died"""
+        host = socket.gethostname()
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT id, lease_owner FROM jobs WHERE kind = ? AND status = ?",
+                                (self.kind, PROCESSING)).fetchall()
+            orphans = []
+            for row in rows:
+                owner_host, _, rest = (row["lease_owner"] or "").partition(":")
+                pid = rest.partition(":")[0]
+                if owner_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                    orphans.append(row["id"])
+            for job_id in orphans:
+                conn.execute("UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL "
+                             "WHERE id = ?", (QUEUED, job_id))
+        if orphans:
+            logger.info(f"Resuming {len(orphans)} interrupted {self.kind} jobs: {', '.join(orphans)}")
+        return len(orphans)
+
+    def claim(self, owner: Optional[str] = None) -> Optional[Job]:
+        """Lease the most urgent runnable job, including ones whose previous lease expired"""
+        owner = owner or _worker_owner()
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases that already used their attempts are failed rather than retried
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = 'lease expired', lease_owner = NULL "
+                "WHERE kind = ? AND status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (FAILED, now, self.kind, PROCESSING, now)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE kind = ? AND (status = ? OR (status = ? AND lease_expires < ?)) "
+                "ORDER BY priority, created_at LIMIT 1",
+                (self.kind, QUEUED, PROCESSING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            if row["status"] == PROCESSING:
+                logger.warning(f"Lease on {row['id']} held by {row['lease_owner']} expired; reclaiming")
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?, "
+                "heartbeat_at = ?, started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (PROCESSING, owner, now + self.lease_seconds, now, now, row["id"])
+            )
+        return Job(row["id"], row["kind"], row["priority"], json.loads(row["payload"]),
+                   row["attempts"] + 1, row["max_attempts"], owner)
+
+    def heartbeat(self, job: Job) -> bool:
+        """Extend the lease; False means another worker has taken the job over"""
+        now = time.time()
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, heartbeat_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = ?",
+                (now + self.lease_seconds, now, job.id, job.owner, PROCESSING)
+            ).rowcount
+        return bool(updated)
+
+    def complete(self, job: Job, result: Any = None) -> bool:
+        """Record success if the lease is still ours"""
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL WHERE id = ? AND lease_owner = ?",
+                (COMPLETED, json.dumps(result), time.time(), job.id, job.owner)
+            ).rowcount
+        return bool(updated)
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> bool:
+        """Record a failed attempt, requeueing while attempts remain"""
+        requeue = retry and job.attempts < job.max_attempts
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND lease_owner = ?",
+                (QUEUED if requeue else FAILED, error, None if requeue else time.time(), job.id, job.owner)
+            ).rowcount
+        if requeue and updated:
+            logger.info(f"Job {job.id} attempt {job.attempts}/{job.max_attempts} failed, requeued: {error}")
+        return bool(updated)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Stored state of one job"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Jobs of this kind, newest first"""
+        query, params = "SELECT * FROM jobs WHERE kind = ?", [self.kind]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [self._row_to_dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs WHERE kind = ? GROUP BY status",
+                                (self.kind,)).fetchall()
+        return {status: count for status, count in rows}
+
+    def export_metrics(self):
+        """Collector for the metrics registry"""
+        counts = self.counts()
+        QUEUE_DEPTH.set(counts.get(QUEUED, 0), queue=self.kind)
+        QUEUE_RUNNING.set(counts.get(PROCESSING, 0), queue=self.kind)
+
+    def purge(self, older_than_seconds: float) -> int:
+        """Delete finished jobs older than the cutoff"""
+        cutoff = time.time() - older_than_seconds
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM jobs WHERE kind = ? AND status IN (?, ?) AND finished_at < ?",
+                                (self.kind, COMPLETED, FAILED, cutoff)).rowcount
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+class LeaseKeeper:
+    """Background heartbeat for a running job"""
+
+    def __init__(self, queue: JobQueue, job: Job, interval: Optional[float] = None):
+        self.queue = queue
+        self.job = job
+        self.interval = interval or queue.lease_seconds / 3
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{job.id}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.job):
+                    self.lost = True
+                    logger.warning(f"Lost the lease on job {self.job.id}")
+                    return
+            except sqlite3.Error as e:
+                logger.warning(f"Heartbeat for job {self.job.id} failed: {e}")
+
+    def __enter__(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=5)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Metrics Registry
+Counters, gauges and histograms rendered in the Prometheus text format, served on /metrics and written as a textfile
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .tracing import add_event, span
+
+logger = logging.getLogger("AutoMagic.Metrics")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a cached API call to a long render
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return lines + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+class Gauge(_Metric):
+    """Value that goes up and down; usually refreshed by a collector at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+class Histogram(_Metric):
+    """Cumulative buckets plus sum and count per label set"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts, then sum, then count
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> float:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[-1] if series else 0.0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                                 f"{_format_value(cumulative)}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics plus collectors that refresh gauges right before rendering"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different shape")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, name: str, collector: Callable[[], None]):
+        """Run collector before every render; a later collector with the same name replaces it"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def remove_collector(self, name: str):
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors.items())
+            metrics = list(self._metrics.values())
+        for name, collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.debug(f"Metrics collector {name} failed: {e}")
+        lines: List[str] = []
+        for metric in sorted(metrics, key=lambda m: m.name):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Union[str, Path]):
+        """Atomically write the exposition for node_exporter's textfile collector"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, path)
+
+REGISTRY = MetricsRegistry()
+
+# Shared instruments; modules record into these so every entry point exports the same series
+STAGE_SECONDS = REGISTRY.histogram("automagic_stage_seconds", "Pipeline stage latency",
+                                   ["pipeline", "stage", "status"])
+PROVIDER_CALL_SECONDS = REGISTRY.histogram("automagic_provider_call_seconds",
+                                           "External provider call latency by outcome",
+                                           ["kind", "provider", "outcome"])
+CACHE_REQUESTS = REGISTRY.counter("automagic_cache_requests_total", "Cache lookups by result",
+                                  ["cache", "result"])
+FFMPEG_SECONDS = REGISTRY.histogram("automagic_ffmpeg_seconds", "ffmpeg process wall time", ["outcome"])
+FFMPEG_REALTIME_FACTOR = REGISTRY.histogram("automagic_ffmpeg_realtime_factor",
+                                            "Seconds of media produced per second of ffmpeg wall time", [],
+                                            buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128))
+QUEUE_DEPTH = REGISTRY.gauge("automagic_queue_depth", "Items waiting in a queue", ["queue"])
+QUEUE_RUNNING = REGISTRY.gauge("automagic_queue_running", "Items being worked on from a queue", ["queue"])
+
+def record_cache(cache: str, hit: bool):
+    result = "hit" if hit else "miss"
+    CACHE_REQUESTS.inc(cache=cache, result=result)
+    add_event("cache.lookup", **{"cache.name": cache, "cache.result": result})
+
+@contextmanager
+def track_provider_call(kind: str, provider: str) -> Iterator[None]:
+    """Time a provider call, labelled success or error by whether it raised"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        with span(f"provider.{kind}", **{"provider.kind": kind, "provider.name": provider}):
+            yield
+        outcome = "success"
+    finally:
+        PROVIDER_CALL_SECONDS.observe(time.perf_counter() - started, kind=kind, provider=provider, outcome=outcome)
+
+@contextmanager
+def track_stage(pipeline: str, stage: str) -> Iterator[None]:
+    """Time a pipeline step that does not run under a StageGraph"""
+    started = time.perf_counter()
+    status = "failed"
+    try:
+        with span(f"stage.{stage}", **{"pipeline.name": pipeline, "stage.name": stage}):
+            yield
+        status = "succeeded"
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, pipeline=pipeline, stage=stage, status=status)
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+class MetricsExporter:
+    """Serves /metrics over HTTP and/or rewrites a textfile on an interval, from daemon threads"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, port: int = 0, host: str = "127.0.0.1",
+                 textfile: Optional[Union[str, Path]] = None, textfile_interval: float = 15.0):
+        self.registry = registry
+        self.port = port
+        self.host = host
+        self.textfile = Path(textfile) if textfile else None
+        self.textfile_interval = textfile_interval
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "MetricsExporter":
+        if self.port:
+            handler = type("MetricsHandler", (_Handler,), {"registry": self.registry})
+            self._server = ThreadingHTTPServer((self.host, self.port), handler)
+            self._server.daemon_threads = True
+            self.port = self._server.server_address[1]
+            self._threads.append(threading.Thread(target=self._server.serve_forever,
+                                                  name="metrics-http", daemon=True))
+            logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+        if self.textfile:
+            self._threads.append(threading.Thread(target=self._write_loop, name="metrics-textfile", daemon=True))
+            logger.info(f"Writing metrics to {self.textfile} every {self.textfile_interval:g}s")
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _write_loop(self):
+        while True:
+            try:
+                self.registry.write_textfile(self.textfile)
+            except OSError as e:
+                logger.warning(f"Could not write metrics textfile {self.textfile}: {e}")
+            if self._stop.wait(self.textfile_interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads.clear()
+        if self.textfile:
+            try:
+                self.registry.write_textfile(self.textfile)  # Final values for the collector
+            except OSError:
+                pass
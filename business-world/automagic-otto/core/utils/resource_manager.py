@@ -5,20 +5,36 @@ Manages system resources, monitors usage, and performs cleanup operations
 """
 
 import asyncio
+import os
 import psutil
 import time
 import logging
 import shutil
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple
 from dataclasses import dataclass, field
 from pathlib import Path
 from contextlib import asynccontextmanager
 import gc
 import threading
 from ..config import get_config
+from ..media import progress_registry, get_ffmpeg_scheduler
+from .scratch import get_scratch_manager
+from .admission import AdmissionController, CostModel, OperationCost, operation_type
+from .ring_buffer import RingBuffer
+from .metrics import QUEUE_DEPTH, QUEUE_RUNNING, REGISTRY
+from .tracing import span
 
 logger = logging.getLogger("AutoMagic.ResourceManager")
 
+PROCESS_RSS = REGISTRY.gauge("automagic_process_tree_rss_bytes", "RSS of this process and its children")
+PROCESS_CPU = REGISTRY.gauge("automagic_process_tree_cpu_percent", "CPU share of this process tree")
+CHILD_PROCESSES = REGISTRY.gauge("automagic_child_processes", "Running child processes (ffmpeg and helpers)")
+ASSET_DISK = REGISTRY.gauge("automagic_asset_disk_bytes", "Size of the asset, temp and cache directories")
+
+# Columns of the usage history ring buffer
+HISTORY_FIELDS = ("timestamp", "memory_gb", "disk_gb", "cpu_percent", "active_ops",
+                  "child_processes", "system_memory_percent")
+
 @dataclass
 class ResourceLimits:
     """Resource usage limits"""
@@ -29,11 +45,14 @@ class ResourceLimits:
 
 @dataclass
 class ResourceUsage:
-    """Current resource usage"""
-    memory_gb: float = 0.0
-    disk_gb: float = 0.0
-    cpu_percent: float = 0.0
+    """Current resource usage of this process tree (ffmpeg children included)"""
+    memory_gb: float = 0.0  # RSS of this process and its children
+    disk_gb: float = 0.0  # Size of the directories the pipeline writes to
+    cpu_percent: float = 0.0  # Share of the whole machine
     active_ops: int = 0
+    child_processes: int = 0
+    system_memory_percent: float = 0.0
+    disk_free_gb: float = 0.0
     
     def is_within_limits(self, limits: ResourceLimits) -> bool:
         """Check if usage is within specified limits"""
@@ -62,8 +81,15 @@ class ResourceMonitor:
         
         # Resource tracking
         self.current_usage = ResourceUsage()
-        self.usage_history: List[ResourceUsage] = []
-        self.max_history = 100
+        self.max_history = 720  # An hour at the default interval
+        self.usage_history = RingBuffer(self.max_history, HISTORY_FIELDS)
+        
+        # Process-tree sampling state; CPU is the change in CPU seconds between samples
+        self._process = psutil.Process()
+        self._cpu_count = psutil.cpu_count() or 1
+        self._last_cpu: Optional[Tuple[float, float]] = None  # (monotonic time, tree CPU seconds)
+        self.disk_scan_interval = 60.0  # Walking the asset directories is slower than the other probes
+        self._last_disk_scan = 0.0
         
         # Active operations tracking
         self.active_operations: Dict[str, float] = {}  # operation_id -> start_time
@@ -105,36 +131,85 @@ class ResourceMonitor:
                 logger.error(f"Error in resource monitoring: {e}")
                 await asyncio.sleep(self.check_interval)
     
+    def _tree_cpu_seconds(self, children: List[psutil.Process]) -> float:
+        """CPU seconds of this process, its reaped children and the children still running"""
+        times = self._process.cpu_times()
+        total = times.user + times.system + times.children_user + times.children_system
+        for child in children:
+            try:
+                child_times = child.cpu_times()
+                total += child_times.user + child_times.system
+            except psutil.Error:
+                pass
+        return total
+    
+    def _directory_size_gb(self) -> float:
+        """Bytes under the pipeline's asset, temp and cache directories"""
+        paths = self.config.paths
+        total = 0
+        for root in {paths.image_save_path, paths.audio_save_path, paths.video_clips_path,
+                     paths.final_video_path, paths.thumbnails_path, paths.temp_path, paths.cache_path}:
+            stack = [str(root)]
+            while stack:
+                try:
+                    with os.scandir(stack.pop()) as entries:
+                        for entry in entries:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    stack.append(entry.path)
+                                elif entry.is_file(follow_symlinks=False):
+                                    total += entry.stat(follow_symlinks=False).st_size
+                            except OSError:
+                                pass
+                except OSError:
+                    pass
+        return total / (1024**3)
+    
+    def _sample(self) -> ResourceUsage:
+        """Take one sample of the process tree; runs in a worker thread and never sleeps"""
+        children = self._process.children(recursive=True)
+        rss = 0
+        for process in [self._process] + children:
+            try:
+                rss += process.memory_info().rss
+            except psutil.Error:
+                pass
+        
+        now = time.monotonic()
+        cpu_seconds = self._tree_cpu_seconds(children)
+        cpu_percent = self.current_usage.cpu_percent
+        if self._last_cpu is not None and now > self._last_cpu[0]:
+            cores_busy = (cpu_seconds - self._last_cpu[1]) / (now - self._last_cpu[0])
+            cpu_percent = min(100.0, max(0.0, 100.0 * cores_busy / self._cpu_count))
+        self._last_cpu = (now, cpu_seconds)
+        
+        disk_gb = self.current_usage.disk_gb
+        if now - self._last_disk_scan >= self.disk_scan_interval:
+            disk_gb = self._directory_size_gb()
+            self._last_disk_scan = now
+        try:
+            disk_free_gb = shutil.disk_usage(self.config.paths.base_dir).free / (1024**3)
+        except OSError:
+            disk_free_gb = 0.0
+        
+        with self._operation_lock:
+            active_ops = len(self.active_operations)
+        
+        return ResourceUsage(memory_gb=rss / (1024**3), disk_gb=disk_gb, cpu_percent=cpu_percent,
+                             active_ops=active_ops, child_processes=len(children),
+                             system_memory_percent=psutil.virtual_memory().percent,
+                             disk_free_gb=disk_free_gb)
+    
     async def _update_usage(self):
         """Update current resource usage"""
         try:
-            # Memory usage
-            memory = psutil.virtual_memory()
-            self.current_usage.memory_gb = memory.used / (1024**3)
-            
-            # Disk usage
-            disk = psutil.disk_usage(self.config.paths.base_dir)
-            used_gb = (disk.total - disk.free) / (1024**3)
-            self.current_usage.disk_gb = used_gb
-            
-            # CPU usage
-            self.current_usage.cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # Active operations
-            with self._operation_lock:
-                self.current_usage.active_ops = len(self.active_operations)
+            self.current_usage = await asyncio.to_thread(self._sample)
             
             # Store in history
-            self.usage_history.append(ResourceUsage(
-                memory_gb=self.current_usage.memory_gb,
-                disk_gb=self.current_usage.disk_gb,
-                cpu_percent=self.current_usage.cpu_percent,
-                active_ops=self.current_usage.active_ops
-            ))
-            
-            # Limit history size
-            if len(self.usage_history) > self.max_history:
-                self.usage_history = self.usage_history[-self.max_history:]
+            self.usage_history.append(
+                timestamp=time.time(),
+                **{name: getattr(self.current_usage, name) for name in HISTORY_FIELDS if name != "timestamp"}
+            )
             
             # Call callbacks
             for callback in self._callbacks:
@@ -183,7 +258,15 @@ class ResourceMonitor:
             "cpu_limit_percent": self.limits.max_cpu_percent,
             "active_operations": self.current_usage.active_ops,
             "max_operations": self.limits.max_concurrent_ops,
-            "within_limits": self.current_usage.is_within_limits(self.limits)
+            "child_processes": self.current_usage.child_processes,
+            "system_memory_percent": self.current_usage.system_memory_percent,
+            "disk_free_gb": self.current_usage.disk_free_gb,
+            "within_limits": self.current_usage.is_within_limits(self.limits),
+            "history": {
+                "samples": len(self.usage_history),
+                "memory_gb": self.usage_history.stats("memory_gb"),
+                "cpu_percent": self.usage_history.stats("cpu_percent")
+            }
         }
 
 class FileCleanupManager:
@@ -336,8 +419,18 @@ class ResourceManager:
         self.auto_gc_enabled = True
         self.memory_pressure_threshold = 0.8  # 80% of limit
         
+        # Operations reserve their (learned) cost against these budgets before starting
+        self.admission = AdmissionController(
+            max_memory_gb=self.config.resources.max_memory_gb,
+            cpu_slots=self.config.resources.max_concurrent_operations,
+            max_disk_gb=self.config.resources.max_disk_usage_gb,
+            disk_path=self.config.paths.base_dir,
+            cost_model=CostModel(self.config.paths.cache_path / "operation_costs.json")
+        )
+        
         # Setup callbacks
         self.monitor.add_callback(self._on_resource_update)
+        REGISTRY.add_collector("resource_manager", self._export_metrics)
         
     async def initialize(self):
         """Initialize resource management"""
@@ -395,13 +488,16 @@ class ResourceManager:
             logger.error(f"Emergency cleanup failed: {e}")
     
     @asynccontextmanager
-    async def managed_operation(self, operation_id: str):
+    async def managed_operation(self, operation_id: str, cost: Optional[OperationCost] = None):
         """Context manager for resource-managed operations"""
-        # Wait for resource availability
-        while not self.monitor.can_start_operation():
-            logger.info(f"Waiting for resources to start operation: {operation_id}")
-            await asyncio.sleep(1)
-        
+        # Wait in the admission queue until the operation's cost fits the budgets
+        with span(f"operation.{operation_type(operation_id)}", **{"operation.id": operation_id}):
+            async with self.admission.operation(operation_id, cost):
+                async with self._registered(operation_id):
+                    yield
+    
+    @asynccontextmanager
+    async def _registered(self, operation_id: str):
         # Register operation
         self.monitor.register_operation(operation_id)
         
@@ -432,11 +528,26 @@ class ResourceManager:
             logger.error(f"Scheduled cleanup failed: {e}")
             return None
     
+    def _export_metrics(self):
+        """Collector for the metrics registry"""
+        usage = self.monitor.current_usage
+        PROCESS_RSS.set(usage.memory_gb * 1024**3)
+        PROCESS_CPU.set(usage.cpu_percent)
+        CHILD_PROCESSES.set(usage.child_processes)
+        ASSET_DISK.set(usage.disk_gb * 1024**3)
+        admission = self.admission.get_status()
+        QUEUE_DEPTH.set(len(admission["queued"]), queue="admission")
+        QUEUE_RUNNING.set(len(admission["admitted"]), queue="admission")
+    
     def get_status(self) -> Dict[str, Any]:
         """Get current resource management status"""
         return {
             "resource_usage": self.monitor.get_resource_summary(),
             "active_operations": list(self.monitor.active_operations.keys()),
+            "ffmpeg_jobs": progress_registry.active_jobs(),
+            "ffmpeg_scheduler": get_ffmpeg_scheduler().get_status(),
+            "admission": self.admission.get_status(),
+            "scratch": get_scratch_manager().get_status(),
             "auto_cleanup_enabled": self.auto_cleanup_enabled,
             "auto_gc_enabled": self.auto_gc_enabled
         }
@@ -455,8 +566,8 @@ async def get_resource_manager() -> ResourceManager:
     return _resource_manager
 
 @asynccontextmanager
-async def managed_operation(operation_id: str):
+async def managed_operation(operation_id: str, cost: Optional[OperationCost] = None):
     """Convenience context manager for managed operations"""
     resource_manager = await get_resource_manager()
-    async with resource_manager.managed_operation(operation_id):
+    async with resource_manager.managed_operation(operation_id, cost):
         yield
\ No newline at end of file
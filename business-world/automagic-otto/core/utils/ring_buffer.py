@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Ring Buffer
+Fixed-size, array-backed sample history with O(1) appends and vectorized percentile queries
+"""
+
+import threading
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+class RingBuffer:
+    """Float64 rows of named fields; the oldest row is overwritten once full"""
+
+    def __init__(self, capacity: int, fields: Sequence[str]):
+        if capacity < 1:
+            raise ValueError("RingBuffer capacity must be at least 1")
+        self.capacity = capacity
+        self.fields = list(fields)
+        self._columns = {name: index for index, name in enumerate(self.fields)}
+        self._data = np.zeros((capacity, len(self.fields)), dtype=np.float64)
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, **values: float):
+        """Store one sample; fields not given are recorded as NaN"""
+        row = np.full(len(self.fields), np.nan)
+        for name, value in values.items():
+            row[self._columns[name]] = value
+        with self._lock:
+            self._data[self._next] = row
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def _ordered(self, last: Optional[int] = None) -> np.ndarray:
+        """Rows oldest first, optionally only the newest `last`; caller holds the lock"""
+        count = self._size if last is None else min(max(last, 0), self._size)
+        if count == 0:
+            return self._data[:0]
+        start = (self._next - count) % self.capacity
+        if start + count <= self.capacity:
+            return self._data[start:start + count].copy()
+        return np.concatenate((self._data[start:], self._data[:self._next]))
+
+    def column(self, field: str, last: Optional[int] = None) -> np.ndarray:
+        """One field over time, oldest first"""
+        with self._lock:
+            return self._ordered(last)[:, self._columns[field]]
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        with self._lock:
+            if not self._size:
+                return None
+            return dict(zip(self.fields, self._data[(self._next - 1) % self.capacity].tolist()))
+
+    def percentile(self, field: str, q: Union[float, Sequence[float]],
+                   last: Optional[int] = None) -> Union[float, np.ndarray, None]:
+        """Percentile(s) of a field over the history (or its newest `last` samples); None when empty"""
+        values = self.column(field, last)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return None
+        result = np.percentile(values, q)
+        return float(result) if np.ndim(result) == 0 else result
+
+    def stats(self, field: str, last: Optional[int] = None) -> Dict[str, Optional[float]]:
+        """Mean, p50, p95 and max of a field, for status output"""
+        values = self.column(field, last)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return {"mean": None, "p50": None, "p95": None, "max": None}
+        p50, p95 = np.percentile(values, [50, 95])
+        return {"mean": round(float(values.mean()), 3), "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3), "max": round(float(values.max()), 3)}
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Scratch Space Management
+Places render intermediates on tmpfs within a memory budget, spilling to disk and cleaning up per job
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from ..config import get_config
+
+logger = logging.getLogger("AutoMagic.Scratch")
+
+GB = 1024 ** 3
+
+# Smallest reservation per file, so concat lists and other tiny files still count
+MIN_RESERVATION = 64 * 1024
+
+# Never plan to fill more than this share of the tmpfs, which other processes share
+TMPFS_FREE_SHARE = 0.8
+
+class ScratchJob:
+    """One job's intermediates, split between RAM and a disk spill directory"""
+
+    def __init__(self, manager: "ScratchManager", job_id: str, disk_root: Path):
+        self.manager = manager
+        self.job_id = job_id
+        self.name = f"job_{job_id}"
+        self.disk_dir = disk_root / self.name
+        self.ram_dir = manager.ram_root / f"automagic_{os.getpid()}_{self.name}" if manager.ram_root else None
+        self._reservations: Dict[Path, int] = {}
+        self._lock = threading.Lock()
+
+    def path(self, name: str, estimated_bytes: int = 0) -> Path:
+        """Location for an intermediate file: RAM when the budget allows, otherwise disk"""
+        self._reconcile()
+        reservation = max(int(estimated_bytes), MIN_RESERVATION)
+
+        if self.ram_dir and self.manager.reserve(reservation):
+            self.ram_dir.mkdir(parents=True, exist_ok=True)
+            path = self.ram_dir / name
+            with self._lock:
+                self._reservations[path] = self._reservations.get(path, 0) + reservation
+            return path
+
+        if self.ram_dir:
+            logger.debug(f"Scratch budget exhausted, spilling {name} to disk")
+            self.manager.record_spill()
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        return self.disk_dir / name
+
+    def _reconcile(self):
+        """Grow reservations to the real size of files already written"""
+        with self._lock:
+            reservations = list(self._reservations.items())
+        for path, reserved in reservations:
+            try:
+                actual = path.stat().st_size
+            except OSError:
+                continue
+            if actual > reserved:
+                self.manager.reserve(actual - reserved, force=True)
+                with self._lock:
+                    self._reservations[path] = actual
+
+    def close(self):
+        """Delete every intermediate and return the job's reservations"""
+        for directory in (self.ram_dir, self.disk_dir):
+            if directory:
+                shutil.rmtree(directory, ignore_errors=True)
+        with self._lock:
+            reserved = sum(self._reservations.values())
+            self._reservations.clear()
+        self.manager.release(reserved)
+        logger.debug(f"Cleaned up scratch for {self.name}")
+
+class ScratchManager:
+    """Budgets tmpfs space for intermediates across all running jobs"""
+
+    def __init__(self, ram_root: Optional[Union[str, Path]] = None, budget_bytes: Optional[int] = None):
+        resources = get_config().resources
+        self.ram_root = self._usable_root(ram_root if ram_root is not None else resources.scratch_dir)
+
+        if budget_bytes is None:
+            # Scratch shares the process memory limit with everything else running
+            configured = resources.scratch_memory_gb or resources.max_memory_gb * 0.25
+            budget_bytes = int(min(configured, resources.max_memory_gb) * GB)
+        if self.ram_root:
+            usage = shutil.disk_usage(self.ram_root)
+            budget_bytes = min(budget_bytes, int(usage.free * TMPFS_FREE_SHARE))
+        self.budget_bytes = budget_bytes if self.ram_root else 0
+
+        self.reserved_bytes = 0
+        self.peak_bytes = 0
+        self.spills = 0
+        self._lock = threading.Lock()
+
+        if self.ram_root:
+            logger.info(f"Scratch space on {self.ram_root} with {self.budget_bytes / 1024 ** 2:.0f}MB budget")
+        else:
+            logger.info("No RAM scratch space available, intermediates go to disk")
+
+    @staticmethod
+    def _usable_root(root: Optional[Union[str, Path]]) -> Optional[Path]:
+        """A writable directory, or None to disable RAM scratch"""
+        if not root:
+            return None
+        root = Path(root)
+        if root.is_dir() and os.access(root, os.W_OK | os.X_OK):
+            return root
+        logger.warning(f"Scratch directory {root} is not writable, using disk only")
+        return None
+
+    def reserve(self, nbytes: int, force: bool = False) -> bool:
+        """Claim budget; force records usage that already happened"""
+        with self._lock:
+            if not force and self.reserved_bytes + nbytes > self.budget_bytes:
+                return False
+            self.reserved_bytes += nbytes
+            self.peak_bytes = max(self.peak_bytes, self.reserved_bytes)
+            return True
+
+    def release(self, nbytes: int):
+        with self._lock:
+            self.reserved_bytes = max(0, self.reserved_bytes - nbytes)
+
+    def record_spill(self):
+        with self._lock:
+            self.spills += 1
+
+    @contextmanager
+    def job(self, job_id: Optional[str] = None, disk_root: Optional[Union[str, Path]] = None):
+        """Scratch space for one job, removed when the job finishes"""
+        job = ScratchJob(self, job_id or uuid.uuid4().hex[:12], Path(disk_root or tempfile.gettempdir()))
+        try:
+            yield job
+        finally:
+            job.close()
+
+    def get_status(self) -> Dict[str, object]:
+        """Budget and usage summary"""
+        with self._lock:
+            return {
+                "ram_root": str(self.ram_root) if self.ram_root else None,
+                "budget_mb": round(self.budget_bytes / 1024 ** 2, 1),
+                "reserved_mb": round(self.reserved_bytes / 1024 ** 2, 1),
+                "peak_mb": round(self.peak_bytes / 1024 ** 2, 1),
+                "spills": self.spills
+            }
+
+# Global scratch manager instance
+_scratch_manager: Optional[ScratchManager] = None
+_scratch_lock = threading.Lock()
+
+def get_scratch_manager() -> ScratchManager:
+    """Get or create global scratch manager"""
+    global _scratch_manager
+    with _scratch_lock:
+        if _scratch_manager is None:
+            _scratch_manager = ScratchManager()
+        return _scratch_manager
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Trace Report
+Reads a run's span file and prints its critical-path timeline and a flame-style breakdown of where the time went
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+@dataclass
+class SpanRecord:
+    """A finished span read back from a trace file"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float  # Seconds since the epoch
+    end: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    children: List["SpanRecord"] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+def _value(value: Dict[str, Any]) -> Any:
+    for key in ("stringValue", "boolValue", "doubleValue"):
+        if key in value:
+            return value[key]
+    if "intValue" in value:
+        return int(value["intValue"])
+    return None
+
+def _attributes(items: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    return {item["key"]: _value(item.get("value", {})) for item in items or ()}
+
+def _otlp_spans(document: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    if "resourceSpans" not in document:
+        yield document  # A bare span per line
+        return
+    for resource in document["resourceSpans"]:
+        for scope in resource.get("scopeSpans", ()):
+            yield from scope.get("spans", ())
+
+def load_spans(path: Path) -> List[SpanRecord]:
+    """Spans from an OpenTelemetry JSON-lines file; unreadable lines are skipped"""
+    spans = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                document = json.loads(line)
+            except ValueError:
+                continue
+            for raw in _otlp_spans(document):
+                status = raw.get("status", {})
+                spans.append(SpanRecord(
+                    name=raw["name"], trace_id=raw["traceId"], span_id=raw["spanId"],
+                    parent_id=raw.get("parentSpanId") or None,
+                    start=int(raw["startTimeUnixNano"]) / 1e9, end=int(raw["endTimeUnixNano"]) / 1e9,
+                    attributes=_attributes(raw.get("attributes")),
+                    events=[{"name": event["name"], "time": int(event["timeUnixNano"]) / 1e9,
+                             "attributes": _attributes(event.get("attributes"))}
+                            for event in raw.get("events", ())],
+                    error=(status.get("message") or "error") if status.get("code") == 2 else None))
+    return spans
+
+def build_tree(spans: List[SpanRecord]) -> List[SpanRecord]:
+    """Link children to parents; returns the roots, earliest first"""
+    by_id = {span.span_id: span for span in spans}
+    roots = []
+    for span in spans:
+        parent = by_id.get(span.parent_id) if span.parent_id else None
+        if parent is None:
+            roots.append(span)
+        else:
+            parent.children.append(span)
+    for span in spans:
+        span.children.sort(key=lambda child: child.start)
+    return sorted(roots, key=lambda root: root.start)
+
+def critical_path(span: SpanRecord, depth: int = 0) -> List[Tuple[SpanRecord, int]]:
+    """The chain of spans that determined when span finished: last child to end, then whatever it waited on"""
+    chain: List[SpanRecord] = []
+    horizon = span.end
+    for child in sorted(span.children, key=lambda child: child.end, reverse=True):
+        if child.end <= horizon + 1e-6:
+            chain.append(child)
+            horizon = child.start
+    path = [(span, depth)]
+    for child in reversed(chain):
+        path.extend(critical_path(child, depth + 1))
+    return path
+
+def self_time(span: SpanRecord) -> float:
+    """Duration not covered by any child, so parallel children are not counted twice"""
+    covered, cursor = 0.0, span.start
+    for child in span.children:
+        start, end = max(child.start, cursor), min(child.end, span.end)
+        if end > start:
+            covered += end - start
+            cursor = end
+    return max(0.0, span.duration - covered)
+
+def _bar(offset: float, duration: float, total: float, width: int) -> str:
+    if total <= 0:
+        return " " * width
+    start = min(width - 1, int(offset / total * width))
+    length = max(1, int(round(duration / total * width)))
+    return (" " * start + "█" * min(length, width - start)).ljust(width)
+
+def _label(span: SpanRecord) -> str:
+    details = [str(value) for key, value in span.attributes.items()
+               if key in ("provider.name", "ffmpeg.job_id", "operation.id", "ffmpeg.outcome")]
+    label = span.name + (f" [{', '.join(details)}]" if details else "")
+    return label + (f" ✗ {span.error}" if span.error else "")
+
+def render_timeline(root: SpanRecord, width: int = 40, min_duration: float = 0.0) -> List[str]:
+    lines = [f"Critical path ({root.duration:.2f}s)", f"{'start':>9} {'duration':>9}  {'':{width}}  span"]
+    for span, depth in critical_path(root):
+        if span.duration < min_duration and span is not root:
+            continue
+        lines.append(f"{span.start - root.start:8.2f}s {span.duration:8.2f}s  "
+                     f"{_bar(span.start - root.start, span.duration, root.duration, width)}  "
+                     f"{'  ' * depth}{_label(span)}")
+    return lines
+
+@dataclass
+class _FlameNode:
+    total: float = 0.0
+    self: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    children: Dict[str, "_FlameNode"] = field(default_factory=dict)
+
+def _aggregate(span: SpanRecord, node: _FlameNode):
+    node.total += span.duration
+    node.self += self_time(span)
+    node.calls += 1
+    node.errors += 1 if span.error else 0
+    for child in span.children:
+        _aggregate(child, node.children.setdefault(child.name, _FlameNode()))
+
+def render_breakdown(root: SpanRecord, width: int = 30, min_duration: float = 0.0) -> List[str]:
+    """Spans merged by name path, widest first, like a flame graph turned on its side"""
+    tree = _FlameNode()
+    _aggregate(root, tree)
+    lines = [f"Breakdown by span (total / self time, share of {root.duration:.2f}s run)"]
+
+    def walk(name: str, node: _FlameNode, depth: int):
+        if node.total < min_duration and depth:
+            return
+        share = node.total / root.duration if root.duration > 0 else 0.0
+        bar = "█" * max(1, int(round(min(share, 1.0) * width))) if share > 0 else ""
+        extra = f" x{node.calls}" if node.calls > 1 else ""
+        extra += f" ({node.errors} failed)" if node.errors else ""
+        lines.append(f"{node.total:8.2f}s {node.self:8.2f}s {share:6.1%}  {bar:{width}}  {'  ' * depth}{name}{extra}")
+        for child_name, child in sorted(node.children.items(), key=lambda item: item[1].total, reverse=True):
+            walk(child_name, child, depth + 1)
+
+    walk(root.name, tree, 0)
+    return lines
+
+def folded_stacks(root: SpanRecord) -> List[str]:
+    """Self time per stack in microseconds, in the folded format flamegraph.pl and speedscope read"""
+    totals: Dict[str, float] = defaultdict(float)
+
+    def walk(span: SpanRecord, prefix: str):
+        stack = f"{prefix};{span.name}" if prefix else span.name
+        totals[stack] += self_time(span)
+        for child in span.children:
+            walk(child, stack)
+
+    walk(root, "")
+    return [f"{stack} {int(seconds * 1e6)}" for stack, seconds in totals.items() if seconds > 0]
+
+def render_events(root: SpanRecord, limit: int = 20) -> List[str]:
+    """Counts of the point events (cache lookups, file writes, process launches) under the run"""
+    counts: Dict[str, int] = defaultdict(int)
+
+    def walk(span: SpanRecord):
+        for event in span.events:
+            attributes = event["attributes"]
+            detail = attributes.get("cache.name") or attributes.get("process.executable.name") or ""
+            result = attributes.get("cache.result")
+            key = event["name"] + (f" {detail}" if detail else "") + (f" {result}" if result else "")
+            counts[key] += 1
+        for child in span.children:
+            walk(child)
+
+    walk(root)
+    if not counts:
+        return []
+    lines = ["Events"]
+    for key, count in sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]:
+        lines.append(f"{count:8d}  {key}")
+    return lines
+
+def trace_files(directory: Path) -> List[Path]:
+    """Trace files, newest first"""
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob("*.jsonl"), key=lambda path: path.stat().st_mtime, reverse=True)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show where a traced production run spent its time")
+    parser.add_argument("trace", nargs="?", help="Trace file (default: newest in --dir)")
+    parser.add_argument("--dir", default=os.getenv("TRACE_DIR", "logs/traces"), help="Trace directory")
+    parser.add_argument("--list", action="store_true", help="List recent traces")
+    parser.add_argument("--folded", action="store_true", help="Print folded stacks for flamegraph tools")
+    parser.add_argument("--min-ms", type=float, default=0.0, help="Hide spans shorter than this")
+    parser.add_argument("--width", type=int, default=40, help="Bar width in characters")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for path in trace_files(Path(args.dir))[:20]:
+            roots = build_tree(load_spans(path))
+            summary = ", ".join(f"{root.name} {root.duration:.1f}s" for root in roots[:3])
+            print(f"{path.name}  {summary}")
+        return 0
+
+    path = Path(args.trace) if args.trace else next(iter(trace_files(Path(args.dir))), None)
+    if path is None or not path.exists():
+        print(f"No trace found (looked in {args.dir}); run with TRACE_DIR set", file=sys.stderr)
+        return 1
+
+    roots = build_tree(load_spans(path))
+    if not roots:
+        print(f"{path} has no spans", file=sys.stderr)
+        return 1
+    min_duration = args.min_ms / 1000
+    for root in roots:
+        if args.folded:
+            print("\n".join(folded_stacks(root)))
+            continue
+        print(f"Trace {root.trace_id} from {path.name}")
+        for section in (render_timeline(root, args.width, min_duration),
+                        render_breakdown(root, args.width, min_duration),
+                        render_events(root)):
+            if section:
+                print("\n".join(section))
+                print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
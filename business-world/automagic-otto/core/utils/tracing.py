@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Run Tracing
+Nested spans for stages, provider calls, cache lookups, file writes and ffmpeg, exported as OpenTelemetry JSON lines
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger("AutoMagic.Tracing")
+
+SCOPE_NAME = "automagic.tracing"
+MAX_EVENTS_PER_SPAN = 256
+
+# OTLP enum values
+SPAN_KIND_INTERNAL = 1
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in values.items() if value is not None]
+
+class Span:
+    """One timed operation within a trace"""
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.events: List[Dict[str, Any]] = []
+        self.dropped_events = 0
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def recording(self) -> bool:
+        return self.end_ns is None
+
+    def set_attributes(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes: Any):
+        if len(self.events) >= MAX_EVENTS_PER_SPAN:
+            self.dropped_events += 1
+            return
+        self.events.append({"timeUnixNano": str(time.time_ns()), "name": name,
+                            "attributes": _attributes(attributes)})
+
+    def record_exception(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+        self.add_event("exception", **{"exception.type": type(error).__name__, "exception.message": str(error)})
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        # Wall-clock start plus a monotonic duration, so clock adjustments cannot produce negative spans
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._start_perf)
+        if self.status == STATUS_UNSET:
+            self.status = STATUS_OK
+        self.tracer._export(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {"traceId": self.trace_id, "spanId": self.span_id, "parentSpanId": self.parent_id or "",
+                "name": self.name, "kind": SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": str(self.start_ns), "endTimeUnixNano": str(self.end_ns),
+                "attributes": _attributes(self.attributes), "events": self.events,
+                "status": {"code": self.status, "message": self.status_message}}
+        if self.dropped_events:
+            span["droppedEventsCount"] = self.dropped_events
+        return span
+
+class _NoopSpan:
+    """Stands in for a span while tracing is off"""
+    recording = False
+    trace_id = span_id = ""
+
+    def set_attributes(self, **attributes: Any):
+        pass
+
+    def add_event(self, name: str, **attributes: Any):
+        pass
+
+    def record_exception(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+class Tracer:
+    """Writes finished spans to one JSON-lines file per trace in the trace directory"""
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None, service_name: str = "automagic"):
+        self.directory = Path(directory) if directory else None
+        self.service_name = service_name
+        self._lock = threading.Lock()
+        self._files: Dict[str, Path] = {}
+        self._resource = {"attributes": _attributes({"service.name": service_name, "process.pid": os.getpid(),
+                                                      "process.command": os.path.basename(sys.argv[0] or "")})}
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def start_span(self, name: str, attributes: Dict[str, Any]) -> Span:
+        parent = _current_span.get()
+        if parent is not None and parent.tracer is self:
+            return Span(self, name, parent.trace_id, parent.span_id, attributes)
+        span = Span(self, name, os.urandom(16).hex(), None, attributes)
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_")[:40] or "trace"
+        path = self.directory / f"{time.strftime('%Y%m%d-%H%M%S')}_{slug}_{span.trace_id[:8]}.jsonl"
+        with self._lock:
+            self._files[span.trace_id] = path
+        logger.info(f"Tracing {name} to {path}")
+        return span
+
+    def _export(self, span: Span):
+        line = json.dumps({"resourceSpans": [{"resource": self._resource, "scopeSpans": [
+            {"scope": {"name": SCOPE_NAME}, "spans": [span.to_otlp()]}]}]}, default=str)
+        self._local.exporting = True
+        try:
+            with self._lock:
+                path = self._files.get(span.trace_id) or self.directory / f"{span.trace_id}.jsonl"
+                if span.parent_id is None:
+                    # Spans of abandoned threads that end later still find the file by name
+                    self._files.pop(span.trace_id, None)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+        except OSError as e:
+            logger.debug(f"Could not write span {span.name}: {e}")
+        finally:
+            self._local.exporting = False
+
+    def trace_file(self, trace_id: str) -> Optional[Path]:
+        with self._lock:
+            return self._files.get(trace_id)
+
+_tracer = Tracer()
+_audit_installed = False
+
+def _is_write(mode: Any, flags: Any) -> bool:
+    if isinstance(mode, str):
+        return any(flag in mode for flag in "wax+")
+    return isinstance(flags, int) and bool(flags & (os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT))
+
+def _audit(event: str, args: tuple):
+    """Turns file writes and subprocess launches into events on the current span; must never raise"""
+    if event != "open" and event != "subprocess.Popen":
+        return
+    try:
+        span = _current_span.get()
+        if span is None or getattr(span.tracer._local, "exporting", False):
+            return
+        if event == "open":
+            path, mode, flags = args
+            if isinstance(path, (str, bytes, os.PathLike)) and _is_write(mode, flags):
+                span.add_event("file.write", **{"file.path": os.fsdecode(path)})
+        else:
+            executable, argv = args[0], args[1]
+            if isinstance(argv, (list, tuple)) and argv:
+                program = str(argv[0])
+            else:
+                program = str(executable or argv)
+            span.add_event("process.spawn", **{"process.executable.name": os.path.basename(program),
+                                               "process.command_args": len(argv) if isinstance(argv, (list, tuple)) else 1})
+    except Exception:
+        pass
+
+def configure(directory: Optional[Union[str, Path]], service_name: str = "automagic") -> Tracer:
+    """Enable tracing into directory (None disables) for every entry point in this process"""
+    global _tracer, _audit_installed
+    _tracer = Tracer(directory, service_name)
+    if _tracer.enabled and not _audit_installed:
+        # Audit hooks cannot be removed; _audit does nothing outside a span
+        sys.addaudithook(_audit)
+        _audit_installed = True
+    return _tracer
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def current_span() -> Union[Span, _NoopSpan]:
+    return _current_span.get() or NOOP_SPAN
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Union[Span, _NoopSpan]]:
+    """Time the block as a child of the current span, or as the root of a new trace"""
+    tracer = _tracer
+    if not tracer.enabled:
+        yield NOOP_SPAN
+        return
+    current = tracer.start_span(name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+def add_event(name: str, **attributes: Any):
+    """Annotate the current span; a no-op outside one"""
+    current = _current_span.get()
+    if current is not None:
+        current.add_event(name, **attributes)
+
+def set_attributes(**attributes: Any):
+    current = _current_span.get()
+    if current is not None:
+        current.set_attributes(**attributes)
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """Decorator wrapping each call of a sync or async function in a span"""
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# TRACE_DIR turns tracing on for whichever entry point imports the pipeline
+if os.getenv("TRACE_DIR"):
+    configure(os.getenv("TRACE_DIR"), os.getenv("TRACE_SERVICE_NAME", "automagic"))
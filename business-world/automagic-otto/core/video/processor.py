@@ -6,9 +6,12 @@ High-performance video creation with parallel processing, streaming, and resourc
 
 import asyncio
 import logging
+import shutil
 import tempfile
 import time
-from typing import List, Dict, Any, Optional, Union
+import uuid
+from typing import List, Dict, Any, Optional, Tuple, Union
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dataclasses import dataclass
 import subprocess
@@ -17,10 +20,87 @@ import ffmpeg
 from PIL import Image
 import concurrent.futures
 from ..config import get_config
-from ..utils.resource_manager import managed_operation
+from ..utils.resource_manager import get_resource_manager, managed_operation
+from ..utils.admission import OperationCost, attribute_path
+from ..utils.scratch import ScratchJob, get_scratch_manager
+from ..media import (EncoderChoice, get_encoder_tuner, run_ffmpeg, inspect_media, MediaInspectionError,
+                     validate_mp4)
+from ..media import ImagePrepEngine, ImagePrepSpec, LoudnessAnalyzer
 
 logger = logging.getLogger("AutoMagic.VideoProcessor")
 
+# Admission operation type of a render; queued ones count towards the encoder tuner's queue depth
+RENDER_OPERATION = "video_creation"
+
+# Platform renditions rendered alongside (or from) the master video
+PLATFORM_RENDITIONS = {
+    'youtube': {
+        'resolution': '1920x1080',
+        'fps': 30,
+        'bitrate': '8000k',
+        'format': 'mp4'
+    },
+    'youtube_shorts': {
+        'resolution': '1080x1920',
+        'fps': 30,
+        'bitrate': '6000k',
+        'format': 'mp4'
+    },
+    'tiktok': {
+        'resolution': '1080x1920',
+        'fps': 30,
+        'bitrate': '6000k',
+        'format': 'mp4'
+    },
+    'instagram': {
+        'resolution': '1080x1080',
+        'fps': 30,
+        'bitrate': '5000k',
+        'format': 'mp4'
+    }
+}
+
+def _fit_filter(width: Union[int, str], height: Union[int, str]) -> str:
+    """Scale into a frame keeping aspect ratio, padding the remainder"""
+    return (f'scale={width}:{height}:force_original_aspect_ratio=decrease,'
+            f'pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1')
+
+def rendition_path(base_path: str, platform: str) -> str:
+    """Output path for a platform rendition next to the master file"""
+    path = Path(base_path)
+    return str(path.with_name(f"{path.stem}_{platform}.mp4"))
+
+def build_rendition_graph(source: str, platforms: List[str], master_filter: Optional[str] = None) -> str:
+    """Decode once and split into [v_<platform>] outputs (plus [v_master] when a master filter is given)"""
+    branches = (['master'] if master_filter else []) + list(platforms)
+    labels = ''.join(f'[s_{branch}]' for branch in branches)
+    chains = [f'{source}split={len(branches)}{labels}']
+    
+    if master_filter:
+        chains.append(f'[s_master]{master_filter}[v_master]')
+    for platform in platforms:
+        settings = PLATFORM_RENDITIONS[platform]
+        width, height = settings['resolution'].split('x')
+        chains.append(f"[s_{platform}]{_fit_filter(width, height)},fps={settings['fps']}[v_{platform}]")
+    
+    return ';'.join(chains)
+
+def rendition_output_args(platform: str, preset: str, audio_map: Optional[str] = None) -> List[str]:
+    """Per-output encoder arguments for one platform rendition"""
+    settings = PLATFORM_RENDITIONS[platform]
+    args = [
+        '-map', f'[v_{platform}]',
+        '-c:v', 'libx264',
+        '-preset', preset,
+        '-b:v', settings['bitrate'],
+        '-maxrate', settings['bitrate'],
+        '-bufsize', f"{2 * int(settings['bitrate'].rstrip('k'))}k",
+        '-pix_fmt', 'yuv420p'
+    ]
+    if audio_map:
+        args += ['-map', audio_map, '-c:a', 'aac', '-b:a', '128k']
+    return args + ['-movflags', '+faststart']
+
 @dataclass
 class VideoSettings:
     """Video processing settings"""
@@ -33,6 +113,15 @@ class VideoSettings:
     crf: int = 23
     pixel_format: str = "yuv420p"
     
+    # Deadline-aware tuning: pick preset/CRF per job from host calibration
+    auto_tune: bool = False
+    encode_budget: Optional[float] = None  # Wall-clock seconds; defaults to the job's length * budget ratio
+    queue_depth: int = 0  # Jobs waiting outside this process; renders queued for admission are added live
+    
+    # Loudness normalization is fused into the final mux; two-pass measures the source first
+    normalize_audio: bool = True
+    loudnorm_two_pass: bool = False
+    
     @classmethod
     def from_config(cls):
         """Create settings from global config"""
@@ -47,7 +136,9 @@ class VideoSettings:
             codec=config.video.codec,
             preset=config.video.preset,
             crf=config.video.crf,
-            pixel_format=config.video.pixel_format
+            pixel_format=config.video.pixel_format,
+            auto_tune=config.video.auto_tune_encoder,
+            loudnorm_two_pass=config.video.loudnorm_two_pass
         )
 
 class OptimizedVideoProcessor:
@@ -61,6 +152,9 @@ class OptimizedVideoProcessor:
         # Performance settings
         self.max_workers = min(4, self.config.resources.max_concurrent_operations)
         self.thread_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        self.image_engine = ImagePrepEngine(self.config.paths.cache_path / "prepared_images",
+                                            max_workers=self.max_workers)
+        self.loudness = LoudnessAnalyzer(self.config.paths.cache_path / "loudness")
         
     async def __aenter__(self):
         """Async context manager entry"""
@@ -74,45 +168,97 @@ class OptimizedVideoProcessor:
         """Clean up temporary files and resources"""
         try:
             if self.temp_dir.exists():
-                import shutil
                 shutil.rmtree(self.temp_dir, ignore_errors=True)
                 logger.debug(f"Cleaned up temp directory: {self.temp_dir}")
         except Exception as e:
             logger.error(f"Failed to cleanup temp directory: {e}")
         
-        # Shutdown thread executor
+        # Shutdown executors
         self.thread_executor.shutdown(wait=True)
+        self.image_engine.shutdown()
+    
+    @asynccontextmanager
+    async def job_workspace(self, job_id: Optional[str] = None):
+        """Isolated scratch space for one job (tmpfs within budget, else temp_dir), removed when it finishes"""
+        with get_scratch_manager().job(job_id, disk_root=self.temp_dir) as workspace:
+            # What the job writes here is the disk (and tmpfs memory) admission learns for the render
+            attribute_path(workspace.disk_dir)
+            if workspace.ram_dir:
+                attribute_path(workspace.ram_dir, in_memory=True)
+            yield workspace
     
     async def create_video_from_assets(self, 
                                      image_paths: List[str], 
                                      audio_path: str,
                                      output_path: Optional[str] = None) -> str:
         """Create video from images and audio with optimized processing"""
-        async with managed_operation("video_creation"):
+        outputs = await self.create_video_with_renditions(image_paths, audio_path, [], output_path)
+        return outputs['master']
+    
+    async def create_video_with_renditions(self,
+                                           image_paths: List[str],
+                                           audio_path: str,
+                                           platforms: List[str],
+                                           output_path: Optional[str] = None) -> Dict[str, str]:
+        """Create the master video plus platform renditions from a single decode of the assets"""
+        unknown = [platform for platform in platforms if platform not in PLATFORM_RENDITIONS]
+        if unknown:
+            raise ValueError(f"Unsupported platform(s): {', '.join(unknown)}")
+        
+        job_id = uuid.uuid4().hex[:12]
+        
+        # Declared cost is the prior until the admission controller has measured a few renders
+        render_cost = OperationCost(memory_gb=1.0, cpu_slots=2, disk_gb=0.5)
+        async with managed_operation(f"{RENDER_OPERATION}_{job_id}", render_cost), \
+                self.job_workspace(job_id) as workspace:
             if not output_path:
                 timestamp = int(time.time())
-                output_path = str(self.config.paths.final_video_path / f"video_{timestamp}.mp4")
+                output_path = str(self.config.paths.final_video_path / f"video_{timestamp}_{job_id}.mp4")
             
-            logger.info(f"Creating video with {len(image_paths)} images and audio")
+            logger.info(f"Creating video with {len(image_paths)} images and audio"
+                        + (f" ({len(platforms)} renditions)" if platforms else ""))
             
             try:
                 # Validate and prepare assets
                 validated_images = await self._validate_and_prepare_images(image_paths)
-                validated_audio = await self._validate_and_prepare_audio(audio_path)
+                validated_audio, audio_filter = await self._validate_and_prepare_audio(audio_path, workspace)
                 
                 if not validated_images:
                     raise ValueError("No valid images provided for video creation")
                 
-                # Create video in stages for better memory management
-                silent_video_path = await self._create_silent_video(validated_images)
-                final_video_path = await self._add_audio_to_video(silent_video_path, validated_audio, output_path)
+                # The slideshow is timed to the narration so the stream-copied video ends with the audio
+                duration = await self._job_duration(validated_audio)
+                
+                # Create video in stages for better memory management; renditions share the decode
+                silent_videos = await self._create_silent_video(validated_images, workspace, duration, platforms)
+                
+                # A lone master normalizes inside its mux; several outputs share one normalized encode
+                copy_audio = len(silent_videos) > 1
+                if copy_audio:
+                    validated_audio = await self._encode_shared_audio(validated_audio, workspace, duration,
+                                                                      audio_filter)
+                    audio_filter = None
+                
+                # Muxing copies the video stream, so the narration is the only thing decoded here
+                names = list(silent_videos)
+                final_paths = await asyncio.gather(*[
+                    self._add_audio_to_video(
+                        silent_videos[name], validated_audio,
+                        output_path if name == 'master' else rendition_path(output_path, name),
+                        duration, audio_filter, copy_audio
+                    )
+                    for name in names
+                ])
+                outputs = dict(zip(names, final_paths))
                 
                 # Verify output
-                if not await self._verify_video(final_video_path):
-                    raise RuntimeError("Created video failed verification")
+                for name, final_video_path in outputs.items():
+                    if not await self._verify_video(final_video_path, duration,
+                                                    allow_static=len(set(validated_images)) < 2):
+                        raise RuntimeError(f"Created video failed verification: {name}")
                 
-                logger.info(f"Video created successfully: {final_video_path}")
-                return final_video_path
+                logger.info(f"Video created successfully: {outputs['master']}")
+                return outputs
                 
             except Exception as e:
                 logger.error(f"Video creation failed: {e}")
@@ -120,130 +266,46 @@ class OptimizedVideoProcessor:
     
     async def _validate_and_prepare_images(self, image_paths: List[str]) -> List[str]:
         """Validate and prepare images for video processing"""
-        validated_images = []
-        
-        # Process images in parallel
-        tasks = []
-        for i, image_path in enumerate(image_paths):
-            task = asyncio.create_task(self._process_image(image_path, i))
-            tasks.append(task)
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        missing = [path for path in image_paths if not Path(path).exists()]
+        for path in missing:
+            logger.error(f"Failed to process image {path}: Image not found")
         
-        for result in results:
-            if isinstance(result, str) and result:
-                validated_images.append(result)
-            elif isinstance(result, Exception):
-                logger.error(f"Image processing failed: {result}")
+        # Decode, crop and resize in worker processes; results are cached by content hash
+        spec = ImagePrepSpec(self.settings.width, self.settings.height, pixel_format=self.settings.pixel_format)
+        existing = [path for path in image_paths if path not in missing]
+        prepared = await self.image_engine.prepare_many_async(existing, spec)
+        validated_images = [path for path in prepared if path]
         
         logger.info(f"Validated {len(validated_images)} images out of {len(image_paths)}")
         return validated_images
     
-    async def _process_image(self, image_path: str, index: int) -> str:
-        """Process and validate a single image"""
-        try:
-            path = Path(image_path)
-            if not path.exists():
-                raise FileNotFoundError(f"Image not found: {image_path}")
-            
-            # Run image processing in thread to avoid blocking
-            loop = asyncio.get_event_loop()
-            processed_path = await loop.run_in_executor(
-                self.thread_executor,
-                self._process_image_sync,
-                str(path),
-                index
-            )
-            
-            return processed_path
-            
-        except Exception as e:
-            logger.error(f"Failed to process image {image_path}: {e}")
-            return ""
-    
-    def _process_image_sync(self, image_path: str, index: int) -> str:
-        """Synchronous image processing"""
-        try:
-            with Image.open(image_path) as img:
-                # Convert to RGB if necessary
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Resize to target dimensions
-                target_size = (self.settings.width, self.settings.height)
-                if img.size != target_size:
-                    # Maintain aspect ratio and center crop
-                    img_aspect = img.width / img.height
-                    target_aspect = self.settings.width / self.settings.height
-                    
-                    if img_aspect > target_aspect:
-                        # Image is wider, crop width
-                        new_width = int(img.height * target_aspect)
-                        left = (img.width - new_width) // 2
-                        img = img.crop((left, 0, left + new_width, img.height))
-                    else:
-                        # Image is taller, crop height
-                        new_height = int(img.width / target_aspect)
-                        top = (img.height - new_height) // 2
-                        img = img.crop((0, top, img.width, top + new_height))
-                    
-                    # Resize to exact target
-                    img = img.resize(target_size, Image.Resampling.LANCZOS)
-                
-                # Save processed image
-                processed_path = self.temp_dir / f"processed_image_{index:03d}.jpg"
-                img.save(processed_path, "JPEG", quality=85, optimize=True)
-                
-                return str(processed_path)
-                
-        except Exception as e:
-            logger.error(f"Sync image processing failed for {image_path}: {e}")
-            return ""
-    
-    async def _validate_and_prepare_audio(self, audio_path: str) -> str:
-        """Validate and prepare audio for video processing"""
+    async def _validate_and_prepare_audio(self, audio_path: str, workspace: ScratchJob) -> Tuple[str, Optional[str]]:
+        """Validate audio and return it with the filter chain the final mux should apply"""
         if not audio_path or not Path(audio_path).exists():
             logger.warning("No valid audio provided, creating silent audio")
-            return await self._create_silent_audio()
+            return await self._create_silent_audio(workspace), None
         
         try:
-            # Validate audio with ffprobe
+            # Validate audio stream
             probe_result = await self._probe_media(audio_path)
             
             if not self._has_audio_stream(probe_result):
                 logger.warning("Audio file has no valid audio stream, creating silent audio")
-                return await self._create_silent_audio()
+                return await self._create_silent_audio(workspace), None
             
-            # Normalize audio if needed
-            normalized_path = await self._normalize_audio(audio_path)
-            return normalized_path
+            # Normalization runs inside the mux, so the source is decoded and encoded once
+            return audio_path, await self._loudness_filter(audio_path)
             
         except Exception as e:
             logger.error(f"Audio validation failed: {e}, creating silent audio")
-            return await self._create_silent_audio()
+            return await self._create_silent_audio(workspace), None
     
     async def _probe_media(self, file_path: str) -> Dict[str, Any]:
-        """Probe media file with ffprobe"""
+        """Probe media file (parsed in-process and memoized; ffprobe only for unknown formats)"""
         try:
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_format', '-show_streams', file_path
-            ]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
+            return inspect_media(file_path).to_probe_dict()
             
-            if process.returncode != 0:
-                raise RuntimeError(f"ffprobe failed: {stderr.decode()}")
-            
-            return json.loads(stdout.decode())
-            
-        except Exception as e:
+        except MediaInspectionError as e:
             logger.error(f"Media probing failed: {e}")
             return {}
     
@@ -252,44 +314,31 @@ class OptimizedVideoProcessor:
         streams = probe_result.get('streams', [])
         return any(stream.get('codec_type') == 'audio' for stream in streams)
     
-    async def _normalize_audio(self, audio_path: str) -> str:
-        """Normalize audio for consistent output"""
-        normalized_path = self.temp_dir / "normalized_audio.mp3"
+    async def _job_duration(self, audio_path: str) -> float:
+        """Length of this job's video: the narration's, capped at the configured maximum"""
+        try:
+            measured = float(inspect_media(audio_path).duration)
+        except (MediaInspectionError, OSError) as e:
+            logger.warning(f"Could not measure narration length, using {self.settings.duration}s: {e}")
+            return float(self.settings.duration)
+        if measured <= 0:
+            return float(self.settings.duration)
+        return min(measured, float(self.settings.duration))
+    
+    async def _loudness_filter(self, audio_path: str) -> Optional[str]:
+        """Loudnorm filter chain for the mux (measurements cached per source audio hash)"""
+        if not self.settings.normalize_audio:
+            return None
         
         try:
-            # Use ffmpeg for audio normalization
-            cmd = [
-                'ffmpeg', '-i', audio_path,
-                '-ar', '44100',          # Sample rate
-                '-ac', '2',              # Stereo
-                '-b:a', '128k',          # Bitrate
-                '-af', 'loudnorm=I=-16:TP=-1.5:LRA=11',  # Loudness normalization
-                '-y',                    # Overwrite output
-                str(normalized_path)
-            ]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                logger.error(f"Audio normalization failed: {stderr.decode()}")
-                return audio_path  # Return original if normalization fails
-            
-            logger.debug("Audio normalized successfully")
-            return str(normalized_path)
-            
+            return await self.loudness.filter_chain(audio_path, two_pass=self.settings.loudnorm_two_pass)
         except Exception as e:
-            logger.error(f"Audio normalization error: {e}")
-            return audio_path
+            logger.error(f"Audio normalization setup failed, muxing without it: {e}")
+            return None
     
-    async def _create_silent_audio(self) -> str:
+    async def _create_silent_audio(self, workspace: ScratchJob) -> str:
         """Create silent audio track"""
-        silent_audio_path = self.temp_dir / "silent_audio.mp3"
+        silent_audio_path = workspace.path("silent_audio.mp3", self.settings.duration * 128_000 // 8)
         
         try:
             cmd = [
@@ -302,15 +351,10 @@ class OptimizedVideoProcessor:
                 str(silent_audio_path)
             ]
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            await process.communicate()
+            result = await run_ffmpeg(cmd, job_id=f"{workspace.name}_silent_audio",
+                                      expected_duration=self.settings.duration, check=False)
             
-            if process.returncode == 0:
+            if result.returncode == 0:
                 logger.debug("Silent audio created successfully")
                 return str(silent_audio_path)
             else:
@@ -320,16 +364,85 @@ class OptimizedVideoProcessor:
             logger.error(f"Silent audio creation failed: {e}")
             raise
     
-    async def _create_silent_video(self, image_paths: List[str]) -> str:
-        """Create silent video from images using optimized FFmpeg"""
-        silent_video_path = self.temp_dir / "silent_video.mp4"
+    async def _encode_shared_audio(self, audio_path: str, workspace: ScratchJob, duration: float,
+                                   audio_filter: Optional[str] = None) -> str:
+        """Decode, normalize and encode the narration once for every output to stream-copy"""
+        shared_audio_path = workspace.path("narration.m4a", int(duration * 128_000 // 8))
+        
+        cmd = ['ffmpeg', '-i', audio_path, '-vn']
+        if audio_filter:
+            cmd += ['-af', audio_filter]
+        cmd += [
+            '-c:a', 'aac',
+            '-b:a', '128k',
+            '-ar', '44100',
+            '-ac', '2',
+            '-t', f"{duration:.3f}",
+            '-y',
+            str(shared_audio_path)
+        ]
+        
+        result = await run_ffmpeg(cmd, job_id=f"{workspace.name}_audio", expected_duration=duration, check=False)
+        if result.returncode != 0:
+            error_msg = result.stderr or "Unknown error"
+            raise RuntimeError(f"Audio encoding failed: {error_msg}")
+        
+        return str(shared_audio_path)
+    
+    async def _queue_depth(self) -> int:
+        """Renders waiting behind this one: those queued for admission plus any the caller reports"""
+        manager = await get_resource_manager()
+        return self.settings.queue_depth + manager.admission.queued(RENDER_OPERATION)
+    
+    async def _select_encoder(self, duration: float) -> EncoderChoice:
+        """Choose preset/CRF/threads for this job, tuned to the budget when enabled"""
+        if not self.settings.auto_tune:
+            return EncoderChoice(self.settings.preset, self.settings.crf, self.max_workers, 0.0, 0.0)
+        
+        tuner = get_encoder_tuner(self.config.paths.cache_path / "encoder_calibration.json")
+        budget = self.settings.encode_budget or duration * self.config.video.encode_budget_ratio
+        queue_depth = await self._queue_depth()
+        
+        try:
+            # Calibration runs ffmpeg on first use, keep it off the event loop
+            loop = asyncio.get_event_loop()
+            choice = await loop.run_in_executor(
+                self.thread_executor,
+                lambda: tuner.choose(
+                    frames=int(duration * self.settings.fps),
+                    width=self.settings.width,
+                    height=self.settings.height,
+                    budget_seconds=budget,
+                    target_crf=self.settings.crf,
+                    queue_depth=queue_depth
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Encoder tuning failed, using configured preset: {e}")
+            return EncoderChoice(self.settings.preset, self.settings.crf, self.max_workers, 0.0, budget)
+        
+        logger.info(f"Encoder tuned: preset={choice.preset} crf={choice.crf} threads={choice.threads} "
+                    f"(est. {choice.estimated_seconds:.1f}s of {budget:.1f}s budget, {queue_depth} queued)")
+        return choice
+    
+    async def _create_silent_video(self, image_paths: List[str], workspace: ScratchJob, duration: float,
+                                   platforms: List[str] = ()) -> Dict[str, str]:
+        """Create silent master video (and platform renditions) from images using optimized FFmpeg"""
+        # Slideshows compress to well under 0.1 bits per pixel; renditions are bitrate-capped
+        master_bytes = int(self.settings.width * self.settings.height * self.settings.fps
+                           * duration * 0.1 / 8)
+        silent_paths = {'master': str(workspace.path("silent_video.mp4", master_bytes))}
+        for platform in platforms:
+            bitrate = int(PLATFORM_RENDITIONS[platform]['bitrate'].rstrip('k')) * 1000
+            silent_paths[platform] = str(workspace.path(f"silent_video_{platform}.mp4",
+                                                        int(bitrate * duration // 8)))
         
         try:
             # Calculate timing
-            image_duration = self.settings.duration / len(image_paths)
+            image_duration = duration / len(image_paths)
             
             # Create concat file
-            concat_file_path = self.temp_dir / "concat.txt"
+            concat_file_path = workspace.path("concat.txt")
             with open(concat_file_path, 'w') as f:
                 for image_path in image_paths:
                     f.write(f"file '{image_path}'\n")
@@ -338,48 +451,58 @@ class OptimizedVideoProcessor:
                 if image_paths:
                     f.write(f"file '{image_paths[-1]}'\n")
             
+            encoder = await self._select_encoder(duration)
+            master_filter = f'fps={self.settings.fps},{_fit_filter(self.settings.width, self.settings.height)}'
+            master_args = [
+                '-c:v', self.settings.codec,
+                '-preset', encoder.preset,
+                '-crf', str(encoder.crf),
+                '-pix_fmt', self.settings.pixel_format,
+                '-movflags', '+faststart',  # Optimize for streaming
+            ]
+            
             # Optimized FFmpeg command for video creation
             cmd = [
                 'ffmpeg',
                 '-f', 'concat',
                 '-safe', '0',
+                '-t', f"{duration:.3f}",  # The repeated last image would otherwise add a frame
                 '-i', str(concat_file_path),
-                '-vf', f'fps={self.settings.fps},scale={self.settings.width}:{self.settings.height}:force_original_aspect_ratio=decrease,pad={self.settings.width}:{self.settings.height}:(ow-iw)/2:(oh-ih)/2',
-                '-c:v', self.settings.codec,
-                '-preset', self.settings.preset,
-                '-crf', str(self.settings.crf),
-                '-pix_fmt', self.settings.pixel_format,
-                '-movflags', '+faststart',  # Optimize for streaming
-                '-threads', str(self.max_workers),
-                '-y',
-                str(silent_video_path)
+                '-threads', str(encoder.threads)
             ]
             
-            logger.debug(f"Creating silent video with command: {' '.join(cmd[:5])}...")
+            if platforms:
+                # One decode of the slideshow, split into master and per-platform encodes
+                cmd += ['-filter_complex', build_rendition_graph('[0:v]', list(platforms), master_filter)]
+                cmd += ['-map', '[v_master]', *master_args, '-y', silent_paths['master']]
+                for platform in platforms:
+                    cmd += [*rendition_output_args(platform, encoder.preset), '-y', silent_paths[platform]]
+            else:
+                cmd += ['-vf', master_filter, *master_args, '-y', silent_paths['master']]
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            logger.debug(f"Creating silent video with command: {' '.join(cmd[:5])}...")
             
-            stdout, stderr = await process.communicate()
+            result = await run_ffmpeg(cmd, job_id=f"{workspace.name}_silent_video",
+                                      expected_duration=duration, check=False)
             
-            if process.returncode != 0:
-                error_msg = stderr.decode() if stderr else "Unknown error"
+            if result.returncode != 0:
+                error_msg = result.stderr or "Unknown error"
                 raise RuntimeError(f"Silent video creation failed: {error_msg}")
             
-            if not silent_video_path.exists() or silent_video_path.stat().st_size < 1000:
-                raise RuntimeError("Silent video creation produced invalid output")
+            for name, path in silent_paths.items():
+                if not Path(path).exists() or Path(path).stat().st_size < 1000:
+                    raise RuntimeError(f"Silent video creation produced invalid output: {name}")
             
             logger.info("Silent video created successfully")
-            return str(silent_video_path)
+            return silent_paths
             
         except Exception as e:
             logger.error(f"Silent video creation failed: {e}")
             raise
     
-    async def _add_audio_to_video(self, video_path: str, audio_path: str, output_path: str) -> str:
+    async def _add_audio_to_video(self, video_path: str, audio_path: str, output_path: str,
+                                  duration: float, audio_filter: Optional[str] = None,
+                                  copy_audio: bool = False) -> str:
         """Add audio to video using optimized FFmpeg"""
         try:
             # Ensure output directory exists
@@ -393,27 +516,28 @@ class OptimizedVideoProcessor:
                 '-c:v', 'copy',          # Copy video stream (no re-encoding)
                 '-c:a', 'aac',           # Audio codec
                 '-b:a', '128k',          # Audio bitrate
+                '-ar', '44100',          # Sample rate
+                '-ac', '2',              # Stereo
                 '-map', '0:v:0',         # Map video from first input
                 '-map', '1:a:0',         # Map audio from second input
                 '-shortest',             # Stop at shortest stream
                 '-movflags', '+faststart',
-                '-threads', str(self.max_workers),
                 '-y',
                 output_path
             ]
+            if copy_audio:
+                # Already encoded (and normalized) once for every output
+                cmd[cmd.index('-c:a'):cmd.index('-map')] = ['-c:a', 'copy']
+            elif audio_filter:
+                cmd[cmd.index('-map'):cmd.index('-map')] = ['-af', audio_filter]
             
             logger.debug(f"Adding audio with command: {' '.join(cmd[:5])}...")
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
+            result = await run_ffmpeg(cmd, job_id=f"{Path(output_path).stem}_mux",
+                                      expected_duration=duration, check=False)
             
-            if process.returncode != 0:
-                error_msg = stderr.decode() if stderr else "Unknown error"
+            if result.returncode != 0:
+                error_msg = result.stderr or "Unknown error"
                 raise RuntimeError(f"Audio mixing failed: {error_msg}")
             
             if not Path(output_path).exists() or Path(output_path).stat().st_size < 1000:
@@ -426,115 +550,63 @@ class OptimizedVideoProcessor:
             logger.error(f"Adding audio to video failed: {e}")
             raise
     
-    async def _verify_video(self, video_path: str) -> bool:
-        """Verify the created video is valid"""
-        try:
-            if not Path(video_path).exists():
-                return False
-            
-            # Check file size
-            file_size = Path(video_path).stat().st_size
-            if file_size < 10000:  # Less than 10KB is likely invalid
-                logger.error(f"Video file too small: {file_size} bytes")
-                return False
-            
-            # Probe video with ffprobe
-            probe_result = await self._probe_media(video_path)
-            
-            if not probe_result:
-                return False
-            
-            # Check for video and audio streams
-            streams = probe_result.get('streams', [])
-            has_video = any(s.get('codec_type') == 'video' for s in streams)
-            has_audio = any(s.get('codec_type') == 'audio' for s in streams)
-            
-            if not has_video:
-                logger.error("Video verification failed: no video stream")
-                return False
-            
-            # Audio is optional but warn if missing
-            if not has_audio:
-                logger.warning("Video has no audio stream")
-            
-            # Check duration
-            format_info = probe_result.get('format', {})
-            duration = float(format_info.get('duration', 0))
-            
-            if duration < 1:
-                logger.error(f"Video duration too short: {duration}s")
-                return False
-            
-            logger.info(f"Video verification passed: {duration:.1f}s duration, {file_size:,} bytes")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Video verification failed: {e}")
+    async def _verify_video(self, video_path: str, expected_duration: Optional[float] = None,
+                            allow_static: bool = False) -> bool:
+        """Verify the created video from its box tree and a few sampled frames"""
+        # Runs in a thread (keeping the ffmpeg priority context) since frame sampling spawns ffmpeg
+        validation = await asyncio.to_thread(
+            validate_mp4, video_path,
+            expected_duration=expected_duration,
+            require_audio=False,  # Audio is optional but warn if missing
+            require_faststart=True,
+            allow_static=allow_static
+        )
+        
+        for warning in validation.warnings:
+            logger.warning(f"{Path(video_path).name}: {warning}")
+        if not validation.passed:
+            logger.error(f"Video verification failed: {validation.summary()}")
             return False
+        if not validation.audio:
+            logger.warning("Video has no audio stream")
+        
+        logger.info(f"Video verification passed in {validation.elapsed_ms:.0f}ms: {validation.summary()}")
+        return True
     
     async def optimize_video_for_platform(self, input_path: str, platform: str) -> str:
         """Optimize video for specific platform (YouTube, TikTok, etc.)"""
-        platform_settings = {
-            'youtube': {
-                'resolution': '1920x1080',
-                'fps': 30,
-                'bitrate': '8000k',
-                'format': 'mp4'
-            },
-            'tiktok': {
-                'resolution': '1080x1920',
-                'fps': 30,
-                'bitrate': '6000k',
-                'format': 'mp4'
-            },
-            'instagram': {
-                'resolution': '1080x1080',
-                'fps': 30,
-                'bitrate': '5000k',
-                'format': 'mp4'
-            }
-        }
-        
-        if platform not in platform_settings:
-            raise ValueError(f"Unsupported platform: {platform}")
+        outputs = await self.optimize_video_for_platforms(input_path, [platform])
+        return outputs[platform]
+    
+    async def optimize_video_for_platforms(self, input_path: str, platforms: List[str]) -> Dict[str, str]:
+        """Render several platform versions of a finished video from one decode"""
+        unknown = [platform for platform in platforms if platform not in PLATFORM_RENDITIONS]
+        if unknown:
+            raise ValueError(f"Unsupported platform(s): {', '.join(unknown)}")
         
-        settings = platform_settings[platform]
-        output_path = str(Path(input_path).with_suffix(f'_{platform}.mp4'))
+        output_paths = {platform: rendition_path(input_path, platform) for platform in platforms}
         
         try:
-            width, height = settings['resolution'].split('x')
-            
             cmd = [
                 'ffmpeg',
                 '-i', input_path,
-                '-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2',
-                '-r', str(settings['fps']),
-                '-b:v', settings['bitrate'],
-                '-c:v', 'libx264',
-                '-preset', 'fast',
-                '-c:a', 'aac',
-                '-b:a', '128k',
-                '-movflags', '+faststart',
-                '-y',
-                output_path
+                '-filter_complex', build_rendition_graph('[0:v]', list(platforms))
             ]
+            for platform in platforms:
+                cmd += [*rendition_output_args(platform, self.settings.preset, audio_map='0:a?'),
+                        '-y', output_paths[platform]]
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            await process.communicate()
-            
-            if process.returncode == 0:
-                logger.info(f"Video optimized for {platform}: {output_path}")
-                return output_path
+            result = await run_ffmpeg(cmd, job_id=f"{Path(input_path).stem}_renditions", check=False)
+
+            if result.returncode == 0:
+                logger.info(f"Video optimized for {', '.join(platforms)}: {input_path}")
+                return output_paths
             else:
-                raise RuntimeError(f"Platform optimization failed for {platform}")
+                error_msg = "\n".join(result.stderr_tail[-10:]) or "Unknown error"
+                raise RuntimeError(f"Platform optimization failed for {', '.join(platforms)}: {error_msg}")
                 
         except Exception as e:
-            logger.error(f"Video optimization for {platform} failed: {e}")
+            logger.error(f"Video optimization for {', '.join(platforms)} failed: {e}")
             raise
 
 # Convenience function for video creation
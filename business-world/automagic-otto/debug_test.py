@@ -61,8 +61,9 @@ def test_ffmpeg():
     """Test FFmpeg availability"""
     print("\n=== FFmpeg Test ===")
     try:
-        import subprocess
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, timeout=5)
+        from core.media import PRIORITY_INTERACTIVE, run_ffmpeg_sync
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], timeout=5, check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         if result.returncode == 0:
             version_line = result.stdout.split('\n')[0]
             print(f"✓ FFmpeg available: {version_line}")
@@ -141,8 +141,8 @@ def test_public_upload():
     # Create a simple test video
     from PIL import Image
     from pathlib import Path
-    import subprocess
     import time
+    from core.media import run_ffmpeg_sync
     
     try:
         # Create simple test image
@@ -180,7 +180,7 @@ def test_public_upload():
             str(test_video_path)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = run_ffmpeg_sync(cmd, check=False)
         if result.returncode != 0:
             print(f"[ERROR] Failed to create test video: {result.stderr}")
             return None
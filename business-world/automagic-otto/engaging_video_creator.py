@@ -8,7 +8,6 @@ import os
 import sys
 import json
 import time
-import subprocess
 import random
 import requests
 from datetime import datetime
@@ -17,9 +16,12 @@ import tempfile
 import shutil
 
 # For animations and visuals
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageOps
+from PIL import Image, ImageDraw, ImageEnhance
 import numpy as np
 
+from core.graphics import TextStyle, render_text_reveal
+from core.media import run_ffmpeg_sync
+
 # Load environment
 from dotenv import load_dotenv
 load_dotenv()
@@ -194,6 +196,10 @@ class EngagingVideoCreator:
         
         colors = color_schemes.get(scene_data["type"], [(50, 50, 50), (150, 150, 150)])
         
+        # Text overlay with a single-blur glow, rendered once per scene and revealed by cropping
+        text_style = TextStyle(font="arial.ttf", size=80, glow_radius=8,
+                               glow_fill=(255, 255, 255, 120), line_height=100)
+        
         # Generate frames
         for frame_num in range(total_frames):
             # Create base image with gradient
@@ -277,57 +283,12 @@ class EngagingVideoCreator:
                             particle_x + particle_size, particle_y + particle_size],
                            fill=(255, 255, 255, 100))
             
-            # Add text overlay with animation
-            try:
-                font_large = ImageFont.truetype("arial.ttf", 80)
-                font_small = ImageFont.truetype("arial.ttf", 40)
-            except:
-                font_large = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-            
             # Animated text
             text = scene_data["text"]
             
-            # Text reveal animation (typewriter effect)
+            # Text reveal animation (typewriter effect) over the full text's cached sprite
             chars_to_show = int(len(text) * min(1, t * 2))
-            display_text = text[:chars_to_show]
-            
-            if display_text:
-                # Calculate text position
-                lines = []
-                words = display_text.split()
-                current_line = []
-                
-                for word in words:
-                    current_line.append(word)
-                    test_line = " ".join(current_line)
-                    bbox = draw.textbbox((0, 0), test_line, font=font_large)
-                    
-                    if bbox[2] - bbox[0] > width - 200:
-                        lines.append(" ".join(current_line[:-1]))
-                        current_line = [word]
-                
-                if current_line:
-                    lines.append(" ".join(current_line))
-                
-                # Draw each line
-                total_height = len(lines) * 100
-                start_y = (height - total_height) // 2
-                
-                for i, line in enumerate(lines):
-                    bbox = draw.textbbox((0, 0), line, font=font_large)
-                    text_width = bbox[2] - bbox[0]
-                    x = (width - text_width) // 2
-                    y = start_y + i * 100
-                    
-                    # Text glow effect
-                    for offset in range(10, 0, -2):
-                        alpha = 20 - offset * 2
-                        draw.text((x, y), line, font=font_large, 
-                                fill=(255, 255, 255, alpha))
-                    
-                    # Main text
-                    draw.text((x, y), line, font=font_large, fill=(255, 255, 255))
+            render_text_reveal(text, text_style, width - 200).paste_centered(img, chars_to_show)
             
             # Save frame
             frame_path = scene_dir / f"frame_{frame_num:04d}.png"
@@ -346,7 +307,7 @@ class EngagingVideoCreator:
             str(scene_video)
         ]
         
-        subprocess.run(cmd, capture_output=True)
+        run_ffmpeg_sync(cmd, check=False)
         
         # Clean up frames
         shutil.rmtree(scene_dir)
@@ -397,7 +358,7 @@ class EngagingVideoCreator:
                 '-t', str(duration),
                 str(audio_path)
             ]
-            subprocess.run(cmd, capture_output=True)
+            run_ffmpeg_sync(cmd, check=False)
             
             return str(audio_path)
     
@@ -478,7 +439,7 @@ class EngagingVideoCreator:
             str(output_path)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = run_ffmpeg_sync(cmd, check=False)
         
         if result.returncode == 0:
             print(f"Video created: {output_path}")
@@ -5,7 +5,6 @@ import os
 import json
 import time
 import logging
-import subprocess
 import tempfile
 import concurrent.futures
 from pathlib import Path
@@ -14,6 +13,11 @@ from typing import List, Optional, Dict, Any, Tuple
 import threading
 from queue import Queue
 import hashlib
+import shutil
+
+from core.media import (probe_duration, MediaInspectionError, BackendSelector, run_ffmpeg_sync, validate_mp4,
+                        PRIORITY_INTERACTIVE)
+from core.utils.job_queue import JobQueue, LeaseKeeper
 
 # Video processing imports
 try:
@@ -35,6 +39,53 @@ except ImportError:
 
 logger = logging.getLogger("AutoMagic.Pipeline")
 
+def _probe_ffmpeg_cli() -> Tuple[bool, str]:
+    """ffmpeg must exist and provide the libx264 and aac encoders"""
+    if not shutil.which('ffmpeg'):
+        return False, "ffmpeg not found on PATH"
+    result = run_ffmpeg_sync(['ffmpeg', '-hide_banner', '-encoders'], job_id="encoder_probe",
+                             timeout=30, check=False, priority=PRIORITY_INTERACTIVE)
+    if result.returncode != 0:
+        return False, f"ffmpeg -encoders failed: {result.stderr[-200:]}"
+    missing = [codec for codec in ('libx264', 'aac') if f" {codec} " not in result.stdout]
+    if missing:
+        return False, f"ffmpeg lacks encoders: {', '.join(missing)}"
+    return True, "ok"
+
+def _probe_moviepy() -> Tuple[bool, str]:
+    """MoviePy backend needs the library and the ffmpeg binary it drives"""
+    if not MOVIEPY_AVAILABLE:
+        return False, "moviepy not installed"
+    return _probe_ffmpeg_cli()
+
+def _probe_ffmpeg_python() -> Tuple[bool, str]:
+    """ffmpeg-python backend needs the bindings and the ffmpeg binary"""
+    if not FFMPEG_PYTHON_AVAILABLE:
+        return False, "ffmpeg-python not installed"
+    return _probe_ffmpeg_cli()
+
+_backend_selector: Optional[BackendSelector] = None
+_backend_selector_lock = threading.Lock()
+
+def get_assembly_backend_selector() -> BackendSelector:
+    """Shared selector so every assembler in the process learns from the same history"""
+    global _backend_selector
+    with _backend_selector_lock:
+        if _backend_selector is None:
+            _backend_selector = BackendSelector(
+                "assembly",
+                probes={
+                    'moviepy_enhanced': _probe_moviepy,
+                    'ffmpeg_python': _probe_ffmpeg_python,
+                    'ffmpeg_direct': _probe_ffmpeg_cli,
+                    'basic_fallback': _probe_ffmpeg_cli
+                },
+                # Single still image output is degraded, so it only runs when everything else failed
+                fallback_only=('basic_fallback',),
+                reprobe_interval=float(os.getenv('ASSEMBLY_REPROBE_INTERVAL', '3600'))
+            )
+        return _backend_selector
+
 class VideoProcessingError(Exception):
     """Custom exception for video processing errors"""
     pass
@@ -53,6 +104,15 @@ class EnhancedVideoAssembler:
         self.default_resolution = (1280, 720)
         self.max_workers = min(4, os.cpu_count() or 1)
         
+        # Assembly backends in declared preference order; the selector reorders them per host
+        self.methods = {
+            'moviepy_enhanced': self._assemble_with_moviepy_enhanced,
+            'ffmpeg_python': self._assemble_with_ffmpeg_python,
+            'ffmpeg_direct': self._assemble_with_ffmpeg_direct,
+            'basic_fallback': self._assemble_basic_fallback
+        }
+        self.backend_selector = get_assembly_backend_selector()
+        
         logger.info(f"Enhanced Video Assembler initialized with {self.max_workers} workers")
         
     def __del__(self):
@@ -94,15 +154,18 @@ class EnhancedVideoAssembler:
         add_transitions = kwargs.get('add_transitions', True)
         add_effects = kwargs.get('add_effects', True)
         
-        # Try different assembly methods in order of preference
-        methods = [
-            ('moviepy_enhanced', self._assemble_with_moviepy_enhanced),
-            ('ffmpeg_python', self._assemble_with_ffmpeg_python),
-            ('ffmpeg_direct', self._assemble_with_ffmpeg_direct),
-            ('basic_fallback', self._assemble_basic_fallback)
-        ]
+        # Try backends in order of expected time to a valid output on this host
+        order = self.backend_selector.order()
+        if not order:
+            logger.error("No video assembly backend is usable on this host")
+            return None
         
-        for method_name, method_func in methods:
+        output_seconds = self._get_audio_duration(audio_path)
+        
+        for method_name in order:
+            method_func = self.methods[method_name]
+            start = time.perf_counter()
+            error = ""
             try:
                 logger.info(f"Attempting video assembly with {method_name}")
                 
@@ -114,19 +177,29 @@ class EnhancedVideoAssembler:
                     add_effects=add_effects
                 )
                 
-                if result and self._validate_output(result):
+                # The basic fallback deliberately renders a single still
+                allow_static = method_name == 'basic_fallback' or len(set(image_paths)) < 2
+                if result and self._validate_output(result, allow_static):
+                    self.backend_selector.record(method_name, True, time.perf_counter() - start, output_seconds)
                     logger.info(f"Video assembly successful with {method_name}: {result}")
                     return result
                 else:
+                    error = "failed or produced invalid output"
                     logger.warning(f"Method {method_name} failed or produced invalid output")
                     
             except Exception as e:
+                error = str(e)
                 logger.warning(f"Method {method_name} failed: {e}")
-                continue
+            
+            self.backend_selector.record(method_name, False, time.perf_counter() - start, output_seconds, error)
         
         logger.error("All video assembly methods failed")
         return None
     
+    def get_backend_status(self) -> Dict[str, Any]:
+        """Assembly backend capabilities, history and current order"""
+        return self.backend_selector.describe()
+    
     def _validate_inputs(self, image_paths: List[str], audio_path: str) -> bool:
         """Validate input files"""
         # Check images
@@ -246,7 +319,7 @@ class EnhancedVideoAssembler:
             logger.error(f"MoviePy enhanced assembly failed: {e}")
             raise VideoProcessingError(f"MoviePy assembly failed: {e}")
     
-    def _process_image_for_video(self, image_path: str, duration: float, resolution: Tuple[int, int]) -> Optional[ImageClip]:
+    def _process_image_for_video(self, image_path: str, duration: float, resolution: Tuple[int, int]) -> Optional['ImageClip']:
         """Process individual image for video with caching"""
         try:
             # Check cache first
@@ -384,7 +457,8 @@ class EnhancedVideoAssembler:
                 shortest=None
             )
             
-            ffmpeg.run(output, overwrite_output=True, capture_stdout=True)
+            run_ffmpeg_sync(ffmpeg.compile(output, overwrite_output=True),
+                            job_id=f"{Path(output_path).stem}_ffmpeg_python")
             
             return output_path
             
@@ -432,11 +506,11 @@ class EnhancedVideoAssembler:
                 output_path
             ]
             
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=300  # 5 minute timeout
+            result = run_ffmpeg_sync(
+                cmd,
+                job_id=f"{Path(output_path).stem}_ffmpeg_direct",
+                timeout=300,  # 5 minute timeout
+                check=False
             )
             
             if result.returncode == 0:
@@ -491,7 +565,8 @@ class EnhancedVideoAssembler:
                 output_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            result = run_ffmpeg_sync(cmd, job_id=f"{Path(output_path).stem}_basic",
+                                     expected_duration=audio_duration, timeout=120, check=False)
             
             if result.returncode == 0:
                 return output_path
@@ -503,23 +578,11 @@ class EnhancedVideoAssembler:
             return None
     
     def _get_audio_duration(self, audio_path: str) -> Optional[float]:
-        """Get audio file duration using FFmpeg"""
+        """Get audio file duration from its headers"""
         try:
-            cmd = [
-                'ffprobe', '-v', 'quiet',
-                '-show_entries', 'format=duration',
-                '-of', 'csv=p=0',
-                audio_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                return float(result.stdout.strip())
-            else:
-                return None
+            return probe_duration(audio_path)
                 
-        except Exception as e:
+        except MediaInspectionError as e:
             logger.warning(f"Failed to get audio duration: {e}")
             return None
     
@@ -546,46 +609,37 @@ class EnhancedVideoAssembler:
             return False
         return audio_path.lower().endswith(('.mp3', '.wav', '.aac', '.ogg', '.m4a'))
     
-    def _validate_output(self, output_path: str) -> bool:
+    def _validate_output(self, output_path: str, allow_static: bool = False) -> bool:
         """Validate generated video file"""
         if not os.path.exists(output_path):
             return False
         
-        if os.path.getsize(output_path) < 10000:  # Less than 10KB is likely invalid
-            return False
-        
-        # Try to get video info with ffprobe
-        try:
-            cmd = [
-                'ffprobe', '-v', 'quiet',
-                '-show_entries', 'format=duration',
-                '-of', 'csv=p=0',
-                output_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                duration = float(result.stdout.strip())
-                return duration > 0  # Video should have positive duration
-            else:
-                return False
-                
-        except Exception as e:
-            logger.warning(f"Failed to validate video output: {e}")
-            return False
+        # Box tree and sample tables must be complete, with a few keyframes decoded for black/frozen output
+        validation = validate_mp4(output_path, allow_static=allow_static)
+        if not validation.passed:
+            logger.warning(f"Failed to validate video output: {validation.summary()}")
+        return validation.passed
 
 
 class VideoProcessingManager:
-    """Manager for video processing tasks with queue and monitoring"""
+    """Manager for video processing tasks with a durable priority queue and monitoring"""
     
-    def __init__(self, max_concurrent_jobs: int = 2):
+    def __init__(self, max_concurrent_jobs: int = 2, db_path: Optional[str] = None):
         self.assembler = EnhancedVideoAssembler()
         self.max_concurrent_jobs = max_concurrent_jobs
-        self.active_jobs = {}
-        self.job_queue = Queue()
-        self.job_counter = 0
+        self.db_path = db_path or os.getenv('VIDEO_JOB_DB', os.path.join('.cache', 'video_jobs.db'))
+        self._queue: Optional[JobQueue] = None
         self._lock = threading.Lock()
+    
+    @property
+    def queue(self) -> JobQueue:
+        """Durable job store, opened on first use so importing this module stays side-effect free"""
+        with self._lock:
+            if self._queue is None:
+                # Jobs survive restarts; ones interrupted by a crash are resumed here
+                self._queue = JobQueue(self.db_path, kind='video_assembly',
+                                       lease_seconds=float(os.getenv('VIDEO_JOB_LEASE_SECONDS', '60')))
+            return self._queue
         
     def submit_video_job(
         self, 
@@ -595,62 +649,56 @@ class VideoProcessingManager:
         priority: int = 5,
         **kwargs
     ) -> str:
-        """Submit a video assembly job"""
+        """Submit a video assembly job (lower priority numbers run first)"""
         
-        with self._lock:
-            job_id = f"job_{self.job_counter}_{int(time.time())}"
-            self.job_counter += 1
-        
-        job_data = {
-            'id': job_id,
+        job_id = self.queue.submit({
             'image_paths': image_paths,
             'audio_path': audio_path,
             'output_path': output_path,
-            'priority': priority,
-            'status': 'queued',
-            'created_at': datetime.now(),
             'kwargs': kwargs
-        }
-        
-        self.job_queue.put((priority, job_data))
-        self.active_jobs[job_id] = job_data
+        }, priority=priority)
         
         logger.info(f"Video job submitted: {job_id}")
         return job_id
     
     def process_video_queue(self):
-        """Process video jobs from queue"""
+        """Process queued video jobs until none are left, up to max_concurrent_jobs at a time"""
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrent_jobs) as executor:
-            while not self.job_queue.empty():
-                try:
-                    priority, job_data = self.job_queue.get(timeout=1)
-                    
-                    # Update job status
-                    job_data['status'] = 'processing'
-                    job_data['started_at'] = datetime.now()
-                    
-                    # Submit job to executor
-                    future = executor.submit(self._process_single_job, job_data)
-                    
-                    # Monitor completion
-                    try:
-                        result = future.result(timeout=600)  # 10 minute timeout
-                        job_data['status'] = 'completed' if result else 'failed'
-                        job_data['result'] = result
-                        job_data['completed_at'] = datetime.now()
-                        
-                    except concurrent.futures.TimeoutError:
-                        job_data['status'] = 'timeout'
-                        logger.error(f"Job {job_data['id']} timed out")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing job queue: {e}")
+        workers = [
+            threading.Thread(target=self._worker_loop, name=f"video-worker-{n}")
+            for n in range(self.max_concurrent_jobs)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
     
-    def _process_single_job(self, job_data: Dict[str, Any]) -> Optional[str]:
+    def _worker_loop(self):
+        """Claim and run jobs until the queue has nothing runnable"""
+        while True:
+            try:
+                job = self.queue.claim()
+            except Exception as e:
+                logger.error(f"Error processing job queue: {e}")
+                return
+            if job is None:
+                return
+            
+            # Heartbeats keep the lease while the job runs; a crashed worker's lease expires
+            with LeaseKeeper(self.queue, job) as lease:
+                result = self._process_single_job(job.id, job.payload)
+            
+            if lease.lost:
+                logger.warning(f"Job {job.id} was taken over by another worker; discarding its result")
+            elif result:
+                self.queue.complete(job, result)
+            else:
+                self.queue.fail(job, "assembly failed or produced invalid output")
+    
+    def _process_single_job(self, job_id: str, job_data: Dict[str, Any]) -> Optional[str]:
         """Process a single video job"""
         try:
-            logger.info(f"Processing job {job_data['id']}")
+            logger.info(f"Processing job {job_id}")
             
             result = self.assembler.assemble_video_enhanced(
                 job_data['image_paths'],
@@ -662,16 +710,35 @@ class VideoProcessingManager:
             return result
             
         except Exception as e:
-            logger.error(f"Job {job_data['id']} failed: {e}")
+            logger.error(f"Job {job_id} failed: {e}")
             return None
     
+    @staticmethod
+    def _job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Stored job in the shape callers of get_job_status expect"""
+        timestamp = lambda value: datetime.fromtimestamp(value) if value else None
+        return {
+            'id': job['id'],
+            **job['payload'],
+            'priority': job['priority'],
+            'status': job['status'],
+            'attempts': job['attempts'],
+            'created_at': timestamp(job['created_at']),
+            'started_at': timestamp(job['started_at']),
+            'completed_at': timestamp(job['finished_at']),
+            'heartbeat_at': timestamp(job['heartbeat_at']),
+            'result': job['result'],
+            'error': job['error']
+        }
+    
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get status of a specific job"""
-        return self.active_jobs.get(job_id)
+        job = self.queue.get(job_id)
+        return self._job_status(job) if job else None
     
     def get_all_jobs_status(self) -> Dict[str, Dict[str, Any]]:
         """Get status of all jobs"""
-        return self.active_jobs.copy()
+        return {job['id']: self._job_status(job) for job in self.queue.list()}
 
 
 # Global instances
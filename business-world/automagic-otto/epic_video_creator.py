@@ -13,6 +13,8 @@ from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 import math
 import random
 
+from core.media import FFmpegError, get_encoder_tuner, run_ffmpeg_sync
+
 class EpicVideoCreator:
     def __init__(self):
         self.assets_dir = Path("epic_video_assets")
@@ -399,6 +401,17 @@ $synthesizer.Dispose()
             # Combine effects
             video_filter = ",".join(effects) if effects else "scale=1792:1024"
             
+            # Slowest preset that still renders the segment within ~2x real time
+            try:
+                encoder = get_encoder_tuner().choose(
+                    frames=duration * 30, width=1792, height=1024,
+                    budget_seconds=duration * 2, target_crf=20
+                )
+                encoder_args = ['-preset', encoder.preset, '-crf', str(encoder.crf)]
+            except Exception as e:
+                print(f"    [WARN] Encoder tuning unavailable ({e}), using medium preset")
+                encoder_args = ['-preset', 'medium', '-crf', '20']
+            
             cmd = [
                 'ffmpeg', '-y',
                 '-loop', '1',
@@ -406,17 +419,22 @@ $synthesizer.Dispose()
                 '-i', img_data["path"],
                 '-vf', f'{video_filter},fps=30',
                 '-c:v', 'libx264',
-                '-preset', 'medium',
-                '-crf', '20',
+                *encoder_args,
                 '-pix_fmt', 'yuv420p',
                 str(temp_video)
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            try:
+                result = run_ffmpeg_sync(cmd, job_id=f"epic_segment_{timestamp}_{i:02d}",
+                                         expected_duration=duration, check=False)
+            except FFmpegError as e:
+                print(f"    [FAIL] Segment {i+1} aborted: {e}")
+                continue
             
             if result.returncode == 0:
                 temp_videos.append(str(temp_video))
-                print(f"    [OK] Epic segment {i+1} created")
+                print(f"    [OK] Epic segment {i+1} created "
+                      f"({result.elapsed:.1f}s, {result.progress.realtime_factor:.2f}x realtime)")
             else:
                 print(f"    [FAIL] Segment {i+1} failed: {result.stderr}")
         
@@ -442,7 +460,14 @@ $synthesizer.Dispose()
             str(concat_video)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        total_duration = sum(seg["duration"] for seg in story["segments"])
+        
+        try:
+            result = run_ffmpeg_sync(cmd, job_id=f"epic_concat_{timestamp}",
+                                     expected_duration=total_duration, check=False)
+        except FFmpegError as e:
+            print(f"Concatenation aborted: {e}")
+            return None
         
         if result.returncode != 0:
             print(f"Concatenation failed: {result.stderr}")
@@ -469,7 +494,6 @@ $synthesizer.Dispose()
         else:
             print("No audio - creating silent version...")
             
-            total_duration = sum(seg["duration"] for seg in story["segments"])
             cmd = [
                 'ffmpeg', '-y',
                 '-i', str(concat_video),
@@ -479,7 +503,12 @@ $synthesizer.Dispose()
                 str(final_output)
             ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        try:
+            result = run_ffmpeg_sync(cmd, job_id=f"epic_final_{timestamp}",
+                                     expected_duration=total_duration, check=False)
+        except FFmpegError as e:
+            print(f"Final assembly aborted: {e}")
+            return None
         
         if result.returncode == 0:
             file_size = os.path.getsize(final_output) / (1024 * 1024)
@@ -4,10 +4,11 @@ Final Video Assembler - Fix the FFmpeg concat issue and create complete video
 """
 
 import os
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from core.media import run_ffmpeg_sync
+
 def assemble_final_video():
     """Assemble the video with proper FFmpeg syntax"""
     
@@ -59,7 +60,7 @@ def assemble_final_video():
             str(temp_video)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = run_ffmpeg_sync(cmd, check=False)
         
         if result.returncode == 0:
             temp_videos.append(str(temp_video))
@@ -90,7 +91,7 @@ def assemble_final_video():
         str(concat_video)
     ]
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = run_ffmpeg_sync(cmd, check=False)
     
     if result.returncode != 0:
         print(f"Concatenation failed: {result.stderr}")
@@ -125,7 +126,7 @@ def assemble_final_video():
             str(final_output)
         ]
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = run_ffmpeg_sync(cmd, check=False)
     
     if result.returncode == 0:
         file_size = os.path.getsize(final_output) / (1024 * 1024)
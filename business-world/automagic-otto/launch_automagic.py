@@ -190,7 +190,7 @@ def generate_audio(script):
     audio_dir.mkdir(exist_ok=True)
     
     # For now, create silent audio as fallback
-    import subprocess
+    from core.media import run_ffmpeg_sync
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     audio_path = audio_dir / f"narration_{timestamp}.mp3"
     
@@ -205,7 +205,7 @@ def generate_audio(script):
     ]
     
     try:
-        subprocess.run(cmd, capture_output=True, check=True)
+        run_ffmpeg_sync(cmd)
         logger.info(f"✓ Generated audio: {audio_path}")
         return str(audio_path)
     except Exception as e:
@@ -248,8 +248,8 @@ def create_simple_video(images, audio):
     ]
     
     try:
-        import subprocess
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        from core.media import run_ffmpeg_sync
+        result = run_ffmpeg_sync(cmd, check=False)
         
         # Clean up temp file
         os.unlink(input_file)
@@ -4,10 +4,11 @@ OTTO Epic Assembler - Fast assembly of epic video with existing assets
 """
 
 import os
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from core.media import run_ffmpeg_sync
+
 def assemble_otto_epic():
     """Assemble epic OTTO video quickly"""
     
@@ -56,7 +57,7 @@ def assemble_otto_epic():
             str(temp_video)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = run_ffmpeg_sync(cmd, check=False)
         
         if result.returncode == 0:
             temp_videos.append(str(temp_video))
@@ -86,7 +87,7 @@ def assemble_otto_epic():
         str(concat_video)
     ]
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = run_ffmpeg_sync(cmd, check=False)
     
     if result.returncode != 0:
         print(f"Assembly failed: {result.stderr}")
@@ -123,7 +124,7 @@ def assemble_otto_epic():
             str(final_output)
         ]
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = run_ffmpeg_sync(cmd, check=False)
     
     if result.returncode == 0:
         file_size = os.path.getsize(final_output) / (1024 * 1024)
@@ -15,6 +15,8 @@ from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
+from core.media import run_ffmpeg_sync
+
 # Load environment
 load_dotenv()
 
@@ -342,7 +344,7 @@ class FixedVideoProduction:
         ]
         
         try:
-            subprocess.run(cmd, capture_output=True, check=True)
+            run_ffmpeg_sync(cmd)
             logger.info(f"✓ Extended audio track created ({duration}s)")
             return str(audio_path)
         except Exception as e:
@@ -409,7 +411,7 @@ class FixedVideoProduction:
         
         try:
             logger.info("  Running FFmpeg...")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = run_ffmpeg_sync(cmd, timeout=300, check=False)
             
             # Cleanup temp file
             os.unlink(input_file)
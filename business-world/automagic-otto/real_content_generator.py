@@ -17,6 +17,8 @@ import requests
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import numpy as np
 
+from core.media import run_ffmpeg_sync
+
 # Audio generation
 try:
     from gtts import gTTS
@@ -290,7 +292,7 @@ Thanks for watching! Don't forget to subscribe for more amazing content like thi
             str(audio_path)
         ]
         
-        subprocess.run(cmd, capture_output=True)
+        run_ffmpeg_sync(cmd, check=False)
         print(f"  [OK] Created {duration:.0f}s audio track")
         return str(audio_path)
     
@@ -340,7 +342,7 @@ Thanks for watching! Don't forget to subscribe for more amazing content like thi
             str(output_path)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = run_ffmpeg_sync(cmd, check=False)
         
         if result.returncode == 0:
             # Check final video
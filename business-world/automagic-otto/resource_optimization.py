@@ -17,6 +17,8 @@ from queue import Queue, PriorityQueue
 import json
 import weakref
 
+from core.utils.metrics import record_cache
+
 logger = logging.getLogger("AutoMagic.ResourceManager")
 
 class ResourceMonitor:
@@ -251,6 +253,7 @@ class CacheManager:
                     # Update access time
                     self.access_times[cache_key] = time.time()
                     logger.debug(f"Cache hit: {cache_key}")
+                    record_cache("cache_manager", True)
                     return file_path
                 else:
                     # Remove invalid entry
@@ -260,6 +263,7 @@ class CacheManager:
                     logger.debug(f"Cache entry removed (file missing): {cache_key}")
             
         logger.debug(f"Cache miss: {cache_key}")
+        record_cache("cache_manager", False)
         return None
     
     def put(self, cache_key: str, file_path: str) -> bool:
@@ -24,7 +24,9 @@ logger = logging.getLogger("AutoMagic-Launcher")
 def check_ffmpeg():
     """Verify FFmpeg installation."""
     try:
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        from core.media import PRIORITY_INTERACTIVE, run_ffmpeg_sync
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         if result.returncode == 0:
             return True, result.stdout.split('\n')[0]
         return False, "FFmpeg command returned non-zero exit code"
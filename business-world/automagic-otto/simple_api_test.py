@@ -80,9 +80,9 @@ def test_ffmpeg():
     print("\nTesting FFmpeg...")
     
     try:
-        import subprocess
-        result = subprocess.run(['ffmpeg', '-version'], 
-                              capture_output=True, text=True, timeout=10)
+        from core.media import PRIORITY_INTERACTIVE, run_ffmpeg_sync
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], timeout=10, check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         if result.returncode == 0:
             version_line = result.stdout.split('\n')[0]
             print(f"✓ FFmpeg working: {version_line}")
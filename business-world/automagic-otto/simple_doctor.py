@@ -9,7 +9,8 @@ import json
 import pickle
 from pathlib import Path
 from datetime import datetime
-import subprocess
+
+from core.media import inspect_media, PRIORITY_INTERACTIVE, run_ffmpeg_sync
 
 def main_diagnostic():
     print("=" * 60)
@@ -114,15 +115,8 @@ def main_diagnostic():
             
             # Quick duration check
             try:
-                result = subprocess.run([
-                    'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                    '-show_format', str(video)
-                ], capture_output=True, text=True)
-                
-                if result.returncode == 0:
-                    info = json.loads(result.stdout)
-                    duration = float(info['format']['duration'])
-                    print(f"     Duration: {duration:.1f} seconds")
+                duration = inspect_media(video).duration
+                print(f"     Duration: {duration:.1f} seconds")
                     
             except:
                 print(f"     Duration: Unable to check")
@@ -171,7 +165,8 @@ def main_diagnostic():
     
     # Check FFmpeg
     try:
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         if result.returncode == 0:
             version_line = result.stdout.split('\\n')[0]
             print(f"[OK] FFmpeg: {version_line}")
@@ -19,6 +19,8 @@ import subprocess
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 import numpy as np
 
+from core.media import run_ffmpeg_sync
+
 # Audio/TTS
 try:
     import pyttsx3
@@ -379,7 +381,7 @@ class SimpleRealVideoGenerator:
         
         # Run FFmpeg
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = run_ffmpeg_sync(cmd, check=False)
             if result.returncode == 0:
                 logger.info(f"Video created successfully: {output_path}")
                 return str(output_path)
@@ -101,8 +101,9 @@ def test_ffmpeg_installation():
     logger.info("Testing FFmpeg installation")
     
     try:
-        import subprocess
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        from core.media import PRIORITY_INTERACTIVE, run_ffmpeg_sync
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         
         if result.returncode == 0:
             version_line = result.stdout.split('\n')[0]
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Concurrency test for OptimizedVideoProcessor
+Runs several create_video_from_assets jobs at once on one processor and checks
+that their encodes overlap and every output carries its own images and audio (no shared temp artifacts)
+"""
+import asyncio
+import logging
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger("AutoMagic.Test")
+
+JOB_COUNT = 4
+DURATION = 3
+JOB_COLORS = [(220, 40, 40), (40, 200, 60), (40, 80, 220), (230, 210, 40), (200, 60, 200), (40, 200, 200)]
+
+def _make_job_assets(job_dir: Path, color, tone_hz: int):
+    """Two noisy shades of one colour plus a sine tone unique to the job"""
+    rng = np.random.default_rng(tone_hz)
+    images = []
+    for i in range(2):
+        # The shades differ enough that verification does not see a frozen picture
+        shade = np.asarray(color, dtype=np.int16) + (10 if i else -10)
+        pixels = np.clip(shade + rng.integers(-12, 12, (360, 640, 3)), 0, 255)
+        path = job_dir / f"image_{i}.png"
+        Image.fromarray(pixels.astype(np.uint8), "RGB").save(path)
+        images.append(str(path))
+
+    audio = job_dir / "voice.mp3"
+    subprocess.run([
+        'ffmpeg', '-loglevel', 'error', '-f', 'lavfi',
+        '-i', f'sine=frequency={tone_hz}:duration={DURATION}', '-y', str(audio)
+    ], check=True)
+    return images, str(audio)
+
+def _mean_frame_color(video_path: str, at: float):
+    """Average RGB of the frame at a timestamp, decoded with ffmpeg"""
+    result = subprocess.run([
+        'ffmpeg', '-loglevel', 'error', '-ss', str(at), '-i', video_path,
+        '-frames:v', '1', '-vf', 'scale=16:16', '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'
+    ], capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.uint8).reshape(-1, 3).mean(axis=0)
+
+def _dominant_tone(video_path: str) -> float:
+    """Peak frequency of the output audio track"""
+    result = subprocess.run([
+        'ffmpeg', '-loglevel', 'error', '-i', video_path, '-vn',
+        '-ac', '1', '-ar', '8000', '-f', 's16le', '-'
+    ], capture_output=True, check=True)
+    samples = np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32)
+    spectrum = np.abs(np.fft.rfft(samples))
+    return float(np.argmax(spectrum[1:]) + 1) * 8000 / len(samples)
+
+def _peak_overlap(windows) -> int:
+    """Most (start, end) windows open at the same moment"""
+    # At equal times an end sorts before a start, so touching windows do not count as overlapping
+    events = sorted([(start, 1) for start, _ in windows] + [(end, -1) for _, end in windows])
+    peak = current = 0
+    for _, change in events:
+        current += change
+        peak = max(peak, current)
+    return peak
+
+async def _render_concurrently(work_dir: Path, job_count: int):
+    """Render job_count videos simultaneously through one processor"""
+    from core.media import get_ffmpeg_scheduler, progress_registry
+    from core.utils.admission import AdmissionController
+    from core.utils.resource_manager import get_resource_manager
+    from core.video import OptimizedVideoProcessor, VideoSettings
+    from core.utils.scratch import get_scratch_manager
+
+    # Room for every job: on a small machine admission and the ffmpeg scheduler would run them one at a time
+    manager = await get_resource_manager()
+    manager.admission = AdmissionController(max_memory_gb=2.0 * job_count, cpu_slots=2 * job_count,
+                                            max_disk_gb=1.0 * job_count, disk_path=work_dir)
+    scheduler = get_ffmpeg_scheduler()
+    scheduler.max_concurrent = max(scheduler.max_concurrent, job_count)
+
+    # Latest progress of each job's slideshow encode, for its start and end times
+    encodes = {}
+
+    def record_encode(progress):
+        if progress.job_id.endswith("_silent_video"):
+            encodes[progress.job_id] = progress
+
+    progress_registry.add_listener(record_encode)
+
+    jobs = []
+    for index in range(job_count):
+        job_dir = work_dir / f"job_{index}"
+        job_dir.mkdir()
+        tone_hz = 300 + 150 * index
+        images, audio = _make_job_assets(job_dir, JOB_COLORS[index], tone_hz)
+        jobs.append((images, audio, str(work_dir / f"output_{index}.mp4"), tone_hz))
+
+    settings = VideoSettings(width=640, height=360, fps=15, duration=DURATION, preset="ultrafast")
+    async with OptimizedVideoProcessor(settings) as processor:
+        outputs = await asyncio.gather(*[
+            processor.create_video_from_assets(images, audio, output_path)
+            for images, audio, output_path, _ in jobs
+        ])
+        leftover = list(processor.temp_dir.iterdir())
+    windows = [(progress.started_at, progress.updated_at) for progress in encodes.values()]
+
+    # Intermediates placed on tmpfs must be gone too, with the budget fully returned
+    scratch = get_scratch_manager()
+    if scratch.ram_root:
+        leftover += list(scratch.ram_root.glob("automagic_*_job_*"))
+    assert scratch.reserved_bytes == 0, f"Scratch reservations leaked: {scratch.get_status()}"
+
+    return jobs, outputs, leftover, windows
+
+def test_concurrent_create_video_from_assets(job_count: int = JOB_COUNT):
+    """Simultaneous jobs must not overwrite each other's intermediate files"""
+    if not shutil.which('ffmpeg'):
+        logger.warning("ffmpeg not available, skipping concurrency test")
+        return
+
+    work_dir = Path(tempfile.mkdtemp(prefix="automagic_concurrency_"))
+    try:
+        jobs, outputs, leftover, windows = asyncio.run(_render_concurrently(work_dir, job_count))
+
+        assert not leftover, f"Job workspaces were not cleaned up: {leftover}"
+        assert len(windows) == job_count, f"Expected {job_count} slideshow encodes, saw {len(windows)}"
+        overlap = _peak_overlap(windows)
+        assert job_count < 2 or overlap >= 2, "Renders ran one at a time: no two encodes overlapped"
+        logger.info(f"✓ Up to {overlap} of {job_count} encodes ran at the same time")
+        assert len(set(outputs)) == job_count, "Jobs produced overlapping output paths"
+
+        for index, ((_, _, expected_path, tone_hz), output) in enumerate(zip(jobs, outputs)):
+            assert output == expected_path
+            assert Path(output).exists()
+
+            for at in (0.5, DURATION - 0.5):
+                color = _mean_frame_color(output, at)
+                expected = np.asarray(JOB_COLORS[index], dtype=np.float32)
+                assert np.abs(color - expected).max() < 30, \
+                    f"Job {index} frame at {at}s has color {color.round()} expected {expected}"
+
+            tone = _dominant_tone(output)
+            assert abs(tone - tone_hz) < 15, f"Job {index} audio tone {tone:.0f}Hz expected {tone_hz}Hz"
+
+            logger.info(f"✓ Job {index}: {output} has its own frames and audio")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else JOB_COUNT
+    test_concurrent_create_video_from_assets(count)
+    logger.info(f"✓ {count} concurrent renders produced independent, correct outputs")
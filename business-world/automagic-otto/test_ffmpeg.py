@@ -5,6 +5,8 @@ import sys
 import tempfile
 from pathlib import Path
 
+from core.media import run_ffmpeg_sync
+
 print("Testing FFmpeg installation and basic media generation...")
 
 # Try to import ffmpeg-python
@@ -43,12 +45,12 @@ try:
     os.makedirs("generated_audio", exist_ok=True)
     
     # Create a silent audio file - 3 seconds duration
-    (
+    run_ffmpeg_sync(
         ffmpeg
         .input('anullsrc', format='lavfi', t='3')
         .output(test_audio_path, acodec='libmp3lame', ar='44100')
         .overwrite_output()
-        .run(capture_stdout=True, capture_stderr=True, quiet=True)
+        .compile()
     )
     print(f"✓ Created test audio: {test_audio_path}")
 except Exception as e:
@@ -72,12 +74,12 @@ try:
     temp_video_path = os.path.join(tempfile.gettempdir(), "temp_silent_video.mp4")
     print("Creating silent video...")
     # First, create silent video from image
-    (
+    run_ffmpeg_sync(
         ffmpeg
         .input(temp_concat_file_path, format='concat', safe=0)
         .output(temp_video_path, vcodec='libx264', pix_fmt='yuv420p', r='24')
         .overwrite_output()
-        .run(capture_stdout=True, capture_stderr=True)
+        .compile()
     )
     print(f"Silent video created at: {temp_video_path}")
     
@@ -92,21 +94,21 @@ try:
     audio_stream = ffmpeg.input(test_audio_path)
     
     try:
-        (
+        run_ffmpeg_sync(
             ffmpeg
             .output(video_stream, audio_stream, test_video_path, 
                     vcodec='copy', acodec='aac', shortest=None)
             .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True)
+            .compile()
         )
     except Exception as e:
         print(f"❌ Error adding audio: {e}")
         # Try alternative syntax
         try:
             print("Trying alternative FFmpeg syntax...")
-            result = ffmpeg.concat(video_stream, audio_stream, v=1, a=1).output(
+            result = run_ffmpeg_sync(ffmpeg.concat(video_stream, audio_stream, v=1, a=1).output(
                 test_video_path, vcodec='copy', acodec='aac'
-            ).overwrite_output().run(capture_stdout=True, capture_stderr=True)
+            ).overwrite_output().compile())
             print("Alternative syntax worked!")
         except Exception as e2:
             print(f"❌ Alternative syntax also failed: {e2}")
@@ -6,6 +6,8 @@ import tempfile
 import shutil
 from pathlib import Path
 
+from core.media import run_ffmpeg_sync
+
 print("Testing FFmpeg functionality...")
 
 # Try to import ffmpeg
@@ -25,12 +27,12 @@ silent_audio_path = os.path.join(test_dir, "silent.mp3")
 print(f"Creating silent audio file: {silent_audio_path}")
 
 try:
-    (
+    run_ffmpeg_sync(
         ffmpeg
         .input('anullsrc', format='lavfi', t='3')
         .output(silent_audio_path, acodec='libmp3lame', ar='44100')
         .overwrite_output()
-        .run(capture_stdout=True, capture_stderr=True, quiet=True)
+        .compile()
     )
     
     if os.path.exists(silent_audio_path) and os.path.getsize(silent_audio_path) > 0:
@@ -47,12 +49,12 @@ color_video_path = os.path.join(test_dir, "color.mp4")
 print(f"Creating color test video: {color_video_path}")
 
 try:
-    (
+    run_ffmpeg_sync(
         ffmpeg
         .input('color=c=blue:s=1280x720:d=3', format='lavfi')
         .output(color_video_path, vcodec='libx264', pix_fmt='yuv420p')
         .overwrite_output()
-        .run(capture_stdout=True, capture_stderr=True)
+        .compile()
     )
     
     if os.path.exists(color_video_path) and os.path.getsize(color_video_path) > 0:
@@ -75,11 +77,11 @@ try:
     
     # Combine streams
     print("Combining video and audio streams...")
-    (
+    run_ffmpeg_sync(
         ffmpeg
         .output(video_stream, audio_stream, final_video_path, vcodec='copy', acodec='aac')
         .overwrite_output()
-        .run(capture_stdout=True, capture_stderr=True)
+        .compile()
     )
     
     if os.path.exists(final_video_path) and os.path.getsize(final_video_path) > 0:
@@ -2,14 +2,16 @@ print("Starting test_setup.py")
 # test_setup.py - Test your AutoMagic setup
 import os
 import sys
-import subprocess
 from pathlib import Path
 from dotenv import load_dotenv
 
+from core.media import PRIORITY_INTERACTIVE, run_ffmpeg_sync
+
 def check_ffmpeg():
     """Check if FFmpeg is installed and accessible."""
     try:
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         if result.returncode == 0:
             return True, result.stdout.split('\n')[0]
         return False, "FFmpeg command returned non-zero exit code"
@@ -17,6 +17,8 @@ from requests_html import HTMLSession
 import pytz
 from pytrends.request import TrendReq
 
+from core.utils.metrics import record_cache
+
 # Initialize logging
 logger = logging.getLogger('trend_scraper')
 logger.setLevel(logging.INFO)
@@ -97,11 +99,14 @@ class TrendScraper:
         """Check if the cached data for a platform is still valid."""
         cache_data = self.trends_cache.get(platform)
         if not cache_data or not cache_data['timestamp'] or not cache_data['data']:
+            record_cache("trends", False)
             return False
             
         now = datetime.now()
         expiry_time = cache_data['timestamp'] + self.cache_expiry[platform]
-        return now < expiry_time
+        valid = now < expiry_time
+        record_cache("trends", valid)
+        return valid
         
     def get_google_trends(self, region='US', category=0):
         """Fetch trending searches from Google Trends.
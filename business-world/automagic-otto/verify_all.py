@@ -80,7 +80,9 @@ def verify_dependencies() -> Tuple[bool, List[str]]:
 def verify_ffmpeg() -> Tuple[bool, str]:
     """Verify FFmpeg installation."""
     try:
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        from core.media import PRIORITY_INTERACTIVE, run_ffmpeg_sync
+        result = run_ffmpeg_sync(['ffmpeg', '-version'], check=False,
+                                 priority=PRIORITY_INTERACTIVE)
         if result.returncode == 0:
             return True, result.stdout.split('\n')[0]
         return False, "FFmpeg command returned non-zero exit code"
@@ -15,9 +15,10 @@ print()
 
 # Create a simple test video
 from PIL import Image, ImageDraw, ImageFont
-import subprocess
 import time
 
+from core.media import run_ffmpeg_sync
+
 # Create test image
 print("Creating test video...")
 img = Image.new('RGB', (1280, 720), (0, 255, 0))  # Green = success
@@ -47,7 +48,7 @@ cmd = [
     str(test_video)
 ]
 
-result = subprocess.run(cmd, capture_output=True, text=True)
+result = run_ffmpeg_sync(cmd, check=False)
 if result.returncode != 0:
     print(f"[ERROR] Failed to create test video: {result.stderr}")
     exit(1)
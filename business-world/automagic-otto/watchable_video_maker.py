@@ -8,7 +8,6 @@ import os
 import sys
 import json
 import time
-import subprocess
 import random
 import requests
 from datetime import datetime
@@ -19,6 +18,9 @@ import math
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 import numpy as np
 
+from core.graphics import ProceduralCanvas, TextStyle, load_font, render_text_sprite
+from core.media import run_ffmpeg_sync
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -123,42 +125,18 @@ class WatchableVideoMaker:
         
         colors = color_schemes.get(style, [(50, 50, 50), (100, 100, 100), (150, 150, 150)])
         
-        # Create base image with animated gradient
-        img = Image.new('RGB', (width, height))
-        
-        # Create animated gradient background
-        for y in range(height):
-            ratio = y / height
-            
-            # Animate the gradient over time
-            time_factor = math.sin(segment_index * 0.5) * 0.3
-            
-            if ratio < 0.4:
-                # Top section
-                t = ratio / 0.4
-                r = int(colors[0][0] * (1-t) + colors[1][0] * t + time_factor * 30)
-                g = int(colors[0][1] * (1-t) + colors[1][1] * t + time_factor * 20)
-                b = int(colors[0][2] * (1-t) + colors[1][2] * t + time_factor * 40)
-            else:
-                # Bottom section
-                t = (ratio - 0.4) / 0.6
-                r = int(colors[1][0] * (1-t) + colors[2][0] * t + time_factor * 30)
-                g = int(colors[1][1] * (1-t) + colors[2][1] * t + time_factor * 20)
-                b = int(colors[1][2] * (1-t) + colors[2][2] * t + time_factor * 40)
-            
-            # Clamp values
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            
-            for x in range(width):
-                img.putpixel((x, y), (r, g, b))
-        
-        # Add dynamic elements
-        draw = ImageDraw.Draw(img)
+        # Animate the gradient over time
+        time_factor = math.sin(segment_index * 0.5) * 0.3
+        canvas = ProceduralCanvas.from_gradient(
+            width, height, colors,
+            stops=[0.0, 0.4, 1.0],
+            offset=(time_factor * 30, time_factor * 20, time_factor * 40)
+        )
         
         # Add floating particles based on style
         particle_count = {"dramatic": 15, "mystery": 20, "shocking": 25}.get(style, 10)
+        particle_centers = []
+        particle_sizes = []
         
         for i in range(particle_count):
             # Animated particle positions
@@ -169,20 +147,16 @@ class WatchableVideoMaker:
             offset_x = math.sin(segment_index * 0.3 + i * 0.5) * 100
             offset_y = math.cos(segment_index * 0.2 + i * 0.3) * 50
             
-            particle_x = base_x + offset_x
-            particle_y = base_y + offset_y
-            
             # Keep particles on screen
-            particle_x = max(0, min(width, particle_x))
-            particle_y = max(0, min(height, particle_y))
+            particle_x = max(0, min(width, base_x + offset_x))
+            particle_y = max(0, min(height, base_y + offset_y))
+            particle_centers.append((particle_x, particle_y))
             
             # Animated size
-            size = 3 + math.sin(segment_index * 0.4 + i) * 2
-            
-            # Draw particle
-            draw.ellipse([particle_x - size, particle_y - size,
-                         particle_x + size, particle_y + size],
-                        fill=(255, 255, 255, 80))
+            particle_sizes.append(3 + math.sin(segment_index * 0.4 + i) * 2)
+        
+        # Opaque, as before: the old ImageDraw on an RGB image ignored the fill's alpha
+        canvas.particles(particle_centers, particle_sizes, (255, 255, 255))
         
         # Add geometric shapes for visual interest
         for i in range(5):
@@ -190,90 +164,29 @@ class WatchableVideoMaker:
             shape_y = height // 2 + math.sin(segment_index * 0.3 + i) * 200
             shape_size = 50 + math.cos(segment_index * 0.2 + i) * 30
             
-            # Semi-transparent overlay
-            overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
-            
             # Different shapes based on style
             if style in ["dramatic", "shocking"]:
-                # Diamonds
-                points = [
-                    (shape_x, shape_y - shape_size),
-                    (shape_x + shape_size, shape_y),
-                    (shape_x, shape_y + shape_size),
-                    (shape_x - shape_size, shape_y)
-                ]
-                overlay_draw.polygon(points, fill=(colors[2][0], colors[2][1], colors[2][2], 30))
+                canvas.diamond(shape_x, shape_y, shape_size, colors[2], opacity=30 / 255)
             else:
-                # Circles
-                overlay_draw.ellipse([shape_x - shape_size, shape_y - shape_size,
-                                    shape_x + shape_size, shape_y + shape_size],
-                                   fill=(colors[2][0], colors[2][1], colors[2][2], 25))
-            
-            img = Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB')
+                canvas.circle(shape_x, shape_y, shape_size, colors[2], opacity=25 / 255)
         
-        # Add text with dynamic styling
-        draw = ImageDraw.Draw(img)
+        img = canvas.render()
         
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 90)
-            font_medium = ImageFont.truetype("arial.ttf", 60)
-        except:
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-        
-        # Break text into lines
-        words = text.split()
-        lines = []
-        current_line = []
-        
-        for word in words:
-            current_line.append(word)
-            test_line = " ".join(current_line)
-            bbox = draw.textbbox((0, 0), test_line, font=font_large)
-            
-            if bbox[2] - bbox[0] > width - 200:  # Leave margin
-                if len(current_line) > 1:
-                    lines.append(" ".join(current_line[:-1]))
-                    current_line = [word]
-                else:
-                    lines.append(word)
-                    current_line = []
-        
-        if current_line:
-            lines.append(" ".join(current_line))
-        
-        # Center text vertically
-        line_height = 110
-        total_height = len(lines) * line_height
-        start_y = (height - total_height) // 2
-        
-        for i, line in enumerate(lines):
-            bbox = draw.textbbox((0, 0), line, font=font_large)
-            text_width = bbox[2] - bbox[0]
-            x = (width - text_width) // 2
-            y = start_y + i * line_height
-            
-            # Text shadow with glow effect
-            for shadow_offset in range(8, 0, -1):
-                shadow_alpha = 255 - (shadow_offset * 25)
-                shadow_color = (0, 0, 0, shadow_alpha)
-                
-                draw.text((x + shadow_offset, y + shadow_offset), line, 
-                         font=font_large, fill=shadow_color)
-            
-            # Colored outline based on style
-            outline_color = colors[2] if style != "subscribe" else (255, 255, 255)
-            
-            for dx in [-2, -1, 0, 1, 2]:
-                for dy in [-2, -1, 0, 1, 2]:
-                    if dx != 0 or dy != 0:
-                        draw.text((x + dx, y + dy), line, font=font_large, 
-                                 fill=outline_color)
-            
-            # Main text
-            text_color = (255, 255, 255) if style != "subscribe" else (255, 255, 100)
-            draw.text((x, y), line, font=font_large, fill=text_color)
+        # Add text with dynamic styling: one cached sprite with stroke and blurred shadow
+        outline_color = colors[2] if style != "subscribe" else (255, 255, 255)
+        text_color = (255, 255, 255) if style != "subscribe" else (255, 255, 100)
+        
+        text_style = TextStyle(
+            font="arial.ttf", size=90,
+            fill=text_color + (255,),
+            stroke_width=2, stroke_fill=tuple(outline_color) + (255,),
+            shadow_offset=(5, 5), shadow_blur=3, shadow_fill=(0, 0, 0, 200),
+            line_height=110
+        )
+        render_text_sprite(text, text_style, width - 200).paste_centered(img)
+        
+        draw = ImageDraw.Draw(img)
+        font_large = load_font("arial.ttf", 90)
         
         # Add style-specific elements
         if style == "dramatic":
@@ -419,7 +332,7 @@ class WatchableVideoMaker:
         cmd.append(str(output_path))
         
         # Run FFmpeg
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = run_ffmpeg_sync(cmd, check=False)
         
         if result.returncode == 0:
             file_size = os.path.getsize(output_path) / (1024 * 1024)
@@ -18,6 +18,9 @@ import subprocess
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 
+from core.graphics import ProceduralCanvas
+from core.media import run_ffmpeg_sync
+
 # Audio/TTS
 try:
     import pyttsx3
@@ -144,42 +147,13 @@ The best part? You can start applying this knowledge right now. The tools are av
         """Create a visually stunning image"""
         width, height = 1920, 1080
         
-        # Create base with complex gradient
-        img = Image.new('RGB', (width, height), colors[0])
-        
-        # Create multi-layer gradient
-        for y in range(height):
-            for x in range(width):
-                # Calculate position ratios
-                x_ratio = x / width
-                y_ratio = y / height
-                
-                # Complex color mixing
-                if y_ratio < 0.3:
-                    ratio = y_ratio / 0.3
-                    r = int(colors[0][0] * (1-ratio) + colors[1][0] * ratio)
-                    g = int(colors[0][1] * (1-ratio) + colors[1][1] * ratio)
-                    b = int(colors[0][2] * (1-ratio) + colors[1][2] * ratio)
-                elif y_ratio < 0.7:
-                    ratio = (y_ratio - 0.3) / 0.4
-                    r = int(colors[1][0] * (1-ratio) + colors[2][0] * ratio)
-                    g = int(colors[1][1] * (1-ratio) + colors[2][1] * ratio)
-                    b = int(colors[1][2] * (1-ratio) + colors[2][2] * ratio)
-                else:
-                    ratio = (y_ratio - 0.7) / 0.3
-                    r = int(colors[2][0] * (1-ratio) + colors[0][0] * ratio)
-                    g = int(colors[2][1] * (1-ratio) + colors[0][1] * ratio)
-                    b = int(colors[2][2] * (1-ratio) + colors[0][2] * ratio)
-                
-                # Add subtle variation
-                r = max(0, min(255, r + random.randint(-10, 10)))
-                g = max(0, min(255, g + random.randint(-10, 10)))
-                b = max(0, min(255, b + random.randint(-10, 10)))
-                
-                img.putpixel((x, y), (r, g, b))
-        
-        # Add visual elements
-        draw = ImageDraw.Draw(img)
+        # Create multi-layer gradient with subtle per-pixel variation
+        canvas = ProceduralCanvas.from_gradient(
+            width, height,
+            [colors[0], colors[1], colors[2], colors[0]],
+            stops=[0.0, 0.3, 0.7, 1.0],
+            noise=10
+        )
         
         # Add abstract shapes
         for _ in range(8):
@@ -188,25 +162,16 @@ The best part? You can start applying this knowledge right now. The tools are av
             x2 = x1 + random.randint(300, 600)
             y2 = y1 + random.randint(200, 400)
             
-            # Create overlay for transparency
-            overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
+            fill = (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))
             
             # Random shape
             if random.choice([True, False]):
-                # Rectangle
-                overlay_draw.rectangle([x1, y1, x2, y2], 
-                                     fill=(random.randint(100, 255), 
-                                          random.randint(100, 255), 
-                                          random.randint(100, 255), 40))
+                canvas.rectangle(x1, y1, x2, y2, fill, opacity=40 / 255)
             else:
-                # Circle
-                overlay_draw.ellipse([x1, y1, x2, y2], 
-                                   fill=(random.randint(100, 255), 
-                                        random.randint(100, 255), 
-                                        random.randint(100, 255), 40))
-            
-            img = Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB')
+                canvas.ellipse(x1, y1, x2, y2, fill, opacity=40 / 255)
+        
+        img = canvas.render()
+        draw = ImageDraw.Draw(img)
         
         # Add professional text
         try:
@@ -369,7 +334,7 @@ The best part? You can start applying this knowledge right now. The tools are av
             ]
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = run_ffmpeg_sync(cmd, check=False)
             if result.returncode == 0:
                 logger.info(f"Video created: {output_path}")
                 return str(output_path)